@@ -1,6 +1,10 @@
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
+# Features a scoring profile can weight (see app/services/rerank.py)
+PROFILE_FEATURES = ("relevance", "speedup", "memory", "efficiency", "readability", "votes")
+
 
 class Settings(BaseSettings):
     """Application settings from environment variables."""
@@ -32,10 +36,123 @@ class Settings(BaseSettings):
     # Embeddings
     embedding_model: str = "microsoft/codebert-base"
     embedding_dim: int = 768
+    embedding_batch_size: int = 64
+
+    # Embedding spaces (model + dim); `embedding_space` names the one defined above
+    embedding_space: str = "codebert"
+    embedding_search_space: str = ""  # Route search to this space; empty = active space in DB
+    embedding_shadow_space: str = ""  # Also query this space and record result overlap
+    embedding_shadow_sample_rate: float = 1.0
+
+    # HNSW vector indexes (one partial index per embedding space)
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    hnsw_maintenance_work_mem: str = "512MB"
+    hnsw_iterative_scan: str = "relaxed_order"  # filtered scans; "" on pgvector < 0.8
+
+    # Per-request recall/latency tiers for vector search; `candidates` is the
+    # pool re-ranked by the second stage (grown to offset + limit for deep pages)
+    search_default_tier: str = "balanced"
+    search_tiers: dict[str, dict[str, int]] = {
+        "fast": {"ef_search": 40, "candidates": 100},
+        "balanced": {"ef_search": 100, "candidates": 200},
+        "accurate": {"ef_search": 400, "candidates": 500},
+    }
+
+    # Named re-ranking profiles: weights of features normalized to [0, 1]
+    # (relevance, speedup, memory, efficiency, readability, votes)
+    search_default_profile: str = "balanced"
+    scoring_profiles: dict[str, dict[str, float]] = {
+        "balanced": {"relevance": 0.8, "speedup": 0.2},
+        "relevance-only": {"relevance": 1.0},
+        "speed-first": {"relevance": 0.5, "speedup": 0.4, "efficiency": 0.1},
+        "memory-first": {"relevance": 0.5, "memory": 0.4, "efficiency": 0.1},
+        "community": {"relevance": 0.6, "votes": 0.25, "readability": 0.15},
+    }
+
+    # Lexical retrieval (full-text + title trigram), fused with vector candidates
+    lexical_candidates: int = 100
+
+    # Batch search: queries of one request searched concurrently on this many connections
+    search_batch_concurrency: int = 4
+
+    # Search result cache (ranked ids in Redis, invalidated by version counters)
+    search_cache_enabled: bool = True
+    search_cache_ttl_seconds: int = 120
+
+    # Autocomplete index (Redis sorted sets per prefix, rebuilt from Postgres)
+    suggestion_query_days: int = 90  # window of search_queries counted as popular
+    suggestion_min_query_count: int = 3  # searches before a query is suggested to others
+    suggestion_refresh_seconds: int = 3600  # full rebuild by beat; the index expires after two missed runs
+
+    # In-process vector index for search candidates (Postgres stays the source of truth)
+    ann_index_enabled: bool = False
+    ann_index_dir: str = "/tmp/codeforge-ann"  # memory-mapped float16 vectors
+    ann_index_sync_seconds: float = 0.5  # how often queued changes are applied
+    ann_index_retry_seconds: float = 30.0
+
+    # Chunked embeddings for solutions longer than the model context
+    chunk_max_tokens: int = 384  # headroom below CodeBERT's 512 sub-word limit
+    chunk_overlap_tokens: int = 64
+    chunk_pooling: str = "max"  # max over the nearest chunks, or mean over all chunks of a solution
+    chunk_candidates: int = 200  # nearest chunks considered per query
+
+    # Bulk reindex
+    reindex_page_size: int = 512
+    reindex_time_budget_seconds: int = 240  # re-enqueue before the Celery hard limit
+
+    # Embed on write (outbox drained by the `embeddings` Celery queue)
+    embedding_coalesce_seconds: int = 2  # writes within this window share one task
+    embedding_outbox_batch_size: int = 64
+    embedding_outbox_max_attempts: int = 5
+    embedding_outbox_sweep_seconds: int = 60
+
+    # Playground retrieval: solutions found through structural LSH buckets, merged with vector candidates
+    playground_structural_candidates: int = 200
+
+    # Playground verify mode: both versions run in a subprocess on generated inputs
+    playground_verify_sizes: list[int] = [100, 1000, 10000]
+    playground_verify_int_sizes: list[int] = [10, 15, 20]  # functions of a number alone, e.g. fib(n)
+    playground_verify_runs: int = 3  # best of, after one warmup call
+    playground_verify_call_timeout_seconds: float = 2.0  # larger sizes are skipped after a timeout
+    playground_rewrite_check_sizes: list[int] = [0, 1, 10, 100]  # automatic rewrites must match on these
+    playground_sandbox_memory_mb: int = 512  # address space of the sandbox process
+    # Address space of node, Go binaries and the compilers, which reserve it up front
+    playground_sandbox_runtime_memory_mb: int = 2048
+    playground_sandbox_cpu_seconds: int = 30
+    playground_verify_max_runs: int = 8  # sandbox runs per request, rewrite checks included
+    # Automatic rewrites are checked in the sandbox in verify mode only; this
+    # also checks them on every analysis (runs submitted code)
+    playground_verify_rewrites: bool = False
+
+    # Playground analysis cache (full responses in Redis, keyed on normalized code)
+    playground_cache_enabled: bool = True
+    playground_cache_ttl_seconds: int = 3600
+
+    # Whole-file analysis: functions of one request analyzed concurrently
+    playground_file_concurrency: int = 4
+    playground_file_max_functions: int = 500
 
     # CORS
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
 
+    @field_validator("scoring_profiles")
+    @classmethod
+    def check_scoring_profiles(cls, profiles: dict[str, dict[str, float]]) -> dict[str, dict[str, float]]:
+        for name, weights in profiles.items():
+            unknown = set(weights) - set(PROFILE_FEATURES)
+            if unknown:
+                raise ValueError(f"Scoring profile '{name}' weights unknown features: {sorted(unknown)}")
+            if any(weight < 0 for weight in weights.values()):
+                raise ValueError(f"Scoring profile '{name}' has negative weights")
+        return profiles
+
+    @model_validator(mode="after")
+    def check_default_profile(self) -> "Settings":
+        if self.search_default_profile not in self.scoring_profiles:
+            raise ValueError(f"search_default_profile '{self.search_default_profile}' is not in scoring_profiles")
+        return self
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -95,6 +95,37 @@ async def startup_event():
     loop.run_in_executor(None, load_model)
 
 
+@app.on_event("startup")
+async def start_vector_index():
+    """Load the in-process vector index in the background (if enabled)."""
+    from app.services.ann_index import start_ann_index
+
+    await start_ann_index()
+
+
+@app.on_event("startup")
+async def build_suggestion_index():
+    """Build the autocomplete index in the background if it doesn't exist yet."""
+    import asyncio
+    from app.services.suggestions import ensure_suggestions
+
+    asyncio.create_task(ensure_suggestions())
+
+
+@app.on_event("shutdown")
+async def stop_vector_index():
+    from app.services.ann_index import stop_ann_index
+
+    await stop_ann_index()
+
+
+@app.on_event("shutdown")
+async def close_redis_client():
+    from app.services.cache import close_redis
+
+    await close_redis()
+
+
 @app.get("/")
 async def root():
     return {
@@ -5,5 +5,11 @@ from app.models.benchmark import Benchmark
 from app.models.vote import Vote
 from app.models.comment import SolutionComment
 from app.models.analytics import PageView, SearchQuery
+from app.models.embedding import (
+    ReindexCheckpoint, EmbeddingOutbox, EmbeddingSpace, SolutionEmbedding, SolutionEmbeddingChunk,
+    EmbeddingShadowComparison,
+)
 
-__all__ = ["User", "Problem", "Solution", "Benchmark", "Vote", "SolutionComment", "PageView", "SearchQuery"]
+__all__ = ["User", "Problem", "Solution", "Benchmark", "Vote", "SolutionComment", "PageView", "SearchQuery",
+           "ReindexCheckpoint", "EmbeddingOutbox", "EmbeddingSpace", "SolutionEmbedding",
+           "SolutionEmbeddingChunk", "EmbeddingShadowComparison"]
@@ -0,0 +1,131 @@
+"""
+Bookkeeping models for the embedding pipeline.
+"""
+from datetime import datetime
+import uuid
+from sqlalchemy import String, Integer, BigInteger, Float, Text, Boolean, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from pgvector.sqlalchemy import Vector
+
+from app.database import Base
+
+
+class ReindexCheckpoint(Base):
+    """Progress of a bulk reindex job, so an interrupted run can resume."""
+    __tablename__ = "reindex_checkpoints"
+
+    job_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    last_solution_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    embedded: Mapped[int] = mapped_column(Integer, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[int] = mapped_column(Integer, default=0)
+    status: Mapped[str] = mapped_column(String(20), default="running")  # running, completed, failed
+
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class EmbeddingOutbox(Base):
+    """
+    Solutions waiting for an embedding.
+
+    Rows are written in the same transaction as the solution, so the work is
+    not lost if the task broker is unavailable at write time.
+    """
+    __tablename__ = "embedding_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    solution_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("solutions.id", ondelete="CASCADE"), index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class EmbeddingSpace(Base):
+    """
+    A named embedding model + dimension.
+
+    Several spaces can be populated at once (dual-write) while exactly one is
+    active for search, so switching models needs no search downtime.
+    """
+    __tablename__ = "embedding_spaces"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)  # e.g. "codebert"
+    model: Mapped[str] = mapped_column(String(255))  # e.g. "microsoft/codebert-base"
+    dim: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(20), default="backfilling")  # backfilling, ready, retired
+    is_active: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    activated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class SolutionEmbedding(Base):
+    """Embedding of a solution in one embedding space."""
+    __tablename__ = "solution_embeddings"
+
+    solution_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("solutions.id", ondelete="CASCADE"), primary_key=True
+    )
+    space: Mapped[str] = mapped_column(
+        String(100), ForeignKey("embedding_spaces.name", ondelete="CASCADE"), primary_key=True
+    )
+    # Dimension varies per space; indexes cast to the space's dimension
+    embedding = mapped_column(Vector())
+    code_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)  # SHA256 of embedded text
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class SolutionEmbeddingChunk(Base):
+    """
+    Embedding of one chunk (function or line window) of a long solution.
+
+    Only solutions longer than the model context have chunks; their whole-code
+    vector in solution_embeddings is kept as well.
+    """
+    __tablename__ = "solution_embedding_chunks"
+
+    solution_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("solutions.id", ondelete="CASCADE"), primary_key=True
+    )
+    space: Mapped[str] = mapped_column(
+        String(100), ForeignKey("embedding_spaces.name", ondelete="CASCADE"), primary_key=True
+    )
+    chunk_index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    start_line: Mapped[int] = mapped_column(Integer)
+    end_line: Mapped[int] = mapped_column(Integer)
+    embedding = mapped_column(Vector())
+
+
+class EmbeddingShadowComparison(Base):
+    """Overlap between search results of the active space and a shadow space."""
+    __tablename__ = "embedding_shadow_comparisons"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    query: Mapped[str] = mapped_column(Text)
+    primary_space: Mapped[str] = mapped_column(String(100))
+    shadow_space: Mapped[str] = mapped_column(String(100), index=True)
+    k: Mapped[int] = mapped_column(Integer)
+    overlap: Mapped[float] = mapped_column(Float)  # |primary ∩ shadow| / k
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
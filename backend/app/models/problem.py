@@ -1,6 +1,6 @@
 from datetime import datetime
 import uuid
-from sqlalchemy import String, Text, DateTime, func
+from sqlalchemy import String, Integer, BigInteger, Text, DateTime, func, ARRAY
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
@@ -99,6 +99,11 @@ class Problem(Base):
     baseline_complexity_time: Mapped[str | None] = mapped_column(String(50), nullable=True)
     baseline_complexity_space: Mapped[str | None] = mapped_column(String(50), nullable=True)
 
+    # Structural fingerprint of the baseline code (app/services/fingerprints.py)
+    baseline_structure_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    baseline_minhash = mapped_column(ARRAY(Integer), nullable=True)
+    baseline_lsh_buckets = mapped_column(ARRAY(BigInteger), nullable=True)  # GIN-indexed in the migration
+
     # Test cases (JSON)
     test_cases: Mapped[str | None] = mapped_column(Text, nullable=True)
 
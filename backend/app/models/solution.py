@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 import enum
-from sqlalchemy import String, Integer, Text, Float, DateTime, ForeignKey, Boolean, func, ARRAY, JSON
+from sqlalchemy import String, Integer, BigInteger, Text, Float, DateTime, ForeignKey, Boolean, Computed, func, ARRAY, JSON
 from sqlalchemy.dialects.postgresql import UUID, ENUM, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pgvector.sqlalchemy import Vector
@@ -58,6 +58,11 @@ class Solution(Base):
     title: Mapped[str] = mapped_column(String(255))
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     code: Mapped[str] = mapped_column(Text)
+    # First 200 characters for result listings (generated by Postgres)
+    code_preview: Mapped[str | None] = mapped_column(
+        Text,
+        Computed("CASE WHEN length(code) > 200 THEN left(code, 200) || '...' ELSE code END", persisted=True),
+    )
     language: Mapped[str] = mapped_column(language_type, index=True)
 
     # Versioning
@@ -76,10 +81,15 @@ class Solution(Base):
     tags = mapped_column(ARRAY(Text), default=[])
     optimization_patterns = mapped_column(ARRAY(Text), default=[])  # e.g., ['memoization', 'early_exit']
 
-    # Embedding for semantic search
+    # Legacy single-model embedding; search reads per-space vectors from solution_embeddings
     embedding = mapped_column(Vector(settings.embedding_dim), nullable=True)
     search_vector = mapped_column(TSVECTOR, nullable=True)
 
+    # Structural fingerprint of the alpha-renamed code (app/services/fingerprints.py)
+    structure_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    minhash = mapped_column(ARRAY(Integer), nullable=True)
+    lsh_buckets = mapped_column(ARRAY(BigInteger), nullable=True)  # GIN-indexed in the migration
+
     # Verification and votes
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     vote_count: Mapped[int] = mapped_column(Integer, default=0)
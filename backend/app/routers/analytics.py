@@ -13,6 +13,7 @@ from pydantic import BaseModel
 
 from app.database import get_db
 from app.models.analytics import PageView, SearchQuery
+from app.services.suggestions import add_search_query
 from app.utils.jwt import get_current_user_optional
 from app.models.user import User
 
@@ -80,6 +81,9 @@ async def track_search(
     db.add(search_query)
     await db.commit()
 
+    if data.results_count > 0:
+        await add_search_query(data.query)
+
     return {"status": "tracked"}
 
 
@@ -13,6 +13,8 @@ from app.models.benchmark import Benchmark
 from app.models.solution import Solution
 from app.models.problem import Problem
 from app.schemas.benchmark import BenchmarkCreate, BenchmarkResponse
+from app.services.playground_cache import bump_playground_versions
+from app.services.search_cache import bump_search_versions
 from app.services.benchmark import (
     run_benchmark_for_language,
     run_benchmark_comparison,
@@ -280,6 +282,8 @@ async def run_benchmark(
         solution.speedup = round(avg_speedup, 2)
 
         await db.commit()
+        await bump_search_versions([(problem.category, solution.language)])
+        await bump_playground_versions([(problem.id, solution.language)])
 
         logger.info(
             f"Benchmark completed for solution {solution.id}: "
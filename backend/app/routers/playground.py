@@ -2,26 +2,80 @@
 Playground router for code analysis and optimization.
 """
 
+import asyncio
+import base64
+import binascii
 import logging
 import math
 import re
-from dataclasses import dataclass
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
-from sqlalchemy import text
+from dataclasses import asdict, dataclass
+from typing import Any
+from uuid import UUID
 
-from app.database import async_session
-from app.services.embeddings import get_embedding
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session, get_db
+from app.services.benchmark import extract_function_name
+from app.services.code_analyzer import (
+    IMPACT_ORDER,
+    AnalysisReport,
+    analyze_python,
+    estimate_line_costs,
+    split_functions,
+)
+from app.services.code_rewriter import PYTHON_REWRITES, rewrite_python
+from app.services.embeddings import get_embedding, get_embeddings_batch
+from app.services.fingerprints import (
+    NUM_PERM,
+    CodeFingerprint,
+    estimated_similarity,
+    find_structural_matches,
+    fingerprint_code,
+)
+from app.services.embedding_spaces import get_search_space
+from app.services.playground_cache import CachedAnalysis, analysis_cache_key, lookup_analysis, store_analysis
+from app.services.profiles import (
+    ProfileEntry,
+    ProfileError,
+    SourceFunction,
+    parse_collapsed,
+    parse_pstats,
+    rank_hot_functions,
+)
+from app.services.tree_sitter_analyzer import analyze_source, is_supported as is_tree_sitter_supported
+from app.services.verification import (
+    VerificationBudget,
+    VerificationResult,
+    verify_python,
+    verify_rewrite,
+    verify_timing,
+)
+from app.services.vector_index import (
+    apply_search_tier,
+    get_search_tier,
+    nearest_solutions_cte,
+    query_vector,
+    vector_column,
+)
 from app.limiter import limiter
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 router = APIRouter()
 
 
 class AnalyzeRequest(BaseModel):
     code: str
     language: str
+    verify: bool = False  # Measure the speedup by running both versions
+    inputs: list[list[Any]] | None = Field(default=None, max_length=20)  # Positional args per call
 
 
 class ComplexityInfo(BaseModel):
@@ -29,17 +83,150 @@ class ComplexityInfo(BaseModel):
     space: str
 
 
+class FindingInfo(BaseModel):
+    rule: str
+    message: str
+    line: int
+    col: int
+    impact: str  # high, medium or low
+
+
+class ScalingPointInfo(BaseModel):
+    size: int
+    baseline_ms: float | None
+    candidate_ms: float | None
+    speedup: float | None
+    equivalence: str | None = None
+
+
+class VerificationInfo(BaseModel):
+    candidate: str  # similar_solution or generated
+    function: str
+    candidate_function: str
+    equivalence: str  # exact, unordered, different, error or unchecked
+    equivalent: bool
+    speedup: float | None  # Measured at the largest size both versions finished
+    curve: list[ScalingPointInfo]
+    error: str | None = None
+
+
 class AnalyzeResponse(BaseModel):
     optimized_code: str
     speedup: float
+    speedup_measured: bool = False  # True when `speedup` comes from verification
     complexity: ComplexityInfo
     suggestions: list[str]
+    findings: list[FindingInfo] = []  # Structured findings (code that parses, see analyze_structure)
+    verification: VerificationInfo | None = None  # Only in verify mode
+
+
+class AnalyzeFileRequest(BaseModel):
+    code: str
+    language: str
+    path: str | None = None  # Echoed back, e.g. the path in the repository
+
+
+class AnalyzeFilesRequest(BaseModel):
+    files: list[AnalyzeFileRequest] = Field(..., min_length=1, max_length=50)
+
+
+class FunctionAnalysis(BaseModel):
+    name: str  # Class.method for methods, <module> for a file analyzed whole
+    line: int
+    end_line: int
+    impact: str | None  # Highest impact among its findings
+    analysis: AnalyzeResponse
+
+
+class FileFindingInfo(FindingInfo):
+    path: str | None
+    function: str
+    speedup: float  # Estimated speedup of the function's suggested code
+
+
+class AnalyzeFileResponse(BaseModel):
+    path: str | None
+    functions: list[FunctionAnalysis]  # Ranked by impact, then speedup
+    findings: list[FileFindingInfo]  # Of all functions, ranked the same way
+
+
+class AnalyzeFilesResponse(BaseModel):
+    files: list[AnalyzeFileResponse]  # In request order
+    findings: list[FileFindingInfo]  # Of all files
+
+
+class AnalyzeProfileRequest(BaseModel):
+    profile: str  # Collapsed stacks as text, or a pstats dump base64-encoded
+    format: str = Field(default="collapsed", pattern="^(collapsed|pstats)$")
+    sample_rate_hz: float = Field(default=100.0, gt=0)  # Of collapsed stacks; py-spy samples at 100
+    files: list[AnalyzeFileRequest] = Field(..., min_length=1, max_length=200)  # Paths as in the profile
+    top_n: int = Field(default=5, ge=1, le=20)
+
+
+class HotFunctionAnalysis(BaseModel):
+    path: str | None
+    function: FunctionAnalysis
+    self_time: float  # Seconds in the function itself (nested functions included)
+    self_percent: float  # Of the profile's total
+    calls: int | None  # Known for pstats profiles
+    estimated_savings: float  # Seconds saved at the estimated speedup
+    estimated_savings_percent: float
+
+
+class UnmatchedFrameInfo(BaseModel):
+    file: str
+    line: int | None
+    function: str
+    self_time: float
+    self_percent: float
+
+
+class ProfileAnalysisResponse(BaseModel):
+    total_time: float  # Seconds of self time over all frames
+    functions: list[HotFunctionAnalysis]  # Top-N by self time
+    estimated_savings: float
+    estimated_savings_percent: float
+    unmatched: list[UnmatchedFrameInfo]  # Hottest frames outside the submitted files
+
+
+class AnnotateRequest(BaseModel):
+    code: str
+    language: str
+
+
+class LineCostInfo(BaseModel):
+    line: int
+    count: str  # Estimated executions, e.g. "1", "n", "n²", "n·m", "n log n", "2ⁿ"
+    depth: int  # Enclosing loops over the input
+    heat: float  # 0 for lines run once, 1 for the most executed ones
+
+
+class AllocationSiteInfo(BaseModel):
+    line: int
+    col: int
+    kind: str  # list, dict, set, comprehension, copy, slice or string-concat
+    count: str
+    hot: bool  # In the deepest loop nest of its function
+
+
+class SizeSymbolInfo(BaseModel):
+    symbol: str
+    expression: str  # What the letter is the size of
+    function: str | None
+
+
+class AnnotateResponse(BaseModel):
+    complexity: ComplexityInfo
+    lines: list[LineCostInfo]  # Lines with code, in order
+    allocations: list[AllocationSiteInfo]  # Hot ones first
+    sizes: list[SizeSymbolInfo]
 
 
 @dataclass
 class SimilarSolution:
     """Simple data class for similar solution results."""
     id: str
+    problem_id: str
     code: str
     title: str
     speedup: float
@@ -77,38 +264,37 @@ def normalize_code(code: str, language: str = "python") -> str:
     return normalized
 
 
-def calculate_code_similarity(code1: str, code2: str, language: str = "python") -> float:
-    """
-    Calculate similarity between two code snippets.
-    Uses normalized Levenshtein-like comparison.
-    """
-    norm1 = normalize_code(code1, language)
-    norm2 = normalize_code(code2, language)
-
-    # Simple character-based similarity
-    if not norm1 or not norm2:
-        return 0.0
-
-    # Calculate Jaccard similarity on tokens
-    tokens1 = set(norm1.split())
-    tokens2 = set(norm2.split())
-
-    if not tokens1 or not tokens2:
-        return 0.0
-
-    intersection = len(tokens1 & tokens2)
-    union = len(tokens1 | tokens2)
-
-    return intersection / union if union > 0 else 0.0
+def structural_similarities(fingerprint: CodeFingerprint | None, rows, language: str) -> np.ndarray:
+    """Estimated structural similarity of each candidate row, from the minhash stored at write time."""
+    if fingerprint is None or not rows:
+        return np.zeros(len(rows))
+    signatures = np.zeros((len(rows), NUM_PERM), dtype=np.uint64)
+    known = np.ones(len(rows), dtype=bool)
+    for i, row in enumerate(rows):
+        signature = row.minhash
+        if signature is None:
+            # Written before fingerprints were backfilled
+            candidate = fingerprint_code(row.code, language)
+            if candidate is None:
+                known[i] = False
+                continue
+            signature = candidate.minhash
+        signatures[i] = signature
+    return np.where(known, estimated_similarity(fingerprint, signatures), 0.0)
 
 
 def detect_complexity(code: str) -> tuple[str, str]:
-    """Simple heuristic complexity detection."""
+    """
+    Simple heuristic complexity detection.
+
+    Fallback for code the syntax-tree analyzers can't handle (other languages,
+    or code that doesn't parse); see analyze_structure.
+    """
     code_lower = code.lower()
 
-    # Detect nested loops
-    nested_for = len(re.findall(r'for\s+.*?:\s*\n\s+for\s+', code, re.DOTALL))
-    nested_while = len(re.findall(r'while\s+.*?:\s*\n\s+while\s+', code, re.DOTALL))
+    # Detect nested loops (loop header followed by a loop on the next line)
+    nested_for = len(re.findall(r'for\s+[^\n]*:[ \t]*\n\s+for\s+', code))
+    nested_while = len(re.findall(r'while\s+[^\n]*:[ \t]*\n\s+while\s+', code))
     nested_loops = nested_for + nested_while
 
     # Detect recursion
@@ -142,7 +328,7 @@ def detect_complexity(code: str) -> tuple[str, str]:
 
 
 def analyze_patterns(code: str, language: str) -> list[str]:
-    """Detect anti-patterns and suggest optimizations."""
+    """Detect anti-patterns and suggest optimizations (substring heuristics, see detect_complexity)."""
     suggestions = []
     code_lower = code.lower()
 
@@ -221,54 +407,91 @@ def analyze_patterns(code: str, language: str) -> list[str]:
     return suggestions
 
 
-def generate_optimized_code(code: str, language: str) -> tuple[str, float]:
+def analyze_structure(code: str, language: str) -> AnalysisReport | None:
     """
-    Apply automatic optimizations to code based on detected patterns.
-    Returns (optimized_code, estimated_speedup).
+    Syntax-tree analysis: the AST for Python, tree-sitter for JavaScript/TypeScript,
+    Go and Rust. None when it doesn't apply (other languages, grammar not
+    installed, syntax errors), in which case the heuristics are used.
     """
-    optimized = code
-    speedup_multiplier = 1.0
+    try:
+        if language.lower() in ("python", "py"):
+            return analyze_python(code)
+        if is_tree_sitter_supported(language):
+            return analyze_source(code, language)
+        return None
+    except (SyntaxError, ValueError, RecursionError) as e:
+        logger.debug(f"AST analysis unavailable, using heuristics: {e}")
+        return None
+
+
+def request_budget(verify: bool = False) -> VerificationBudget | None:
+    """
+    Sandbox runs one request may start: none (submitted code is never run)
+    unless it asks for verify mode or `playground_verify_rewrites` is set.
+    """
+    if verify or settings.playground_verify_rewrites:
+        return VerificationBudget(settings.playground_verify_max_runs)
+    return None
+
+
+async def rewrite_verified(code: str, budget: VerificationBudget | None = None) -> tuple[str, float, list[str]]:
+    """
+    Rewrite Python code on the AST.
+
+    Rewrites run one at a time. With a budget, each is kept only if the
+    functions it changed return exactly the same results as before on
+    generated inputs; without one, nothing is run, only changes proven
+    from the code alone are applied and they are returned unverified.
 
+    The estimated speedup is the largest estimate of a single applied
+    rewrite (estimates don't compound); verification checks results, only
+    verify mode measures the speedup.
+    Returns (optimized_code, estimated_speedup, notes on applied rewrites).
+    """
+    current = code
+    speedup = 1.0
+    notes = []
+    for rewrite in PYTHON_REWRITES:
+        try:
+            result = rewrite_python(current, [rewrite], proven_only=budget is None)
+        except (SyntaxError, ValueError, RecursionError) as e:
+            logger.debug(f"Automatic rewrites unavailable: {e}")
+            return code, 1.0, []
+        if not result.applied:
+            continue
+        if budget is not None:
+            equivalent, reason = await verify_rewrite(current, result.code, budget)
+            if not equivalent:
+                logger.info(f"Rewrite {rewrite.id} rejected by verification: {reason}")
+                continue
+            status = "verified"
+        else:
+            status = "not verified, analyze with verify to check"
+        current = result.code
+        speedup = max(speedup, rewrite.estimated_speedup)
+        status += f", estimated {rewrite.estimated_speedup:g}x faster"
+        notes.extend(f"Applied: {applied.message} (line {applied.line}, {status})" for applied in result.applied)
+    return current, speedup, notes
+
+
+async def generate_optimized_code(
+    code: str, language: str, budget: VerificationBudget | None = None
+) -> tuple[str, float, list[str]]:
+    """
+    Apply automatic optimizations to code based on detected patterns.
+
+    Python is rewritten on the AST, verified in the sandbox when there is a
+    budget (see app/services/code_rewriter.py and rewrite_verified); other
+    languages get textual rewrites.
+    Returns (optimized_code, estimated_speedup, notes on applied rewrites).
+    """
     if language.lower() == 'python':
-        # Replace range(len()) with enumerate()
-        pattern = r'for\s+(\w+)\s+in\s+range\(len\((\w+)\)\):'
-        if re.search(pattern, optimized):
-            optimized = re.sub(
-                pattern,
-                r'for \1, item in enumerate(\2):',
-                optimized
-            )
-            speedup_multiplier *= 1.1
+        return await rewrite_verified(code, budget)
 
-        # Replace nested loop membership check with set
-        # Pattern: for x in list1: for y in list2: if x == y
-        if re.search(r'for\s+\w+\s+in\s+\w+:\s*\n\s+for\s+\w+\s+in\s+\w+:', optimized):
-            # Add set conversion suggestion in comments
-            lines = optimized.split('\n')
-            if lines and 'set(' not in optimized:
-                lines.insert(0, "# Optimization: Convert inner list to set for O(1) lookup")
-                optimized = '\n'.join(lines)
-                speedup_multiplier *= 10.0  # O(n²) -> O(n)
-
-        # Replace string += with list append + join
-        if re.search(r'(\w+)\s*\+=\s*["\']', optimized) and 'for ' in optimized:
-            # Add optimization hint
-            if '# Optimization' not in optimized:
-                lines = optimized.split('\n')
-                lines.insert(0, "# Optimization: Use ''.join(parts) instead of string +=")
-                optimized = '\n'.join(lines)
-                speedup_multiplier *= 5.0
-
-        # Replace multiple .count() with Counter
-        if optimized.count('.count(') > 1:
-            if 'from collections import Counter' not in optimized:
-                lines = optimized.split('\n')
-                lines.insert(0, "from collections import Counter")
-                lines.insert(1, "# Use counter = Counter(items) then counter[x]")
-                optimized = '\n'.join(lines)
-                speedup_multiplier *= 3.0
+    optimized = code
+    speedup_multiplier = 1.0
 
-    elif language.lower() in ['javascript', 'js', 'typescript', 'ts']:
+    if language.lower() in ['javascript', 'js', 'typescript', 'ts']:
         # Replace var with const/let
         optimized = re.sub(r'\bvar\s+', 'const ', optimized)
 
@@ -292,183 +515,782 @@ def generate_optimized_code(code: str, language: str) -> tuple[str, float]:
             optimized = '\n'.join(lines)
             speedup_multiplier *= 2.0
 
-    return optimized, speedup_multiplier
+    return optimized, speedup_multiplier, []
+
+
+async def _embed_or_none(code: str, model: str) -> list[float] | None:
+    try:
+        return await get_embedding(code, model_name=model)
+    except Exception as e:
+        logger.info(f"Embedding service unavailable, using structural matches only: {e}")
+        return None
 
 
-async def find_similar_solution(code: str, language: str) -> SimilarSolution | None:
+async def find_similar_solution(
+    db: AsyncSession,
+    code: str,
+    language: str,
+    query_embedding: list[float] | None = None,
+    structural_only: bool = False,
+) -> tuple[SimilarSolution | None, bool]:
     """
     Find similar optimized solution using semantic search + structural similarity.
 
     Strategy:
     1. Use embedding similarity to find candidates
-    2. Apply structural similarity to re-rank
-    3. Return the best match with highest speedup
+    2. Add structurally similar solutions from the LSH index, matched on the
+       solution's own code or on its problem's baseline (renamed variables
+       still match)
+    3. Re-rank by embedding and structural similarity
+    4. Return the best match with highest speedup
+
+    The embedding and the fingerprint are computed concurrently off the event
+    loop; structural similarity uses the minhash signatures stored at write
+    time, compared for all candidates at once. Batched callers pass the
+    code's `query_embedding`, or `structural_only` when the embedding model
+    is unavailable.
+
+    Returns:
+        (best match or None, whether the lookup was complete); it is not when
+        the database failed or only structural matches could be used
     """
     try:
-        embedding = await get_embedding(code)
-    except Exception as e:
-        logger.info(f"Embedding service unavailable, using heuristics only: {e}")
-        return None
+        space = await get_search_space(db)
+        fingerprinting = asyncio.to_thread(fingerprint_code, code, language)
+        embedding = query_embedding
+        if embedding is None and not structural_only:
+            fingerprint, embedding = await asyncio.gather(fingerprinting, _embed_or_none(code, space.model))
+        else:
+            fingerprint = await fingerprinting
+        if embedding is None and fingerprint is None:
+            return None, False
+
+        rows = []
+        if embedding is not None:
+            # Long solutions are scored by their chunks as well as the whole-code
+            # vector, since the whole-code vector only saw the first 512 tokens.
+            # The nearest chunks find the solutions; "mean" pooling then averages
+            # over all chunks of each, not just the ones that made the cut.
+            if settings.chunk_pooling == "mean":
+                chunk_scores = f"""
+                    SELECT ac.solution_id, AVG(1 - ({vector_column(space, "ac")} <=> {query_vector(space)})) AS sim
+                    FROM solution_embedding_chunks ac
+                    WHERE ac.space = :space
+                    AND ac.solution_id IN (SELECT solution_id FROM nearest_chunks)
+                    GROUP BY ac.solution_id
+                """
+            else:
+                chunk_scores = "SELECT solution_id, MAX(sim) AS sim FROM nearest_chunks GROUP BY solution_id"
+
+            # Nearest solutions and nearest chunks both come from HNSW scans; the
+            # language/speedup filters and threshold apply to that pool afterwards
+            tier = get_search_tier()
+            await apply_search_tier(db, tier)
+            chunk_column = vector_column(space, "sc")
 
-    try:
-        async with async_session() as db:
             # Find top 30 similar solutions by embedding, including problem info for grouping
             result = await db.execute(
-                text("""
+                text(f"""
+                    WITH {nearest_solutions_cte(space)},
+                    nearest_chunks AS (
+                        SELECT sc.solution_id, 1 - ({chunk_column} <=> {query_vector(space)}) AS sim
+                        FROM solution_embedding_chunks sc
+                        WHERE sc.space = :space
+                        ORDER BY {chunk_column} <=> {query_vector(space)}
+                        LIMIT :chunk_candidates
+                    ),
+                    chunk_scores AS ({chunk_scores}),
+                    pool AS (
+                        SELECT solution_id FROM candidates
+                        UNION
+                        SELECT solution_id FROM chunk_scores
+                    )
                     SELECT s.id, s.code, s.title, s.speedup,
-                           s.complexity_time, s.complexity_space,
+                           s.complexity_time, s.complexity_space, s.minhash,
                            p.id as problem_id, p.title as problem_title,
-                           1 - (s.embedding <=> :embedding) as sim_score
-                    FROM solutions s
+                           GREATEST(1 - (se.embedding <=> :embedding), COALESCE(cs.sim, 0)) as sim_score
+                    FROM pool
+                    JOIN solutions s ON s.id = pool.solution_id
+                    JOIN solution_embeddings se ON se.solution_id = s.id AND se.space = :space
                     JOIN problems p ON s.problem_id = p.id
+                    LEFT JOIN chunk_scores cs ON cs.solution_id = s.id
                     WHERE s.language = :language
                     AND s.speedup IS NOT NULL
                     AND s.speedup > 1
-                    AND 1 - (s.embedding <=> :embedding) > 0.2
-                    ORDER BY s.embedding <=> :embedding
+                    AND GREATEST(1 - (se.embedding <=> :embedding), COALESCE(cs.sim, 0)) > 0.2
+                    ORDER BY sim_score DESC
                     LIMIT 30
                 """),
-                {"embedding": str(embedding), "language": language.lower()}
+                {
+                    "embedding": str(embedding),
+                    "space": space.name,
+                    "language": language.lower(),
+                    "candidates": tier.candidates,
+                    "chunk_candidates": settings.chunk_candidates,
+                }
             )
             rows = result.fetchall()
 
-            if not rows:
-                logger.info("No similar solutions found by embedding")
-                return None
-
-            # Group solutions by problem and find best solution per problem
-            # Then pick the problem with highest average relevance
-            problem_solutions: dict[str, list] = {}
-
-            for row in rows:
-                structural_sim = calculate_code_similarity(code, row.code, language)
-                combined_sim = (row.sim_score * 0.70 + structural_sim * 0.30)
-
-                # Logarithmic speedup bonus - no artificial cap
-                speedup_bonus = math.log10(max(row.speedup, 1)) / 3.0
-                final_score = combined_sim * (1 + speedup_bonus)
-
-                logger.debug(
-                    f"Candidate '{row.title}' (problem: {row.problem_title}): "
-                    f"embed={row.sim_score:.2f}, struct={structural_sim:.2f}, "
-                    f"speedup={row.speedup}x, final={final_score:.2f}"
-                )
-
-                if combined_sim > 0.20 or structural_sim > 0.4:
-                    problem_id = str(row.problem_id)
-                    if problem_id not in problem_solutions:
-                        problem_solutions[problem_id] = []
-                    problem_solutions[problem_id].append((row, final_score, combined_sim))
-
-            if not problem_solutions:
-                logger.info("No candidates passed similarity threshold")
-                return None
-
-            # For each problem, find the solution with highest speedup among good candidates
-            # Then rank problems by their best candidate's combined_sim (relevance to input)
-            best_per_problem = []
-            for problem_id, candidates in problem_solutions.items():
-                # Sort by combined_sim first, then by speedup
-                candidates.sort(key=lambda x: (x[2], x[0].speedup or 0), reverse=True)
-                best_relevance = candidates[0][2]  # highest combined_sim for this problem
-
-                # Among solutions with similar relevance, pick highest speedup
-                top_candidates = [c for c in candidates if c[2] >= best_relevance * 0.9]
-                top_candidates.sort(key=lambda x: x[0].speedup or 0, reverse=True)
-
-                best_solution = top_candidates[0]
-                best_per_problem.append((best_solution[0], best_solution[1], best_relevance))
-
-            # Sort problems by relevance (combined_sim of best candidate)
-            best_per_problem.sort(key=lambda x: x[2], reverse=True)
-            best_candidate = best_per_problem[0][0] if best_per_problem else None
-
-            if best_candidate:
-                best_score = best_per_problem[0][1] if best_per_problem else 0.0
-                logger.info(
-                    f"Found solution '{best_candidate.title}' with "
-                    f"{best_candidate.speedup}x speedup (score: {best_score:.2f})"
-                )
-                return SimilarSolution(
-                    id=str(best_candidate.id),
-                    code=best_candidate.code,
-                    title=best_candidate.title,
-                    speedup=best_candidate.speedup,
-                    complexity_time=best_candidate.complexity_time,
-                    complexity_space=best_candidate.complexity_space,
-                )
-
+        # Structural matches the vector scan missed join the pool
+        structural = await find_structural_matches(db, fingerprint, language) if fingerprint else {}
+        seen = {str(row.id) for row in rows}
+        missing = [UUID(solution_id) for solution_id in structural if solution_id not in seen]
+        if missing:
+            embedding_sim = "COALESCE(1 - (se.embedding <=> :embedding), 0)" if embedding is not None else "0.0"
+            result = await db.execute(
+                text(f"""
+                    SELECT s.id, s.code, s.title, s.speedup,
+                           s.complexity_time, s.complexity_space, s.minhash,
+                           p.id as problem_id, p.title as problem_title,
+                           {embedding_sim} as sim_score
+                    FROM solutions s
+                    JOIN problems p ON s.problem_id = p.id
+                    LEFT JOIN solution_embeddings se ON se.solution_id = s.id AND se.space = :space
+                    WHERE s.id = ANY(:ids)
+                    AND s.speedup IS NOT NULL
+                    AND s.speedup > 1
+                """),
+                {
+                    "ids": missing,
+                    "space": space.name,
+                    **({"embedding": str(embedding)} if embedding is not None else {}),
+                }
+            )
+            rows.extend(result.fetchall())
     except Exception as e:
         logger.warning(f"Database query for similar solutions failed: {e}")
+        await db.rollback()
+        return None, False
+
+    if not rows:
+        logger.info("No similar solutions found by embedding or structure")
+        return None, embedding is not None
+
+    # Group solutions by problem and find best solution per problem
+    # Then pick the problem with highest average relevance
+    problem_solutions: dict[str, list] = {}
+
+    structural_sims = structural_similarities(fingerprint, rows, language)
+    for row, estimated_sim in zip(rows, structural_sims):
+        structural_sim = structural.get(str(row.id), float(estimated_sim))
+        # A structural near-copy is relevant on its own, whatever the embedding says
+        combined_sim = max(row.sim_score * 0.70 + structural_sim * 0.30, structural_sim)
+
+        # Logarithmic speedup bonus - no artificial cap
+        speedup_bonus = math.log10(max(row.speedup, 1)) / 3.0
+        final_score = combined_sim * (1 + speedup_bonus)
+
+        logger.debug(
+            f"Candidate '{row.title}' (problem: {row.problem_title}): "
+            f"embed={row.sim_score:.2f}, struct={structural_sim:.2f}, "
+            f"speedup={row.speedup}x, final={final_score:.2f}"
+        )
 
-    return None
+        if combined_sim > 0.20 or structural_sim > 0.4:
+            problem_id = str(row.problem_id)
+            if problem_id not in problem_solutions:
+                problem_solutions[problem_id] = []
+            problem_solutions[problem_id].append((row, final_score, combined_sim))
+
+    if not problem_solutions:
+        logger.info("No candidates passed similarity threshold")
+        return None, embedding is not None
+
+    # For each problem, find the solution with highest speedup among good candidates
+    # Then rank problems by their best candidate's combined_sim (relevance to input)
+    best_per_problem = []
+    for problem_id, candidates in problem_solutions.items():
+        # Sort by combined_sim first, then by speedup
+        candidates.sort(key=lambda x: (x[2], x[0].speedup or 0), reverse=True)
+        best_relevance = candidates[0][2]  # highest combined_sim for this problem
+
+        # Among solutions with similar relevance, pick highest speedup
+        top_candidates = [c for c in candidates if c[2] >= best_relevance * 0.9]
+        top_candidates.sort(key=lambda x: x[0].speedup or 0, reverse=True)
+
+        best_solution = top_candidates[0]
+        best_per_problem.append((best_solution[0], best_solution[1], best_relevance))
+
+    # Sort problems by relevance (combined_sim of best candidate)
+    best_per_problem.sort(key=lambda x: x[2], reverse=True)
+    best_candidate, best_score, _ = best_per_problem[0]
+    logger.info(
+        f"Found solution '{best_candidate.title}' with "
+        f"{best_candidate.speedup}x speedup (score: {best_score:.2f})"
+    )
+    return SimilarSolution(
+        id=str(best_candidate.id),
+        problem_id=str(best_candidate.problem_id),
+        code=best_candidate.code,
+        title=best_candidate.title,
+        speedup=best_candidate.speedup,
+        complexity_time=best_candidate.complexity_time,
+        complexity_space=best_candidate.complexity_space,
+    ), embedding is not None
+
+
+async def load_similar_solution(db: AsyncSession, solution_id: str) -> SimilarSolution | None:
+    """Load a previously matched solution again, None if it is gone or no longer faster."""
+    try:
+        result = await db.execute(
+            text("""
+                SELECT id, problem_id, code, title, speedup, complexity_time, complexity_space
+                FROM solutions
+                WHERE id = :id AND speedup > 1
+            """),
+            {"id": UUID(solution_id)},
+        )
+        row = result.fetchone()
+    except Exception as e:
+        logger.warning(f"Loading cached similar solution failed: {e}")
+        await db.rollback()
+        return None
+    if not row:
+        return None
+    return SimilarSolution(
+        id=str(row.id),
+        problem_id=str(row.problem_id),
+        code=row.code,
+        title=row.title,
+        speedup=row.speedup,
+        complexity_time=row.complexity_time,
+        complexity_space=row.complexity_space,
+    )
+
+
+async def verify_candidate(
+    code: str,
+    candidate_code: str,
+    language: str,
+    candidate: str,
+    inputs: list[list[Any]] | None,
+    budget: VerificationBudget,
+) -> VerificationInfo:
+    """Run the submitted code and a candidate side by side and measure the speedup."""
+    func_name = extract_function_name(code, language)
+    candidate_func = extract_function_name(candidate_code, language)
+    if not func_name or not candidate_func:
+        result = VerificationResult(
+            function=func_name or "", candidate_function=candidate_func or "",
+            equivalence="error", speedup=None, error="No function found to run",
+        )
+    elif candidate_code.strip() == code.strip():
+        result = VerificationResult(
+            function=func_name, candidate_function=candidate_func,
+            equivalence="error", speedup=None, error="No rewrite to compare against",
+        )
+    elif not budget.take():
+        result = VerificationResult(
+            function=func_name, candidate_function=candidate_func,
+            equivalence="error", speedup=None, error="Verification budget of the request is spent",
+        )
+    elif language == "python":
+        result = await verify_python(code, func_name, candidate_code, candidate_func, inputs)
+    else:
+        result = await verify_timing(code, func_name, candidate_code, candidate_func, language)
+    return VerificationInfo(
+        candidate=candidate,
+        function=result.function,
+        candidate_function=result.candidate_function,
+        equivalence=result.equivalence,
+        equivalent=result.equivalent,
+        speedup=result.speedup,
+        curve=[ScalingPointInfo(**asdict(point)) for point in result.curve],
+        error=result.error,
+    )
+
+
+def apply_verification(response: AnalyzeResponse, verification: VerificationInfo) -> AnalyzeResponse:
+    """Replace the estimated speedup with the measured one when it can be trusted."""
+    response.verification = verification
+    # Unchecked timings (no equivalence check) are shown as their curve only
+    if verification.speedup is not None and verification.equivalent:
+        response.speedup = verification.speedup
+        response.speedup_measured = True
+    elif verification.equivalence == "different":
+        response.suggestions.append(
+            "Verification: the suggested code returned different results than yours - review it before use"
+        )
+    return response
+
+
+def snippet_cache_key(code: str, language: str, verify: bool = False, inputs: list | None = None) -> str:
+    return analysis_cache_key(normalize_code(code, language), language, verify, inputs)
+
+
+async def match_similar_solution(
+    db: AsyncSession,
+    code: str,
+    language: str,
+    cached: CachedAnalysis | None,
+    query_embedding: list[float] | None = None,
+    structural_only: bool = False,
+) -> tuple[SimilarSolution | None, bool]:
+    """The cached match when there is one, else the result of a new search."""
+    if cached and cached.solution_id:
+        similar = await load_similar_solution(db, cached.solution_id)
+        if similar:
+            return similar, True
+    elif cached:
+        return None, True
+    return await find_similar_solution(db, code, language, query_embedding, structural_only)
+
+
+async def analyze_snippet(
+    db: AsyncSession,
+    code: str,
+    language: str,
+    cache_key: str,
+    cached: CachedAnalysis | None,
+    language_version: str | None,
+    verify: bool = False,
+    inputs: list[list[Any]] | None = None,
+    query_embedding: list[float] | None = None,
+    structural_only: bool = False,
+    budget: VerificationBudget | None = None,
+) -> AnalyzeResponse:
+    """
+    Analyze one snippet, given its cache lookup (entry and language version).
+
+    The similar-solution search embeds the code itself unless
+    `query_embedding` is passed (batched callers) or `structural_only` is set
+    (embedding model unavailable). Submitted code is only run in the sandbox
+    within `budget` (see request_budget), which verify mode requires.
+    """
+    if verify and budget is None:
+        budget = request_budget(verify)
+    if cached and cached.response:
+        return AnalyzeResponse(**cached.response)
+
+    # The AST analysis runs in a thread while the similar-solution search waits on the database
+    report, (similar, complete) = await asyncio.gather(
+        asyncio.to_thread(analyze_structure, code, language),
+        match_similar_solution(db, code, language, cached, query_embedding, structural_only),
+    )
+    # Hand the connection back before rewriting and verifying, which can take seconds
+    await db.commit()
+
+    # Detect current complexity and anti-patterns, from the syntax tree when the language has one
+    if report:
+        time_complexity, space_complexity = report.time_complexity, report.space_complexity
+        findings = [FindingInfo(**asdict(finding)) for finding in report.findings]
+        suggestions = list(dict.fromkeys(finding.message for finding in report.findings))
+        if not suggestions:
+            suggestions.append("Code looks reasonably optimized")
+    else:
+        time_complexity, space_complexity = detect_complexity(code)
+        findings = []
+        suggestions = analyze_patterns(code, language)
+
+    if similar and similar.speedup:
+        # Return the optimized version found
+        response = AnalyzeResponse(
+            optimized_code=similar.code,
+            speedup=similar.speedup,
+            complexity=ComplexityInfo(
+                time=similar.complexity_time or "O(n)",
+                space=similar.complexity_space or "O(n)",
+            ),
+            suggestions=suggestions + [f"Found similar solution: {similar.title}"],
+            findings=findings,
+        )
+        candidate = "similar_solution"
+    else:
+        # No similar solution found - apply automatic optimizations
+        optimized_code, estimated_speedup, applied = await generate_optimized_code(code, language, budget)
+        suggestions = suggestions + applied
+
+        if "O(n²)" in time_complexity or "O(n³)" in time_complexity:
+            if not report and "Nested loops detected" not in str(suggestions):
+                suggestions.append("Nested loops detected - consider hash-based O(n) approach")
+
+        # Complexity of what is returned: re-analyzed for rewritten Python
+        improved_time, improved_space = time_complexity, space_complexity
+        optimized_report = analyze_structure(optimized_code, language) if optimized_code != code else None
+        if optimized_report:
+            improved_time = optimized_report.time_complexity
+            improved_space = optimized_report.space_complexity
+
+        response = AnalyzeResponse(
+            optimized_code=optimized_code,
+            speedup=round(estimated_speedup, 1),
+            complexity=ComplexityInfo(time=improved_time, space=improved_space),
+            suggestions=suggestions,
+            findings=findings,
+        )
+        candidate = "generated"
+
+    if verify:
+        verification = await verify_candidate(code, response.optimized_code, language, candidate, inputs, budget)
+        response = apply_verification(response, verification)
+
+    # Degraded lookups (database or embeddings down) are not cached
+    if complete:
+        await store_analysis(
+            cache_key,
+            code,
+            language,
+            language_version,
+            response.model_dump(),
+            solution_id=similar.id if similar else None,
+            problem_id=similar.problem_id if similar else None,
+        )
+    return response
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
 @limiter.limit("20/minute")
-async def analyze_code(request: Request, analyze_request: AnalyzeRequest):
+async def analyze_code(
+    request: Request,
+    analyze_request: AnalyzeRequest,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Analyze code and return optimization suggestions.
 
     Uses:
     - Heuristic pattern detection for anti-patterns
     - Semantic search to find similar optimized solutions
+
+    With `verify`, both versions are run in the sandbox on the same inputs
+    (`inputs` or generated from the signature); the measured speedup then
+    replaces the estimate if their outputs agree. Automatic rewrites are
+    only checked in the sandbox in verify mode, otherwise they are marked
+    unverified; at most `playground_verify_max_runs` runs per request.
+
+    Responses are cached on the normalized code: unchanged code is answered
+    from the cache, and code that only changed formatting or comments reuses
+    the cached match instead of searching again.
     """
     try:
         code = analyze_request.code
         language = analyze_request.language.lower()
+        cache_key = snippet_cache_key(code, language, analyze_request.verify, analyze_request.inputs)
+        cached, language_version = await lookup_analysis(cache_key, code, language)
+        return await analyze_snippet(
+            db, code, language, cache_key, cached, language_version,
+            analyze_request.verify, analyze_request.inputs,
+            budget=request_budget(analyze_request.verify),
+        )
+    except Exception as e:
+        logger.error(f"Code analysis failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Analysis failed: {str(e)}"
+        )
 
-        # Detect current complexity
-        time_complexity, space_complexity = detect_complexity(code)
 
-        # Find optimization suggestions
-        suggestions = analyze_patterns(code, language)
+@dataclass
+class _Unit:
+    """A function of a submitted file, analyzed on its own."""
+    file: int
+    name: str
+    line: int
+    end_line: int
+    indent: int
+    code: str
+    language: str
+
+
+def split_file(index: int, source: "AnalyzeFileRequest") -> list[_Unit]:
+    """Top-level functions and methods of a Python file; other files (or no functions) are one unit."""
+    language = source.language.lower()
+    whole = _Unit(index, "<module>", 1, max(len(source.code.splitlines()), 1), 0, source.code, language)
+    if language not in ("python", "py"):
+        return [whole]
+    try:
+        functions = split_functions(source.code)
+    except (SyntaxError, ValueError, RecursionError) as e:
+        logger.debug(f"Can't split file into functions, analyzing it whole: {e}")
+        return [whole]
+    units = [
+        _Unit(index, function.name, function.line, function.end_line, function.indent, function.code, language)
+        for function in functions
+    ]
+    return units or [whole]
+
+
+async def embed_snippets(db: AsyncSession, codes: list[str]) -> list[list[float] | None]:
+    """Embed many snippets in one batched forward pass (all None if the model is unavailable)."""
+    if not codes:
+        return []
+    try:
+        space = await get_search_space(db)
+        return await get_embeddings_batch(codes, model_name=space.model)
+    except Exception as e:
+        logger.warning(f"Embedding model unavailable, using structural matches only: {e}")
+        return [None] * len(codes)
 
-        # Try to find similar optimized solution
-        similar = await find_similar_solution(code, language)
-
-        if similar and similar.speedup:
-            # Return the optimized version found
-            return AnalyzeResponse(
-                optimized_code=similar.code,
-                speedup=similar.speedup,
-                complexity=ComplexityInfo(
-                    time=similar.complexity_time or "O(n)",
-                    space=similar.complexity_space or "O(n)",
-                ),
-                suggestions=suggestions + [f"Found similar solution: {similar.title}"],
+
+def _impact_rank(impact: str | None) -> int:
+    return IMPACT_ORDER.get(impact, len(IMPACT_ORDER))
+
+
+def _unit_analysis(unit: _Unit, analysis: AnalyzeResponse) -> FunctionAnalysis:
+    # Lines already match the file; methods were dedented
+    for finding in analysis.findings:
+        finding.col += unit.indent
+    if analysis.optimized_code != unit.code:
+        analysis.optimized_code = re.sub(r"\n{3,}", "\n\n", analysis.optimized_code.lstrip("\n"))
+    else:
+        analysis.optimized_code = analysis.optimized_code.strip("\n") + "\n"
+    impacts = [finding.impact for finding in analysis.findings]
+    return FunctionAnalysis(
+        name=unit.name,
+        line=unit.line,
+        end_line=unit.end_line,
+        impact=min(impacts, key=_impact_rank) if impacts else None,
+        analysis=analysis,
+    )
+
+
+def _function_rank(function: FunctionAnalysis) -> tuple:
+    return (_impact_rank(function.impact), -function.analysis.speedup, function.line)
+
+
+def _ranked_findings(path: str | None, functions: list[FunctionAnalysis]) -> list[FileFindingInfo]:
+    return [
+        FileFindingInfo(path=path, function=function.name, speedup=function.analysis.speedup, **finding.model_dump())
+        for function in functions
+        for finding in function.analysis.findings
+    ]
+
+
+def _finding_rank(finding: FileFindingInfo) -> tuple:
+    return (_impact_rank(finding.impact), -finding.speedup, finding.path or "", finding.line)
+
+
+async def analyze_units(db: AsyncSession, units: list[_Unit]) -> list[FunctionAnalysis]:
+    """
+    Analyze functions, in order.
+
+    Cached functions are answered from the analysis cache; the others are
+    embedded in one batched forward pass and analyzed concurrently on up to
+    `playground_file_concurrency` connections. They share one sandbox
+    budget, empty unless `playground_verify_rewrites` is set.
+    """
+    budget = request_budget()
+    keys = [snippet_cache_key(unit.code, unit.language) for unit in units]
+    lookups = await asyncio.gather(
+        *(lookup_analysis(key, unit.code, unit.language) for key, unit in zip(keys, units))
+    )
+    misses = [i for i, (cached, _) in enumerate(lookups) if cached is None]
+    embeddings: dict[int, list[float] | None] = dict(
+        zip(misses, await embed_snippets(db, [units[i].code for i in misses]))
+    )
+
+    semaphore = asyncio.Semaphore(settings.playground_file_concurrency)
+
+    async def analyze_one(i: int) -> FunctionAnalysis:
+        unit = units[i]
+        async with semaphore, async_session() as session:
+            analysis = await analyze_snippet(
+                session, unit.code, unit.language, keys[i], *lookups[i],
+                query_embedding=embeddings.get(i),
+                structural_only=i in embeddings and embeddings[i] is None,
+                budget=budget,
             )
+        return _unit_analysis(unit, analysis)
 
-        # No similar solution found - apply automatic optimizations
-        optimized_code, estimated_speedup = generate_optimized_code(code, language)
+    return await asyncio.gather(*(analyze_one(i) for i in range(len(units))))
 
-        # If we detected nested loops, add estimate
-        if "O(n²)" in time_complexity or "O(n³)" in time_complexity:
-            base_speedup = 10.0 if "O(n²)" in time_complexity else 100.0
-            estimated_speedup = max(estimated_speedup, base_speedup)
-            if "Nested loops detected" not in str(suggestions):
-                suggestions.append("Nested loops detected - consider hash-based O(n) approach")
 
-        # Determine improved complexity if optimizations applied
-        improved_time = time_complexity
-        if estimated_speedup > 5:
-            if time_complexity == "O(n²)":
-                improved_time = "O(n)"
-            elif time_complexity == "O(n³)":
-                improved_time = "O(n²)"
+async def analyze_sources(db: AsyncSession, sources: list[AnalyzeFileRequest]) -> list[AnalyzeFileResponse]:
+    """Analyze every function of the given files."""
+    units = [unit for index, source in enumerate(sources) for unit in split_file(index, source)]
+    if len(units) > settings.playground_file_max_functions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many functions ({len(units)}), at most {settings.playground_file_max_functions}",
+        )
+    analyses = await analyze_units(db, units)
 
-        return AnalyzeResponse(
-            optimized_code=optimized_code,
-            speedup=round(estimated_speedup, 1),
-            complexity=ComplexityInfo(
-                time=improved_time if optimized_code != code else time_complexity,
-                space=space_complexity,
-            ),
-            suggestions=suggestions,
+    results = []
+    for index, source in enumerate(sources):
+        functions = sorted(
+            (analysis for unit, analysis in zip(units, analyses) if unit.file == index),
+            key=_function_rank,
         )
+        findings = sorted(_ranked_findings(source.path, functions), key=_finding_rank)
+        results.append(AnalyzeFileResponse(path=source.path, functions=functions, findings=findings))
+    return results
+
+
+@router.post("/analyze-file", response_model=AnalyzeFileResponse)
+@limiter.limit("10/minute")
+async def analyze_file(
+    request: Request,
+    file_request: AnalyzeFileRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Analyze a whole module function by function.
+
+    Python modules are split into their top-level functions and methods
+    (other languages are analyzed whole); each is analyzed like POST
+    /playground/analyze, with line numbers pointing into the module.
+    Functions and findings are ranked by impact, then estimated speedup.
+    """
+    try:
+        return (await analyze_sources(db, [file_request]))[0]
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Code analysis failed: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Analysis failed: {str(e)}"
+        logger.error(f"File analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@router.post("/analyze-files", response_model=AnalyzeFilesResponse)
+@limiter.limit("5/minute")
+async def analyze_files(
+    request: Request,
+    files_request: AnalyzeFilesRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Analyze many modules in one request, e.g. a repository in CI.
+
+    Every function of every file shares one batched embedding pass. Files
+    come back in request order; `findings` ranks the findings of all files.
+    """
+    try:
+        files = await analyze_sources(db, files_request.files)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"File analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    findings = sorted((finding for result in files for finding in result.findings), key=_finding_rank)
+    return AnalyzeFilesResponse(files=files, findings=findings)
+
+
+async def read_profile(profile_request: AnalyzeProfileRequest) -> list[ProfileEntry]:
+    """
+    Parse the submitted profile.
+
+    Raises:
+        ProfileError: If it can't be read in the given format
+    """
+    if profile_request.format == "pstats":
+        try:
+            data = base64.b64decode(profile_request.profile, validate=True)
+        except (binascii.Error, ValueError):
+            raise ProfileError("A pstats profile must be base64-encoded")
+        return await parse_pstats(data)
+    return parse_collapsed(profile_request.profile, profile_request.sample_rate_hz)
+
+
+def _savings(self_time: float, speedup: float) -> float:
+    """Time no longer spent if the function's own work gets `speedup` times faster."""
+    return self_time * (1 - 1 / speedup) if speedup > 1 else 0.0
+
+
+def _percent(part: float, total: float) -> float:
+    return round(100 * part / total, 1) if total else 0.0
+
+
+@router.post("/analyze-profile", response_model=ProfileAnalysisResponse)
+@limiter.limit("5/minute")
+async def analyze_profile(
+    request: Request,
+    profile_request: AnalyzeProfileRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Analyze the hottest functions of a profile.
+
+    Frames of the profile (a cProfile/pstats dump or collapsed stacks, e.g.
+    from py-spy) are attributed to the functions of the submitted files by
+    path suffix and line. Only the `top_n` functions by self time are
+    analyzed like POST /playground/analyze-file; each reports the wall time
+    it would save at its estimated speedup.
+    """
+    try:
+        entries = await read_profile(profile_request)
+    except ProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sources = profile_request.files
+    units = {
+        (sources[unit.file].path or "", unit.name, unit.line): unit
+        for index, source in enumerate(sources)
+        for unit in split_file(index, source)
+    }
+    functions = [SourceFunction(path, name, line, unit.end_line) for (path, name, line), unit in units.items()]
+    hot, unmatched = rank_hot_functions(entries, functions)
+    hot = [spot for spot in hot if spot.self_time > 0][:profile_request.top_n]
+    total = sum(entry.self_time for entry in entries)
+
+    try:
+        analyses = await analyze_units(
+            db,
+            [units[(spot.function.path, spot.function.name, spot.function.line)] for spot in hot]
+        )
+    except Exception as e:
+        logger.error(f"Profile analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+    results = []
+    for spot, analysis in zip(hot, analyses):
+        savings = _savings(spot.self_time, analysis.analysis.speedup)
+        results.append(HotFunctionAnalysis(
+            path=spot.function.path or None,
+            function=analysis,
+            self_time=round(spot.self_time, 6),
+            self_percent=_percent(spot.self_time, total),
+            calls=spot.calls,
+            estimated_savings=round(savings, 6),
+            estimated_savings_percent=_percent(savings, total),
+        ))
+    savings = sum(result.estimated_savings for result in results)
+    return ProfileAnalysisResponse(
+        total_time=round(total, 6),
+        functions=results,
+        estimated_savings=round(savings, 6),
+        estimated_savings_percent=_percent(savings, total),
+        unmatched=[
+            UnmatchedFrameInfo(
+                file=entry.file,
+                line=entry.line,
+                function=entry.function,
+                self_time=round(entry.self_time, 6),
+                self_percent=_percent(entry.self_time, total),
+            )
+            for entry in unmatched[:10]
+            if entry.self_time > 0
+        ],
+    )
+
+
+@router.post("/annotate", response_model=AnnotateResponse)
+@limiter.limit("20/minute")
+async def annotate_code(
+    request: Request,
+    annotate_request: AnnotateRequest,
+):
+    """
+    Annotate each line with its estimated execution count, for a heat map.
+
+    Counts are symbolic in the sizes of the inputs (n, m, ... explained in
+    `sizes`), derived from the loop nests and recursion of each function;
+    allocations (containers, copies, slices, string concatenation) that run
+    more than a constant number of times are listed with their count, those
+    in the deepest loops flagged as hot. Python only.
+    """
+    if annotate_request.language.lower() not in ("python", "py"):
+        raise HTTPException(status_code=400, detail="Line annotations are only available for Python")
+    code = annotate_request.code
+    try:
+        report, costs = await asyncio.gather(
+            asyncio.to_thread(analyze_python, code),
+            asyncio.to_thread(estimate_line_costs, code),
         )
+    except (SyntaxError, ValueError, RecursionError) as e:
+        raise HTTPException(status_code=400, detail=f"Code does not parse: {e}")
+
+    return AnnotateResponse(
+        complexity=ComplexityInfo(time=report.time_complexity, space=report.space_complexity),
+        lines=[LineCostInfo(**asdict(line)) for line in costs.lines],
+        allocations=[AllocationSiteInfo(**asdict(site)) for site in costs.allocations],
+        sizes=[SizeSymbolInfo(**asdict(size)) for size in costs.sizes],
+    )
@@ -8,6 +8,8 @@ from sqlalchemy import select, func
 from app.database import get_db
 from app.models.problem import Problem
 from app.schemas.problem import ProblemCreate, ProblemResponse, ProblemList
+from app.services.fingerprints import fingerprint_columns
+from app.services.suggestions import add_suggestion
 
 
 def generate_slug(title: str) -> str:
@@ -102,10 +104,14 @@ async def create_problem(
         baseline_complexity_time=problem.baseline_complexity_time,
         baseline_complexity_space=problem.baseline_complexity_space,
         test_cases=problem.test_cases,
+        **fingerprint_columns(problem.baseline_code, problem.baseline_language, prefix="baseline_"),
     )
 
     db.add(db_problem)
     await db.commit()
     await db.refresh(db_problem)
 
+    await add_suggestion("problems", db_problem.title, [db_problem.title, db_problem.slug])
+    await add_suggestion("categories", db_problem.category, [db_problem.category])
+
     return db_problem
@@ -1,18 +1,39 @@
-import math
+import asyncio
+import json
+import logging
 import re
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 from sqlalchemy.orm import joinedload
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_db, async_session
 from app.models.solution import Solution
 from app.models.problem import Problem
-from app.schemas.search import SearchQuery, SearchResult, SearchResultItem
-from app.services.embeddings import get_embedding, translate_query
+from app.schemas.search import BatchSearchQuery, BatchSearchResult, SearchQuery, SearchResult, SearchResultItem
+from app.services.embeddings import get_embedding, get_embeddings_batch, translate_query
+from app.services.embedding_spaces import (
+    EmbeddingSpaceInfo,
+    get_search_space,
+    get_shadow_space_name,
+    get_space,
+    record_shadow_comparison,
+)
+from app.services.ann_index import ann_candidates_cte, get_ann_index
+from app.services.lexical_search import fulltext_cte, title_match_cte
+from app.services.search_cache import lookup_search, store_search
+from app.services.suggestions import lookup_suggestions
+from app.services.rerank import CandidateFeatures, after_cursor, get_scoring_profile, rank
+from app.services.vector_index import apply_search_tier, get_search_tier, nearest_solutions_cte
 from app.limiter import limiter
+from app.utils.pagination import decode_cursor, encode_cursor, estimate_rows, resolve_count_mode
 
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
 
 # Common stop words to filter out when extracting keywords
 STOP_WORDS = {'find', 'get', 'make', 'create', 'how', 'to', 'a', 'the', 'fast',
@@ -32,26 +53,84 @@ def extract_primary_keyword(query: str) -> str:
 router = APIRouter()
 
 
-@router.post("/", response_model=SearchResult)
-@limiter.limit("30/minute")
-async def semantic_search(
-    request: Request,
+def _parse_fields(fields: list[str] | None) -> set[str] | None:
+    """Validate a response field selection; `id` is always included."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields if f.strip()}
+    unknown = requested - set(SearchResultItem.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+
+def _select_fields(result: SearchResult, fields: set[str] | None) -> dict:
+    data = result.model_dump(mode="json")
+    if fields is not None:
+        data["items"] = [{k: v for k, v in item.items() if k in fields} for item in data["items"]]
+    return data
+
+
+def _project(result: SearchResult, fields: set[str] | None) -> SearchResult | JSONResponse:
+    """Return only the selected item fields (bypasses the response model)."""
+    if fields is None:
+        return result
+    return JSONResponse(content=_select_fields(result, fields))
+
+
+def _cursor_sort(query: SearchQuery) -> str:
+    """Sort name stamped on search cursors: the sort order plus the scoring profile."""
+    return f"{query.sort.lower()}:{get_scoring_profile(query.profile).name}"
+
+
+def _search_filters(query: SearchQuery) -> tuple[list[str], dict]:
+    """SQL predicates over `s` (solutions) and `p` (problems) for the query's filters."""
+    filters = []
+    params = {}
+    if query.language:
+        filters.append("s.language = :language")
+        params["language"] = query.language
+    if query.category:
+        filters.append("p.category = :category")
+        params["category"] = query.category
+    if query.min_speedup:
+        filters.append("s.speedup >= :min_speedup")
+        params["min_speedup"] = query.min_speedup
+    return filters, params
+
+
+async def embed_query(translated_query: str, space: EmbeddingSpaceInfo) -> list[float] | None:
+    """Embed a query with the space's model, or None if the model is unavailable."""
+    try:
+        return await get_embedding(translated_query, model_name=space.model)
+    except Exception as e:
+        logger.warning(f"Embedding model unavailable, searching lexically only: {e}")
+        return None
+
+
+async def run_hybrid_search(
+    db: AsyncSession,
     query: SearchQuery,
-    db: AsyncSession = Depends(get_db),
-):
+    translated_query: str,
+    space: EmbeddingSpaceInfo,
+    query_embedding: list[float] | None = None,
+    lexical_only: bool = False,
+) -> SearchResult:
     """
-    Hybrid semantic search for solutions.
-
-    Combines:
-    - Vector embedding similarity (semantic meaning)
-    - Problem title matching (exact relevance)
-    - Speedup bonus (prefer faster solutions)
+    Run the hybrid search against one embedding space and return the requested page.
+
+    Two stages: retrieval of a candidate pool (deeper than the requested page)
+    from the vector index and the two lexical indexes, each with the filters
+    applied inside the scan, then a vectorized re-rank of the whole pool that
+    fuses the three lists, so any page is cut from the same ordering. Only the
+    page is hydrated. A cursor holds the (score, id) of the last item returned
+    and the number of items before it; `total` is the size of the ranked pool,
+    an approximation. If the embedding model is unavailable the search runs
+    on the lexical lists alone (`vector_search` is False), as it does with
+    `lexical_only`. A precomputed `query_embedding` skips the model call.
     """
-    # Translate Russian terms to English for better embedding search
-    translated_query = translate_query(query.query)
-
-    # Generate embedding for the translated query
-    query_embedding = await get_embedding(translated_query)
+    if query_embedding is None and not lexical_only:
+        query_embedding = await embed_query(translated_query, space)
 
     # Extract primary keyword for title matching
     keyword = extract_primary_keyword(translated_query)
@@ -59,101 +138,155 @@ async def semantic_search(
     # Minimum similarity threshold to filter out irrelevant results
     min_similarity = 0.20  # Lowered slightly to allow title matching to boost relevant results
 
-    # Hybrid SQL query with embedding similarity + title matching
-    sql = """
+    sort = query.sort.lower()
+    profile = get_scoring_profile(query.profile)
+    # Cursors hold ranking keys, so they are only valid under the same profile
+    cursor_sort = _cursor_sort(query)
+    after = decode_cursor(query.cursor, cursor_sort) if query.cursor else None
+    start = after.position if after else query.offset
+
+    filters, params = _search_filters(query)
+    tier = get_search_tier(query.tier)
+    # One row past the page tells whether there is a next page
+    pool_size = max(tier.candidates, start + query.limit + 1)
+
+    # Stage 1a: lexical candidates from the full-text and trigram indexes
+    ctes = [fulltext_cte(filters=filters), title_match_cte(filters=filters)]
+    pool = [
+        "SELECT solution_id FROM fulltext",
+        "SELECT solution_id FROM title_matches",
+    ]
+    params.update({
+        "query_text": translated_query,
+        "keyword": keyword,
+        "lexical_candidates": max(settings.lexical_candidates, start + query.limit + 1),
+    })
+
+    # Stage 1b: nearest neighbours matching the filters, from the in-process index
+    # when loaded, else from the HNSW index with the filters inside the scan
+    if query_embedding is not None:
+        ann_index = get_ann_index(space.name)
+        if ann_index:
+            neighbours = await ann_index.search_async(
+                query_embedding, pool_size, language=query.language, category=query.category
+            )
+            ctes.insert(0, ann_candidates_cte())
+            params["candidate_ids"] = [solution_id for solution_id, _ in neighbours]
+            params["candidate_sims"] = [sim for _, sim in neighbours]
+        else:
+            await apply_search_tier(db, tier)
+            ctes.insert(0, nearest_solutions_cte(space, filters=filters))
+            params.update({"embedding": str(query_embedding), "space": space.name, "candidates": pool_size})
+        pool.insert(0, "SELECT solution_id FROM candidates WHERE embedding_sim >= :min_similarity")
+        params["min_similarity"] = min_similarity
+        embedding_sim = "c.embedding_sim"
+        candidates_join = "LEFT JOIN candidates c ON c.solution_id = s.id AND c.embedding_sim >= :min_similarity"
+    else:
+        embedding_sim = "NULL::float8"
+        candidates_join = ""
+
+    # Stage 2: scoring features for the union of the lists
+    sql = f"""
+        WITH {", ".join(ctes)},
+        pool AS (
+            {" UNION ".join(pool)}
+        )
         SELECT
             s.id,
-            s.title,
-            s.code,
-            s.language,
+            {embedding_sim} as embedding_sim,
+            f.fts_score,
+            t.title_score,
             s.speedup,
             s.memory_reduction,
             s.efficiency_score,
-            s.badges,
+            s.readability_score,
             s.vote_count,
-            s.created_at,
-            COALESCE(u.username, 'anonymous') as author_username,
-            p.id as problem_id,
-            p.slug as problem_slug,
-            p.title as problem_title,
-            p.category as problem_category,
-            1 - (s.embedding <=> :embedding) as embedding_sim,
-            COALESCE(similarity(lower(p.title), lower(:query_text)), 0) as title_sim,
-            CASE
-                WHEN lower(p.title) LIKE '%' || :keyword || '%' THEN 0.30
-                WHEN lower(p.slug) LIKE '%' || :keyword || '%' THEN 0.20
-                ELSE 0.0
-            END as keyword_bonus
-        FROM solutions s
-        LEFT JOIN users u ON s.author_id = u.id
+            EXTRACT(EPOCH FROM s.created_at) as created_at
+        FROM pool
+        JOIN solutions s ON s.id = pool.solution_id
         JOIN problems p ON s.problem_id = p.id
-        WHERE s.embedding IS NOT NULL
-        AND 1 - (s.embedding <=> :embedding) >= :min_similarity
+        {candidates_join}
+        LEFT JOIN fulltext f ON f.solution_id = s.id
+        LEFT JOIN title_matches t ON t.solution_id = s.id
+        WHERE TRUE
     """
+    # Filters the in-process index can't apply (and a no-op recheck otherwise)
+    sql += "".join(f" AND {f}" for f in filters)
 
-    params = {
-        "embedding": str(query_embedding),
-        "min_similarity": min_similarity,
-        "query_text": translated_query,
-        "keyword": keyword,
-    }
+    result = await db.execute(text(sql), params)
+    features = CandidateFeatures.from_rows(result.fetchall())
 
-    # Add filters
-    if query.language:
-        sql += " AND s.language = :language"
-        params["language"] = query.language
+    order, scores, keys = rank(features, sort, profile)
+    if after:
+        remaining = after_cursor(features, order, keys, after.key, after.id)
+    else:
+        remaining = order[query.offset:]
+    page = remaining[:query.limit]
+    if len(page) == 0:
+        return SearchResult(
+            items=[], total=len(features), query=query.query, vector_search=query_embedding is not None
+        )
 
-    if query.category:
-        sql += " AND p.category = :category"
-        params["category"] = query.category
+    next_cursor = None
+    if len(remaining) > query.limit:
+        last = page[-1]
+        next_cursor = encode_cursor(cursor_sort, float(keys[last]), features.ids[last], position=start + len(page))
 
-    if query.min_speedup:
-        sql += " AND s.speedup >= :min_speedup"
-        params["min_speedup"] = query.min_speedup
+    page_ids = [str(features.ids[i]) for i in page]
+    page_scores = [round(float(scores[i]), 3) for i in page]  # Return fused relevance score
 
-    # Fetch more results for Python-side re-ranking when using relevance sort
-    fetch_limit = query.limit * 3 if query.sort.lower() == "relevance" else query.limit
-
-    # Apply database-level sorting for non-relevance sorts
-    if query.sort.lower() != "relevance":
-        sort_mapping = {
-            "speedup": "s.speedup DESC NULLS LAST",
-            "votes": "s.vote_count DESC",
-            "recent": "s.created_at DESC",
-        }
-        order_by = sort_mapping.get(query.sort.lower(), "embedding_sim DESC")
-        sql += f" ORDER BY {order_by} LIMIT :limit OFFSET :offset"
-        params["limit"] = query.limit
-        params["offset"] = query.offset
-    else:
-        # For relevance sort, fetch more and re-rank in Python
-        sql += " ORDER BY embedding_sim DESC LIMIT :limit"
-        params["limit"] = fetch_limit
+    # Stage 3: hydrate the page
+    items = await hydrate_search_items(db, page_ids, page_scores)
+    return SearchResult(
+        items=items,
+        total=len(features),
+        query=query.query,
+        next_cursor=next_cursor,
+        vector_search=query_embedding is not None,
+    )
 
-    result = await db.execute(text(sql), params)
-    rows = result.fetchall()
 
-    # Build items with hybrid scoring
-    scored_items = []
-    for row in rows:
-        # Calculate hybrid final score for relevance sorting
-        # Weights: embedding 45%, title match 35%, speedup 20%
-        embedding_sim = float(row.embedding_sim)
-        title_sim = float(row.title_sim)
-        keyword_bonus = float(row.keyword_bonus)
-        speedup_norm = math.log10(max(row.speedup or 1, 1)) / 3.0  # Normalize: 10x=0.33, 100x=0.67, 1000x=1.0
-
-        final_score = (
-            embedding_sim * 0.45 +
-            title_sim * 0.35 +
-            keyword_bonus +
-            speedup_norm * 0.20
-        )
+async def hydrate_search_items(
+    db: AsyncSession,
+    solution_ids: list[str],
+    scores: list[float | None],
+) -> list[SearchResultItem]:
+    """Load result items for ranked ids in one query, keeping their order."""
+    result = await db.execute(
+        text("""
+            SELECT
+                s.id,
+                s.title,
+                s.code_preview,
+                s.language,
+                s.speedup,
+                s.memory_reduction,
+                s.efficiency_score,
+                s.badges,
+                s.vote_count,
+                COALESCE(u.username, 'anonymous') as author_username,
+                p.id as problem_id,
+                p.slug as problem_slug,
+                p.title as problem_title,
+                p.category as problem_category
+            FROM solutions s
+            LEFT JOIN users u ON s.author_id = u.id
+            JOIN problems p ON s.problem_id = p.id
+            WHERE s.id = ANY(CAST(:ids AS uuid[]))
+        """),
+        {"ids": solution_ids},
+    )
+    rows_by_id = {str(row.id): row for row in result.fetchall()}
 
-        item = SearchResultItem(
-            id=str(row.id),
+    items = []
+    for solution_id, score in zip(solution_ids, scores):
+        row = rows_by_id.get(solution_id)
+        if row is None:
+            continue  # deleted since it was ranked
+        items.append(SearchResultItem(
+            id=solution_id,
             title=row.title,
-            code_preview=row.code[:200] + "..." if len(row.code) > 200 else row.code,
+            code_preview=row.code_preview or "",
             language=row.language,
             speedup=row.speedup,
             memory_reduction=row.memory_reduction,
@@ -165,33 +298,248 @@ async def semantic_search(
             problem_slug=row.problem_slug,
             problem_title=row.problem_title,
             problem_category=row.problem_category,
-            similarity_score=round(final_score, 3),  # Return hybrid score
+            similarity_score=score,
+        ))
+    return items
+
+
+async def _record_shadow_search(
+    query: SearchQuery,
+    translated_query: str,
+    primary_space: str,
+    shadow_space_name: str,
+    primary_ids: list[str],
+) -> None:
+    """Run the query against the shadow space and store the result overlap."""
+    try:
+        async with async_session() as db:
+            shadow_space = await get_space(db, shadow_space_name)
+            if not shadow_space:
+                logger.warning(f"Shadow embedding space '{shadow_space_name}' is not registered")
+                return
+            shadow_result = await run_hybrid_search(db, query, translated_query, shadow_space)
+            await record_shadow_comparison(
+                db,
+                query=query.query,
+                primary_space=primary_space,
+                shadow_space=shadow_space.name,
+                primary_ids=primary_ids,
+                shadow_ids=[item.id for item in shadow_result.items],
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Shadow search against '{shadow_space_name}' failed: {e}")
+
+
+@router.post("/", response_model=SearchResult)
+@limiter.limit("30/minute")
+async def semantic_search(
+    request: Request,
+    query: SearchQuery,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Hybrid semantic search for solutions.
+
+    Combines, by reciprocal rank fusion:
+    - Vector embedding similarity (semantic meaning)
+    - Full-text matches on solution title/description/tags
+    - Problem title matching (exact relevance)
+    plus quality features weighted by the scoring profile (`profile`; the
+    default adds a speedup bonus to prefer faster solutions).
+
+    Vectors come from the embedding space that currently serves search; when a
+    shadow space is configured the same query is replayed against it in the
+    background to measure result overlap before a cutover.
+    """
+    fields = _parse_fields(query.fields)
+    space = await get_search_space(db)
+
+    # Repeated requests reuse the cached ranking and only hydrate the ids
+    cached, versions = await lookup_search(query, space.name)
+    if cached:
+        items = await hydrate_search_items(db, cached.ids, cached.scores)
+        result = SearchResult(items=items, total=cached.total, query=query.query, next_cursor=cached.next_cursor)
+        return _project(result, fields)
+
+    # Translate Russian terms to English for better embedding search
+    translated_query = translate_query(query.query)
+
+    result = await run_hybrid_search(db, query, translated_query, space)
+    # Lexical-only fallbacks are not cached, so results recover with the model
+    if versions is not None and result.vector_search:
+        await store_search(query, space.name, versions, result)
+
+    shadow_space_name = get_shadow_space_name(space)
+    if shadow_space_name:
+        background_tasks.add_task(
+            _record_shadow_search,
+            query,
+            translated_query,
+            space.name,
+            shadow_space_name,
+            [item.id for item in result.items],
         )
-        scored_items.append((item, final_score))
 
-    # Re-rank by hybrid score for relevance sort
-    if query.sort.lower() == "relevance":
-        scored_items.sort(key=lambda x: x[1], reverse=True)
-        # Apply pagination after re-ranking
-        scored_items = scored_items[query.offset:query.offset + query.limit]
+    return _project(result, fields)
 
-    items = [item for item, _ in scored_items]
 
-    return SearchResult(
-        items=items,
-        total=len(items),
-        query=query.query,
+async def embed_queries(translated_queries: list[str], space: EmbeddingSpaceInfo) -> list[list[float] | None]:
+    """Embed many queries in one batched forward pass (all None if the model is unavailable)."""
+    if not translated_queries:
+        return []
+    try:
+        return await get_embeddings_batch(translated_queries, model_name=space.model)
+    except Exception as e:
+        logger.warning(f"Embedding model unavailable, searching lexically only: {e}")
+        return [None] * len(translated_queries)
+
+
+@router.post("/batch", response_model=BatchSearchResult)
+@limiter.limit("10/minute")
+async def batch_search(
+    request: Request,
+    batch: BatchSearchQuery,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Run many searches in one request.
+
+    Cached queries are answered from the search cache; the others are
+    embedded in one batched forward pass and searched concurrently on up to
+    `search_batch_concurrency` connections. Each result is the page POST
+    /search/ would return for that query, in request order.
+    """
+    fields = [_parse_fields(query.fields) for query in batch.queries]
+    space = await get_search_space(db)
+
+    lookups = await asyncio.gather(*(lookup_search(query, space.name) for query in batch.queries))
+    results: list[SearchResult | None] = [None] * len(batch.queries)
+    for i, (cached, _) in enumerate(lookups):
+        if cached:
+            items = await hydrate_search_items(db, cached.ids, cached.scores)
+            results[i] = SearchResult(
+                items=items, total=cached.total, query=batch.queries[i].query, next_cursor=cached.next_cursor
+            )
+
+    misses = [i for i, result in enumerate(results) if result is None]
+    translated = {i: translate_query(batch.queries[i].query) for i in misses}
+    embeddings = await embed_queries([translated[i] for i in misses], space)
+
+    semaphore = asyncio.Semaphore(settings.search_batch_concurrency)
+
+    async def search_one(i: int, query_embedding: list[float] | None) -> None:
+        query = batch.queries[i]
+        async with semaphore, async_session() as session:
+            result = await run_hybrid_search(
+                session, query, translated[i], space,
+                query_embedding=query_embedding, lexical_only=query_embedding is None,
+            )
+        versions = lookups[i][1]
+        if versions is not None and result.vector_search:
+            await store_search(query, space.name, versions, result)
+        results[i] = result
+
+    await asyncio.gather(*(search_one(i, embedding) for i, embedding in zip(misses, embeddings)))
+
+    if all(selected is None for selected in fields):
+        return BatchSearchResult(results=results)
+    return JSONResponse(content={
+        "results": [_select_fields(result, selected) for result, selected in zip(results, fields)],
+    })
+
+
+# Media types of the streaming search formats
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _stream_event(event: str, data: dict, format: str) -> str:
+    if format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+@router.post("/stream")
+@limiter.limit("30/minute")
+async def stream_search(
+    request: Request,
+    query: SearchQuery,
+    format: str = Query("ndjson", regex="^(ndjson|sse)$"),
+):
+    """
+    Hybrid search that streams results as they become available.
+
+    Emits a `lexical` event with the full-text and title matches while the
+    query is still being embedded, then a `results` event with the final
+    fused ordering (the same page POST /search/ returns), as NDJSON lines of
+    {"event", "data"} or as Server-Sent Events. Cached queries and cursor
+    pages emit `results` only; a failure ends the stream with an `error` event.
+    """
+    fields = _parse_fields(query.fields)
+    if query.cursor:
+        decode_cursor(query.cursor, _cursor_sort(query))  # reject bad cursors before streaming
+
+    async def events():
+        async with async_session() as db:
+            try:
+                space = await get_search_space(db)
+                cached, versions = await lookup_search(query, space.name)
+                if cached:
+                    items = await hydrate_search_items(db, cached.ids, cached.scores)
+                    result = SearchResult(
+                        items=items, total=cached.total, query=query.query, next_cursor=cached.next_cursor
+                    )
+                    yield _stream_event("results", _select_fields(result, fields), format)
+                    return
+
+                translated_query = translate_query(query.query)
+                # The model runs in a worker thread while the lexical stage queries the database
+                embedding = asyncio.create_task(embed_query(translated_query, space))
+                try:
+                    if not query.cursor:
+                        lexical = await run_hybrid_search(db, query, translated_query, space, lexical_only=True)
+                        lexical.next_cursor = None  # pages continue from the final ordering
+                        yield _stream_event("lexical", _select_fields(lexical, fields), format)
+                    query_embedding = await embedding
+                finally:
+                    embedding.cancel()
+
+                result = await run_hybrid_search(
+                    db, query, translated_query, space,
+                    query_embedding=query_embedding, lexical_only=query_embedding is None,
+                )
+                if versions is not None and result.vector_search:
+                    await store_search(query, space.name, versions, result)
+                yield _stream_event("results", _select_fields(result, fields), format)
+            except Exception as e:
+                logger.error(f"Streaming search failed: {e}")
+                yield _stream_event("error", {"detail": "Search failed"}, format)
+
+    return StreamingResponse(
+        events(),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @router.get("/suggestions")
 async def search_suggestions(
     q: str,
-    limit: int = 5,
+    limit: int = Query(5, ge=1, le=20),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get search suggestions based on partial query."""
-    # Simple full-text search for suggestions
+    """
+    Get search suggestions based on partial query.
+
+    Served from the prefix index in app/services/suggestions.py; matches
+    word starts of titles, slugs, categories and popular queries.
+    """
+    suggestions = await lookup_suggestions(q, limit)
+    if suggestions is not None:
+        return suggestions
+
+    # Index unavailable (Redis down or not built yet): scan the tables
     result = await db.execute(
         select(Problem.title)
         .where(Problem.title.ilike(f"%{q}%"))
@@ -209,9 +557,19 @@ async def search_suggestions(
     return {
         "problems": problems,
         "solutions": solutions,
+        "categories": [],
+        "queries": [],
     }
 
 
+# Non-null sort keys for category listings; ties broken by id (see app/utils/pagination.py)
+CATEGORY_SORT_KEYS = {
+    "speedup": "COALESCE(s.speedup, '-Infinity'::float8)",  # NULLS LAST
+    "votes": "COALESCE(s.vote_count, 0)",
+    "recent": "s.created_at",
+}
+
+
 @router.get("/by-category", response_model=SearchResult)
 async def search_by_category(
     category: str,
@@ -219,14 +577,38 @@ async def search_by_category(
     sort: str = "speedup",
     limit: int = 20,
     offset: int = 0,
+    cursor: str | None = None,
+    count: str | None = Query(None, regex="^(exact|approximate|none)$"),
+    fields: str | None = None,  # Comma-separated item fields to return
     db: AsyncSession = Depends(get_db),
 ):
-    """Get solutions filtered by category (no semantic search)."""
-    sql = """
+    """
+    Get solutions filtered by category (no semantic search).
+
+    Pass `next_cursor` from the previous page as `cursor` to page by keyset;
+    `offset` is still accepted for the first pages. Totals are exact on the
+    first page by default; `count=approximate` uses the planner's estimate.
+    """
+    selected_fields = _parse_fields(fields.split(",") if fields else None)
+
+    # Default to speedup for category search (also for "relevance")
+    sort = sort.lower() if sort.lower() in CATEGORY_SORT_KEYS else "speedup"
+    sort_key = CATEGORY_SORT_KEYS[sort]
+
+    where = " WHERE p.category = :category"
+    params: dict = {"category": category}
+
+    if language:
+        where += " AND s.language = :language"
+        params["language"] = language
+    # Cursors continue only the listing they were issued for
+    cursor_filters = {"category": category, "language": language}
+
+    sql = f"""
         SELECT
             s.id,
             s.title,
-            s.code,
+            s.code_preview,
             s.language,
             s.speedup,
             s.memory_reduction,
@@ -238,51 +620,54 @@ async def search_by_category(
             p.id as problem_id,
             p.slug as problem_slug,
             p.title as problem_title,
-            p.category as problem_category
+            p.category as problem_category,
+            {sort_key} as sort_key
         FROM solutions s
         LEFT JOIN users u ON s.author_id = u.id
         JOIN problems p ON s.problem_id = p.id
-        WHERE p.category = :category
+        {where}
     """
-    params: dict = {"category": category}
-
-    if language:
-        sql += " AND s.language = :language"
-        params["language"] = language
-
-    # Apply sorting
-    sort_mapping = {
-        "speedup": "s.speedup DESC NULLS LAST",
-        "votes": "s.vote_count DESC",
-        "recent": "s.created_at DESC",
-        "relevance": "s.speedup DESC NULLS LAST",  # Default to speedup for category search
-    }
-    order_by = sort_mapping.get(sort.lower(), "s.speedup DESC NULLS LAST")
-    sql += f" ORDER BY {order_by} LIMIT :limit OFFSET :offset"
-    params["limit"] = limit
-    params["offset"] = offset
-
-    result = await db.execute(text(sql), params)
+    page_params = dict(params)
+    if cursor:
+        after = decode_cursor(cursor, sort, cursor_filters)
+        sql += f" AND ({sort_key}, s.id) < (:cursor_key, CAST(:cursor_id AS uuid))"
+        page_params["cursor_key"] = after.key
+        page_params["cursor_id"] = after.id
+
+    # Fetch one extra row to know whether there is a next page
+    sql += f" ORDER BY {sort_key} DESC, s.id DESC LIMIT :limit"
+    page_params["limit"] = limit + 1
+    if not cursor:
+        sql += " OFFSET :offset"
+        page_params["offset"] = offset
+
+    result = await db.execute(text(sql), page_params)
     rows = result.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, rows[-1].sort_key, rows[-1].id, filters=cursor_filters)
 
     # Count total
-    count_sql = """
-        SELECT COUNT(*) FROM solutions s
+    count_mode = resolve_count_mode(count, cursor)
+    count_from = f"""
+        FROM solutions s
         JOIN problems p ON s.problem_id = p.id
-        WHERE p.category = :category
+        {where}
     """
-    if language:
-        count_sql += " AND s.language = :language"
-
-    count_result = await db.execute(text(count_sql), {"category": category, "language": language} if language else {"category": category})
-    total = count_result.scalar() or 0
+    total = None
+    if count_mode == "exact":
+        count_result = await db.execute(text(f"SELECT COUNT(*) {count_from}"), params)
+        total = count_result.scalar() or 0
+    elif count_mode == "approximate":
+        total = await estimate_rows(db, f"SELECT 1 {count_from}", params)
 
     items = []
     for row in rows:
         items.append(SearchResultItem(
             id=str(row.id),
             title=row.title,
-            code_preview=row.code[:200] + "..." if len(row.code) > 200 else row.code,
+            code_preview=row.code_preview or "",
             language=row.language,
             speedup=row.speedup,
             memory_reduction=row.memory_reduction,
@@ -297,8 +682,10 @@ async def search_by_category(
             similarity_score=None,
         ))
 
-    return SearchResult(
+    result = SearchResult(
         items=items,
         total=total,
         query=f"category:{category}",
+        next_cursor=next_cursor,
     )
+    return _project(result, selected_fields)
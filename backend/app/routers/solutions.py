@@ -4,7 +4,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy import select, func, text, tuple_, literal
 from sqlalchemy.orm import joinedload
 
 from app.database import get_db
@@ -13,7 +13,13 @@ from app.models.problem import Problem
 from app.schemas.solution import SolutionCreate, SolutionResponse, SolutionList
 from app.limiter import limiter
 from app.services.benchmark_runner import calculate_readability_score, extract_dependencies
+from app.services.embedding_outbox import add_to_outbox, schedule_outbox_drain
+from app.services.fingerprints import fingerprint_columns
+from app.services.playground_cache import bump_playground_versions
+from app.services.search_cache import bump_search_versions, invalidate_solutions
+from app.services.suggestions import add_suggestion
 from app.utils.jwt import get_current_user
+from app.utils.pagination import decode_cursor, encode_cursor, estimate_rows, resolve_count_mode
 from app.utils.github import create_gist, GitHubOAuthError
 from app.models.user import User
 
@@ -21,6 +27,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Non-null sort keys for listings; ties broken by id (see app/utils/pagination.py)
+SOLUTION_SORT_KEYS = {
+    "votes": func.coalesce(Solution.vote_count, 0),
+    "speedup": func.coalesce(Solution.speedup, float("-inf")),  # NULLS LAST
+    "memory": func.coalesce(Solution.memory_reduction, float("-inf")),
+    "efficiency": func.coalesce(Solution.efficiency_score, float("-inf")),
+    "recent": Solution.created_at,
+}
+
 
 def normalize_code_for_duplicate_check(code: str, language: str = "python") -> str:
     """
@@ -139,57 +154,64 @@ async def list_solutions(
     min_memory_reduction: float | None = None,
     badges: str | None = None,  # Comma-separated badges
     sort_by: str = Query("votes", regex="^(votes|speedup|memory|efficiency|recent)$"),
+    cursor: str | None = None,
+    count: str | None = Query(None, regex="^(exact|approximate|none)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List solutions with pagination and filters."""
-    query = select(Solution).options(joinedload(Solution.author), joinedload(Solution.problem))
+    """
+    List solutions with pagination and filters.
 
+    `cursor` (the `next_cursor` of the previous page) pages by keyset and
+    takes precedence over `page`. Totals are exact on the first page by
+    default; `count=approximate` uses the planner's estimate.
+    """
+    filters = []
     if problem_id:
-        query = query.where(Solution.problem_id == problem_id)
+        filters.append(Solution.problem_id == problem_id)
     if language:
-        query = query.where(Solution.language == language)
+        filters.append(Solution.language == language)
     if min_speedup:
-        query = query.where(Solution.speedup >= min_speedup)
+        filters.append(Solution.speedup >= min_speedup)
     if min_memory_reduction:
-        query = query.where(Solution.memory_reduction >= min_memory_reduction)
+        filters.append(Solution.memory_reduction >= min_memory_reduction)
     if badges:
         # Filter by any of the specified badges
         badge_list = [b.strip() for b in badges.split(",")]
-        query = query.where(Solution.badges.overlap(badge_list))
-
-    # Sorting
-    if sort_by == "votes":
-        query = query.order_by(Solution.vote_count.desc())
-    elif sort_by == "speedup":
-        query = query.order_by(Solution.speedup.desc().nullslast())
-    elif sort_by == "memory":
-        query = query.order_by(Solution.memory_reduction.desc().nullslast())
-    elif sort_by == "efficiency":
-        query = query.order_by(Solution.efficiency_score.desc().nullslast())
-    else:  # recent
-        query = query.order_by(Solution.created_at.desc())
-
-    # Count total - build separate count query with same filters
-    count_query = select(func.count()).select_from(Solution)
-    if problem_id:
-        count_query = count_query.where(Solution.problem_id == problem_id)
-    if language:
-        count_query = count_query.where(Solution.language == language)
-    if min_speedup:
-        count_query = count_query.where(Solution.speedup >= min_speedup)
-    if min_memory_reduction:
-        count_query = count_query.where(Solution.memory_reduction >= min_memory_reduction)
-    if badges:
-        badge_list = [b.strip() for b in badges.split(",")]
-        count_query = count_query.where(Solution.badges.overlap(badge_list))
-    total = await db.scalar(count_query) or 0
+        filters.append(Solution.badges.overlap(badge_list))
 
-    # Paginate
-    query = query.offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    solutions = result.scalars().unique().all()
+    # Sorting: non-null key DESC, then id DESC so the keyset matches the ORDER BY
+    sort_key = SOLUTION_SORT_KEYS[sort_by]
+    query = (
+        select(Solution, sort_key.label("sort_key"))
+        .options(joinedload(Solution.author), joinedload(Solution.problem))
+        .where(*filters)
+        .order_by(sort_key.desc(), Solution.id.desc())
+    )
+
+    if cursor:
+        after = decode_cursor(cursor, sort_by)
+        query = query.where(tuple_(sort_key, Solution.id) < tuple_(literal(after.key), literal(UUID(after.id))))
+    else:
+        query = query.offset((page - 1) * size)
+
+    # Count total - same filters, no joins or ordering
+    count_mode = resolve_count_mode(count, cursor)
+    total = None
+    if count_mode == "exact":
+        total = await db.scalar(select(func.count()).select_from(Solution).where(*filters)) or 0
+    elif count_mode == "approximate":
+        total = await estimate_rows(db, select(Solution.id).where(*filters))
 
-    return SolutionList(items=solutions, total=total, page=page, size=size)
+    # Paginate (one extra row tells whether there is a next page)
+    result = await db.execute(query.limit(size + 1))
+    rows = result.unique().all()
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(sort_by, rows[-1].sort_key, rows[-1].Solution.id)
+    solutions = [row.Solution for row in rows]
+
+    return SolutionList(items=solutions, total=total, page=page, size=size, next_cursor=next_cursor)
 
 
 @router.get("/{solution_id}", response_model=SolutionResponse)
@@ -262,12 +284,22 @@ async def create_solution(
         cyclomatic_complexity=complexity,
         dependencies=deps,
         has_external_deps=has_external,
+        **fingerprint_columns(solution.code, solution.language),
     )
 
     db.add(db_solution)
+    await db.flush()
+    # Queue embedding in the same transaction so it survives a broker outage
+    add_to_outbox(db, db_solution.id)
     await db.commit()
     await db.refresh(db_solution)
 
+    await schedule_outbox_drain()
+    await bump_search_versions([(problem.category, solution.language)])
+    await bump_playground_versions([(problem.id, solution.language)])
+    await add_suggestion("solutions", db_solution.title, [db_solution.title])
+    await add_suggestion("problems", problem.title, [problem.title, problem.slug])
+
     return db_solution
 
 
@@ -290,6 +322,9 @@ async def vote_solution(
     solution.vote_count += value
     await db.commit()
 
+    # Vote counts feed the `votes` sort
+    await invalidate_solutions(db, [solution.id])
+
     return {"vote_count": solution.vote_count}
 
 
@@ -394,12 +429,19 @@ async def create_new_version(
         cyclomatic_complexity=complexity,
         dependencies=deps,
         has_external_deps=has_external,
+        **fingerprint_columns(code, parent.language),
     )
 
     db.add(db_solution)
+    await db.flush()
+    add_to_outbox(db, db_solution.id)
     await db.commit()
     await db.refresh(db_solution, ["author", "problem"])
 
+    await schedule_outbox_drain()
+    await bump_search_versions([(parent.problem.category, parent.language)])
+    await bump_playground_versions([(parent.problem_id, parent.language)])
+
     logger.info(f"Created version {db_solution.version} of solution {root_id}")
 
     return db_solution
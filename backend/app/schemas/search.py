@@ -9,8 +9,12 @@ class SearchQuery(BaseModel):
     min_memory_reduction: float | None = None
     badges: list[str] | None = None  # Filter by badges
     sort: str = Field(default="relevance")  # relevance, speedup, memory, efficiency, votes, recent
+    tier: str | None = None  # Recall/latency tier: fast, balanced, accurate
+    profile: str | None = None  # Scoring profile: balanced, relevance-only, speed-first, memory-first, community
     limit: int = Field(default=20, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
+    cursor: str | None = None  # next_cursor of the previous page; takes precedence over offset
+    fields: list[str] | None = None  # Return only these item fields (id is always included)
 
 
 class SearchResultItem(BaseModel):
@@ -39,5 +43,15 @@ class SearchResultItem(BaseModel):
 
 class SearchResult(BaseModel):
     items: list[SearchResultItem]
-    total: int
+    total: int | None  # None when not counted (cursor pages); approximate for semantic search
     query: str
+    next_cursor: str | None = None
+    vector_search: bool = True  # False when the embedding model was down and only lexical matches were used
+
+
+class BatchSearchQuery(BaseModel):
+    queries: list[SearchQuery] = Field(..., min_length=1, max_length=100)
+
+
+class BatchSearchResult(BaseModel):
+    results: list[SearchResult]  # In request order
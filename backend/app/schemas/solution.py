@@ -94,9 +94,10 @@ class SolutionResponse(SolutionBase):
 
 class SolutionList(BaseModel):
     items: list[SolutionResponse]
-    total: int
+    total: int | None  # None when not counted (cursor pages)
     page: int
     size: int
+    next_cursor: str | None = None
 
 
 class SolutionStats(BaseModel):
@@ -0,0 +1,452 @@
+"""
+In-process vector index used as a fast path for search candidates.
+
+Postgres stays the source of truth. When `ann_index_enabled` is set, each API
+process loads the vectors of the search space at startup into a float16
+matrix memory-mapped from `ann_index_dir`, and answers nearest-neighbour
+queries with a blocked NumPy scan, so only the id hydration and text scoring
+hit the database. A trigger on `solution_embeddings` publishes changes with
+NOTIFY; a listener applies them in small batches. If the listener connection
+drops (notifications may have been missed) or the search space changes, the
+index is rebuilt, and search falls back to the pgvector path meanwhile.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import async_session
+from app.services.embedding_spaces import EmbeddingSpaceInfo, get_search_space
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel fed by the trigger from migration 007
+CHANGES_CHANNEL = "solution_embedding_changes"
+
+# Rows fetched per query while loading, and rows scored per block while searching
+LOAD_PAGE_SIZE = 5000
+SEARCH_BLOCK_SIZE = 65536
+
+# Vector plus the attributes filtered on in the index
+INDEXED_COLUMNS = "se.solution_id, se.embedding::text AS embedding, s.language, p.category"
+
+
+def parse_vector(value: str) -> np.ndarray:
+    """Parse pgvector's text form '[0.1,0.2,...]'."""
+    return np.array(value.strip("[]").split(","), dtype=np.float32)
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True)
+class _Rows:
+    """
+    The changeable part of an index. Never modified in place: changes build a
+    new instance and publish it with one assignment, so a search running in a
+    worker thread reads one consistent version from start to end.
+    """
+    alive: np.ndarray  # loaded rows still current
+    extra_ids: tuple[str, ...]  # vectors changed after loading
+    extra_positions: dict[str, int]
+    extra: np.ndarray
+    extra_alive: np.ndarray
+    extra_languages: np.ndarray
+    extra_categories: np.ndarray
+
+
+class AnnIndex:
+    """
+    Cosine nearest-neighbour index over the vectors of one embedding space.
+
+    The bulk of the vectors lives in a read-only (memory-mapped) float16
+    matrix; vectors changed after loading go to a small in-memory overflow
+    matrix and their old rows are masked out. Each row also carries the
+    solution's language and problem category, so filtered queries are
+    answered from a pre-filter mask instead of post-filtering the top-k.
+    """
+
+    def __init__(
+        self,
+        space: EmbeddingSpaceInfo,
+        ids: list[str],
+        matrix: np.ndarray,
+        languages: list[str] | None = None,
+        categories: list[str] | None = None,
+    ):
+        self.space = space
+        self._ids = ids
+        self._positions = {solution_id: i for i, solution_id in enumerate(ids)}
+        self._matrix = matrix
+        self._codes: dict[str, int] = {}
+        self._languages = self._encode(languages or [""] * len(ids))
+        self._categories = self._encode(categories or [""] * len(ids))
+        self._rows = _Rows(
+            alive=np.ones(len(ids), dtype=bool),
+            extra_ids=(),
+            extra_positions={},
+            extra=np.empty((0, space.dim), dtype=np.float16),
+            extra_alive=np.empty(0, dtype=bool),
+            extra_languages=np.empty(0, dtype=np.int32),
+            extra_categories=np.empty(0, dtype=np.int32),
+        )
+
+    def _code(self, value: str | None) -> int:
+        return self._codes.setdefault((value or "").lower(), len(self._codes))
+
+    def _encode(self, values: list[str]) -> np.ndarray:
+        return np.array([self._code(v) for v in values], dtype=np.int32)
+
+    def __len__(self) -> int:
+        rows = self._rows
+        return int(rows.alive.sum() + rows.extra_alive.sum())
+
+    def apply(
+        self,
+        upserts: Iterable[tuple[str, Any, str, str]] = (),
+        removes: Iterable[str] = (),
+    ) -> None:
+        """Apply (solution_id, vector, language, category) upserts and removals as one change."""
+        rows = self._rows
+        alive = rows.alive.copy()
+        extra_ids = list(rows.extra_ids)
+        extra_positions = dict(rows.extra_positions)
+        extra = rows.extra.copy()
+        extra_alive = rows.extra_alive.copy()
+        extra_languages = rows.extra_languages.copy()
+        extra_categories = rows.extra_categories.copy()
+        added_vectors, added_languages, added_categories = [], [], []
+
+        for solution_id in removes:
+            position = self._positions.get(solution_id)
+            if position is not None:
+                alive[position] = False
+            extra_position = extra_positions.get(solution_id)
+            if extra_position is not None:
+                extra_alive[extra_position] = False
+
+        for solution_id, vector, language, category in upserts:
+            vector = _normalize(vector).astype(np.float16)
+            if vector.shape != (self.space.dim,):
+                continue
+            position = self._positions.get(solution_id)
+            if position is not None:
+                alive[position] = False
+            extra_position = extra_positions.get(solution_id)
+            if extra_position is not None and extra_position < len(extra):
+                extra[extra_position] = vector
+                extra_alive[extra_position] = True
+                extra_languages[extra_position] = self._code(language)
+                extra_categories[extra_position] = self._code(category)
+            elif extra_position is not None:
+                # Added earlier in this same batch
+                added = extra_position - len(extra)
+                added_vectors[added] = vector
+                added_languages[added] = self._code(language)
+                added_categories[added] = self._code(category)
+            else:
+                extra_positions[solution_id] = len(extra_ids)
+                extra_ids.append(solution_id)
+                added_vectors.append(vector)
+                added_languages.append(self._code(language))
+                added_categories.append(self._code(category))
+
+        if added_vectors:
+            extra = np.vstack([extra, np.stack(added_vectors)])
+            extra_alive = np.append(extra_alive, np.ones(len(added_vectors), dtype=bool))
+            extra_languages = np.append(extra_languages, np.array(added_languages, dtype=np.int32))
+            extra_categories = np.append(extra_categories, np.array(added_categories, dtype=np.int32))
+        self._rows = _Rows(
+            alive=alive,
+            extra_ids=tuple(extra_ids),
+            extra_positions=extra_positions,
+            extra=extra,
+            extra_alive=extra_alive,
+            extra_languages=extra_languages,
+            extra_categories=extra_categories,
+        )
+
+    def upsert(self, solution_id: str, vector, language: str = "", category: str = "") -> None:
+        self.apply(upserts=[(solution_id, vector, language, category)])
+
+    def remove(self, solution_id: str) -> None:
+        self.apply(removes=[solution_id])
+
+    def _mask(
+        self, alive: np.ndarray, languages: np.ndarray, categories: np.ndarray,
+        language: str | None, category: str | None,
+    ) -> np.ndarray:
+        mask = alive.copy()
+        for value, codes in ((language, languages), (category, categories)):
+            if value:
+                code = self._codes.get(value.lower())
+                if code is None:
+                    return np.zeros_like(alive)
+                mask &= codes == code
+        return mask
+
+    def search(
+        self,
+        query,
+        k: int,
+        language: str | None = None,
+        category: str | None = None,
+    ) -> list[tuple[str, float]]:
+        """Top-k (solution_id, cosine similarity) among rows matching the filters, best first."""
+        if k <= 0:
+            return []
+        query = _normalize(query)
+        if query.shape != (self.space.dim,):
+            raise ValueError(f"Query has {query.shape[0]} dims, space '{self.space.name}' has {self.space.dim}")
+
+        snapshot = self._rows
+        mask = self._mask(snapshot.alive, self._languages, self._categories, language, category)
+        scores = np.full(len(self._ids), -np.inf, dtype=np.float32)
+        for start in range(0, len(self._ids), SEARCH_BLOCK_SIZE):
+            block_mask = mask[start:start + SEARCH_BLOCK_SIZE]
+            if not block_mask.any():
+                continue
+            # Only rows passing the filters are read from the memory map
+            rows = np.flatnonzero(block_mask)
+            block = self._matrix[start + rows]
+            scores[start + rows] = block.astype(np.float32) @ query
+
+        extra_mask = self._mask(
+            snapshot.extra_alive, snapshot.extra_languages, snapshot.extra_categories, language, category
+        )
+        extra_scores = snapshot.extra.astype(np.float32) @ query
+        extra_scores[~extra_mask] = -np.inf
+
+        all_scores = np.concatenate([scores, extra_scores])
+        k = min(k, len(all_scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-all_scores, k - 1)[:k]
+        top = top[np.argsort(-all_scores[top])]
+
+        results = []
+        for i in top:
+            score = float(all_scores[i])
+            if score == -np.inf:
+                break
+            solution_id = self._ids[i] if i < len(self._ids) else snapshot.extra_ids[i - len(self._ids)]
+            results.append((solution_id, score))
+        return results
+
+    async def search_async(
+        self,
+        query,
+        k: int,
+        language: str | None = None,
+        category: str | None = None,
+    ) -> list[tuple[str, float]]:
+        """search() in a worker thread, keeping the event loop free on large indexes."""
+        return await asyncio.to_thread(self.search, query, k, language, category)
+
+
+def ann_candidates_cte(name: str = "candidates") -> str:
+    """
+    CTE with the same shape as vector_index.nearest_solutions_cte, fed by the
+    in-process index. Expects :candidate_ids and :candidate_sims parameters.
+    """
+    return f"""
+        {name} AS (
+            SELECT c.solution_id, c.embedding_sim
+            FROM unnest(CAST(:candidate_ids AS uuid[]), CAST(:candidate_sims AS float8[]))
+                AS c(solution_id, embedding_sim)
+        )
+    """
+
+
+async def load_index(space: EmbeddingSpaceInfo, directory: str | None = None) -> AnnIndex:
+    """Read every vector of `space` from Postgres into a memory-mapped index."""
+    settings = get_settings()
+    directory = directory or settings.ann_index_dir
+    os.makedirs(directory, exist_ok=True)
+    # Per process: several API workers may load the same space at once
+    path = os.path.join(directory, f"{space.name}-{os.getpid()}.npy")
+
+    async with async_session() as db:
+        total = (await db.execute(
+            text("SELECT COUNT(*) FROM solution_embeddings WHERE space = :space"),
+            {"space": space.name},
+        )).scalar()
+
+        matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float16, shape=(total, space.dim))
+        ids: list[str] = []
+        languages: list[str] = []
+        categories: list[str] = []
+        after_id = None
+        while len(ids) < total:
+            sql = f"""
+                SELECT {INDEXED_COLUMNS}
+                FROM solution_embeddings se
+                JOIN solutions s ON s.id = se.solution_id
+                JOIN problems p ON p.id = s.problem_id
+                WHERE se.space = :space
+            """
+            params: dict = {"space": space.name, "limit": LOAD_PAGE_SIZE}
+            if after_id:
+                sql += " AND se.solution_id > :after_id"
+                params["after_id"] = after_id
+            sql += " ORDER BY se.solution_id LIMIT :limit"
+            rows = (await db.execute(text(sql), params)).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if len(ids) == total:
+                    break  # rows inserted during the load arrive as notifications
+                vector = parse_vector(row.embedding)
+                if vector.shape != (space.dim,):
+                    continue
+                matrix[len(ids)] = _normalize(vector)
+                ids.append(str(row.solution_id))
+                languages.append(row.language)
+                categories.append(row.category)
+            after_id = rows[-1].solution_id
+
+    matrix.flush()
+    del matrix
+    loaded = np.load(path, mmap_mode="r")[:len(ids)]
+    # The mapping stays valid after unlinking; the file goes away with the process
+    os.remove(path)
+    logger.info(f"Loaded {len(ids)} vectors of space '{space.name}' into the in-process index")
+    return AnnIndex(space, ids, loaded, languages, categories)
+
+
+class AnnIndexSync:
+    """Keeps the process-wide index loaded and in sync with Postgres."""
+
+    def __init__(self):
+        self.index: AnnIndex | None = None
+        self._pending: dict[str, str] = {}  # solution_id -> "upsert" | "delete"
+        self._task: asyncio.Task | None = None
+        self._connection = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._close_connection()
+        self.index = None
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        change = json.loads(payload)
+        if self.index and change["space"] == self.index.space.name:
+            self._pending[change["solution_id"]] = change["op"]
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        settings = get_settings()
+        dsn = settings.database_url.replace("postgresql+asyncpg://", "postgresql://")
+        self._connection = await asyncpg.connect(dsn)
+        await self._connection.add_listener(CHANGES_CHANNEL, self._on_notification)
+
+    async def _close_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    async def _apply_pending(self) -> None:
+        pending, self._pending = self._pending, {}
+        index = self.index
+        if not pending or not index:
+            return
+        index.apply(removes=[solution_id for solution_id, op in pending.items() if op == "delete"])
+        upserts = [solution_id for solution_id, op in pending.items() if op != "delete"]
+        if not upserts:
+            return
+        async with async_session() as db:
+            result = await db.execute(
+                text(f"""
+                    SELECT {INDEXED_COLUMNS}
+                    FROM solution_embeddings se
+                    JOIN solutions s ON s.id = se.solution_id
+                    JOIN problems p ON p.id = s.problem_id
+                    WHERE se.space = :space AND se.solution_id = ANY(CAST(:ids AS uuid[]))
+                """),
+                {"space": index.space.name, "ids": upserts},
+            )
+            index.apply(upserts=[
+                (str(row.solution_id), parse_vector(row.embedding), row.language, row.category)
+                for row in result.fetchall()
+            ])
+
+    async def _rebuild(self) -> None:
+        """(Re)subscribe, then load: changes during the load are queued, not lost."""
+        self.index = None
+        self._pending = {}
+        await self._close_connection()
+        await self._listen()
+        async with async_session() as db:
+            space = await get_search_space(db)
+        self.index = await load_index(space)
+
+    async def _run(self) -> None:
+        settings = get_settings()
+        while True:
+            try:
+                if self.index is None or self._connection is None or self._connection.is_closed():
+                    await self._rebuild()
+                else:
+                    async with async_session() as db:
+                        space = await get_search_space(db)
+                    if space.name != self.index.space.name:
+                        logger.info(f"Search space changed to '{space.name}', rebuilding in-process index")
+                        await self._rebuild()
+                await self._apply_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"In-process vector index unavailable, search uses pgvector: {e}")
+                self.index = None
+                await self._close_connection()
+                await asyncio.sleep(settings.ann_index_retry_seconds)
+                continue
+            await asyncio.sleep(settings.ann_index_sync_seconds)
+
+
+_sync: AnnIndexSync | None = None
+
+
+async def start_ann_index() -> None:
+    """Start loading and syncing the in-process index if enabled."""
+    global _sync
+    if not get_settings().ann_index_enabled or _sync is not None:
+        return
+    _sync = AnnIndexSync()
+    _sync.start()
+
+
+async def stop_ann_index() -> None:
+    global _sync
+    if _sync is not None:
+        await _sync.stop()
+        _sync = None
+
+
+def get_ann_index(space_name: str) -> AnnIndex | None:
+    """The loaded index for `space_name`, or None if search must use pgvector."""
+    if _sync is None or _sync.index is None or _sync.index.space.name != space_name:
+        return None
+    return _sync.index
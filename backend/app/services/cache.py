@@ -0,0 +1,62 @@
+"""Shared Redis client for caching and task coordination."""
+import asyncio
+import logging
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Lazily created so importing this module never needs a Redis connection.
+# Celery tasks run each call on a fresh event loop, and asyncio connections
+# can't cross loops, so the client is recreated when the loop changes.
+_redis = None
+_redis_loop = None
+
+
+def _retire(client, loop) -> None:
+    """Close a client that belongs to another event loop."""
+    if loop is not None and loop.is_running():
+        # A loop running in another thread: close the connections there
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        # Its loop is gone and can't run the close; code that ends a loop
+        # should await close_redis() first (see tasks._run_async)
+        logger.debug("Dropping a Redis client whose event loop is no longer running")
+
+
+def get_redis():
+    """Get the shared asyncio Redis client."""
+    global _redis, _redis_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _redis is None or _redis_loop is not loop:
+        if _redis is not None:
+            _retire(_redis, _redis_loop)
+        import redis.asyncio as redis
+        settings = get_settings()
+        _redis = redis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+        _redis_loop = loop
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared client's connections; call before its event loop ends."""
+    global _redis, _redis_loop
+    client, loop = _redis, _redis_loop
+    if client is None:
+        return
+    _redis = _redis_loop = None
+    if loop is not asyncio.get_running_loop():
+        _retire(client, loop)
+        return
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.warning(f"Failed to close Redis client: {e}")
@@ -0,0 +1,135 @@
+"""
+Split long solutions into chunks that fit the embedding model's context.
+
+CodeBERT truncates input at 512 tokens, so a long solution embedded as one
+string is represented by its first few lines only. Long solutions are split
+by top-level function/class (Python AST) and oversized pieces, or code that
+cannot be parsed, by overlapping line windows with a token budget. Each chunk
+gets its own vector; similarity to a solution is pooled over its chunks.
+"""
+
+import ast
+import re
+from dataclasses import dataclass
+
+from app.config import get_settings
+
+# Rough proxy for the model's sub-word tokens: identifiers, numbers and punctuation
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass
+class CodeChunk:
+    """A contiguous slice of a solution's code (1-based, inclusive lines)."""
+    index: int
+    start_line: int
+    end_line: int
+    text: str
+
+
+def count_tokens(code: str) -> int:
+    """Approximate number of model tokens in `code`."""
+    return len(_TOKEN_RE.findall(code))
+
+
+def _window_lines(
+    lines: list[str], first_line: int, max_tokens: int, overlap_tokens: int
+) -> list[tuple[int, int]]:
+    """Overlapping windows of whole lines, each at most `max_tokens` (1-based ranges)."""
+    line_tokens = [count_tokens(line) for line in lines]
+    windows = []
+    start = 0
+    while start < len(lines):
+        end = start
+        used = 0
+        while end < len(lines) and (used + line_tokens[end] <= max_tokens or end == start):
+            used += line_tokens[end]
+            end += 1
+        windows.append((first_line + start, first_line + end - 1))
+        if end >= len(lines):
+            break
+        # Step back so consecutive windows share ~overlap_tokens of context
+        back = end
+        shared = 0
+        while back > start + 1 and shared + line_tokens[back - 1] <= overlap_tokens:
+            shared += line_tokens[back - 1]
+            back -= 1
+        start = back
+    return windows
+
+
+def _python_spans(code: str) -> list[tuple[int, int]] | None:
+    """Line spans of top-level functions/classes (methods for large classes)."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    def node_span(node: ast.AST) -> tuple[int, int]:
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno] + [d.lineno for d in decorators])
+        return start, node.end_lineno
+
+    spans = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            spans.append(node_span(node))
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if methods:
+                spans.extend(node_span(m) for m in methods)
+            else:
+                spans.append(node_span(node))
+    return spans
+
+
+def chunk_code(
+    code: str,
+    language: str = "python",
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> list[CodeChunk]:
+    """
+    Split code into chunks of at most `max_tokens`.
+
+    Returns an empty list when the whole solution already fits, since its
+    single vector covers it.
+    """
+    settings = get_settings()
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    overlap_tokens = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+
+    if count_tokens(code) <= max_tokens:
+        return []
+
+    lines = code.splitlines()
+    spans = _python_spans(code) if language.lower() == "python" else None
+    if not spans:
+        spans = [(1, len(lines))]
+
+    def tokens_between(start: int, end: int) -> int:
+        return count_tokens("\n".join(lines[start - 1:end]))
+
+    ranges: list[tuple[int, int]] = []
+    pack: tuple[int, int] | None = None  # consecutive small functions share a chunk
+    for start, end in spans:
+        if tokens_between(start, end) > max_tokens:
+            if pack:
+                ranges.append(pack)
+                pack = None
+            ranges.extend(_window_lines(lines[start - 1:end], start, max_tokens, overlap_tokens))
+        elif pack and tokens_between(pack[0], end) <= max_tokens:
+            pack = (pack[0], end)
+        else:
+            if pack:
+                ranges.append(pack)
+            pack = (start, end)
+    if pack:
+        ranges.append(pack)
+
+    chunks = []
+    for start, end in ranges:
+        chunk_text = "\n".join(lines[start - 1:end]).strip()
+        if chunk_text:
+            chunks.append(CodeChunk(index=len(chunks), start_line=start, end_line=end, text=chunk_text))
+    return chunks
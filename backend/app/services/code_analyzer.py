@@ -0,0 +1,1189 @@
+"""
+AST-based performance analyzer for Python code (used by the playground).
+
+The code is parsed once and walked once. The walker keeps the context every
+check needs (enclosing loops, the current function and its self-calls, and
+what kind of value each local name holds: list, set, dict, str...) and hands
+each node to the rules registered for its type. Rules are small classes that
+yield structured findings with a position and an estimated impact; new
+checks are added by subclassing `Rule` and listing the class in
+`PYTHON_RULES`.
+
+The same walk estimates time and space complexity. Loops over the input
+count as a factor n, loops over a constant range don't, while-loops that
+halve their bound count as log n; linear operations hidden in a loop body
+(`x in some_list`, `.count()`, `.index()`, `.pop(0)`) add a factor n, and
+sorting adds n log n. Recursion is classified per function as linear,
+divide-and-conquer (arguments halve the input) or branching (exponential
+unless memoized).
+
+`estimate_line_costs` applies the same loop and recursion model line by
+line: each line gets a symbolic execution count over the sizes of the
+inputs (n, n², n·m, n log n...) and allocations in loops are reported with
+theirs, for the playground's heat map.
+"""
+
+import ast
+import math
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# Impact levels of findings, most important first
+IMPACT_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+# Method calls that scan a list, i.e. cost O(n) each
+LINEAR_METHODS = {"count", "index", "remove"}
+SORT_FUNCTIONS = {"sorted"}
+MEMOIZE_DECORATORS = {"lru_cache", "cache", "memoize", "cached"}
+
+# Calls that build a new container from their argument
+COPYING_CALLS = {"list", "dict", "set", "tuple", "sorted", "deepcopy", "copy"}
+
+_KIND_CALLS = {
+    "list": "list", "sorted": "list",
+    "set": "set", "frozenset": "set",
+    "dict": "dict", "Counter": "dict", "defaultdict": "dict", "OrderedDict": "dict",
+    "str": "str", "tuple": "tuple", "range": "range", "deque": "deque",
+}
+_KIND_ANNOTATIONS = {
+    "list": "list", "List": "list", "Sequence": "list",
+    "set": "set", "Set": "set", "frozenset": "set", "FrozenSet": "set",
+    "dict": "dict", "Dict": "dict", "Mapping": "dict",
+    "str": "str", "tuple": "tuple", "Tuple": "tuple",
+}
+
+_SUPERSCRIPTS = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+
+
+@dataclass
+class Finding:
+    """A performance issue found in the code (1-based line and column)."""
+    rule: str
+    message: str
+    line: int
+    col: int
+    impact: str  # high, medium or low
+
+
+@dataclass(order=True)
+class Cost:
+    """Growth n^power * log(n)^log, or exponential."""
+    exponential: bool = False
+    power: int = 0
+    log: int = 0
+
+    def times(self, power: int = 0, log: int = 0) -> "Cost":
+        return Cost(self.exponential, self.power + power, self.log + log)
+
+    def label(self) -> str:
+        if self.exponential:
+            return "O(2ⁿ)"
+        if self.power == 0 and self.log == 0:
+            return "O(1)"
+        parts = []
+        if self.power:
+            parts.append("n" if self.power == 1 else "n" + str(self.power).translate(_SUPERSCRIPTS))
+        if self.log:
+            parts.append("log n" if self.log == 1 else f"log{str(self.log).translate(_SUPERSCRIPTS)} n")
+        return f"O({' '.join(parts)})"
+
+
+@dataclass
+class FunctionReport:
+    """Complexity of one function (or method) of the analyzed code."""
+    name: str
+    line: int
+    end_line: int
+    time_complexity: str
+    space_complexity: str
+
+
+@dataclass
+class AnalysisReport:
+    time_complexity: str
+    space_complexity: str
+    findings: list[Finding]
+    functions: list[FunctionReport]
+
+
+@dataclass
+class FunctionSource:
+    """A top-level function or method cut out of a module so it parses on its own."""
+    name: str  # Class.method for methods
+    line: int
+    end_line: int
+    indent: int  # Columns removed from the lines of a method
+    code: str  # Module imports above it, then the function at its original line numbers
+
+
+@dataclass
+class _Loop:
+    node: ast.AST
+    power: int  # 1 for a loop over the input, 0 for a constant or halving loop
+    log: int  # 1 for a halving loop
+
+
+@dataclass
+class _Function:
+    node: ast.FunctionDef | ast.AsyncFunctionDef
+    scope: dict[str, str]
+    params: set[str]
+    memoized: bool
+    self_calls: list[ast.Call] = field(default_factory=list)
+    time: Cost = field(default_factory=Cost)
+    space: Cost = field(default_factory=Cost)
+    count_calls: dict[str, int] = field(default_factory=dict)
+
+
+class AnalysisContext:
+    """State of the tree walk at the node being checked."""
+
+    def __init__(self):
+        self.loops: list[_Loop] = []
+        self.functions: list[_Function] = []
+        self.module_scope: dict[str, str] = {}
+        self.module_count_calls: dict[str, int] = {}
+        self.time = Cost()
+        self.space = Cost()
+        self.function_reports: list[FunctionReport] = []
+
+    @property
+    def function(self) -> _Function | None:
+        return self.functions[-1] if self.functions else None
+
+    @property
+    def in_loop(self) -> bool:
+        return any(loop.power or loop.log for loop in self.loops)
+
+    @property
+    def loop_depth(self) -> int:
+        """Number of enclosing loops over the input."""
+        return sum(loop.power for loop in self.loops)
+
+    @property
+    def retained_depth(self) -> int:
+        """Enclosing comprehension loops: values allocated there are kept, once per iteration."""
+        comprehensions = (ast.ListComp, ast.SetComp, ast.DictComp)
+        return sum(loop.power for loop in self.loops if isinstance(loop.node, comprehensions))
+
+    @property
+    def loop_cost(self) -> Cost:
+        return Cost(power=self.loop_depth, log=sum(loop.log for loop in self.loops))
+
+    def kind_of(self, node: ast.AST) -> str | None:
+        """What kind of value an expression holds, when it can be told statically."""
+        if isinstance(node, (ast.List, ast.ListComp)):
+            return "list"
+        if isinstance(node, (ast.Set, ast.SetComp)):
+            return "set"
+        if isinstance(node, (ast.Dict, ast.DictComp)):
+            return "dict"
+        if isinstance(node, ast.Tuple):
+            return "tuple"
+        if isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+            return "str"
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mult)):
+            left, right = self.kind_of(node.left), self.kind_of(node.right)
+            return left if left in ("str", "list") else right if right in ("str", "list") else None
+        if isinstance(node, ast.Call):
+            return _KIND_CALLS.get(_call_name(node))
+        if isinstance(node, ast.Name):
+            for scope in reversed([self.module_scope] + [f.scope for f in self.functions]):
+                if node.id in scope:
+                    return scope[node.id]
+            if self.function and node.id in self.function.params:
+                return "param"
+        return None
+
+    def bind(self, target: ast.AST, kind: str | None) -> None:
+        if isinstance(target, ast.Name):
+            scope = self.function.scope if self.function else self.module_scope
+            if kind:
+                scope[target.id] = kind
+            else:
+                scope.pop(target.id, None)
+
+    def add_time(self, cost: Cost) -> None:
+        if self.function:
+            self.function.time = max(self.function.time, cost)
+        self.time = max(self.time, cost)
+
+    def add_space(self, cost: Cost) -> None:
+        if self.function:
+            self.function.space = max(self.function.space, cost)
+        self.space = max(self.space, cost)
+
+
+class Rule:
+    """
+    A check run during the analyzer's tree walk.
+
+    Subclasses set `id` and `node_types` and implement `check`, which is
+    called for every node of those types with the walk context at that node.
+    """
+    id: str = ""
+    node_types: tuple[type[ast.AST], ...] = ()
+
+    def check(self, node: ast.AST, ctx: AnalysisContext) -> Iterable[Finding]:
+        return ()
+
+    def finding(self, node: ast.AST, message: str, impact: str) -> Finding:
+        return Finding(rule=self.id, message=message, line=node.lineno, col=node.col_offset + 1, impact=impact)
+
+
+def _call_name(node: ast.Call) -> str | None:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _is_method_call(node: ast.AST, *names: str) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in names
+
+
+def _is_constant_range(node: ast.AST) -> bool:
+    """range(...) over literal bounds, e.g. range(26)."""
+    return (
+        isinstance(node, ast.Call) and _call_name(node) == "range"
+        and all(isinstance(arg, ast.Constant) for arg in node.args)
+    )
+
+
+def _is_string_rebuild(node: ast.Assign, ctx: AnalysisContext) -> bool:
+    """`s = s + x` or `s = x + s` on a string: copies the whole string every time."""
+    if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+        return False
+    value = node.value
+    name = node.targets[0].id
+    return (
+        isinstance(value, ast.BinOp) and isinstance(value.op, ast.Add)
+        and any(isinstance(side, ast.Name) and side.id == name for side in (value.left, value.right))
+        and ctx.kind_of(node.targets[0]) == "str"
+    )
+
+
+def _halves(node: ast.AST) -> bool:
+    """Whether an expression halves something: x // 2, x >> 1, x / 2 or a slice."""
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Slice):
+            return True
+        if isinstance(sub, (ast.BinOp, ast.AugAssign)) and isinstance(sub.op, (ast.FloorDiv, ast.Div, ast.RShift)):
+            return True
+    return False
+
+
+# Rules ---------------------------------------------------------------------
+
+
+class NestedLoopsRule(Rule):
+    id = "nested-loops"
+    node_types = (ast.For, ast.AsyncFor, ast.While)
+
+    def check(self, node, ctx):
+        # Reported once per nest, at the loop that makes it quadratic
+        if ctx.loop_depth == 2 and ctx.loops[-1].node is node and ctx.loops[-1].power:
+            yield self.finding(node, "Consider hash-based approach to reduce nested loops", "high")
+
+
+class ListMembershipRule(Rule):
+    id = "list-membership-in-loop"
+    node_types = (ast.Compare,)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        for op, comparator in zip(node.ops, node.comparators):
+            if not isinstance(op, (ast.In, ast.NotIn)):
+                continue
+            kind = ctx.kind_of(comparator)
+            if kind == "list" and not isinstance(comparator, ast.List):
+                yield self.finding(node, "Use set for O(1) lookup instead of list", "high")
+            elif kind == "param":
+                yield self.finding(
+                    node,
+                    f"Use set for O(1) lookup instead of list (convert '{comparator.id}' once, before the loop)",
+                    "medium",
+                )
+
+
+class RangeLenRule(Rule):
+    id = "range-len"
+    node_types = (ast.For,)
+
+    def check(self, node, ctx):
+        it = node.iter
+        if (
+            isinstance(it, ast.Call) and _call_name(it) == "range" and len(it.args) == 1
+            and isinstance(it.args[0], ast.Call) and _call_name(it.args[0]) == "len"
+        ):
+            yield self.finding(node, "Use enumerate() instead of range(len())", "low")
+
+
+class StringConcatRule(Rule):
+    id = "string-concat-in-loop"
+    node_types = (ast.AugAssign, ast.Assign)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        if isinstance(node, ast.AugAssign):
+            is_concat = isinstance(node.op, ast.Add) and "str" in (ctx.kind_of(node.target), ctx.kind_of(node.value))
+        else:
+            is_concat = _is_string_rebuild(node, ctx)
+        if is_concat:
+            yield self.finding(node, "Use ''.join() for string concatenation", "medium")
+
+
+class RepeatedCountRule(Rule):
+    id = "repeated-count"
+    node_types = (ast.Call,)
+
+    def check(self, node, ctx):
+        if not _is_method_call(node, "count") or ctx.kind_of(node.func.value) == "str":
+            return
+        if ctx.in_loop:
+            yield self.finding(node, "Use collections.Counter instead of count() inside a loop", "high")
+            return
+        calls = ctx.function.count_calls if ctx.function else ctx.module_count_calls
+        receiver = ast.dump(node.func.value)
+        calls[receiver] = calls.get(receiver, 0) + 1
+        if calls[receiver] == 2:
+            yield self.finding(node, "Use collections.Counter instead of multiple count() calls", "medium")
+
+
+class AppendInLoopRule(Rule):
+    id = "append-in-loop"
+    node_types = (ast.For,)
+
+    def check(self, node, ctx):
+        body = node.body
+        if len(body) == 1 and isinstance(body[0], ast.If) and not body[0].orelse:
+            body = body[0].body
+        if (
+            len(body) == 1 and isinstance(body[0], ast.Expr) and _is_method_call(body[0].value, "append")
+            and not node.orelse
+        ):
+            yield self.finding(node, "Consider using list comprehension for better performance", "low")
+
+
+class SortInLoopRule(Rule):
+    id = "sort-in-loop"
+    node_types = (ast.Call,)
+
+    def check(self, node, ctx):
+        if ctx.in_loop and (_call_name(node) in SORT_FUNCTIONS or _is_method_call(node, "sort")):
+            yield self.finding(node, "Sorting inside loop is expensive - consider sorting once", "high")
+
+
+class PopFrontRule(Rule):
+    id = "list-pop-front"
+    node_types = (ast.Call,)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        front = node.args and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0
+        if front and _is_method_call(node, "pop", "insert") and ctx.kind_of(node.func.value) != "deque":
+            yield self.finding(node, "Use collections.deque for O(1) operations at the front of a list", "medium")
+
+
+class DictGetDefaultRule(Rule):
+    id = "dict-get-default"
+    node_types = (ast.If,)
+
+    def check(self, node, ctx):
+        # if key in d: x = d[key] else: x = default
+        test = node.test
+        if not (
+            isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.In)
+            and len(node.body) == 1 and len(node.orelse) == 1
+            and isinstance(node.body[0], ast.Assign) and isinstance(node.orelse[0], ast.Assign)
+        ):
+            return
+        value = node.body[0].value
+        same_target = ast.dump(node.body[0].targets[0]) == ast.dump(node.orelse[0].targets[0])
+        if (
+            same_target and isinstance(value, ast.Subscript)
+            and ast.dump(value.value) == ast.dump(test.comparators[0])
+            and ast.dump(value.slice) == ast.dump(test.left)
+        ):
+            yield self.finding(node, "Use dict.get(key, default) instead of if-else", "low")
+
+
+class IfChainRule(Rule):
+    id = "if-chain"
+    node_types = (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.For, ast.While, ast.If)
+
+    def check(self, node, ctx):
+        # Three or more consecutive `if x == ...` on the same name without elif
+        run: list[ast.If] = []
+        for stmt in node.body + [None]:
+            subject = None
+            if (
+                isinstance(stmt, ast.If) and not stmt.orelse and isinstance(stmt.test, ast.Compare)
+                and isinstance(stmt.test.ops[0], ast.Eq)
+            ):
+                subject = ast.dump(stmt.test.left)
+            if subject is not None and (not run or ast.dump(run[0].test.left) == subject):
+                run.append(stmt)
+                continue
+            if len(run) >= 3:
+                yield self.finding(run[0], "Consider using elif for mutually exclusive conditions", "low")
+            run = [stmt] if subject is not None else []
+
+
+class UnmemoizedRecursionRule(Rule):
+    id = "unmemoized-recursion"
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+    def check(self, node, ctx):
+        # Checked on entry; the self-calls are only known once the body is
+        # walked, so the analyzer calls `check_function` on exit
+        return ()
+
+    def check_function(self, function: _Function) -> Iterable[Finding]:
+        calls = function.self_calls
+        if len(calls) >= 2 and not function.memoized and not any(_halves(call) for call in calls):
+            yield self.finding(
+                function.node,
+                f"Memoize recursive function '{function.node.name}' with functools.lru_cache "
+                "(repeated subproblems make it exponential)",
+                "high",
+            )
+
+
+PYTHON_RULES: list[type[Rule]] = [
+    NestedLoopsRule,
+    ListMembershipRule,
+    RangeLenRule,
+    StringConcatRule,
+    RepeatedCountRule,
+    AppendInLoopRule,
+    SortInLoopRule,
+    PopFrontRule,
+    DictGetDefaultRule,
+    IfChainRule,
+    UnmemoizedRecursionRule,
+]
+
+
+# Walker --------------------------------------------------------------------
+
+
+class PythonAnalyzer:
+    """Walks a module once, running every rule and estimating complexity."""
+
+    def __init__(self, rules: Iterable[type[Rule]] | None = None):
+        self.rules = [rule() for rule in (PYTHON_RULES if rules is None else rules)]
+        self._dispatch: dict[type, list[Rule]] = {}
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                self._dispatch.setdefault(node_type, []).append(rule)
+
+    def analyze(self, code: str) -> AnalysisReport:
+        """
+        Analyze Python source.
+
+        Raises:
+            SyntaxError: If the code can't be parsed
+        """
+        tree = ast.parse(code)
+        ctx = AnalysisContext()
+        findings: list[Finding] = []
+        self._visit(tree, ctx, findings)
+        # One finding per rule and line (e.g. two .count() calls in one condition)
+        findings = list({(f.rule, f.line): f for f in reversed(findings)}.values())
+        findings.sort(key=lambda f: (IMPACT_ORDER[f.impact], f.line, f.col))
+        return AnalysisReport(
+            time_complexity=ctx.time.label(),
+            space_complexity=ctx.space.label(),
+            findings=findings,
+            functions=ctx.function_reports,
+        )
+
+    def _check(self, node: ast.AST, ctx: AnalysisContext, findings: list[Finding]) -> None:
+        for rule in self._dispatch.get(type(node), ()):
+            findings.extend(rule.check(node, ctx))
+
+    def _visit(self, node: ast.AST, ctx: AnalysisContext, findings: list[Finding]) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._visit_function(node, ctx, findings)
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self._visit_all([node.target, node.iter], ctx, findings)
+            ctx.bind(node.target, None)
+            power = 0 if _is_constant_range(node.iter) else 1
+            self._visit_loop(node, _Loop(node, power, 0), node.body, ctx, findings)
+            self._visit_all(node.orelse, ctx, findings)
+        elif isinstance(node, ast.While):
+            self._visit(node.test, ctx, findings)
+            halving = any(_halves(stmt) for stmt in node.body if isinstance(stmt, (ast.Assign, ast.AugAssign)))
+            loop = _Loop(node, 0, 1) if halving else _Loop(node, 1, 0)
+            self._visit_loop(node, loop, node.body, ctx, findings)
+            self._visit_all(node.orelse, ctx, findings)
+        elif isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            self._visit_comprehension(node, ctx, findings)
+        else:
+            self._check(node, ctx, findings)
+            self._account(node, ctx)
+            for child in ast.iter_child_nodes(node):
+                self._visit(child, ctx, findings)
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    ctx.bind(target, ctx.kind_of(node.value))
+            elif isinstance(node, ast.AnnAssign) and node.value is not None:
+                ctx.bind(node.target, ctx.kind_of(node.value) or _annotation_kind(node.annotation))
+
+    def _visit_all(self, nodes: Iterable[ast.AST], ctx: AnalysisContext, findings: list[Finding]) -> None:
+        for node in nodes:
+            self._visit(node, ctx, findings)
+
+    def _visit_loop(
+        self, node: ast.AST, loop: _Loop, body: list[ast.stmt], ctx: AnalysisContext, findings: list[Finding]
+    ) -> None:
+        ctx.loops.append(loop)
+        self._check(node, ctx, findings)
+        ctx.add_time(ctx.loop_cost)
+        self._visit_all(body, ctx, findings)
+        ctx.loops.pop()
+
+    def _visit_comprehension(self, node: ast.AST, ctx: AnalysisContext, findings: list[Finding]) -> None:
+        self._check(node, ctx, findings)
+        # The first iterable is evaluated outside the comprehension's loops
+        self._visit(node.generators[0].iter, ctx, findings)
+        pushed = 0
+        for i, generator in enumerate(node.generators):
+            if i:
+                self._visit(generator.iter, ctx, findings)
+            power = 0 if _is_constant_range(generator.iter) else 1
+            ctx.loops.append(_Loop(node, power, 0))
+            pushed += 1
+            self._visit(generator.target, ctx, findings)
+            self._visit_all(generator.ifs, ctx, findings)
+        ctx.add_time(ctx.loop_cost)
+        if not isinstance(node, ast.GeneratorExp):
+            ctx.add_space(ctx.loop_cost)
+        elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        self._visit_all(elements, ctx, findings)
+        del ctx.loops[len(ctx.loops) - pushed:]
+
+    def _visit_function(self, node, ctx: AnalysisContext, findings: list[Finding]) -> None:
+        self._check(node, ctx, findings)
+        self._visit_all(node.decorator_list, ctx, findings)
+        args = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+        scope = {arg.arg: kind for arg in args if (kind := _annotation_kind(arg.annotation))}
+        memoized = any(
+            (isinstance(d, ast.Call) and _call_name(d) in MEMOIZE_DECORATORS)
+            or (isinstance(d, ast.Name) and d.id in MEMOIZE_DECORATORS)
+            or (isinstance(d, ast.Attribute) and d.attr in MEMOIZE_DECORATORS)
+            for d in node.decorator_list
+        )
+        function = _Function(
+            node=node, scope=scope, params={arg.arg for arg in args} - {"self", "cls"}, memoized=memoized
+        )
+        outer_loops, ctx.loops = ctx.loops, []  # a function body starts a new loop nest
+        ctx.functions.append(function)
+        self._visit_all(node.body, ctx, findings)
+        ctx.functions.pop()
+        ctx.loops = outer_loops
+
+        for rule in self.rules:
+            if isinstance(rule, UnmemoizedRecursionRule):
+                findings.extend(rule.check_function(function))
+        time, space = _recursion_cost(function)
+        ctx.add_time(time)
+        ctx.add_space(space)
+        ctx.function_reports.append(FunctionReport(
+            name=node.name,
+            line=node.lineno,
+            end_line=node.end_lineno or node.lineno,
+            time_complexity=time.label(),
+            space_complexity=space.label(),
+        ))
+
+    def _account(self, node: ast.AST, ctx: AnalysisContext) -> None:
+        """Add the cost of one expression at the current loop depth."""
+        if isinstance(node, ast.Call):
+            name = _call_name(node)
+            function = ctx.function
+            if function and (
+                (isinstance(node.func, ast.Name) and node.func.id == function.node.name)
+                or (
+                    isinstance(node.func, ast.Attribute) and node.func.attr == function.node.name
+                    and isinstance(node.func.value, ast.Name) and node.func.value.id == "self"
+                )
+            ):
+                function.self_calls.append(node)
+            if name in SORT_FUNCTIONS or _is_method_call(node, "sort"):
+                ctx.add_time(ctx.loop_cost.times(power=1, log=1))
+            elif _is_method_call(node, *LINEAR_METHODS) or (
+                _is_method_call(node, "pop", "insert") and node.args
+                and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0
+            ):
+                if ctx.kind_of(node.func.value) not in ("str", "deque"):
+                    ctx.add_time(ctx.loop_cost.times(power=1))
+            if name in COPYING_CALLS:
+                ctx.add_time(ctx.loop_cost.times(power=1))
+                ctx.add_space(Cost(power=ctx.retained_depth + 1))
+            elif _is_method_call(node, "append", "add", "extend", "update", "appendleft"):
+                ctx.add_space(Cost(power=ctx.loop_depth))
+        elif isinstance(node, ast.Compare):
+            for op, comparator in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and ctx.kind_of(comparator) in ("list", "tuple", "param"):
+                    if not isinstance(comparator, (ast.List, ast.Tuple)):  # literals are constant size
+                        ctx.add_time(ctx.loop_cost.times(power=1))
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            ctx.add_time(ctx.loop_cost.times(power=1))
+            ctx.add_space(Cost(power=ctx.retained_depth + 1))
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult) and isinstance(node.left, ast.List):
+            ctx.add_time(ctx.loop_cost.times(power=1))
+            ctx.add_space(Cost(power=ctx.retained_depth + 1))  # [0] * n
+        elif isinstance(node, ast.Assign) and _is_string_rebuild(node, ctx):
+            ctx.add_time(ctx.loop_cost.times(power=1))
+
+
+def _annotation_kind(annotation: ast.AST | None) -> str | None:
+    if isinstance(annotation, ast.Subscript):
+        annotation = annotation.value
+    if isinstance(annotation, ast.Name):
+        return _KIND_ANNOTATIONS.get(annotation.id)
+    if isinstance(annotation, ast.Attribute):
+        return _KIND_ANNOTATIONS.get(annotation.attr)
+    return None
+
+
+def _recursion_cost(function: _Function) -> tuple[Cost, Cost]:
+    """Time and space of a function including its recursion."""
+    body_time, body_space = function.time, function.space
+    calls = function.self_calls
+    if not calls:
+        return body_time, body_space
+    stack = Cost(power=1)
+    if any(_halves(call) for call in calls):
+        stack = Cost(log=1)
+        if len(calls) == 1:
+            # T(n) = T(n/2) + f(n), e.g. binary search
+            time = body_time if body_time.power else body_time.times(log=1)
+        else:
+            # T(n) = 2T(n/2) + f(n), e.g. merge sort
+            time = body_time.times(log=1) if body_time.power == 1 else max(body_time, Cost(power=1))
+    elif len(calls) == 1 or function.memoized:
+        time = body_time.times(power=1)
+    else:
+        time = Cost(exponential=True)
+    return time, max(body_space, stack)
+
+
+def analyze_python(code: str) -> AnalysisReport:
+    """
+    Analyze Python code with the default rules.
+
+    Raises:
+        SyntaxError: If the code can't be parsed
+    """
+    return PythonAnalyzer().analyze(code)
+
+
+def split_functions(code: str) -> list[FunctionSource]:
+    """
+    Split a module into its top-level functions and the methods of its classes.
+
+    Each unit keeps the imports above it and its original line numbers (the
+    other lines are blank), so findings point into the module and rewrites
+    can still be run.
+
+    Raises:
+        SyntaxError: If the code can't be parsed
+    """
+    tree = ast.parse(code)
+    lines = code.splitlines()
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    definitions = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            definitions.append((node.name, node))
+        elif isinstance(node, ast.ClassDef):
+            definitions.extend(
+                (f"{node.name}.{item.name}", item)
+                for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+            )
+
+    units = []
+    for name, node in definitions:
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+        end = node.end_lineno
+        unit = [""] * end
+        for statement in imports:
+            if statement.end_lineno < start:
+                unit[statement.lineno - 1:statement.end_lineno] = lines[statement.lineno - 1:statement.end_lineno]
+        indent = node.col_offset
+        unit[start - 1:end] = [
+            line[indent:] if not line[:indent].strip() else line
+            for line in lines[start - 1:end]
+        ]
+        units.append(FunctionSource(name, start, end, indent, "\n".join(unit) + "\n"))
+    return units
+
+
+# Line costs ----------------------------------------------------------------
+
+# Letters for input sizes, in order of first use within a function
+_SIZE_SYMBOLS = "nmkpqrst"
+_SYMBOL_SUPERSCRIPTS = {"n": "ⁿ", "m": "ᵐ", "k": "ᵏ", "p": "ᵖ", "r": "ʳ", "s": "ˢ", "t": "ᵗ"}
+# Size used to weigh counts against each other for the heat of a line
+_REFERENCE_SIZE = 1000
+_ITERATION_WRAPPERS = {"enumerate", "reversed", "sorted", "list", "set", "tuple", "zip", "iter", "frozenset"}
+_SIZE_PRESERVING_METHODS = {"items", "keys", "values", "copy"}
+
+
+@dataclass(frozen=True)
+class Count:
+    """Symbolic execution count: a product of input sizes and their logs, or exponential in a size."""
+    powers: tuple[tuple[str, int], ...] = ()
+    logs: tuple[tuple[str, int], ...] = ()
+    exponential: str | None = None
+
+    def times(self, other: "Count") -> "Count":
+        powers, logs = dict(self.powers), dict(self.logs)
+        for symbol, power in other.powers:
+            powers[symbol] = powers.get(symbol, 0) + power
+        for symbol, power in other.logs:
+            logs[symbol] = logs.get(symbol, 0) + power
+        return Count(
+            tuple(sorted(powers.items(), key=_symbol_order)),
+            tuple(sorted(logs.items(), key=_symbol_order)),
+            self.exponential or other.exponential,
+        )
+
+    def label(self) -> str:
+        if self.exponential:
+            superscript = _SYMBOL_SUPERSCRIPTS.get(self.exponential)
+            return f"2{superscript}" if superscript else f"2^{self.exponential}"
+        factors = [
+            symbol if power == 1 else symbol + str(power).translate(_SUPERSCRIPTS)
+            for symbol, power in self.powers
+        ]
+        logs = [
+            f"log {symbol}" if power == 1 else f"log{str(power).translate(_SUPERSCRIPTS)} {symbol}"
+            for symbol, power in self.logs
+        ]
+        return " ".join(["·".join(factors)] + logs if factors else logs) or "1"
+
+    def weight(self) -> float:
+        """log10 of the count with every size at the reference size."""
+        if self.exponential:
+            return _REFERENCE_SIZE * math.log10(2)
+        powers = sum(power for _, power in self.powers)
+        logs = sum(power for _, power in self.logs)
+        return powers * math.log10(_REFERENCE_SIZE) + logs * math.log10(math.log2(_REFERENCE_SIZE))
+
+
+def _symbol_order(item: tuple[str, int]) -> tuple[int, str]:
+    """n before m before k..., as the letters are handed out."""
+    symbol = item[0]
+    return (_SIZE_SYMBOLS.index(symbol) if symbol in _SIZE_SYMBOLS else len(_SIZE_SYMBOLS), symbol)
+
+
+def _size(symbol: str, log: bool = False) -> Count:
+    return Count(logs=((symbol, 1),)) if log else Count(powers=((symbol, 1),))
+
+
+@dataclass
+class LineCost:
+    """Estimated execution count of one line."""
+    line: int
+    count: str  # e.g. "1", "n", "n²", "n·m", "n log n", "2ⁿ"
+    depth: int  # Enclosing loops over the input
+    heat: float  # 0 for lines run once, 1 for the most executed ones
+
+
+@dataclass
+class AllocationSite:
+    """A container or string built where it runs more than a constant number of times."""
+    line: int
+    col: int
+    kind: str  # list, dict, set, comprehension, copy, slice or string-concat
+    count: str
+    hot: bool  # In the deepest loop nest of its function
+
+
+@dataclass
+class SizeSymbol:
+    """What a size letter of the counts stands for."""
+    symbol: str
+    expression: str  # e.g. "arr" for len(arr), "n" for range(n)
+    function: str | None  # None at module level
+
+
+@dataclass
+class LineCostReport:
+    lines: list[LineCost]
+    allocations: list[AllocationSite]
+    sizes: list[SizeSymbol]
+
+
+@dataclass
+class _SizeScope:
+    function: str | None
+    symbols: dict[str, str] = field(default_factory=dict)  # size expression -> symbol
+    aliases: dict[str, str] = field(default_factory=dict)  # name -> size expression it has the size of
+    loop_symbols: dict[str, Count] = field(default_factory=dict)  # loop variable -> its loop's count
+    strings: set[str] = field(default_factory=set)
+    recursion: str | None = None  # linear, halving, divide or exponential
+    recursion_symbol: str = "n"
+    max_depth: int = 0
+
+
+class LineCostEstimator:
+    """
+    Estimates how often each line runs, from loop structure and recursion.
+
+    Every loop over an input multiplies the count of its body by that
+    input's size; inputs get a letter per function (n, m, ...), the same
+    input (len(a), range(len(a)), a[1:], a.items()...) the same letter, and
+    loops over a loop variable's range the letter of that loop. Constant
+    loops don't count, halving loops count log. A recursive function
+    multiplies its lines by the number of calls: n for linear (or memoized)
+    recursion, log n when halving once, n with loops counted log n for
+    divide and conquer, 2ⁿ for branching recursion.
+    """
+
+    def estimate(self, code: str) -> LineCostReport:
+        """
+        Annotate Python source.
+
+        Raises:
+            SyntaxError: If the code can't be parsed
+        """
+        tree = ast.parse(code)
+        self._lines: dict[int, tuple[Count, int]] = {}
+        self._allocations: list[tuple[ast.AST, str, Count, int, _SizeScope]] = []
+        self._sizes: list[SizeSymbol] = []
+        self._loops: list[Count] = []
+        self._scope = _SizeScope(function=None)
+        self._visit_all(tree.body)
+
+        # Heat ranks the distinct counts, so an exponential line doesn't flatten the rest
+        levels = sorted({0.0} | {count.weight() for count, _ in self._lines.values()})
+        lines = [
+            LineCost(
+                line=line,
+                count=count.label(),
+                depth=depth,
+                heat=round(levels.index(count.weight()) / (len(levels) - 1), 3) if len(levels) > 1 else 0.0,
+            )
+            for line, (count, depth) in sorted(self._lines.items())
+        ]
+        allocations = [
+            AllocationSite(
+                line=node.lineno,
+                col=node.col_offset + 1,
+                kind=kind,
+                count=count.label(),
+                hot=depth > 0 and depth == scope.max_depth,
+            )
+            for node, kind, count, depth, scope in self._allocations
+        ]
+        allocations.sort(key=lambda site: (not site.hot, site.line, site.col))
+        return LineCostReport(lines=lines, allocations=allocations, sizes=self._sizes)
+
+    # Counts
+
+    def _count(self) -> Count:
+        count = Count()
+        for loop in self._loops:
+            count = count.times(loop)
+        scope = self._scope
+        symbol = scope.recursion_symbol
+        if scope.recursion == "exponential":
+            return count.times(Count(exponential=symbol))
+        if scope.recursion == "linear":
+            return count.times(_size(symbol))
+        if scope.recursion == "halving":
+            return count.times(_size(symbol, log=True))
+        if scope.recursion == "divide":
+            # Each level of calls loops over n elements in total, over log n levels
+            calls = _size(symbol, log=True) if symbol in dict(count.powers) else _size(symbol)
+            return count.times(calls)
+        return count
+
+    @property
+    def _depth(self) -> int:
+        return sum(1 for loop in self._loops if loop.powers or loop.logs)
+
+    def _record(self, node: ast.AST) -> None:
+        line = getattr(node, "lineno", None)
+        if line is None:
+            return
+        count = self._count()
+        current = self._lines.get(line)
+        if current is None or count.weight() > current[0].weight():
+            self._lines[line] = (count, self._depth)
+
+    def _symbol(self, expression: str, last: bool = False) -> str:
+        """The letter of an input size; `last` takes it from the end, keeping n, m... for the inputs."""
+        scope = self._scope
+        if expression not in scope.symbols:
+            used = set(scope.symbols.values())
+            free = [letter for letter in _SIZE_SYMBOLS if letter not in used]
+            if expression in free:
+                symbol = expression
+            elif free:
+                symbol = free[-1] if last else free[0]
+            else:
+                symbol = f"n{len(used)}"
+            scope.symbols[expression] = symbol
+            self._sizes.append(SizeSymbol(symbol, expression, scope.function))
+        return scope.symbols[expression]
+
+    def _size_expression(self, node: ast.AST) -> str | None:
+        """The input whose size bounds an iterable or bound, None for constants."""
+        if isinstance(node, ast.Constant) or (
+            isinstance(node, (ast.List, ast.Tuple, ast.Set, ast.Dict)) and not any(
+                isinstance(element, ast.Starred) for element in getattr(node, "elts", ())
+            )
+        ):
+            return None
+        if isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name == "range":
+                if not node.args:
+                    return None
+                return self._size_expression(node.args[1] if len(node.args) > 1 else node.args[0])
+            if name == "len" and node.args:
+                return self._size_expression(node.args[0])
+            if name in _ITERATION_WRAPPERS and isinstance(node.func, ast.Name) and node.args:
+                return self._size_expression(node.args[0])
+            if _is_method_call(node, *_SIZE_PRESERVING_METHODS):
+                return self._size_expression(node.func.value)
+        if isinstance(node, ast.BinOp):
+            left, right = self._size_expression(node.left), self._size_expression(node.right)
+            return left or right
+        if isinstance(node, ast.UnaryOp):
+            return self._size_expression(node.operand)
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            return self._size_expression(node.value)
+        if isinstance(node, ast.Name):
+            return self._scope.aliases.get(node.id, node.id)
+        return ast.unparse(node)
+
+    def _loop_count(self, node: ast.AST) -> Count:
+        """Iterations of a loop over `node` (an iterable, or the bound of a while loop)."""
+        if isinstance(node, ast.Call) and _call_name(node) == "range" and node.args:
+            bound = node.args[1] if len(node.args) > 1 else node.args[0]
+            # range(i) with i a loop variable: the same size as that loop
+            if isinstance(bound, ast.Name) and bound.id in self._scope.loop_symbols:
+                return self._scope.loop_symbols[bound.id]
+        elif isinstance(node, ast.Name) and node.id in self._scope.loop_symbols:
+            return self._scope.loop_symbols[node.id]
+        expression = self._size_expression(node)
+        return Count() if expression is None else _size(self._symbol(expression))
+
+    def _while_bound(self, test: ast.AST) -> ast.AST | None:
+        """What a while loop's condition compares against: len(x), a container, or a size."""
+        for sub in ast.walk(test):
+            if isinstance(sub, ast.Call) and _call_name(sub) == "len":
+                return sub
+        if isinstance(test, (ast.Name, ast.Attribute)):
+            return test  # while queue:
+        if isinstance(test, ast.Compare):
+            names = [side for side in [test.left] + test.comparators if isinstance(side, (ast.Name, ast.Attribute))]
+            if names:
+                return names[-1]
+        return None
+
+    # Walk
+
+    def _visit_all(self, nodes: Iterable[ast.AST]) -> None:
+        for node in nodes:
+            self._visit(node)
+
+    def _visit(self, node: ast.AST) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._visit_function(node)
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self._visit(node.iter)
+            loop = self._loop_count(node.iter)
+            self._bind_loop_target(node.target, node.iter, loop)
+            self._visit_loop(node, loop, [node.target] + node.body)
+            self._visit_all(node.orelse)
+        elif isinstance(node, ast.While):
+            halving = any(_halves(stmt) for stmt in node.body if isinstance(stmt, (ast.Assign, ast.AugAssign)))
+            bound = self._while_bound(node.test)
+            if not halving and isinstance(bound, ast.Name) and bound.id in self._scope.loop_symbols:
+                loop = self._scope.loop_symbols[bound.id]  # while j < i
+            else:
+                expression = self._size_expression(bound) if bound is not None else None
+                # Without a size in the condition (while True, while x > 5), the loop gets its own letter
+                symbol = self._symbol(expression) if expression else self._symbol(
+                    f"while {ast.unparse(node.test)}", last=True
+                )
+                loop = _size(symbol, log=halving)
+            self._visit_loop(node, loop, [node.test] + node.body)
+            self._visit_all(node.orelse)
+        elif isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            self._visit_comprehension(node)
+        else:
+            self._record(node)
+            self._allocation(node)
+            for child in ast.iter_child_nodes(node):
+                self._visit(child)
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+                same_length = isinstance(value, ast.Tuple) and len(getattr(target, "elts", ())) == len(value.elts)
+                if isinstance(target, ast.Tuple) and same_length:
+                    pairs = list(zip(target.elts, value.elts))  # lo, hi = 0, len(a)
+                else:
+                    pairs = [(target, value)]
+                for name, value in pairs:
+                    if isinstance(name, ast.Name):
+                        self._bind(name.id, value)
+
+    def _visit_loop(self, node: ast.AST, loop: Count, body: list[ast.AST]) -> None:
+        self._loops.append(loop)
+        self._scope.max_depth = max(self._scope.max_depth, self._depth)
+        self._record(node)
+        self._visit_all(body)
+        self._loops.pop()
+
+    def _visit_comprehension(self, node: ast.AST) -> None:
+        self._record(node)
+        self._allocation(node)
+        self._visit(node.generators[0].iter)
+        pushed = 0
+        for i, generator in enumerate(node.generators):
+            if i:
+                self._visit(generator.iter)
+            loop = self._loop_count(generator.iter)
+            self._bind_loop_target(generator.target, generator.iter, loop)
+            self._loops.append(loop)
+            pushed += 1
+            self._scope.max_depth = max(self._scope.max_depth, self._depth)
+            self._visit_all(generator.ifs)
+        elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        self._visit_all(elements)
+        del self._loops[len(self._loops) - pushed:]
+
+    def _bind_loop_target(self, target: ast.AST, iterable: ast.AST, loop: Count) -> None:
+        """Index variables (for i in range(n)) bound later loops: range(i) runs up to n times."""
+        if not isinstance(target, ast.Name):
+            return
+        if isinstance(iterable, ast.Call) and _call_name(iterable) == "range" and (loop.powers or loop.logs):
+            self._scope.loop_symbols[target.id] = loop
+        else:
+            self._scope.loop_symbols.pop(target.id, None)
+
+    def _bind(self, name: str, value: ast.AST) -> None:
+        """Track names holding strings, and names with the size of another input (lengths, slices, copies)."""
+        scope = self._scope
+        if isinstance(value, ast.JoinedStr) or (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+            scope.strings.add(name)
+        else:
+            scope.strings.discard(name)
+        derived = (
+            (isinstance(value, ast.Subscript) and isinstance(value.slice, ast.Slice))
+            or (isinstance(value, ast.Call) and (
+                _call_name(value) in COPYING_CALLS | {"len", scope.function}
+                or _is_method_call(value, *_SIZE_PRESERVING_METHODS)
+            ))
+        )
+        expression = self._size_expression(value) if derived else None
+        if isinstance(value, ast.Call) and _call_name(value) == scope.function and value.args:
+            expression = self._size_expression(value.args[0])  # left = merge_sort(arr[:mid])
+        if expression and expression != name:
+            scope.aliases[name] = expression
+        else:
+            scope.aliases.pop(name, None)
+
+    def _visit_function(self, node) -> None:
+        self._visit_all(node.decorator_list)
+        outer_scope, outer_loops = self._scope, self._loops
+        self._scope = _SizeScope(function=node.name)
+        self._loops = []  # a function body starts a new loop nest
+        params = [arg.arg for arg in node.args.posonlyargs + node.args.args if arg.arg not in ("self", "cls")]
+        self._record(node)
+        self._classify_recursion(node, params)
+        self._visit_all(node.body)
+        self._scope, self._loops = outer_scope, outer_loops
+
+    def _classify_recursion(self, node, params: list[str]) -> None:
+        calls = [
+            sub for sub in _own_nodes(node)
+            if isinstance(sub, ast.Call) and (
+                (isinstance(sub.func, ast.Name) and sub.func.id == node.name)
+                or (
+                    isinstance(sub.func, ast.Attribute) and sub.func.attr == node.name
+                    and isinstance(sub.func.value, ast.Name) and sub.func.value.id == "self"
+                )
+            )
+        ]
+        if not calls:
+            return
+        memoized = any(
+            (isinstance(d, ast.Call) and _call_name(d) in MEMOIZE_DECORATORS)
+            or (isinstance(d, ast.Name) and d.id in MEMOIZE_DECORATORS)
+            or (isinstance(d, ast.Attribute) and d.attr in MEMOIZE_DECORATORS)
+            for d in node.decorator_list
+        )
+        scope = self._scope
+        scope.recursion_symbol = self._symbol(params[0]) if params else "n"
+        if any(_halves(call) for call in calls):
+            scope.recursion = "halving" if len(calls) == 1 else "divide"
+        elif len(calls) == 1 or memoized:
+            scope.recursion = "linear"
+        else:
+            scope.recursion = "exponential"
+
+    def _allocation(self, node: ast.AST) -> None:
+        kind = None
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp)):
+            kind = "comprehension"
+        elif isinstance(node, ast.List) and isinstance(node.ctx, ast.Load):
+            kind = "list"
+        elif isinstance(node, ast.Dict):
+            kind = "dict"
+        elif isinstance(node, ast.Set):
+            kind = "set"
+        elif isinstance(node, ast.Call) and (
+            (isinstance(node.func, ast.Name) and node.func.id in COPYING_CALLS) or _is_method_call(node, "copy")
+        ):
+            kind = "copy"
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice) and isinstance(node.ctx, ast.Load):
+            kind = "slice"
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult) and isinstance(node.left, ast.List):
+            kind = "list"
+        elif isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Add) and (
+            (isinstance(node.target, ast.Name) and node.target.id in self._scope.strings)
+            or isinstance(node.value, ast.JoinedStr)
+            or (isinstance(node.value, ast.Constant) and isinstance(node.value.value, str))
+        ):
+            kind = "string-concat"
+        if kind is None:
+            return
+        count = self._count()
+        if count.powers or count.logs or count.exponential:
+            self._allocations.append((node, kind, count, self._depth, self._scope))
+
+
+def _own_nodes(function: ast.AST) -> Iterable[ast.AST]:
+    """Nodes of a function's body, without those of nested functions and classes."""
+    stack = list(function.body)
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(
+            child for child in ast.iter_child_nodes(node)
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda))
+        )
+
+
+def estimate_line_costs(code: str) -> LineCostReport:
+    """
+    Per-line execution counts and allocation sites of Python code.
+
+    Raises:
+        SyntaxError: If the code can't be parsed
+    """
+    return LineCostEstimator().estimate(code)
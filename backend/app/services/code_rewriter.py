@@ -0,0 +1,943 @@
+"""
+Source-to-source rewrites of Python code (used by the playground).
+
+Each rewrite fixes one pattern the analyzer reports (see code_analyzer.py)
+when the transformation can be justified from the code alone: membership
+tests against a list become set lookups, string building with += becomes
+''.join, .count() of the iterated sequence becomes a Counter lookup, pure
+branching recursion gets lru_cache, invariant sorted()/set()/sum()/max()
+calls are hoisted out of loops, and range(len()) loops iterate directly.
+
+Rewrites produce text edits at AST node positions rather than unparsing
+the tree, so everything they don't touch keeps its formatting and comments.
+They are conservative about what the AST shows (a name rebound or mutated
+inside the loop is never hoisted, a function reading globals is never
+memoized), but types are not known statically: a change that needs hashable
+values (lru_cache arguments, set or Counter items) is only `proven` when
+annotations, literals or numeric use show them. In verify mode the
+playground runs both versions on generated inputs before keeping a rewrite
+(`verify_rewrite` in verification.py); otherwise only proven changes are
+applied (`proven_only`) and returned marked unverified. New rewrites subclass
+`Rewrite` and are listed in `PYTHON_REWRITES`.
+"""
+
+import ast
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Methods that mutate their receiver
+MUTATING_METHODS = {
+    "append", "extend", "insert", "pop", "remove", "clear", "add", "discard", "update", "sort",
+    "reverse", "setdefault", "popitem", "appendleft", "popleft", "extendleft", "rotate",
+    "difference_update", "intersection_update", "symmetric_difference_update",
+}
+# Builtins that don't mutate their arguments or have side effects
+PURE_BUILTINS = {
+    "len", "sum", "min", "max", "sorted", "set", "frozenset", "list", "tuple", "dict", "str", "int",
+    "float", "bool", "abs", "any", "all", "enumerate", "range", "zip", "reversed", "repr", "isinstance",
+    "hash", "round", "divmod", "pow", "ord", "chr", "map", "filter",
+}
+# Calls that may have side effects but never mutate their arguments
+NON_MUTATING_CALLS = PURE_BUILTINS | {"print"}
+# Calls hoisted out of loops when their arguments are loop-invariant
+HOISTABLE_CALLS = {"sorted", "set", "frozenset", "sum", "tuple", "max", "min"}
+
+_STR_PARAM_NAMES = {"s", "text", "string", "word", "line", "sentence", "pattern"}
+# Annotations of hashable values, and of sequences whose items can be hashed
+_HASHABLE_TYPES = {"int", "float", "complex", "bool", "str", "bytes", "frozenset"}
+_SEQUENCE_TYPES = {"list", "List", "Sequence", "Iterable", "set", "Set", "frozenset", "FrozenSet", "tuple", "Tuple"}
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+@dataclass
+class Edit:
+    """Replace source bytes [start, end) with `text` (start == end inserts)."""
+    start: int
+    end: int
+    text: str
+
+
+@dataclass
+class Change:
+    """One occurrence fixed by a rewrite."""
+    edits: list[Edit]
+    message: str
+    line: int
+    imports: set[tuple[str, str]] = field(default_factory=set)  # (module, name)
+    # False when the change is only correct for argument types the code
+    # doesn't show (e.g. hashable items); such changes must be verified
+    proven: bool = True
+
+
+@dataclass
+class AppliedRewrite:
+    rewrite: str
+    rule: str  # analyzer rule the rewrite fixes
+    message: str
+    line: int
+    estimated_speedup: float
+
+
+@dataclass
+class RewriteResult:
+    code: str
+    applied: list[AppliedRewrite]
+
+
+class Source:
+    """Parsed source with the byte offsets, scopes and names rewrites need."""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.data = code.encode("utf-8")
+        self.line_starts = [0]
+        for line in self.data.splitlines(keepends=True):
+            self.line_starts.append(self.line_starts[-1] + len(line))
+        self.tree = ast.parse(code)
+        self.parents = {child: parent for parent in ast.walk(self.tree) for child in ast.iter_child_nodes(parent)}
+        self.names = {
+            getattr(node, attr)
+            for node in ast.walk(self.tree)
+            for attr in ("id", "arg", "name", "asname")
+            if isinstance(getattr(node, attr, None), str)
+        }
+
+    # Positions
+
+    def offset(self, line: int, col: int) -> int:
+        return self.line_starts[line - 1] + col
+
+    def span(self, node: ast.AST) -> tuple[int, int]:
+        return self.offset(node.lineno, node.col_offset), self.offset(node.end_lineno, node.end_col_offset)
+
+    def segment(self, node: ast.AST) -> str:
+        start, end = self.span(node)
+        return self.data[start:end].decode("utf-8")
+
+    def indent(self, stmt: ast.stmt) -> str | None:
+        """Indentation of a statement that starts its line (None after `;` or `:`)."""
+        line_start = self.line_starts[stmt.lineno - 1]
+        prefix = self.data[line_start:self.offset(stmt.lineno, stmt.col_offset)]
+        return prefix.decode("utf-8") if not prefix.strip() else None
+
+    # Edits
+
+    def replace(self, node: ast.AST, text: str) -> Edit:
+        return Edit(*self.span(node), text)
+
+    def insert_before(self, stmt: ast.stmt, lines: list[str]) -> Edit | None:
+        indent = self.indent(stmt)
+        if indent is None:
+            return None
+        first_line = min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])])
+        offset = self.line_starts[first_line - 1]
+        return Edit(offset, offset, "".join(f"{indent}{line}\n" for line in lines))
+
+    def insert_after(self, stmt: ast.stmt, lines: list[str]) -> Edit | None:
+        indent = self.indent(stmt)
+        end = self.offset(stmt.end_lineno, stmt.end_col_offset)
+        rest = self.data[end:self.line_starts[stmt.end_lineno]].strip()
+        if indent is None or (rest and not rest.startswith(b"#")):
+            return None
+        offset = self.line_starts[stmt.end_lineno]
+        return Edit(offset, offset, "".join(f"{indent}{line}\n" for line in lines))
+
+    def fresh(self, base: str) -> str:
+        """A name not used anywhere in the module (reserved once returned)."""
+        name, n = base, 2
+        while name in self.names:
+            name, n = f"{base}{n}", n + 1
+        self.names.add(name)
+        return name
+
+    def can_import(self, module: str, name: str) -> bool:
+        return self.imported(module, name) or name not in self.names
+
+    def imported(self, module: str, name: str) -> bool:
+        return any(
+            isinstance(stmt, ast.ImportFrom) and stmt.module == module
+            and any(alias.name == name and alias.asname is None for alias in stmt.names)
+            for stmt in self.tree.body
+        )
+
+    def import_edit(self, module: str, name: str) -> Edit | None:
+        """Edit adding `from module import name` after the docstring and __future__ imports."""
+        if self.imported(module, name):
+            return None
+        body = self.tree.body
+        position = 0
+        while position < len(body) and (
+            (position == 0 and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant))
+            or (isinstance(body[position], ast.ImportFrom) and body[position].module == "__future__")
+        ):
+            position += 1
+        line = f"from {module} import {name}\n"
+        if position == len(body):
+            return Edit(len(self.data), len(self.data), line)
+        stmt = body[position]
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            line += "\n\n"
+        offset = self.line_starts[min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])]) - 1]
+        return Edit(offset, offset, line)
+
+    def apply(self, edits: list[Edit]) -> str:
+        data = self.data
+        # Back to front; at one offset replacements go first so inserts land before
+        # them, and earlier inserts end up first
+        order = sorted(range(len(edits)), key=lambda i: (edits[i].start, edits[i].end > edits[i].start, i), reverse=True)
+        for i in order:
+            edit = edits[i]
+            data = data[:edit.start] + edit.text.encode("utf-8") + data[edit.end:]
+        return data.decode("utf-8")
+
+    # Scopes
+
+    def bodies(self) -> Iterable[list[ast.stmt]]:
+        """Every statement list, outermost first."""
+        def walk(body):
+            yield body
+            for stmt in body:
+                for name in ("body", "orelse", "finalbody"):
+                    sub = getattr(stmt, name, None)
+                    if isinstance(sub, list) and sub and isinstance(sub[0], ast.stmt):
+                        yield from walk(sub)
+                for handler in getattr(stmt, "handlers", []):
+                    yield from walk(handler.body)
+                for case in getattr(stmt, "cases", []):
+                    yield from walk(case.body)
+        yield from walk(self.tree.body)
+
+    def anchors(self) -> Iterable[ast.stmt]:
+        """
+        Statements loop-invariant work can be hoisted in front of, outermost
+        first: loops, and simple statements holding a comprehension.
+        """
+        for body in self.bodies():
+            for stmt in body:
+                if isinstance(stmt, _LOOPS):
+                    yield stmt
+                elif not hasattr(stmt, "body") and any(isinstance(n, _COMPREHENSIONS) for n in ast.walk(stmt)):
+                    yield stmt
+
+    def enclosing_function(self, node: ast.AST) -> ast.FunctionDef | ast.AsyncFunctionDef | None:
+        while node in self.parents:
+            node = self.parents[node]
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                return node
+        return None
+
+    def kind_of(self, name: str, at: ast.AST) -> str | None:
+        """What a name holds where it is used: list, set, dict, str, param (unknown) or None."""
+        function = self.enclosing_function(at)
+        if function:
+            args = function.args
+            for arg in args.posonlyargs + args.args + args.kwonlyargs:
+                if arg.arg == name:
+                    return _annotation_kind(arg.annotation) or "param"
+        kinds = set()
+        for node in ast.walk(function or self.tree):
+            if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+                kinds.add(_value_kind(node.value))
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.target.id == name:
+                kinds.add(_annotation_kind(node.annotation) or _value_kind(node.value))
+        return kinds.pop() if len(kinds) == 1 else None
+
+    def hashable_items(self, name: str, at: ast.AST) -> bool:
+        """Whether the items of a sequence are provably hashable (a set or Counter of it can't raise)."""
+        function = self.enclosing_function(at)
+        if function:
+            args = function.args
+            for arg in args.posonlyargs + args.args + args.kwonlyargs:
+                if arg.arg == name:
+                    return _hashable_items_annotation(arg.annotation)
+        values = []
+        for node in ast.walk(function or self.tree):
+            if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+                values.append(node.value)
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.target.id == name:
+                if not _hashable_items_annotation(node.annotation):
+                    values.append(node.value)
+        return all(_hashable_items_value(value) for value in values) if values else False
+
+
+def _hashable_annotation(annotation: ast.AST | None) -> bool:
+    if annotation is None:
+        return False
+    head = ast.unparse(annotation).split("[")[0].split(".")[-1]
+    if head in ("tuple", "Tuple") and isinstance(annotation, ast.Subscript):
+        elements = annotation.slice.elts if isinstance(annotation.slice, ast.Tuple) else [annotation.slice]
+        return all(
+            isinstance(e, ast.Constant) and e.value is Ellipsis or _hashable_annotation(e) for e in elements
+        )
+    return head in _HASHABLE_TYPES
+
+
+def _hashable_items_annotation(annotation: ast.AST | None) -> bool:
+    """`str`, `list[int]`, `Sequence[str]`, `tuple[int, ...]`..."""
+    if annotation is None:
+        return False
+    head = ast.unparse(annotation).split("[")[0].split(".")[-1]
+    if head == "str":
+        return True
+    if head not in _SEQUENCE_TYPES or not isinstance(annotation, ast.Subscript):
+        return False
+    elements = annotation.slice.elts if isinstance(annotation.slice, ast.Tuple) else [annotation.slice]
+    return all(isinstance(e, ast.Constant) and e.value is Ellipsis or _hashable_annotation(e) for e in elements)
+
+
+def _hashable_value(value: ast.AST) -> bool:
+    if isinstance(value, ast.Constant):
+        return True
+    if isinstance(value, ast.UnaryOp):
+        return _hashable_value(value.operand)
+    return isinstance(value, ast.Tuple) and all(_hashable_value(e) for e in value.elts)
+
+
+def _hashable_items_value(value: ast.AST | None) -> bool:
+    """Literals of constants, strings, str.split() and range()."""
+    if isinstance(value, (ast.List, ast.Tuple, ast.Set)):
+        return all(_hashable_value(e) for e in value.elts)
+    if isinstance(value, ast.JoinedStr) or isinstance(value, ast.Constant) and isinstance(value.value, str):
+        return True
+    if isinstance(value, ast.Call):
+        if isinstance(value.func, ast.Attribute) and value.func.attr == "split":
+            return True
+        if isinstance(value.func, ast.Name):
+            if value.func.id == "range":
+                return True
+            if value.func.id in ("list", "sorted", "tuple") and len(value.args) == 1:
+                return _hashable_items_value(value.args[0])
+    return False
+
+
+def _numeric_constant(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and type(node.value) in (int, float)
+
+
+def _annotation_kind(annotation: ast.AST | None) -> str | None:
+    if annotation is None:
+        return None
+    head = ast.unparse(annotation).split("[")[0].split(".")[-1]
+    return {
+        "list": "list", "List": "list", "Sequence": "list",
+        "set": "set", "Set": "set", "frozenset": "set", "FrozenSet": "set",
+        "dict": "dict", "Dict": "dict", "Mapping": "dict", "str": "str",
+    }.get(head, "other")
+
+
+def _value_kind(value: ast.AST | None) -> str | None:
+    if isinstance(value, (ast.List, ast.ListComp)):
+        return "list"
+    if isinstance(value, (ast.Set, ast.SetComp)):
+        return "set"
+    if isinstance(value, (ast.Dict, ast.DictComp)):
+        return "dict"
+    if isinstance(value, ast.JoinedStr) or isinstance(value, ast.Constant) and isinstance(value.value, str):
+        return "str"
+    if isinstance(value, ast.Call):
+        if isinstance(value.func, ast.Name):
+            return {
+                "list": "list", "sorted": "list", "set": "set", "frozenset": "set",
+                "dict": "dict", "Counter": "dict", "defaultdict": "dict", "str": "str",
+            }.get(value.func.id)
+        if isinstance(value.func, ast.Attribute) and value.func.attr == "split":
+            return "list"
+    return None
+
+
+def _base_name(node: ast.AST) -> str | None:
+    """`a` of a, a[i], a.b, a[i].b..."""
+    while isinstance(node, (ast.Subscript, ast.Attribute)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def bound_in(node: ast.AST) -> set[str]:
+    """Names (re)bound anywhere inside a node."""
+    names = set()
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Name) and isinstance(sub.ctx, (ast.Store, ast.Del)):
+            names.add(sub.id)
+        elif isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(sub.name)
+        elif isinstance(sub, ast.arg):
+            names.add(sub.arg)
+        elif isinstance(sub, ast.alias):
+            names.add(sub.asname or sub.name.split(".")[0])
+        elif isinstance(sub, ast.ExceptHandler) and sub.name:
+            names.add(sub.name)
+        elif isinstance(sub, (ast.Global, ast.Nonlocal)):
+            names.update(sub.names)
+    return names
+
+
+def mutated_in(node: ast.AST, pure_calls: set[str] = NON_MUTATING_CALLS) -> set[str]:
+    """Names whose value may be mutated inside a node (conservatively)."""
+    names = set()
+    for sub in ast.walk(node):
+        if isinstance(sub, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete)):
+            targets = sub.targets if isinstance(sub, (ast.Assign, ast.Delete)) else [sub.target]
+            for target in targets:
+                for element in ast.walk(target):
+                    if isinstance(element, (ast.Subscript, ast.Attribute)):
+                        names.add(_base_name(element))
+        elif isinstance(sub, ast.Call):
+            func = sub.func
+            if isinstance(func, ast.Attribute) and func.attr in MUTATING_METHODS:
+                names.add(_base_name(func.value))
+            if not (isinstance(func, ast.Name) and func.id in pure_calls):
+                # Anything passed to unknown code may be mutated by it (an element
+                # passed on, x[i], leaves the container itself unchanged)
+                for arg in sub.args + [keyword.value for keyword in sub.keywords]:
+                    arg = arg.value if isinstance(arg, ast.Starred) else arg
+                    if isinstance(arg, ast.Name):
+                        names.add(arg.id)
+    names.discard(None)
+    return names
+
+
+def invariant(names: set[str], node: ast.AST) -> bool:
+    """Whether none of `names` is rebound or mutated inside `node`."""
+    return not names & (bound_in(node) | mutated_in(node))
+
+
+class Rewrite:
+    """
+    A source-to-source transformation.
+
+    Subclasses set `id`, the analyzer `rule` they fix and an
+    `estimated_speedup`, and implement `changes`, which yields the edits
+    fixing each occurrence in a parsed module. Overlapping changes are
+    dropped by the rewriter; occurrences left over are picked up when the
+    rewrite is run again on its own output.
+    """
+    id: str = ""
+    rule: str = ""
+    estimated_speedup: float = 1.0
+
+    def changes(self, source: Source) -> Iterable[Change]:
+        return ()
+
+
+def _repeated_nodes(anchor: ast.stmt) -> Iterable[ast.AST]:
+    """Nodes of an anchor that are evaluated on every iteration."""
+    if isinstance(anchor, (ast.For, ast.AsyncFor)):
+        for stmt in anchor.body:
+            yield from ast.walk(stmt)
+    elif isinstance(anchor, ast.While):
+        yield from ast.walk(anchor.test)
+        for stmt in anchor.body:
+            yield from ast.walk(stmt)
+    else:
+        for comprehension in (n for n in ast.walk(anchor) if isinstance(n, _COMPREHENSIONS)):
+            parts = [comprehension.elt] if not isinstance(comprehension, ast.DictComp) else [
+                comprehension.key, comprehension.value
+            ]
+            for i, generator in enumerate(comprehension.generators):
+                parts.extend(generator.ifs)
+                if i:
+                    parts.append(generator.iter)
+            for part in parts:
+                yield from ast.walk(part)
+
+
+def _iterated_names(anchor: ast.stmt) -> set[str]:
+    """Names an anchor loops over directly (`for x in arr`, `[... for x in arr]`)."""
+    if isinstance(anchor, (ast.For, ast.AsyncFor)):
+        return {anchor.iter.id} if isinstance(anchor.iter, ast.Name) else set()
+    return {
+        n.generators[0].iter.id
+        for n in ast.walk(anchor)
+        if isinstance(n, _COMPREHENSIONS) and isinstance(n.generators[0].iter, ast.Name)
+    }
+
+
+# Rewrites ------------------------------------------------------------------
+
+
+class ListToSetRewrite(Rewrite):
+    id = "list-to-set"
+    rule = "list-membership-in-loop"
+    estimated_speedup = 10.0
+
+    def changes(self, source):
+        done = set()
+        for anchor in source.anchors():
+            groups: dict[str, list[ast.Name]] = {}
+            for node in _repeated_nodes(anchor):
+                if not isinstance(node, ast.Compare):
+                    continue
+                for op, comparator in zip(node.ops, node.comparators):
+                    if (
+                        isinstance(op, (ast.In, ast.NotIn)) and isinstance(comparator, ast.Name)
+                        and comparator not in done
+                    ):
+                        groups.setdefault(comparator.id, []).append(comparator)
+            for name, nodes in groups.items():
+                kind = source.kind_of(name, anchor)
+                if not (kind == "list" or kind == "param" and name not in _STR_PARAM_NAMES):
+                    continue
+                if not invariant({name}, anchor):
+                    continue
+                set_name = source.fresh(f"{name}_set")
+                edits = [source.insert_before(anchor, [f"{set_name} = set({name})"])]
+                edits += [source.replace(node, set_name) for node in nodes]
+                if None in edits:
+                    continue
+                done.update(nodes)
+                yield Change(
+                    edits,
+                    f"Converted '{name}' to a set once, before the loop, for O(1) membership tests",
+                    anchor.lineno,
+                    proven=source.hashable_items(name, anchor),
+                )
+
+
+class StringJoinRewrite(Rewrite):
+    id = "string-join"
+    rule = "string-concat-in-loop"
+    estimated_speedup = 5.0
+
+    def changes(self, source):
+        for body in source.bodies():
+            for position, loop in enumerate(body):
+                if not isinstance(loop, ast.For) or loop.orelse:
+                    continue
+                for name, appends in self._accumulators(loop).items():
+                    init = self._initial_string(body[:position], name)
+                    if init is None or self._declared_outside(source, loop, name):
+                        continue
+                    # The accumulator must not be read inside the loop, only extended
+                    allowed = {id(target) for stmt in appends for target in self._own_names(stmt, name)}
+                    if any(
+                        isinstance(n, ast.Name) and n.id == name and id(n) not in allowed
+                        for n in ast.walk(loop)
+                    ):
+                        continue
+                    parts = source.fresh(f"{name}_parts")
+                    empty = isinstance(init.value, ast.Constant) and init.value.value == ""
+                    edits = [
+                        source.insert_before(loop, [f"{parts} = []" if empty else f"{parts} = [{name}]"]),
+                        source.insert_after(loop, [f"{name} = ''.join({parts})"]),
+                    ]
+                    added = [self._added(source, stmt) for stmt in appends]
+                    if None in added:
+                        continue
+                    edits += [source.replace(stmt, f"{parts}.append({text})") for stmt, text in zip(appends, added)]
+                    if None in edits:
+                        continue
+                    yield Change(edits, f"Built '{name}' with ''.join() instead of += in the loop", loop.lineno)
+
+    @staticmethod
+    def _leftmost(value: ast.expr) -> ast.expr:
+        while isinstance(value, ast.BinOp) and isinstance(value.op, ast.Add):
+            value = value.left
+        return value
+
+    @classmethod
+    def _added(cls, source: Source, stmt: ast.stmt) -> str | None:
+        """Source of what a statement adds to the accumulator (`a + b` of `s = s + a + b`)."""
+        if isinstance(stmt, ast.AugAssign):
+            return source.segment(stmt.value)
+        name = stmt.targets[0].id
+        text = source.segment(stmt.value)
+        if not text.startswith(name):
+            return None  # parenthesized, e.g. s = (s + a) + b
+        rest = text[len(name):].lstrip()
+        return rest[1:].strip() if rest.startswith("+") else None
+
+    @classmethod
+    def _own_names(cls, stmt: ast.stmt, name: str) -> list[ast.Name]:
+        if isinstance(stmt, ast.AugAssign):
+            return [stmt.target]
+        return [stmt.targets[0], cls._leftmost(stmt.value)]
+
+    @classmethod
+    def _accumulators(cls, loop: ast.For) -> dict[str, list[ast.stmt]]:
+        """`s += x` and `s = s + x` statements in a loop, by name."""
+        found: dict[str, list[ast.stmt]] = {}
+        for node in ast.walk(loop):
+            if isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name):
+                found.setdefault(node.target.id, []).append(node)
+            elif (
+                isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+                and isinstance(node.value, ast.BinOp) and isinstance(node.value.op, ast.Add)
+                and isinstance(cls._leftmost(node.value), ast.Name)
+                and cls._leftmost(node.value).id == node.targets[0].id
+            ):
+                found.setdefault(node.targets[0].id, []).append(node)
+        return found
+
+    @staticmethod
+    def _initial_string(before: list[ast.stmt], name: str) -> ast.Assign | None:
+        """The statement that last bound `name` before the loop, if it binds a string literal."""
+        for stmt in reversed(before):
+            if name in bound_in(stmt):
+                if (
+                    isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                    and isinstance(stmt.targets[0], ast.Name) and stmt.targets[0].id == name
+                    and _value_kind(stmt.value) == "str"
+                ):
+                    return stmt
+                return None
+        return None
+
+    @staticmethod
+    def _declared_outside(source: Source, loop: ast.For, name: str) -> bool:
+        scope = source.enclosing_function(loop) or source.tree
+        return any(isinstance(n, (ast.Global, ast.Nonlocal)) and name in n.names for n in ast.walk(scope))
+
+
+class CounterRewrite(Rewrite):
+    id = "counter"
+    rule = "repeated-count"
+    estimated_speedup = 10.0
+
+    def changes(self, source):
+        done = set()
+        for anchor in source.anchors():
+            if not source.can_import("collections", "Counter"):
+                return
+            groups: dict[str, list[ast.Call]] = {}
+            for site, target, sequence in self._sites(anchor):
+                for node in ast.walk(site):
+                    if (
+                        isinstance(node, ast.Call) and node not in done and not node.keywords
+                        and isinstance(node.func, ast.Attribute) and node.func.attr == "count"
+                        and isinstance(node.func.value, ast.Name) and node.func.value.id == sequence
+                        and len(node.args) == 1 and isinstance(node.args[0], ast.Name) and node.args[0].id == target
+                    ):
+                        groups.setdefault(sequence, []).append(node)
+            for sequence, calls in groups.items():
+                if not invariant({sequence}, anchor):
+                    continue
+                counts = source.fresh(f"{sequence}_counts")
+                edits = [source.insert_before(anchor, [f"{counts} = Counter({sequence})"])]
+                edits += [source.replace(call, f"{counts}[{call.args[0].id}]") for call in calls]
+                if None in edits:
+                    continue
+                done.update(calls)
+                yield Change(
+                    edits,
+                    f"Counted '{sequence}' once with collections.Counter instead of .count() per element",
+                    anchor.lineno,
+                    imports={("collections", "Counter")},
+                    proven=source.kind_of(sequence, anchor) == "str" or source.hashable_items(sequence, anchor),
+                )
+
+    @staticmethod
+    def _sites(anchor: ast.stmt) -> Iterable[tuple[ast.AST, str, str]]:
+        """(node, element name, sequence name) of every `for x in seq` in the anchor."""
+        for node in ast.walk(anchor):
+            if (
+                isinstance(node, (ast.For, ast.AsyncFor)) and isinstance(node.target, ast.Name)
+                and isinstance(node.iter, ast.Name) and node.target.id not in bound_in(ast.Module(node.body, []))
+            ):
+                yield ast.Module(node.body, []), node.target.id, node.iter.id
+            elif isinstance(node, _COMPREHENSIONS):
+                generator = node.generators[0]
+                if isinstance(generator.target, ast.Name) and isinstance(generator.iter, ast.Name):
+                    yield node, generator.target.id, generator.iter.id
+
+
+class MemoizeRewrite(Rewrite):
+    id = "memoize"
+    rule = "unmemoized-recursion"
+    estimated_speedup = 100.0
+
+    def changes(self, source):
+        if not source.can_import("functools", "lru_cache"):
+            return
+        for node in ast.walk(source.tree):
+            if not isinstance(node, ast.FunctionDef) or node.decorator_list:
+                continue
+            if isinstance(source.parents.get(node), ast.ClassDef):
+                continue
+            if not self._is_pure_recursion(node):
+                continue
+            edit = source.insert_before(node, ["@lru_cache(maxsize=None)"])
+            if edit is None:
+                continue
+            yield Change(
+                [edit],
+                f"Memoized pure recursive function '{node.name}' with functools.lru_cache",
+                node.lineno,
+                imports={("functools", "lru_cache")},
+                proven=self._hashable_arguments(source, node),
+            )
+
+    @staticmethod
+    def _hashable_arguments(source: Source, function: ast.FunctionDef) -> bool:
+        """
+        Whether every parameter provably holds a hashable value (lru_cache
+        raises TypeError otherwise): annotated int, str, tuple[int, ...]...,
+        or used as a number. Number uses are arithmetic or an ordering
+        comparison with a numeric constant, an index and range(); returning it,
+        passing it on to the function itself and other comparisons prove
+        nothing either way, and any other use (len(), iteration, `in`...)
+        disproves.
+        """
+        args = function.args
+        for arg in args.posonlyargs + args.args:
+            if arg.annotation is not None:
+                if not _hashable_annotation(arg.annotation):
+                    return False
+                continue
+            number = False
+            for node in ast.walk(function):
+                if not (isinstance(node, ast.Name) and node.id == arg.arg and isinstance(node.ctx, ast.Load)):
+                    continue
+                parent = source.parents.get(node)
+                if isinstance(parent, ast.BinOp) and not isinstance(parent.op, ast.Mult):
+                    other = parent.right if parent.left is node else parent.left
+                    if not _numeric_constant(other):
+                        return False
+                    number = True
+                elif isinstance(parent, ast.Compare):
+                    operands = [o for o in [parent.left] + parent.comparators if o is not node]
+                    ordering = not all(isinstance(op, (ast.Eq, ast.NotEq, ast.Is, ast.IsNot)) for op in parent.ops)
+                    if any(isinstance(op, (ast.In, ast.NotIn)) for op in parent.ops):
+                        return False
+                    number |= ordering and all(_numeric_constant(o) for o in operands)
+                elif isinstance(parent, ast.UnaryOp) and isinstance(parent.op, (ast.USub, ast.Invert)):
+                    number = True
+                elif isinstance(parent, ast.Subscript) and parent.slice is node:
+                    number = True
+                elif isinstance(parent, ast.Return):
+                    continue
+                elif isinstance(parent, ast.Call) and node in parent.args and isinstance(parent.func, ast.Name):
+                    if parent.func.id == "range":
+                        number = True
+                    elif parent.func.id != function.name:
+                        return False
+                else:
+                    return False
+            if not number:
+                return False
+        return True
+
+    @staticmethod
+    def _is_pure_recursion(function: ast.FunctionDef) -> bool:
+        args = function.args
+        if args.vararg or args.kwarg or args.kwonlyargs:
+            return False
+        if not all(isinstance(default, ast.Constant) for default in args.defaults):
+            return False
+        self_calls = [
+            n for n in ast.walk(function)
+            if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == function.name
+        ]
+        in_loop = any(isinstance(n, _LOOPS + _COMPREHENSIONS) for n in ast.walk(function))
+        if len(self_calls) < 2 and not (self_calls and in_loop):
+            return False
+
+        for node in ast.walk(function):
+            if isinstance(node, (ast.Global, ast.Nonlocal, ast.Yield, ast.YieldFrom, ast.Await)):
+                return False
+        if mutated_in(function, PURE_BUILTINS | {function.name}):
+            return False
+        # Only its parameters, its locals, itself and pure builtins: no globals to go stale
+        local = bound_in(function) | {function.name}
+        for node in ast.walk(function):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id not in local and node.id not in PURE_BUILTINS:
+                    return False
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                return False
+        return True
+
+
+class HoistInvariantRewrite(Rewrite):
+    id = "hoist-invariant"
+    rule = "sort-in-loop"
+    estimated_speedup = 10.0
+
+    def changes(self, source):
+        done = set()
+        shadowed = bound_in(source.tree) & HOISTABLE_CALLS
+        for anchor in source.anchors():
+            groups: dict[str, list[ast.Call]] = {}
+            for node in _repeated_nodes(anchor):
+                if node in done or not self._hoistable(source, node, anchor, shadowed):
+                    continue
+                groups.setdefault(ast.dump(node), []).append(node)
+            for calls in groups.values():
+                call = calls[0]
+                names = {arg.id for arg in call.args if isinstance(arg, ast.Name)}
+                if not invariant(names, anchor):
+                    continue
+                expression = source.segment(call)
+                if call.func.id in ("max", "min"):
+                    # Only evaluated in the loop when the sequence is non-empty
+                    expression = f"{call.func.id}({call.args[0].id}, default=None)"
+                variable = source.fresh(f"{call.func.id}_{'_'.join(sorted(names))}")
+                edits = [source.insert_before(anchor, [f"{variable} = {expression}"])]
+                edits += [source.replace(c, variable) for c in calls]
+                if None in edits:
+                    continue
+                done.update(calls)
+                yield Change(
+                    edits,
+                    f"Hoisted loop-invariant {source.segment(call)} out of the loop",
+                    anchor.lineno,
+                )
+
+    @staticmethod
+    def _hoistable(source: Source, node: ast.AST, anchor: ast.stmt, shadowed: set[str]) -> bool:
+        if not (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in HOISTABLE_CALLS and node.func.id not in shadowed
+            and not node.keywords and node.args
+            and all(isinstance(arg, (ast.Name, ast.Constant)) for arg in node.args)
+            and any(isinstance(arg, ast.Name) for arg in node.args)
+        ):
+            return False
+        if node.func.id in ("max", "min"):
+            # max([]) raises; hoisted it must only see sequences the loop iterates
+            if len(node.args) != 1 or node.args[0].id not in _iterated_names(anchor):
+                return False
+        # The shared result must not escape to code that could mutate it
+        parent = source.parents.get(node)
+        if isinstance(parent, (ast.Compare, ast.BinOp, ast.BoolOp, ast.UnaryOp, ast.If, ast.While, ast.IfExp)):
+            return True
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            return True
+        return isinstance(parent, (ast.For, ast.comprehension)) and parent.iter is node
+
+
+class RangeLenRewrite(Rewrite):
+    id = "range-len"
+    rule = "range-len"
+    estimated_speedup = 1.1
+
+    def changes(self, source):
+        for loop in ast.walk(source.tree):
+            if not (
+                isinstance(loop, ast.For) and isinstance(loop.target, ast.Name) and not loop.orelse
+                and isinstance(loop.iter, ast.Call) and isinstance(loop.iter.func, ast.Name)
+                and loop.iter.func.id == "range" and len(loop.iter.args) == 1 and not loop.iter.keywords
+            ):
+                continue
+            length = loop.iter.args[0]
+            if not (
+                isinstance(length, ast.Call) and isinstance(length.func, ast.Name) and length.func.id == "len"
+                and len(length.args) == 1 and isinstance(length.args[0], ast.Name)
+            ):
+                continue
+            index, sequence = loop.target.id, length.args[0].id
+            body = ast.Module(loop.body, [])
+            if not invariant({index, sequence}, body):
+                continue
+            lookups = [
+                n for n in ast.walk(body)
+                if isinstance(n, ast.Subscript) and isinstance(n.ctx, ast.Load)
+                and isinstance(n.value, ast.Name) and n.value.id == sequence
+                and isinstance(n.slice, ast.Name) and n.slice.id == index
+            ]
+            if not lookups:
+                continue
+            in_lookups = {id(n.slice) for n in lookups}
+            index_used = any(
+                isinstance(n, ast.Name) and n.id == index and id(n) not in in_lookups for n in ast.walk(body)
+            )
+            item = source.fresh(sequence[:-1] if len(sequence) > 2 and sequence.endswith("s") else f"{sequence}_item")
+            edits = [
+                source.replace(loop.target, f"{index}, {item}" if index_used else item),
+                source.replace(loop.iter, f"enumerate({sequence})" if index_used else sequence),
+            ]
+            edits += [source.replace(n, item) for n in lookups]
+            yield Change(
+                edits,
+                f"Iterated '{sequence}' directly instead of indexing with range(len())",
+                loop.lineno,
+            )
+
+
+PYTHON_REWRITES: list[type[Rewrite]] = [
+    MemoizeRewrite,
+    ListToSetRewrite,
+    CounterRewrite,
+    HoistInvariantRewrite,
+    StringJoinRewrite,
+    RangeLenRewrite,
+]
+
+
+# Rewriter ------------------------------------------------------------------
+
+
+def _conflicts(edit: Edit, other: Edit) -> bool:
+    if edit.start == edit.end:
+        return other.start < edit.start < other.end
+    if other.start == other.end:
+        return edit.start < other.start < edit.end
+    return edit.start < other.end and other.start < edit.end
+
+
+class PythonRewriter:
+    """Applies rewrites one after the other, re-parsing between them."""
+
+    def __init__(self, rewrites: Iterable[type[Rewrite]] | None = None, proven_only: bool = False):
+        self.rewrites = [rewrite() for rewrite in (PYTHON_REWRITES if rewrites is None else rewrites)]
+        self.proven_only = proven_only  # skip changes that are only correct for some argument types
+
+    def rewrite(self, code: str) -> RewriteResult:
+        """
+        Rewrite a module.
+
+        Raises:
+            SyntaxError: If the code doesn't parse
+        """
+        ast.parse(code)
+        if not code.endswith("\n"):
+            code += "\n"
+        applied = []
+        for rewrite in self.rewrites:
+            code, changes = self.apply(rewrite, code)
+            applied.extend(
+                AppliedRewrite(
+                    rewrite=rewrite.id,
+                    rule=rewrite.rule,
+                    message=change.message,
+                    line=change.line,
+                    estimated_speedup=rewrite.estimated_speedup,
+                )
+                for change in changes
+            )
+        return RewriteResult(code=code, applied=applied)
+
+    def apply(self, rewrite: Rewrite, code: str) -> tuple[str, list[Change]]:
+        """One rewrite over a module: (new code, changes made)."""
+        source = Source(code)
+        accepted: list[Change] = []
+        edits: list[Edit] = []
+        for change in rewrite.changes(source):
+            if self.proven_only and not change.proven:
+                continue
+            if any(_conflicts(edit, other) for edit in change.edits for other in edits):
+                continue
+            accepted.append(change)
+            edits.extend(change.edits)
+        if not accepted:
+            return code, []
+
+        imports = sorted({imp for change in accepted for imp in change.imports})
+        import_edits = [source.import_edit(module, name) for module, name in imports]
+        new_code = source.apply([edit for edit in import_edits if edit] + edits)
+        try:
+            ast.parse(new_code)
+        except SyntaxError as e:
+            logger.warning(f"Rewrite {rewrite.id} produced invalid code, skipped: {e}")
+            return code, []
+        return new_code, accepted
+
+
+def rewrite_python(
+    code: str, rewrites: Iterable[type[Rewrite]] | None = None, proven_only: bool = False
+) -> RewriteResult:
+    """Rewrite Python code with every rewrite in `PYTHON_REWRITES` (or `rewrites`)."""
+    return PythonRewriter(rewrites, proven_only).rewrite(code)
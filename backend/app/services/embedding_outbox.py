@@ -0,0 +1,144 @@
+"""
+Embed-on-write pipeline.
+
+Solution writes insert a row into `embedding_outbox` in the same transaction
+and then ask Celery to drain the outbox after a short delay. Writes that land
+within the delay share a single task (coalesced with a Redis flag), and the
+task embeds everything pending in large batches into every embedding space
+that is not retired (dual-write during a model migration). If Redis is down
+the outbox rows stay pending and the periodic sweep picks them up.
+"""
+
+import logging
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session
+from app.models.embedding import EmbeddingOutbox
+from app.services.cache import get_redis
+from app.services.embedding_spaces import get_write_spaces
+from app.services.reindex import embed_and_write
+from app.services.playground_cache import invalidate_playground_solutions
+from app.services.search_cache import invalidate_solutions
+
+logger = logging.getLogger(__name__)
+
+# Set while a drain task is queued; writes seeing it don't enqueue another
+SCHEDULED_KEY = "embedding_outbox:scheduled"
+
+
+def add_to_outbox(db: AsyncSession, solution_id: UUID) -> None:
+    """Queue a solution for embedding as part of the caller's transaction."""
+    db.add(EmbeddingOutbox(solution_id=solution_id))
+
+
+async def schedule_outbox_drain() -> bool:
+    """
+    Enqueue a drain task unless one is already pending.
+
+    Must be called after the outbox row is committed. Never raises: a failure
+    only delays the embedding until the next periodic sweep.
+
+    Returns:
+        True if a task is queued (now or already)
+    """
+    settings = get_settings()
+    try:
+        redis = get_redis()
+        is_first = await redis.set(
+            SCHEDULED_KEY, "1", nx=True, ex=settings.embedding_coalesce_seconds
+        )
+        if not is_first:
+            return True
+
+        from app.tasks import process_embedding_outbox
+        process_embedding_outbox.apply_async(
+            countdown=settings.embedding_coalesce_seconds, retry=False
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Could not schedule embedding task, sweep will pick it up: {e}")
+        return False
+
+
+async def drain_outbox(batch_size: int | None = None) -> dict:
+    """
+    Embed every pending outbox entry, one batch per transaction.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so concurrent drains never
+    embed the same solution twice.
+
+    Returns:
+        Counts of embedded vectors (summed over spaces), skipped (unchanged)
+        vectors and failed entries
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.embedding_outbox_batch_size
+    stats = {"embedded": 0, "skipped": 0, "failed": 0}
+    # Failed entries are retried by the next drain, not in a tight loop here
+    after_id = 0
+
+    async with async_session() as db:
+        while True:
+            result = await db.execute(
+                text("""
+                    SELECT o.id AS outbox_id, o.solution_id
+                    FROM embedding_outbox o
+                    WHERE o.processed_at IS NULL
+                    AND o.attempts < :max_attempts
+                    AND o.id > :after_id
+                    ORDER BY o.id
+                    LIMIT :limit
+                    FOR UPDATE OF o SKIP LOCKED
+                """),
+                {
+                    "max_attempts": settings.embedding_outbox_max_attempts,
+                    "after_id": after_id,
+                    "limit": batch_size,
+                },
+            )
+            rows = result.fetchall()
+            if not rows:
+                break
+
+            outbox_ids = [row.outbox_id for row in rows]
+            after_id = outbox_ids[-1]
+            # The same solution may be queued more than once (create + version edits)
+            solution_ids = list(dict.fromkeys(row.solution_id for row in rows))
+
+            try:
+                for space in await get_write_spaces(db):
+                    embedded, skipped = await embed_and_write(db, solution_ids, space)
+                    stats["embedded"] += embedded
+                    stats["skipped"] += skipped
+                await db.execute(
+                    text("UPDATE embedding_outbox SET processed_at = NOW() WHERE id = ANY(:ids)"),
+                    {"ids": outbox_ids},
+                )
+                await db.commit()
+                # New vectors change search results and playground matches
+                await invalidate_solutions(db, solution_ids)
+                await invalidate_playground_solutions(db, solution_ids)
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Embedding outbox batch failed: {e}")
+                await db.execute(
+                    text("""
+                        UPDATE embedding_outbox
+                        SET attempts = attempts + 1, last_error = :error
+                        WHERE id = ANY(:ids)
+                    """),
+                    {"ids": outbox_ids, "error": str(e)[:1000]},
+                )
+                await db.commit()
+                stats["failed"] += len(outbox_ids)
+
+    if stats["embedded"] or stats["failed"]:
+        logger.info(
+            f"Embedding outbox drained: embedded={stats['embedded']} "
+            f"skipped={stats['skipped']} failed={stats['failed']}"
+        )
+    return stats
@@ -0,0 +1,266 @@
+"""
+Embedding spaces: several embedding models populated side by side.
+
+Every space that is not retired is written on solution writes and by the
+reindex job (dual-write). Search reads one space - `embedding_search_space`
+from settings when set, otherwise the space flagged active in the database.
+Cutover flips the active flag inside one transaction, and an optional shadow
+space is queried in the background to measure result overlap beforehand.
+"""
+
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# How long a process keeps using the active space before re-reading it
+ACTIVE_SPACE_TTL_SECONDS = 10.0
+
+_active_space_cache: tuple[float, "EmbeddingSpaceInfo"] | None = None
+
+# Space names end up in index names and partial index predicates
+SPACE_NAME_RE = re.compile(r"^[a-z][a-z0-9_]{0,40}$")
+
+
+@dataclass(frozen=True)
+class EmbeddingSpaceInfo:
+    """Definition of an embedding space."""
+    name: str
+    model: str
+    dim: int
+    status: str = "ready"
+    is_active: bool = False
+
+
+def validate_space_name(name: str) -> str:
+    """Return `name` if it is a valid space name, else raise ValueError."""
+    if not SPACE_NAME_RE.match(name):
+        raise ValueError(f"Invalid embedding space name '{name}': use lowercase letters, digits and _")
+    return name
+
+
+def config_space() -> EmbeddingSpaceInfo:
+    """The space described by settings.embedding_model / embedding_dim."""
+    settings = get_settings()
+    return EmbeddingSpaceInfo(
+        name=settings.embedding_space,
+        model=settings.embedding_model,
+        dim=settings.embedding_dim,
+    )
+
+
+def _row_to_space(row) -> EmbeddingSpaceInfo:
+    return EmbeddingSpaceInfo(
+        name=row.name, model=row.model, dim=row.dim, status=row.status, is_active=row.is_active
+    )
+
+
+async def list_spaces(db: AsyncSession) -> list[EmbeddingSpaceInfo]:
+    """All registered spaces, active first."""
+    result = await db.execute(
+        text("SELECT name, model, dim, status, is_active FROM embedding_spaces ORDER BY is_active DESC, name")
+    )
+    return [_row_to_space(row) for row in result.fetchall()]
+
+
+async def get_space(db: AsyncSession, name: str) -> EmbeddingSpaceInfo | None:
+    result = await db.execute(
+        text("SELECT name, model, dim, status, is_active FROM embedding_spaces WHERE name = :name"),
+        {"name": name},
+    )
+    row = result.fetchone()
+    return _row_to_space(row) if row else None
+
+
+async def ensure_config_space(db: AsyncSession) -> EmbeddingSpaceInfo:
+    """Register the configured space if missing; it becomes active if nothing else is."""
+    space = config_space()
+    await db.execute(
+        text("""
+            INSERT INTO embedding_spaces (name, model, dim, status, is_active, activated_at)
+            SELECT :name, :model, :dim, 'ready', NOT EXISTS (SELECT 1 FROM embedding_spaces WHERE is_active), NOW()
+            ON CONFLICT (name) DO NOTHING
+        """),
+        {"name": space.name, "model": space.model, "dim": space.dim},
+    )
+    return await get_space(db, space.name) or space
+
+
+async def get_write_spaces(db: AsyncSession) -> list[EmbeddingSpaceInfo]:
+    """Spaces that must receive new embeddings (everything not retired)."""
+    spaces = [s for s in await list_spaces(db) if s.status != "retired"]
+    if not spaces:
+        spaces = [await ensure_config_space(db)]
+    return spaces
+
+
+async def get_search_space(db: AsyncSession) -> EmbeddingSpaceInfo:
+    """
+    Space that serves search.
+
+    The `embedding_search_space` setting wins when set; otherwise the active
+    space from the database, cached for ACTIVE_SPACE_TTL_SECONDS per process.
+    """
+    global _active_space_cache
+    settings = get_settings()
+
+    if settings.embedding_search_space:
+        space = await get_space(db, settings.embedding_search_space)
+        if space:
+            return space
+        logger.warning(f"Configured search space '{settings.embedding_search_space}' is not registered")
+
+    now = time.monotonic()
+    if _active_space_cache and now - _active_space_cache[0] < ACTIVE_SPACE_TTL_SECONDS:
+        return _active_space_cache[1]
+
+    result = await db.execute(
+        text("SELECT name, model, dim, status, is_active FROM embedding_spaces WHERE is_active")
+    )
+    row = result.fetchone()
+    space = _row_to_space(row) if row else config_space()
+    _active_space_cache = (now, space)
+    return space
+
+
+def get_shadow_space_name(primary: EmbeddingSpaceInfo) -> str | None:
+    """Name of the shadow space to compare against for this request, if any."""
+    settings = get_settings()
+    shadow = settings.embedding_shadow_space
+    if not shadow or shadow == primary.name:
+        return None
+    if random.random() >= settings.embedding_shadow_sample_rate:
+        return None
+    return shadow
+
+
+async def register_space(db: AsyncSession, name: str, model: str, dim: int) -> EmbeddingSpaceInfo:
+    """Register a new space in `backfilling` state; writes start dual-writing to it."""
+    validate_space_name(name)
+    await db.execute(
+        text("""
+            INSERT INTO embedding_spaces (name, model, dim, status, is_active)
+            VALUES (:name, :model, :dim, 'backfilling', FALSE)
+            ON CONFLICT (name) DO NOTHING
+        """),
+        {"name": name, "model": model, "dim": dim},
+    )
+    space = await get_space(db, name)
+    if space.model != model or space.dim != dim:
+        raise ValueError(f"Embedding space '{name}' already exists with model {space.model} ({space.dim}d)")
+    return space
+
+
+async def space_coverage(db: AsyncSession, name: str) -> tuple[int, int]:
+    """(solutions embedded in the space, total solutions)."""
+    result = await db.execute(
+        text("""
+            SELECT
+                (SELECT COUNT(*) FROM solution_embeddings WHERE space = :name) AS embedded,
+                (SELECT COUNT(*) FROM solutions) AS total
+        """),
+        {"name": name},
+    )
+    row = result.fetchone()
+    return row.embedded, row.total
+
+
+async def mark_space_ready(db: AsyncSession, name: str) -> None:
+    """Mark a backfilled space as ready for cutover."""
+    await db.execute(
+        text("UPDATE embedding_spaces SET status = 'ready' WHERE name = :name AND status = 'backfilling'"),
+        {"name": name},
+    )
+
+
+async def activate_space(db: AsyncSession, name: str, min_coverage: float = 1.0) -> EmbeddingSpaceInfo:
+    """
+    Make `name` the space that serves search.
+
+    Both flag updates run in the caller's transaction, so readers see either
+    the old or the new active space, never none. The previous space stays
+    `ready` (and keeps being written) so the switch can be reverted.
+
+    Raises:
+        ValueError: If the space is unknown, retired, or not backfilled enough
+    """
+    space = await get_space(db, name)
+    if not space:
+        raise ValueError(f"Unknown embedding space '{name}'")
+    if space.status == "retired":
+        raise ValueError(f"Embedding space '{name}' is retired")
+
+    embedded, total = await space_coverage(db, name)
+    coverage = embedded / total if total else 1.0
+    if coverage < min_coverage:
+        raise ValueError(
+            f"Embedding space '{name}' covers {embedded}/{total} solutions "
+            f"({coverage:.1%}), need {min_coverage:.0%}"
+        )
+
+    # Two statements: the partial unique index is checked per row
+    await db.execute(text("UPDATE embedding_spaces SET is_active = FALSE WHERE is_active AND name != :name"), {"name": name})
+    await db.execute(
+        text("""
+            UPDATE embedding_spaces
+            SET is_active = TRUE, status = 'ready', activated_at = NOW()
+            WHERE name = :name
+        """),
+        {"name": name},
+    )
+    logger.info(f"Embedding space '{name}' is now active for search")
+    return await get_space(db, name)
+
+
+async def retire_space(db: AsyncSession, name: str) -> None:
+    """Stop writing a space and drop its vectors. The active space cannot be retired."""
+    space = await get_space(db, name)
+    if not space:
+        raise ValueError(f"Unknown embedding space '{name}'")
+    if space.is_active:
+        raise ValueError(f"Embedding space '{name}' is active; activate another space first")
+    await db.execute(text("UPDATE embedding_spaces SET status = 'retired' WHERE name = :name"), {"name": name})
+    await db.execute(text("DELETE FROM solution_embeddings WHERE space = :name"), {"name": name})
+    await db.execute(text("DELETE FROM solution_embedding_chunks WHERE space = :name"), {"name": name})
+
+
+def result_overlap(primary_ids: list[str], shadow_ids: list[str]) -> float:
+    """Fraction of the primary top-k that the shadow space also returned."""
+    if not primary_ids:
+        return 1.0 if not shadow_ids else 0.0
+    return len(set(primary_ids) & set(shadow_ids)) / len(primary_ids)
+
+
+async def record_shadow_comparison(
+    db: AsyncSession,
+    query: str,
+    primary_space: str,
+    shadow_space: str,
+    primary_ids: list[str],
+    shadow_ids: list[str],
+) -> float:
+    """Store the overlap between primary and shadow results for one query."""
+    overlap = result_overlap(primary_ids, shadow_ids)
+    await db.execute(
+        text("""
+            INSERT INTO embedding_shadow_comparisons (query, primary_space, shadow_space, k, overlap)
+            VALUES (:query, :primary_space, :shadow_space, :k, :overlap)
+        """),
+        {
+            "query": query,
+            "primary_space": primary_space,
+            "shadow_space": shadow_space,
+            "k": len(primary_ids),
+            "overlap": overlap,
+        },
+    )
+    logger.info(f"Shadow search '{query}': {primary_space} vs {shadow_space} overlap={overlap:.2f}")
+    return overlap
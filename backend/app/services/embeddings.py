@@ -1,6 +1,9 @@
 """Code embedding service using sentence-transformers."""
+import asyncio
+import hashlib
 import logging
 import re
+import threading
 from functools import lru_cache
 import numpy as np
 
@@ -59,8 +62,10 @@ RU_TO_EN_TERMS = {
     "машинное обучение": "machine learning",
 }
 
-# Lazy loading of the model
-_model = None
+# Lazy loading of models, keyed by model name (one per embedding space)
+_models: dict = {}
+# Startup preloading and first requests may load the same model from several threads
+_models_lock = threading.Lock()
 
 
 def translate_query(query: str) -> str:
@@ -89,29 +94,44 @@ def translate_query(query: str) -> str:
     return result
 
 
-def _get_model():
-    """Lazy load the embedding model."""
-    global _model
-    if _model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            from app.config import get_settings
-            settings = get_settings()
-            logger.info(f"Loading embedding model: {settings.embedding_model}")
-            _model = SentenceTransformer(settings.embedding_model)
-            logger.info("Embedding model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load embedding model: {e}")
-            raise RuntimeError(f"Embedding model unavailable: {e}")
-    return _model
-
-
-async def get_embedding(text: str) -> list[float]:
+def _get_model(model_name: str | None = None):
+    """Lazy load an embedding model (defaults to settings.embedding_model)."""
+    from app.config import get_settings
+    model_name = model_name or get_settings().embedding_model
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"Loading embedding model: {model_name}")
+                model = SentenceTransformer(model_name)
+                _models[model_name] = model
+                logger.info("Embedding model loaded successfully")
+            except Exception as e:
+                logger.error(f"Failed to load embedding model: {e}")
+                raise RuntimeError(f"Embedding model unavailable: {e}")
+    return model
+
+
+async def _load_model(model_name: str | None = None):
+    """_get_model without blocking the event loop: a first load takes seconds."""
+    from app.config import get_settings
+    model = _models.get(model_name or get_settings().embedding_model)
+    if model is not None:
+        return model
+    return await asyncio.to_thread(_get_model, model_name)
+
+
+async def get_embedding(text: str, model_name: str | None = None) -> list[float]:
     """
     Generate embedding for a code snippet or query.
 
     Args:
         text: Code or natural language query
+        model_name: Model of the target embedding space (defaults to settings.embedding_model)
 
     Returns:
         List of floats representing the embedding vector
@@ -120,29 +140,54 @@ async def get_embedding(text: str) -> list[float]:
         RuntimeError: If embedding model is unavailable
     """
     try:
-        model = _get_model()
-        embedding = model.encode(text, convert_to_numpy=True)
+        model = await _load_model(model_name)
+        # Off the event loop, so other requests (and a search's SQL) proceed meanwhile
+        embedding = await asyncio.to_thread(model.encode, text, convert_to_numpy=True)
         return embedding.tolist()
     except Exception as e:
         logger.error(f"Embedding generation failed: {e}")
         raise
 
 
-async def get_embeddings_batch(texts: list[str]) -> list[list[float]]:
+async def get_embeddings_batch(
+    texts: list[str],
+    batch_size: int | None = None,
+    model_name: str | None = None,
+) -> list[list[float]]:
     """
     Generate embeddings for multiple texts in batch.
 
     Args:
         texts: List of code snippets or queries
+        batch_size: Forward-pass batch size (defaults to settings.embedding_batch_size)
+        model_name: Model of the target embedding space (defaults to settings.embedding_model)
 
     Returns:
         List of embedding vectors
     """
-    model = _get_model()
-    embeddings = model.encode(texts, convert_to_numpy=True)
+    if not texts:
+        return []
+    from app.config import get_settings
+    model = await _load_model(model_name)
+    embeddings = await asyncio.to_thread(
+        model.encode,
+        texts,
+        batch_size=batch_size or get_settings().embedding_batch_size,
+        convert_to_numpy=True,
+    )
     return embeddings.tolist()
 
 
+def build_embedding_text(title: str, description: str | None, code: str) -> str:
+    """Text that is embedded for a solution (same layout as the seed scripts)."""
+    return " ".join(part for part in (title, description, code) if part)
+
+
+def compute_code_hash(embedding_text: str) -> str:
+    """Stable hash of the embedded text, used to skip unchanged rows on reindex."""
+    return hashlib.sha256(embedding_text.encode("utf-8")).hexdigest()
+
+
 def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
     """Calculate cosine similarity between two vectors."""
     a = np.array(vec1)
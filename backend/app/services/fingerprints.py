@@ -0,0 +1,371 @@
+"""
+Structural fingerprints of code for the playground.
+
+Code is normalized before it is compared: for Python the AST is alpha-renamed
+(every name bound by the code becomes v0, v1, ... in order of first use, while
+builtins, imports and attribute names are kept), literals are canonicalized
+(numbers to 0, strings to "") and docstrings and annotations are dropped, so a
+textbook baseline with different variable names normalizes to the same text.
+Other languages, and Python that doesn't parse, get the same treatment on
+tokens.
+
+Each normalized form gives:
+- `structure_hash`: SHA-256 of the normalized text (identical structure)
+- `minhash`: MinHash signature of its token shingles (estimates Jaccard)
+- `lsh_buckets`: one bucket per band of the signature; two codes whose
+  signatures agree on any band share a bucket, so candidates are found with
+  a GIN `&&` lookup instead of comparing against every solution
+
+Fingerprints are stored per solution (its code) and per problem (its baseline
+code) on write; `backfill_fingerprints` fills in rows written before.
+"""
+
+import ast
+import builtins
+import hashlib
+import keyword
+import logging
+import re
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Changing any of these invalidates stored fingerprints (rerun the backfill with force)
+NUM_PERM = 64
+LSH_BANDS = 16  # 4 rows per band: pairs at Jaccard 0.5 collide ~64% of the time, at 0.7 ~99%
+SHINGLE_SIZE = 4  # tokens per shingle
+
+_PRIME = (1 << 31) - 1  # signatures fit in a Postgres INTEGER
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_TOKEN = re.compile(r"\w+|[^\s\w]")
+_STRING = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`')
+_NUMBER = re.compile(r"\b\d[\w.]*\b")
+_IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+
+# Names kept by the token normalizer: keywords and common builtins of the playground languages
+_KEEP_NAMES = frozenset(keyword.kwlist) | frozenset(dir(builtins)) | frozenset("""
+    break case catch class const continue default delete do else export extends false finally for
+    function if import in instanceof let new null of return static super switch this throw true try
+    typeof undefined var void while yield async await Array Map Set Math Object JSON String Number
+    console length push pop shift slice splice sort includes indexOf
+    chan defer fallthrough func go goto interface package range select struct type make append cap
+    copy nil string int int64 float64 bool byte rune error
+    as crate dyn enum fn impl loop match mod move mut pub ref self Self trait unsafe use where
+    Vec HashMap HashSet BTreeMap String Option Some None Ok Err Box usize i32 i64 u32 u64 f64 vec
+""".split())
+
+
+@dataclass
+class CodeFingerprint:
+    structure_hash: str
+    minhash: np.ndarray  # NUM_PERM uint64 values < 2**31
+    lsh_buckets: list[int]  # LSH_BANDS signed 64-bit bucket ids
+
+
+class _AlphaRenamer(ast.NodeTransformer):
+    """Renames bound names in order of first use and canonicalizes literals."""
+
+    def __init__(self, bound: set[str]):
+        self.bound = bound
+        self.names: dict[str, str] = {}
+
+    def _rename(self, name: str) -> str:
+        if name not in self.bound:
+            return name
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def _drop_docstring(self, node):
+        body = getattr(node, "body", None)
+        if (
+            body and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str)
+        ):
+            node.body = body[1:] or [ast.Pass()]
+
+    def visit_Module(self, node):
+        self._drop_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        node.name = self._rename(node.name)
+        node.returns = None
+        self._drop_docstring(node)
+        node.decorator_list = [self.visit(d) for d in node.decorator_list]
+        node.args = self.visit(node.args)
+        node.body = [self.visit(stmt) for stmt in node.body]
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        node.name = self._rename(node.name)
+        self._drop_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_arg(self, node):
+        node.arg = self._rename(node.arg)
+        node.annotation = None
+        return node
+
+    def visit_Name(self, node):
+        node.id = self._rename(node.id)
+        return node
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            node.name = self._rename(node.name)
+        return self.generic_visit(node)
+
+    def visit_Global(self, node):
+        node.names = [self._rename(name) for name in node.names]
+        return node
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, bool) or value is None or value is Ellipsis:
+            return node
+        if isinstance(value, (int, float, complex)):
+            return ast.Constant(value=0)
+        if isinstance(value, bytes):
+            return ast.Constant(value=b"")
+        return ast.Constant(value="")
+
+    def visit_JoinedStr(self, node):
+        return ast.Constant(value="")
+
+
+def _bound_names(tree: ast.AST) -> set[str]:
+    """Names the code itself binds (definitions, parameters, assignment targets)."""
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+    return bound
+
+
+def normalize_python(code: str) -> str:
+    """Alpha-renamed, literal-canonical Python source (raises SyntaxError)."""
+    tree = ast.parse(code)
+    tree = _AlphaRenamer(_bound_names(tree)).visit(tree)
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+def normalize_tokens(code: str, language: str) -> str:
+    """Token-level normalization for languages without an AST here."""
+    if language == "python":
+        code = re.sub(r"#.*$", "", code, flags=re.MULTILINE)
+    else:
+        code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
+        code = re.sub(r"//.*$", "", code, flags=re.MULTILINE)
+    code = _STRING.sub('""', code)
+    code = _NUMBER.sub("0", code)
+
+    names: dict[str, str] = {}
+
+    def rename(match: re.Match) -> str:
+        name = match.group(0)
+        # Member names (obj.push, strings.Builder) are API, not variables
+        if name in _KEEP_NAMES or match.start() > 0 and code[match.start() - 1] == ".":
+            return name
+        return names.setdefault(name, f"v{len(names)}")
+
+    return " ".join(_TOKEN.findall(_IDENTIFIER.sub(rename, code)))
+
+
+def normalize_structure(code: str, language: str) -> str:
+    language = language.lower()
+    if language == "python":
+        try:
+            return normalize_python(code)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    return normalize_tokens(code, language)
+
+
+def shingles(normalized: str) -> set[str]:
+    tokens = _TOKEN.findall(normalized)
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(items: set[str]) -> np.ndarray:
+    """MinHash signature under NUM_PERM universal hash functions."""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little") % _PRIME for item in items],
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p for every (shingle, permutation); products stay below 2**62
+    return ((hashes[:, None] * _HASH_A + _HASH_B) % _PRIME).min(axis=0)
+
+
+def lsh_buckets(signature: np.ndarray) -> list[int]:
+    """One bucket id per band; the band index is hashed in so bands never collide."""
+    rows = NUM_PERM // LSH_BANDS
+    buckets = []
+    for band in range(LSH_BANDS):
+        digest = hashlib.blake2b(
+            band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def fingerprint_code(code: str, language: str) -> CodeFingerprint | None:
+    """Fingerprint of `code`, or None when there is nothing to fingerprint."""
+    normalized = normalize_structure(code, language)
+    items = shingles(normalized)
+    if not items:
+        return None
+    signature = minhash_signature(items)
+    return CodeFingerprint(
+        structure_hash=hashlib.sha256(normalized.encode()).hexdigest(),
+        minhash=signature,
+        lsh_buckets=lsh_buckets(signature),
+    )
+
+
+def fingerprint_columns(code: str, language: str, prefix: str = "") -> dict:
+    """Column values to store a fingerprint with a row (`prefix` "baseline_" for problems)."""
+    fingerprint = fingerprint_code(code, language)
+    if fingerprint is None:
+        return {f"{prefix}structure_hash": None, f"{prefix}minhash": None, f"{prefix}lsh_buckets": None}
+    return {
+        f"{prefix}structure_hash": fingerprint.structure_hash,
+        f"{prefix}minhash": fingerprint.minhash.tolist(),
+        f"{prefix}lsh_buckets": fingerprint.lsh_buckets,
+    }
+
+
+def estimated_similarity(fingerprint: CodeFingerprint, signatures: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity to each row of a (n, NUM_PERM) signature matrix."""
+    if len(signatures) == 0:
+        return np.zeros(0)
+    return (signatures == fingerprint.minhash).mean(axis=1)
+
+
+async def find_structural_matches(
+    db: AsyncSession, fingerprint: CodeFingerprint, language: str
+) -> dict[str, float]:
+    """
+    Solutions structurally similar to a fingerprint, through the LSH buckets.
+
+    A solution matches on its own code or on its problem's baseline code (the
+    usual case: a user pasting a textbook baseline), whichever is closer.
+
+    Returns:
+        Estimated similarity by solution id (1.0 for identical structure)
+    """
+    result = await db.execute(
+        text("""
+            SELECT s.id, s.structure_hash, s.minhash
+            FROM solutions s
+            WHERE s.language = :language
+              AND s.minhash IS NOT NULL
+              AND (s.structure_hash = :structure_hash OR s.lsh_buckets && :buckets)
+            UNION ALL
+            SELECT s.id, p.baseline_structure_hash, p.baseline_minhash
+            FROM problems p
+            JOIN solutions s ON s.problem_id = p.id AND s.language = :language
+            WHERE p.baseline_language = :language
+              AND p.baseline_minhash IS NOT NULL
+              AND (p.baseline_structure_hash = :structure_hash OR p.baseline_lsh_buckets && :buckets)
+            LIMIT :limit
+        """),
+        {
+            "language": language.lower(),
+            "structure_hash": fingerprint.structure_hash,
+            "buckets": fingerprint.lsh_buckets,
+            "limit": get_settings().playground_structural_candidates,
+        },
+    )
+    rows = result.fetchall()
+    if not rows:
+        return {}
+
+    similarity = estimated_similarity(fingerprint, np.array([row.minhash for row in rows], dtype=np.uint64))
+    matches: dict[str, float] = {}
+    for row, sim in zip(rows, similarity):
+        sim = 1.0 if row.structure_hash == fingerprint.structure_hash else float(sim)
+        solution_id = str(row.id)
+        matches[solution_id] = max(matches.get(solution_id, 0.0), sim)
+    return matches
+
+
+async def backfill_fingerprints(db: AsyncSession, batch_size: int = 500, force: bool = False) -> dict:
+    """
+    Fingerprint solutions and problem baselines stored without one.
+
+    Args:
+        force: Recompute every fingerprint (after changing the normalization)
+
+    Returns:
+        Counts of fingerprinted solutions and problems
+    """
+    counts = {}
+    for table, code_column, language_column, prefix in (
+        ("solutions", "code", "language", ""),
+        ("problems", "baseline_code", "baseline_language", "baseline_"),
+    ):
+        counts[table] = 0
+        last_id = None
+        while True:
+            conditions = [] if force else [f"{prefix}structure_hash IS NULL"]
+            if last_id is not None:
+                conditions.append("id > :last_id")
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            result = await db.execute(
+                text(f"""
+                    SELECT id, {code_column} AS code, {language_column}::text AS language
+                    FROM {table}
+                    {where}
+                    ORDER BY id
+                    LIMIT :batch_size
+                """),
+                {"last_id": last_id, "batch_size": batch_size},
+            )
+            rows = result.fetchall()
+            if not rows:
+                break
+            await db.execute(
+                text(f"""
+                    UPDATE {table}
+                    SET {prefix}structure_hash = :structure_hash,
+                        {prefix}minhash = :minhash,
+                        {prefix}lsh_buckets = :lsh_buckets
+                    WHERE id = :id
+                """),
+                [
+                    {
+                        "id": row.id,
+                        **{
+                            key.removeprefix(prefix): value
+                            for key, value in fingerprint_columns(row.code, row.language, prefix).items()
+                        },
+                    }
+                    for row in rows
+                ],
+            )
+            await db.commit()
+            counts[table] += len(rows)
+            last_id = rows[-1].id
+
+    logger.info(f"Fingerprinted {counts['solutions']} solutions and {counts['problems']} problem baselines")
+    return counts
@@ -0,0 +1,65 @@
+"""
+Lexical retrieval for hybrid search.
+
+Two index-backed candidate lists complement the vector candidates:
+full-text matches on `solutions.search_vector` (GIN, kept up to date by the
+`update_search_vector` trigger) ranked by `ts_rank_cd`, and problem-title
+matches through the `idx_problems_title_trgm` trigram index (word similarity
+to the query, or the query's primary keyword as a substring). The lists are
+fused with the vector list by reciprocal rank fusion in app/services/rerank.py.
+"""
+
+# Text search configuration used by the search_vector trigger
+TS_CONFIG = "english"
+
+
+def _where(filters: list[str] | None) -> str:
+    return "".join(f" AND {f}" for f in filters or [])
+
+
+def fulltext_cte(name: str = "fulltext", filters: list[str] | None = None) -> str:
+    """
+    CTE with the best :lexical_candidates full-text matches and their rank.
+
+    `filters` are predicates over `s` (solutions) and `p` (problems).
+    Expects :query_text and :lexical_candidates parameters.
+    """
+    tsquery = f"websearch_to_tsquery('{TS_CONFIG}', :query_text)"
+    return f"""
+        {name} AS (
+            SELECT s.id AS solution_id, ts_rank_cd(s.search_vector, {tsquery}) AS fts_score
+            FROM solutions s
+            JOIN problems p ON p.id = s.problem_id
+            WHERE s.search_vector @@ {tsquery}{_where(filters)}
+            ORDER BY fts_score DESC, s.id
+            LIMIT :lexical_candidates
+        )
+    """
+
+
+def title_match_cte(name: str = "title_matches", filters: list[str] | None = None) -> str:
+    """
+    CTE with solutions of the :lexical_candidates best title matches.
+
+    Both predicates are served by the trigram index on problems.title; the
+    score is word similarity plus the old keyword bonus for title/slug hits.
+    Expects :query_text, :keyword and :lexical_candidates parameters.
+    """
+    return f"""
+        {name} AS (
+            SELECT
+                s.id AS solution_id,
+                word_similarity(:query_text, p.title)
+                + CASE
+                    WHEN :keyword = '' THEN 0.0
+                    WHEN p.title ILIKE '%' || :keyword || '%' THEN 0.30
+                    WHEN p.slug ILIKE '%' || :keyword || '%' THEN 0.20
+                    ELSE 0.0
+                END AS title_score
+            FROM problems p
+            JOIN solutions s ON s.problem_id = p.id
+            WHERE (:query_text <% p.title OR (:keyword <> '' AND p.title ILIKE '%' || :keyword || '%')){_where(filters)}
+            ORDER BY title_score DESC, s.id
+            LIMIT :lexical_candidates
+        )
+    """
@@ -0,0 +1,179 @@
+"""
+Cache of playground analyses.
+
+Entries are keyed on the normalized code (comments and whitespace removed,
+lowercased) plus language and the verify options, and hold the full
+response together with a digest of the exact code and the matched solution.
+An identical snippet gets the stored response back; a snippet that only
+differs in formatting or comments has different line numbers and rewrites,
+so it is re-analyzed locally but reuses the match, skipping the embedding
+and vector query.
+
+Invalidation uses version counters like the search cache: an entry that
+matched a solution depends on its problem's counter, an entry without a
+match on its language's counter (any new solution could become its match).
+Writes that add, re-embed or re-benchmark solutions bump both, atomically.
+The language's version is read by the lookup, before the analysis, and
+passed to the store, so a response computed from data a write has since
+changed is never stamped with the newer version. Every Redis error is
+swallowed: the cache fails open to a normal analysis.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+ENTRY_PREFIX = "playground:analysis:"
+VERSION_PREFIX = "playground:version:"
+
+
+@dataclass
+class CachedAnalysis:
+    """A fresh cache entry for the normalized code."""
+    solution_id: str | None  # Matched similar solution, None when nothing matched
+    response: dict[str, Any] | None  # Only when the exact code was analyzed
+
+
+def code_digest(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+def analysis_cache_key(normalized: str, language: str, verify: bool = False, inputs: list | None = None) -> str:
+    """Key for a request: same normalized code, language and verify options -> same key."""
+    payload = {"code": normalized, "language": language.lower(), "verify": verify, "inputs": inputs}
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{ENTRY_PREFIX}{digest}"
+
+
+def _problem_key(problem_id: str) -> str:
+    return f"{VERSION_PREFIX}problem:{problem_id}"
+
+
+def _language_key(language: str) -> str:
+    return f"{VERSION_PREFIX}language:{language.lower()}"
+
+
+async def lookup_analysis(key: str, code: str, language: str) -> tuple[CachedAnalysis | None, str | None]:
+    """
+    Look up a fresh entry; its response is only returned for the exact same code.
+
+    Returns:
+        (entry if fresh, current version of the language to store a new
+        entry with); the version is None when Redis is unavailable and
+        nothing should be stored
+    """
+    if not get_settings().playground_cache_enabled:
+        return None, None
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.get(_language_key(language))
+            raw, language_version = await pipe.execute()
+        language_version = language_version or "0"
+        if not raw:
+            return None, language_version
+        entry = json.loads(raw)
+        if entry["depends_on"] == _language_key(language):
+            version = language_version
+        else:
+            version = await redis.get(entry["depends_on"]) or "0"
+        if entry["version"] != version:
+            return None, language_version
+        exact = entry["code"] == code_digest(code)
+        return CachedAnalysis(
+            solution_id=entry["solution_id"],
+            response=entry["response"] if exact else None,
+        ), language_version
+    except Exception as e:
+        logger.warning(f"Playground cache lookup failed: {e}")
+        return None, None
+
+
+async def store_analysis(
+    key: str,
+    code: str,
+    language: str,
+    language_version: str | None,
+    response: dict[str, Any],
+    solution_id: str | None = None,
+    problem_id: str | None = None,
+) -> None:
+    """
+    Cache a response, stamped with versions read before the analysis.
+
+    `language_version` is the one lookup_analysis returned. An entry without
+    a match is stamped with it. An entry that matched a solution depends on
+    its problem, whose version can only be read now: it is stored only if
+    the language's version hasn't moved since the lookup. Matches are of the
+    request's language, and every write that bumps a problem bumps the
+    language of its solution in the same transaction.
+    """
+    settings = get_settings()
+    if not settings.playground_cache_enabled or language_version is None:
+        return
+    try:
+        redis = get_redis()
+        if problem_id:
+            depends_on = _problem_key(problem_id)
+            current_language, version = await redis.mget([_language_key(language), depends_on])
+            if (current_language or "0") != language_version:
+                return  # solutions of the language changed during the analysis
+        else:
+            depends_on, version = _language_key(language), language_version
+        entry = {
+            "depends_on": depends_on,
+            "version": version or "0",
+            "code": code_digest(code),
+            "solution_id": solution_id,
+            "response": response,
+        }
+        await redis.set(key, json.dumps(entry), ex=settings.playground_cache_ttl_seconds)
+    except Exception as e:
+        logger.warning(f"Playground cache store failed: {e}")
+
+
+async def bump_playground_versions(scopes: Iterable[tuple[UUID | str | None, str | None]]) -> None:
+    """Invalidate cached analyses touching these (problem id, language) pairs."""
+    keys = set()
+    for problem_id, language in scopes:
+        if problem_id:
+            keys.add(_problem_key(str(problem_id)))
+        if language:
+            keys.add(_language_key(language))
+    if not keys:
+        return
+    try:
+        # One transaction: a store never sees a problem bumped but not its language
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Playground cache invalidation failed, entries expire by TTL: {e}")
+
+
+async def invalidate_playground_solutions(db: AsyncSession, solution_ids: list[UUID]) -> None:
+    """Bump the versions of the problems and languages of these solutions."""
+    if not solution_ids:
+        return
+    result = await db.execute(
+        text("""
+            SELECT DISTINCT problem_id, language
+            FROM solutions
+            WHERE id = ANY(:ids)
+        """),
+        {"ids": solution_ids},
+    )
+    await bump_playground_versions((row.problem_id, row.language) for row in result.fetchall())
@@ -0,0 +1,201 @@
+"""
+Profile parsing for profile-guided playground analysis.
+
+Two formats are read into per-frame self times:
+
+- pstats: the file cProfile writes (`cProfile.run(..., filename)`,
+  `Stats.dump_stats`), a marshalled dict of (file, line, function) ->
+  (primitive calls, calls, self time, total time, callers). It is decoded in
+  a subprocess because marshal is not safe against malicious data. Time in
+  builtins (`sorted`, `list.index`, ...) is charged to the Python functions
+  calling them, since that is the code to change.
+- collapsed stacks: one `frame;frame;...;frame count` line per stack, as
+  written by `py-spy record --format raw` or flamegraph's stackcollapse
+  scripts. The innermost frame gets the samples, which become seconds
+  through the sampling rate.
+
+Frames are then matched to the functions of submitted source files by path
+suffix, function name and line range.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sys
+from dataclasses import dataclass
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+PSTATS_TIMEOUT_SECONDS = 10
+
+# py-spy frames: "function (path/to/file.py:42)", the line being optional
+_PYSPY_FRAME = re.compile(r"^(?P<function>.+?) \((?P<file>[^()]+?)(?::(?P<line>\d+))?\)$")
+
+_DECODE_PSTATS = """
+import json, marshal, sys
+stats = marshal.loads(sys.stdin.buffer.read())
+rows = []
+for (file, line, function), (cc, nc, tt, ct, callers) in stats.items():
+    if file == "~" and callers:
+        # Builtins: the time is the caller's, split by call site
+        for (caller_file, caller_line, caller), caller_stats in callers.items():
+            rows.append([str(caller_file), int(caller_line), str(caller), None, float(caller_stats[2])])
+    else:
+        rows.append([str(file), int(line), str(function), int(nc), float(tt)])
+print(json.dumps(rows))
+"""
+
+
+class ProfileError(ValueError):
+    """The profile could not be read."""
+
+
+@dataclass
+class ProfileEntry:
+    """Time spent in one frame (a function, or a line of it for sampled profiles)."""
+    file: str
+    line: int | None
+    function: str
+    self_time: float  # seconds, excluding callees
+    calls: int | None = None  # Only known for deterministic profiles
+
+
+@dataclass
+class SourceFunction:
+    """A function of a submitted file that frames can be matched to."""
+    path: str
+    name: str  # Class.method for methods
+    line: int
+    end_line: int
+
+
+async def parse_pstats(data: bytes) -> list[ProfileEntry]:
+    """
+    Read a pstats dump.
+
+    Raises:
+        ProfileError: If the data is not a pstats dump
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-I", "-c", _DECODE_PSTATS,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout=PSTATS_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise ProfileError(f"Reading the pstats dump timed out after {PSTATS_TIMEOUT_SECONDS}s")
+    if process.returncode != 0:
+        logger.debug(f"pstats decoding failed: {stderr.decode('utf-8', 'replace')[-500:]}")
+        raise ProfileError("Not a pstats dump (expected the file written by cProfile or Stats.dump_stats)")
+    try:
+        rows = json.loads(stdout)
+    except ValueError:
+        raise ProfileError("Not a pstats dump (expected the file written by cProfile or Stats.dump_stats)")
+    return [
+        ProfileEntry(file=file, line=line or None, function=function, self_time=tt, calls=nc)
+        for file, line, function, nc, tt in rows
+    ]
+
+
+def parse_frame(frame: str) -> tuple[str, int | None, str]:
+    """(file, line, function) of a collapsed-stack frame; unknown parts are empty or None."""
+    match = _PYSPY_FRAME.match(frame.strip())
+    if not match:
+        return "", None, frame.strip()
+    line = match.group("line")
+    return match.group("file"), int(line) if line else None, match.group("function")
+
+
+def parse_collapsed(text: str, sample_rate_hz: float) -> list[ProfileEntry]:
+    """
+    Read collapsed stacks.
+
+    Raises:
+        ProfileError: If no line has the `frames count` layout
+    """
+    samples: dict[tuple[str, int | None, str], int] = {}
+    for raw in text.splitlines():
+        stack, _, count = raw.strip().rpartition(" ")
+        if not stack or not count.isdigit():
+            continue
+        frames = [frame for frame in stack.split(";") if frame.strip()]
+        if not frames:
+            continue
+        innermost = parse_frame(frames[-1])
+        samples[innermost] = samples.get(innermost, 0) + int(count)
+    if not samples:
+        raise ProfileError("No collapsed stacks found (expected 'frame;frame;... count' lines)")
+    return [
+        ProfileEntry(file=file, line=line, function=function, self_time=count / sample_rate_hz)
+        for (file, line, function), count in samples.items()
+    ]
+
+
+def _normalize_path(path: str) -> str:
+    return path.replace("\\", "/").lstrip("./")
+
+
+def _path_matches(frame_file: str, source_path: str) -> bool:
+    """Profiles hold absolute (or installed) paths, sources their repository paths."""
+    frame_file, source_path = _normalize_path(frame_file), _normalize_path(source_path)
+    return frame_file == source_path or frame_file.endswith("/" + source_path)
+
+
+def match_entry(entry: ProfileEntry, functions: Iterable[SourceFunction]) -> SourceFunction | None:
+    """
+    The source function a frame ran in.
+
+    With a file and line, the innermost function containing the line wins (a
+    frame of a nested function or closure goes to its enclosing top-level
+    function); otherwise the only function of the same name.
+    """
+    if entry.file:
+        candidates = [f for f in functions if _path_matches(entry.file, f.path)]
+        if entry.line is not None:
+            containing = [f for f in candidates if f.line <= entry.line <= f.end_line]
+            if containing:
+                return min(containing, key=lambda f: f.end_line - f.line)
+    else:
+        candidates = list(functions)
+    named = [f for f in candidates if f.name.rsplit(".", 1)[-1] == entry.function]
+    return named[0] if len(named) == 1 else None
+
+
+@dataclass
+class HotFunction:
+    """Self time of a source function, summed over the frames matched to it."""
+    function: SourceFunction
+    self_time: float
+    calls: int | None
+
+
+def rank_hot_functions(
+    entries: list[ProfileEntry], functions: list[SourceFunction]
+) -> tuple[list[HotFunction], list[ProfileEntry]]:
+    """
+    Attribute frames to source functions.
+
+    Returns:
+        (hot functions by self time, frames matching no source by self time)
+    """
+    hot: dict[tuple[str, str, int], HotFunction] = {}
+    unmatched = []
+    for entry in entries:
+        function = match_entry(entry, functions)
+        if function is None:
+            unmatched.append(entry)
+            continue
+        key = (function.path, function.name, function.line)
+        spot = hot.setdefault(key, HotFunction(function, 0.0, None))
+        spot.self_time += entry.self_time
+        # Calls of the function itself, not of its nested functions
+        if entry.calls is not None and entry.function == function.name.rsplit(".", 1)[-1]:
+            spot.calls = (spot.calls or 0) + entry.calls
+    ranked = sorted(hot.values(), key=lambda spot: spot.self_time, reverse=True)
+    unmatched.sort(key=lambda entry: entry.self_time, reverse=True)
+    return ranked, unmatched
@@ -0,0 +1,373 @@
+"""
+Bulk embedding reindex for solutions.
+
+Pages through `solutions` by primary key (keyset pagination, no OFFSET),
+embeds each page in one batched forward pass and upserts the vectors into
+`solution_embeddings` for one embedding space with a single multi-row
+statement per page. Solutions longer than the model context are also split
+into chunks whose vectors go to `solution_embedding_chunks`, embedded in the
+same forward pass. Progress is checkpointed after every page so an
+interrupted job resumes where it stopped, and rows whose embedded text is
+unchanged in that space are skipped.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session
+from app.services.chunking import CodeChunk, chunk_code
+from app.services.embedding_spaces import EmbeddingSpaceInfo, get_search_space, get_space, mark_space_ready
+from app.services.embeddings import (
+    build_embedding_text,
+    compute_code_hash,
+    get_embeddings_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns embed_solutions() needs; join solution_embeddings as `se` for the target space
+SOLUTION_EMBED_COLUMNS = """
+    s.id, s.title, s.description, s.code, s.language,
+    se.code_hash, se.solution_id IS NOT NULL AS has_embedding
+"""
+
+
+def job_name_for_space(space_name: str) -> str:
+    """Checkpoint key of the reindex job for a space."""
+    return f"reindex:{space_name}"
+
+
+@dataclass
+class ReindexStats:
+    """Running totals for a reindex job."""
+    processed: int = 0
+    embedded: int = 0
+    skipped: int = 0
+    errors: int = 0
+    last_solution_id: str | None = None
+    finished: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Rows per multi-row INSERT of chunks (keeps well under asyncpg's bind parameter limit)
+CHUNK_INSERT_BATCH = 1000
+
+
+@dataclass
+class ChunkEmbedding:
+    """Vector of one chunk of a long solution."""
+    chunk: CodeChunk
+    embedding: list[float]
+
+
+@dataclass
+class EmbeddingUpdate:
+    """A computed embedding ready to be written back."""
+    solution_id: UUID
+    embedding: list[float]
+    code_hash: str
+    chunks: list[ChunkEmbedding] = field(default_factory=list)
+
+
+async def write_embeddings(
+    db: AsyncSession,
+    updates: list[EmbeddingUpdate],
+    space_name: str,
+) -> int:
+    """
+    Upsert embeddings for many solutions into one space with a single statement.
+
+    Returns:
+        Number of rows written
+    """
+    if not updates:
+        return 0
+
+    values = []
+    params: dict = {"space": space_name}
+    for i, update in enumerate(updates):
+        values.append(f"(CAST(:id_{i} AS uuid), :space, CAST(:emb_{i} AS vector), CAST(:hash_{i} AS varchar))")
+        params[f"id_{i}"] = update.solution_id
+        params[f"emb_{i}"] = str(update.embedding)
+        params[f"hash_{i}"] = update.code_hash
+
+    sql = f"""
+        INSERT INTO solution_embeddings (solution_id, space, embedding, code_hash)
+        VALUES {", ".join(values)}
+        ON CONFLICT (solution_id, space) DO UPDATE SET
+            embedding = EXCLUDED.embedding,
+            code_hash = EXCLUDED.code_hash,
+            updated_at = NOW()
+    """
+    result = await db.execute(text(sql), params)
+
+    await _write_chunks(db, updates, space_name)
+    return result.rowcount or 0
+
+
+async def _write_chunks(db: AsyncSession, updates: list[EmbeddingUpdate], space_name: str) -> None:
+    """Replace the chunk vectors of the updated solutions."""
+    await db.execute(
+        text("DELETE FROM solution_embedding_chunks WHERE space = :space AND solution_id = ANY(:ids)"),
+        {"space": space_name, "ids": [u.solution_id for u in updates]},
+    )
+
+    chunk_rows = [(u.solution_id, c) for u in updates for c in u.chunks]
+    for offset in range(0, len(chunk_rows), CHUNK_INSERT_BATCH):
+        batch = chunk_rows[offset:offset + CHUNK_INSERT_BATCH]
+        values = []
+        params: dict = {"space": space_name}
+        for i, (solution_id, chunk) in enumerate(batch):
+            values.append(
+                f"(CAST(:id_{i} AS uuid), :space, CAST(:idx_{i} AS integer), "
+                f"CAST(:start_{i} AS integer), CAST(:end_{i} AS integer), CAST(:emb_{i} AS vector))"
+            )
+            params[f"id_{i}"] = solution_id
+            params[f"idx_{i}"] = chunk.chunk.index
+            params[f"start_{i}"] = chunk.chunk.start_line
+            params[f"end_{i}"] = chunk.chunk.end_line
+            params[f"emb_{i}"] = str(chunk.embedding)
+        await db.execute(
+            text(f"""
+                INSERT INTO solution_embedding_chunks
+                    (solution_id, space, chunk_index, start_line, end_line, embedding)
+                VALUES {", ".join(values)}
+            """),
+            params,
+        )
+
+
+async def embed_solutions(
+    rows: list,
+    space: EmbeddingSpaceInfo,
+    force: bool = False,
+) -> tuple[list[EmbeddingUpdate], int]:
+    """
+    Embed the rows whose text changed since they were last embedded in `space`.
+
+    Args:
+        rows: Rows selected with SOLUTION_EMBED_COLUMNS
+        space: Target embedding space
+        force: Re-embed even if the hash matches
+
+    Returns:
+        (updates to write, number of skipped rows)
+    """
+    pending: list[tuple[UUID, str, str, list[CodeChunk]]] = []
+    skipped = 0
+    for row in rows:
+        embedding_text = build_embedding_text(row.title, row.description, row.code)
+        code_hash = compute_code_hash(embedding_text)
+        if row.has_embedding and row.code_hash == code_hash and not force:
+            skipped += 1
+            continue
+        pending.append((row.id, embedding_text, code_hash, chunk_code(row.code, row.language)))
+
+    if not pending:
+        return [], skipped
+
+    # Whole texts and all chunks go through the model in one batched call
+    texts = [t for _, t, _, _ in pending]
+    texts += [chunk.text for _, _, _, chunks in pending for chunk in chunks]
+    vectors = await get_embeddings_batch(texts, model_name=space.model)
+
+    updates = []
+    next_chunk_vector = len(pending)
+    for i, (solution_id, _, code_hash, chunks) in enumerate(pending):
+        chunk_embeddings = [
+            ChunkEmbedding(chunk=chunk, embedding=vectors[next_chunk_vector + j])
+            for j, chunk in enumerate(chunks)
+        ]
+        next_chunk_vector += len(chunks)
+        updates.append(
+            EmbeddingUpdate(
+                solution_id=solution_id,
+                embedding=vectors[i],
+                code_hash=code_hash,
+                chunks=chunk_embeddings,
+            )
+        )
+    return updates, skipped
+
+
+async def embed_and_write(
+    db: AsyncSession,
+    solution_ids: list[UUID],
+    space: EmbeddingSpaceInfo,
+    force: bool = False,
+) -> tuple[int, int]:
+    """
+    Embed the given solutions into one space and write the vectors.
+
+    Returns:
+        (embedded, skipped)
+    """
+    result = await db.execute(
+        text(f"""
+            SELECT {SOLUTION_EMBED_COLUMNS}
+            FROM solutions s
+            LEFT JOIN solution_embeddings se ON se.solution_id = s.id AND se.space = :space
+            WHERE s.id = ANY(:ids)
+        """),
+        {"space": space.name, "ids": solution_ids},
+    )
+    updates, skipped = await embed_solutions(result.fetchall(), space, force=force)
+    await write_embeddings(db, updates, space.name)
+    return len(updates), skipped
+
+
+async def _load_checkpoint(db: AsyncSession, job_name: str) -> tuple[ReindexStats, UUID | None]:
+    result = await db.execute(
+        text("""
+            SELECT last_solution_id, processed, embedded, skipped, errors, status
+            FROM reindex_checkpoints WHERE job_name = :job_name
+        """),
+        {"job_name": job_name},
+    )
+    row = result.fetchone()
+    if not row or row.status == "completed":
+        return ReindexStats(), None
+
+    stats = ReindexStats(
+        processed=row.processed,
+        embedded=row.embedded,
+        skipped=row.skipped,
+        errors=row.errors,
+        last_solution_id=str(row.last_solution_id) if row.last_solution_id else None,
+    )
+    return stats, row.last_solution_id
+
+
+async def _save_checkpoint(db: AsyncSession, job_name: str, stats: ReindexStats, status: str) -> None:
+    await db.execute(
+        text("""
+            INSERT INTO reindex_checkpoints
+                (job_name, last_solution_id, processed, embedded, skipped, errors, status)
+            VALUES
+                (:job_name, CAST(:last_id AS uuid), :processed, :embedded, :skipped, :errors, :status)
+            ON CONFLICT (job_name) DO UPDATE SET
+                last_solution_id = EXCLUDED.last_solution_id,
+                processed = EXCLUDED.processed,
+                embedded = EXCLUDED.embedded,
+                skipped = EXCLUDED.skipped,
+                errors = EXCLUDED.errors,
+                status = EXCLUDED.status,
+                updated_at = NOW()
+        """),
+        {
+            "job_name": job_name,
+            "last_id": stats.last_solution_id,
+            "processed": stats.processed,
+            "embedded": stats.embedded,
+            "skipped": stats.skipped,
+            "errors": stats.errors,
+            "status": status,
+        },
+    )
+
+
+async def reindex_solutions(
+    space_name: str | None = None,
+    resume: bool = True,
+    force: bool = False,
+    page_size: int | None = None,
+    time_budget_seconds: float | None = None,
+    progress_callback: Callable[[ReindexStats], None] | None = None,
+) -> ReindexStats:
+    """
+    Re-embed solutions into one embedding space, committing after every page.
+
+    Search keeps serving the previous vectors for rows not yet reached, so the
+    job can run against a live database. Backfilling a new space this way
+    marks it `ready` for cutover once the whole table has been processed.
+
+    Args:
+        space_name: Target space (defaults to the space that serves search)
+        resume: Continue from the stored checkpoint instead of starting over
+        force: Re-embed rows even if their hash is unchanged
+        page_size: Rows per page (defaults to settings.reindex_page_size)
+        time_budget_seconds: Stop after this long; the caller can re-run to continue
+        progress_callback: Called with the running stats after each page
+
+    Returns:
+        Stats for the run; `finished` is False if the time budget ran out
+    """
+    settings = get_settings()
+    page_size = page_size or settings.reindex_page_size
+    started = time.monotonic()
+
+    async with async_session() as db:
+        space = await get_space(db, space_name) if space_name else await get_search_space(db)
+        if not space:
+            raise ValueError(f"Unknown embedding space '{space_name}'")
+        job_name = job_name_for_space(space.name)
+
+        if resume:
+            stats, after_id = await _load_checkpoint(db, job_name)
+        else:
+            stats, after_id = ReindexStats(), None
+
+        if after_id:
+            logger.info(f"Resuming reindex '{job_name}' after solution {after_id}")
+        else:
+            logger.info(f"Starting reindex '{job_name}' with model {space.model}")
+
+        while True:
+            sql = f"""
+                SELECT {SOLUTION_EMBED_COLUMNS}
+                FROM solutions s
+                LEFT JOIN solution_embeddings se ON se.solution_id = s.id AND se.space = :space
+            """
+            params: dict = {"space": space.name, "limit": page_size}
+            if after_id:
+                sql += " WHERE s.id > :after_id"
+                params["after_id"] = after_id
+            sql += " ORDER BY s.id LIMIT :limit"
+
+            rows = (await db.execute(text(sql), params)).fetchall()
+            if not rows:
+                stats.finished = True
+                await _save_checkpoint(db, job_name, stats, "completed")
+                if stats.errors == 0:
+                    await mark_space_ready(db, space.name)
+                await db.commit()
+                break
+
+            try:
+                updates, skipped = await embed_solutions(rows, space, force=force)
+                await write_embeddings(db, updates, space.name)
+                stats.embedded += len(updates)
+                stats.skipped += skipped
+            except Exception as e:
+                # Keep going - a bad page should not block the rest of the table
+                await db.rollback()
+                logger.error(f"Reindex page after {after_id} failed: {e}")
+                stats.errors += len(rows)
+
+            after_id = rows[-1].id
+            stats.processed += len(rows)
+            stats.last_solution_id = str(after_id)
+            await _save_checkpoint(db, job_name, stats, "running")
+            await db.commit()
+
+            logger.info(
+                f"Reindex '{job_name}': processed={stats.processed} embedded={stats.embedded} "
+                f"skipped={stats.skipped} errors={stats.errors}"
+            )
+            if progress_callback:
+                progress_callback(stats)
+
+            if time_budget_seconds and time.monotonic() - started >= time_budget_seconds:
+                logger.info(f"Reindex '{job_name}' paused after time budget; resume to continue")
+                break
+
+    return stats
@@ -0,0 +1,174 @@
+"""
+Second stage of search: rank the candidate pool with NumPy.
+
+The first stage returns a few hundred candidates from up to three retrievers
+(vector, full-text, title trigram) with their scores. Relevance fuses the
+three ranked lists by reciprocal rank fusion, so a candidate found by
+several retrievers rises and an exact identifier match found only lexically
+still ranks. The final score is a weighted sum of that relevance and of
+quality features (speedup, memory reduction, efficiency, readability,
+votes), each normalized to [0, 1]; the weights come from a named scoring
+profile (`scoring_profiles` in settings) chosen per request. Scores and the
+requested sort order are computed for the whole pool at once, and only the
+requested page is then hydrated from the database. Ties are broken by
+solution id so pagination is stable across requests.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.config import get_settings
+
+# Reciprocal rank fusion: score = sum over lists of 1 / (RRF_K + rank)
+RRF_K = 60
+
+
+@dataclass
+class ScoringProfile:
+    """Feature weights of a ranking."""
+    name: str
+    weights: dict[str, float]
+
+
+def get_scoring_profile(name: str | None = None) -> ScoringProfile:
+    """
+    Resolve a profile name from settings, falling back to the default profile.
+
+    Profiles are validated when settings load (Settings.check_scoring_profiles).
+    """
+    settings = get_settings()
+    profiles = settings.scoring_profiles
+    name = name if name in profiles else settings.search_default_profile
+    return ScoringProfile(name=name, weights=profiles[name])
+
+
+@dataclass
+class CandidateFeatures:
+    """Scoring features of the candidate pool, one array element per candidate."""
+    ids: np.ndarray
+    embedding_sim: np.ndarray  # NaN when not a vector candidate
+    fts_score: np.ndarray  # NaN when not a full-text match
+    title_score: np.ndarray  # NaN when not a title match
+    speedup: np.ndarray  # NaN when not benchmarked
+    memory_reduction: np.ndarray  # NaN when not benchmarked
+    efficiency_score: np.ndarray  # 0-100, NaN when not benchmarked
+    readability_score: np.ndarray  # 0-100, NaN when not computed
+    vote_count: np.ndarray
+    created_at: np.ndarray  # epoch seconds
+
+    @classmethod
+    def from_rows(cls, rows) -> "CandidateFeatures":
+        def column(name: str, fill: float = np.nan) -> np.ndarray:
+            return np.array(
+                [fill if getattr(row, name) is None else getattr(row, name) for row in rows],
+                dtype=np.float64,
+            )
+
+        return cls(
+            ids=np.array([str(row.id) for row in rows], dtype=str),
+            embedding_sim=column("embedding_sim"),
+            fts_score=column("fts_score"),
+            title_score=column("title_score"),
+            speedup=column("speedup"),
+            memory_reduction=column("memory_reduction"),
+            efficiency_score=column("efficiency_score"),
+            readability_score=column("readability_score"),
+            vote_count=column("vote_count", fill=0.0),
+            created_at=column("created_at", fill=0.0),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def list_ranks(scores: np.ndarray) -> np.ndarray:
+    """1-based rank of each candidate within one retriever's list (NaN if absent)."""
+    ranks = np.full(len(scores), np.nan)
+    present = np.flatnonzero(~np.isnan(scores))
+    ranked = present[np.argsort(-scores[present], kind="stable")]
+    ranks[ranked] = np.arange(1, len(ranked) + 1)
+    return ranks
+
+
+def rrf_scores(features: CandidateFeatures) -> np.ndarray:
+    """Reciprocal rank fusion of the three retriever lists, in [0, 1]."""
+    lists = (features.embedding_sim, features.fts_score, features.title_score)
+    rrf = np.zeros(len(features))
+    for scores in lists:
+        ranks = list_ranks(scores)
+        # Normalized so rank 1 contributes 1.0
+        rrf += np.where(np.isnan(ranks), 0.0, (RRF_K + 1) / (RRF_K + np.nan_to_num(ranks, nan=1.0)))
+    return rrf / len(lists)
+
+
+def _log_scale(values: np.ndarray, decades: float) -> np.ndarray:
+    """log10 of a ratio, 1x=0 and 10**decades=1; missing and < 1x count as 0."""
+    return np.minimum(np.log10(np.maximum(np.nan_to_num(values, nan=1.0), 1.0)) / decades, 1.0)
+
+
+def normalized_features(features: CandidateFeatures) -> dict[str, np.ndarray]:
+    """Every profile feature of every candidate, normalized to [0, 1]."""
+    return {
+        "relevance": rrf_scores(features),
+        "speedup": _log_scale(features.speedup, 3.0),  # 10x=0.33, 100x=0.67, 1000x=1.0
+        "memory": _log_scale(features.memory_reduction, 2.0),  # 10x=0.5, 100x=1.0
+        "efficiency": np.nan_to_num(features.efficiency_score, nan=0.0) / 100.0,
+        "readability": np.nan_to_num(features.readability_score, nan=0.0) / 100.0,
+        "votes": _log_scale(features.vote_count + 1.0, 2.0),  # 99 votes=1.0
+    }
+
+
+def fused_scores(features: CandidateFeatures, profile: ScoringProfile | None = None) -> np.ndarray:
+    """Score of every candidate under a scoring profile, roughly in [0, 1]."""
+    profile = profile or get_scoring_profile()
+    normalized = normalized_features(features)
+    scores = np.zeros(len(features))
+    for name, weight in profile.weights.items():
+        scores += weight * normalized[name]
+    return scores
+
+
+def sort_keys(features: CandidateFeatures, scores: np.ndarray, sort: str = "relevance") -> np.ndarray:
+    """Primary sort key of every candidate (descending)."""
+    sort = sort.lower()
+    if sort == "relevance":
+        return scores
+    if sort == "speedup":
+        return np.nan_to_num(features.speedup, nan=-np.inf)  # NULLS LAST
+    if sort == "memory":
+        return np.nan_to_num(features.memory_reduction, nan=-np.inf)
+    if sort == "efficiency":
+        return np.nan_to_num(features.efficiency_score, nan=-np.inf)
+    if sort == "votes":
+        return features.vote_count
+    if sort == "recent":
+        return features.created_at
+    return np.nan_to_num(features.embedding_sim, nan=-np.inf)
+
+
+def rank(
+    features: CandidateFeatures, sort: str = "relevance", profile: ScoringProfile | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Order the candidate pool.
+
+    Returns:
+        (candidate positions in result order, relevance score of every candidate,
+        sort key of every candidate)
+    """
+    scores = fused_scores(features, profile)
+    key = sort_keys(features, scores, sort)
+    # lexsort sorts by the last key first; negate for descending, id ascending on ties
+    order = np.lexsort((features.ids, -key))
+    return order, scores, key
+
+
+def after_cursor(
+    features: CandidateFeatures, order: np.ndarray, key: np.ndarray, cursor_key: float, cursor_id: str
+) -> np.ndarray:
+    """The part of `order` that comes strictly after the (key, id) of a cursor."""
+    ordered_keys = key[order]
+    ordered_ids = features.ids[order]
+    after = (ordered_keys < cursor_key) | ((ordered_keys == cursor_key) & (ordered_ids > cursor_id))
+    return order[after]
@@ -0,0 +1,162 @@
+"""
+Cache of ranked search results.
+
+Entries hold only the ranked solution ids of one page (plus scores, total and
+next cursor) under a key derived from the normalized request and the
+embedding space, so a hit costs one Redis round trip plus an id hydration.
+
+Invalidation uses version counters instead of key scans: a query depends on
+the version of its category filter, its language filter, or the global
+version when unfiltered. Writes that can change results (new or re-embedded
+solutions, benchmark runs, votes) bump the counters of the solution's
+category and language and the global one; entries stamped with an older
+version are treated as misses. Every Redis error is swallowed: the cache
+fails open to a normal search.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.schemas.search import SearchQuery, SearchResult
+from app.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+ENTRY_PREFIX = "search:results:"
+VERSION_PREFIX = "search:version:"
+GLOBAL_VERSION_KEY = f"{VERSION_PREFIX}all"
+
+
+@dataclass
+class CachedSearch:
+    """A cached page of ranked results."""
+    ids: list[str]
+    scores: list[float | None]
+    total: int | None
+    next_cursor: str | None
+
+
+def normalize_query_text(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def search_cache_key(query: SearchQuery, space_name: str) -> str:
+    """Key for a request: same normalized text, filters, sort and page -> same key."""
+    # Field selection only shapes the response, the cached ranking is shared
+    payload = query.model_dump(exclude={"fields"})
+    payload["query"] = normalize_query_text(query.query)
+    payload["space"] = space_name
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{ENTRY_PREFIX}{digest}"
+
+
+def _category_key(category: str) -> str:
+    return f"{VERSION_PREFIX}category:{category.lower()}"
+
+
+def _language_key(language: str) -> str:
+    return f"{VERSION_PREFIX}language:{language.lower()}"
+
+
+def version_keys(query: SearchQuery) -> list[str]:
+    """Version counters the results of `query` depend on."""
+    keys = []
+    if query.category:
+        keys.append(_category_key(query.category))
+    if query.language:
+        keys.append(_language_key(query.language))
+    return keys or [GLOBAL_VERSION_KEY]
+
+
+async def lookup_search(query: SearchQuery, space_name: str) -> tuple[CachedSearch | None, list[str] | None]:
+    """
+    Look up a cached page.
+
+    Returns:
+        (entry if fresh, current versions to stamp a new entry with); the
+        versions are None when Redis is unavailable and nothing should be stored
+    """
+    if not get_settings().search_cache_enabled:
+        return None, None
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(search_cache_key(query, space_name))
+            pipe.mget(version_keys(query))
+            raw, versions = await pipe.execute()
+        versions = [v or "0" for v in versions]
+        if not raw:
+            return None, versions
+        entry = json.loads(raw)
+        if entry["versions"] != versions:
+            return None, versions
+        return CachedSearch(
+            ids=entry["ids"],
+            scores=entry["scores"],
+            total=entry["total"],
+            next_cursor=entry["next_cursor"],
+        ), versions
+    except Exception as e:
+        logger.warning(f"Search cache lookup failed: {e}")
+        return None, None
+
+
+async def store_search(query: SearchQuery, space_name: str, versions: list[str], result: SearchResult) -> None:
+    """Cache the ranked ids of a result page, stamped with the versions read before ranking."""
+    settings = get_settings()
+    entry = {
+        "versions": versions,
+        "ids": [item.id for item in result.items],
+        "scores": [item.similarity_score for item in result.items],
+        "total": result.total,
+        "next_cursor": result.next_cursor,
+    }
+    try:
+        await get_redis().set(
+            search_cache_key(query, space_name),
+            json.dumps(entry),
+            ex=settings.search_cache_ttl_seconds,
+        )
+    except Exception as e:
+        logger.warning(f"Search cache store failed: {e}")
+
+
+async def bump_search_versions(scopes: Iterable[tuple[str | None, str | None]]) -> None:
+    """Invalidate cached searches touching these (category, language) pairs."""
+    keys = {GLOBAL_VERSION_KEY}
+    for category, language in scopes:
+        if category:
+            keys.add(_category_key(category))
+        if language:
+            keys.add(_language_key(language))
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Search cache invalidation failed, entries expire by TTL: {e}")
+
+
+async def invalidate_solutions(db: AsyncSession, solution_ids: list[UUID]) -> None:
+    """Bump the versions of the categories and languages of these solutions."""
+    if not solution_ids:
+        return
+    result = await db.execute(
+        text("""
+            SELECT DISTINCT p.category, s.language
+            FROM solutions s
+            JOIN problems p ON p.id = s.problem_id
+            WHERE s.id = ANY(:ids)
+        """),
+        {"ids": solution_ids},
+    )
+    await bump_search_versions((row.category, row.language) for row in result.fetchall())
@@ -0,0 +1,227 @@
+"""
+Autocomplete index for /search/suggestions.
+
+Suggestions are served from Redis sorted sets keyed by prefix: every word
+start of a problem title or slug, solution title, category and popular search
+query is expanded into its prefixes, and each prefix key holds the best
+MAX_ENTRIES_PER_PREFIX completions scored by popularity (solutions per
+problem, votes per solution, problems per category, searches per query).
+A lookup is one pipelined round trip of ZREVRANGEBYSCORE calls, with no
+database access.
+
+The index is rebuilt from Postgres by `rebuild_suggestions` (at startup when
+missing, and every `suggestion_refresh_seconds` by the beat-scheduled
+`refresh_suggestion_index` task) and kept fresh between rebuilds by
+incremental ZINCRBYs on writes. The built marker expires after two missed
+rebuilds, so a stopped beat makes lookups fall back to the database instead
+of serving a stale index forever. Every Redis error is swallowed;
+the endpoint falls back to the database when the index is unavailable.
+"""
+
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = "suggest:idx:"
+BUILT_KEY = "suggest:built"
+LOCK_KEY = "suggest:lock"
+# The built marker outlives this many refresh intervals
+BUILT_TTL_FACTOR = 2
+
+# Suggestion kinds, in response order
+KINDS = ("problems", "solutions", "categories", "queries")
+
+# Longest indexed prefix; longer inputs are matched on this prefix and filtered
+MAX_PREFIX_LENGTH = 24
+MAX_ENTRIES_PER_PREFIX = 50
+
+# Sorted-set writes per pipeline while rebuilding
+REBUILD_BATCH_SIZE = 500
+
+
+def normalize_suggestion(value: str) -> str:
+    return " ".join(re.findall(r"\w+", value.lower()))
+
+
+def index_prefixes(values: Iterable[str]) -> set[str]:
+    """Prefixes of every word start of `values` (so "sort" completes "Merge Sort")."""
+    prefixes = set()
+    for value in values:
+        words = normalize_suggestion(value).split()
+        for i in range(len(words)):
+            tail = " ".join(words[i:])[:MAX_PREFIX_LENGTH]
+            prefixes.update(tail[:n] for n in range(1, len(tail) + 1) if tail[n - 1] != " ")
+    return prefixes
+
+
+def _key(kind: str, prefix: str) -> str:
+    return f"{INDEX_PREFIX}{kind}:{prefix}"
+
+
+def _min_score(kind: str) -> float:
+    # Queries are only suggested once enough people searched for them
+    return get_settings().suggestion_min_query_count if kind == "queries" else 0
+
+
+async def lookup_suggestions(q: str, limit: int) -> dict[str, list[str]] | None:
+    """
+    Completions of `q` per kind, most popular first.
+
+    Returns:
+        Suggestions by kind, or None when the index is unavailable
+    """
+    normalized = normalize_suggestion(q)
+    if not normalized:
+        return {kind: [] for kind in KINDS}
+    prefix = normalized[:MAX_PREFIX_LENGTH]
+    # Inputs longer than the indexed prefix are filtered from the full entry list
+    truncated = len(normalized) > MAX_PREFIX_LENGTH
+    fetch = MAX_ENTRIES_PER_PREFIX if truncated else limit
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.exists(BUILT_KEY)
+            for kind in KINDS:
+                pipe.zrevrangebyscore(_key(kind, prefix), "+inf", _min_score(kind), start=0, num=fetch)
+            built, *results = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Suggestion lookup failed: {e}")
+        return None
+    if not built:
+        return None
+
+    suggestions = {}
+    for kind, members in zip(KINDS, results):
+        if truncated:
+            members = [m for m in members if normalized in normalize_suggestion(m)]
+        suggestions[kind] = members[:limit]
+    return suggestions
+
+
+async def _load_entries(db: AsyncSession) -> list[tuple[str, str, float, list[str]]]:
+    """(kind, member, score, indexed texts) of everything to suggest."""
+    entries = []
+    categories: dict[str, int] = defaultdict(int)
+
+    result = await db.execute(text("""
+        SELECT p.title, p.slug, p.category, COUNT(s.id) AS solution_count
+        FROM problems p
+        LEFT JOIN solutions s ON s.problem_id = p.id
+        GROUP BY p.id
+    """))
+    for row in result:
+        entries.append(("problems", row.title, row.solution_count + 1, [row.title, row.slug]))
+        if row.category:
+            categories[row.category] += 1
+    entries.extend(("categories", category, count, [category]) for category, count in categories.items())
+
+    result = await db.execute(text("""
+        SELECT title, MAX(GREATEST(COALESCE(vote_count, 0), 0)) AS votes
+        FROM solutions
+        GROUP BY title
+    """))
+    entries.extend(("solutions", row.title, row.votes + 1, [row.title]) for row in result)
+
+    since = datetime.now(timezone.utc) - timedelta(days=get_settings().suggestion_query_days)
+    result = await db.execute(
+        text("""
+            SELECT query, COUNT(*) AS searches
+            FROM search_queries
+            WHERE created_at >= :since AND results_count > 0
+            GROUP BY query
+        """),
+        {"since": since},
+    )
+    queries: dict[str, int] = defaultdict(int)
+    for row in result:
+        normalized = normalize_suggestion(row.query)
+        if normalized:
+            queries[normalized] += row.searches
+    entries.extend(("queries", query, count, [query]) for query, count in queries.items())
+    return entries
+
+
+async def rebuild_suggestions(db: AsyncSession) -> dict:
+    """
+    Rebuild the whole index from the database.
+
+    Each prefix key is replaced atomically (MULTI/EXEC), so lookups never see
+    a half-written key; keys no longer produced by any entry are removed.
+
+    Returns:
+        Counts of indexed entries and prefix keys
+    """
+    entries = await _load_entries(db)
+    index: dict[str, dict[str, float]] = defaultdict(dict)
+    for kind, member, score, texts in entries:
+        for prefix in index_prefixes(texts):
+            members = index[_key(kind, prefix)]
+            members[member] = max(members.get(member, 0), score)
+
+    redis = get_redis()
+    keys = list(index)
+    for start in range(0, len(keys), REBUILD_BATCH_SIZE):
+        async with redis.pipeline(transaction=True) as pipe:
+            for key in keys[start:start + REBUILD_BATCH_SIZE]:
+                best = sorted(index[key].items(), key=lambda item: -item[1])[:MAX_ENTRIES_PER_PREFIX]
+                pipe.delete(key)
+                pipe.zadd(key, dict(best))
+            await pipe.execute()
+
+    stale = [key async for key in redis.scan_iter(match=f"{INDEX_PREFIX}*", count=1000) if key not in index]
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        await redis.unlink(*stale[start:start + REBUILD_BATCH_SIZE])
+    await redis.set(BUILT_KEY, int(time.time()), ex=BUILT_TTL_FACTOR * get_settings().suggestion_refresh_seconds)
+
+    logger.info(f"Rebuilt suggestion index: {len(entries)} entries, {len(keys)} prefixes")
+    return {"entries": len(entries), "prefixes": len(keys), "removed": len(stale)}
+
+
+async def ensure_suggestions() -> None:
+    """Build the index if it doesn't exist yet (one process builds, under a lock)."""
+    from app.database import async_session
+
+    try:
+        redis = get_redis()
+        if await redis.exists(BUILT_KEY):
+            return
+        if not await redis.set(LOCK_KEY, 1, nx=True, ex=300):
+            return
+        try:
+            async with async_session() as db:
+                await rebuild_suggestions(db)
+        finally:
+            await redis.delete(LOCK_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to build suggestion index: {e}")
+
+
+async def add_suggestion(kind: str, member: str, texts: Iterable[str], increment: float = 1) -> None:
+    """Incrementally add `member` (or raise its popularity) under the prefixes of `texts`."""
+    if not member:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for prefix in index_prefixes(texts):
+                key = _key(kind, prefix)
+                pipe.zincrby(key, increment, member)
+                pipe.zremrangebyrank(key, 0, -(MAX_ENTRIES_PER_PREFIX + 1))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Suggestion index update failed, picked up by the next rebuild: {e}")
+
+
+async def add_search_query(query: str) -> None:
+    """Count a search towards the popular query suggestions."""
+    normalized = normalize_suggestion(query)
+    await add_suggestion("queries", normalized, [normalized])
@@ -0,0 +1,807 @@
+"""
+Tree-sitter based performance analyzer for JavaScript/TypeScript, Go and Rust.
+
+The counterpart of app/services/code_analyzer.py for other languages, with
+the same interface: the code is parsed once and walked once, rules are
+`Rule` subclasses registered for node types (grammar node type names here)
+that yield `Finding`s, and the walk estimates time and space complexity the
+same way (loops over the input count n, constant loops don't, halving loops
+count log n; linear searches, copies and sorts inside loops add their cost;
+branching recursion without a memo is exponential).
+
+Each language has a `LanguageSpec` describing its grammar (which node types
+are loops and functions, which calls search, sort, copy or allocate) and a
+rule pack. Shared rules read the spec; language-specific ones (Go string
+building, missing preallocation) live in their pack.
+
+tree-sitter and the grammars are optional dependencies: when they are not
+installed, `is_supported` is False and the playground falls back to its
+heuristics. Languages and parsers are created once; parsers are kept per
+thread since a parser can't be used by two threads at once.
+"""
+
+import importlib
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable
+
+from app.services.code_analyzer import IMPACT_ORDER, AnalysisReport, Cost, Finding, FunctionReport, Rule
+
+# Language names accepted by the playground -> grammar
+LANGUAGE_ALIASES = {
+    "javascript": "javascript", "js": "javascript", "jsx": "javascript",
+    "typescript": "typescript", "ts": "typescript", "tsx": "tsx",
+    "go": "go", "golang": "go",
+    "rust": "rust", "rs": "rust",
+}
+
+# Assignments that halve (or double) a loop bound, e.g. `mid = (lo + hi) / 2`, `n >>= 1`
+_HALVING = re.compile(r"/\s*2\b|>>\s*1\b|/=\s*2\b|>>=\s*1\b|\*=\s*2\b")
+# Recursive calls on half the input
+_HALVING_ARGS = re.compile(r"/\s*2\b|>>\s*1\b|\bmid\b")
+# Loop headers with a literal bound, e.g. `i < 10`, `0..26`
+_CONSTANT_BOUND = re.compile(r"[<>]=?\s*\d+\s*(;|$)|^\s*\d+\s*\.\.=?\s*\d+\s*$")
+_MEMO_NAMES = re.compile(r"\b(memo|cache|dp)\w*", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class LanguageSpec:
+    """What the walker and the shared rules need to know about a grammar."""
+    name: str
+    module: str  # Python package of the grammar
+    loader: str  # Function of the package returning the language
+    functions: frozenset[str]
+    loops: frozenset[str]
+    assignments: frozenset[str]
+    declarations: frozenset[str]
+    linear_methods: frozenset[str]  # Scan their receiver: O(n) per call
+    sort_calls: frozenset[str]  # Method names or qualified functions
+    copy_calls: frozenset[str]  # Build a new container from their receiver or argument
+    allocations: frozenset[str]  # Constructors worth hoisting out of loops
+    grow_methods: frozenset[str]  # push/append: retained space grows with the loop
+    iterating_methods: frozenset[str] = frozenset()  # Run their callback once per element
+    front_removals: frozenset[str] = frozenset()  # Shift the whole container
+    type_kinds: tuple[tuple[str, str], ...] = ()  # (regex on a declared type, kind)
+
+
+@dataclass
+class _Loop:
+    node: Any
+    power: int
+    log: int
+
+
+@dataclass
+class _Function:
+    node: Any
+    name: str
+    scope: dict[str, str] = field(default_factory=dict)
+    self_calls: list[Any] = field(default_factory=list)
+    time: Cost = field(default_factory=Cost)
+    space: Cost = field(default_factory=Cost)
+    memoized: bool = False
+
+
+class TreeSitterContext:
+    """State of the tree walk at the node being checked."""
+
+    def __init__(self, spec: LanguageSpec, source: bytes):
+        self.spec = spec
+        self.source = source
+        self.loops: list[_Loop] = []
+        self.functions: list[_Function] = []
+        self.module_scope: dict[str, str] = {}
+        self.unsized: set[str] = set()  # Containers created without a capacity
+        self.time = Cost()
+        self.space = Cost()
+        self.function_reports: list[FunctionReport] = []
+
+    def text(self, node) -> str:
+        return self.source[node.start_byte:node.end_byte].decode("utf-8", "replace")
+
+    @property
+    def function(self) -> _Function | None:
+        return self.functions[-1] if self.functions else None
+
+    @property
+    def in_loop(self) -> bool:
+        return any(loop.power or loop.log for loop in self.loops)
+
+    @property
+    def loop_depth(self) -> int:
+        """Number of enclosing loops over the input."""
+        return sum(loop.power for loop in self.loops)
+
+    @property
+    def loop_cost(self) -> Cost:
+        return Cost(power=self.loop_depth, log=sum(loop.log for loop in self.loops))
+
+    def bind(self, name: str, kind: str | None) -> None:
+        scope = self.function.scope if self.function else self.module_scope
+        if kind:
+            scope[name] = kind
+        else:
+            scope.pop(name, None)
+
+    def lookup(self, name: str) -> str | None:
+        for scope in reversed([self.module_scope] + [f.scope for f in self.functions]):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def kind_of(self, node) -> str | None:
+        """What kind of value an expression holds (list, set, dict, str, deque), when it can be told."""
+        if node is None:
+            return None
+        kind = _LITERAL_KINDS.get(node.type)
+        if kind:
+            return kind
+        if node.type == "identifier":
+            return self.lookup(self.text(node))
+        if node.type in ("parenthesized_expression", "reference_expression", "await_expression"):
+            return self.kind_of(node.named_children[-1]) if node.named_children else None
+        if node.type == "composite_literal":
+            return self.type_kind(node.child_by_field_name("type"))
+        if node.type in ("call_expression", "new_expression", "macro_invocation"):
+            _, name, callee = callee_of(node, self)
+            if name == "make" and node.child_by_field_name("arguments"):
+                arguments = node.child_by_field_name("arguments").named_children
+                return self.type_kind(arguments[0]) if arguments else None
+            return _CONSTRUCTOR_KINDS.get(callee) or _CONSTRUCTOR_KINDS.get(name)
+        return None
+
+    def type_kind(self, node) -> str | None:
+        if node is None:
+            return None
+        text = self.text(node)
+        for pattern, kind in self.spec.type_kinds:
+            if re.search(pattern, text):
+                return kind
+        return None
+
+    def add_time(self, cost: Cost) -> None:
+        if self.function:
+            self.function.time = max(self.function.time, cost)
+        self.time = max(self.time, cost)
+
+    def add_space(self, cost: Cost) -> None:
+        if self.function:
+            self.function.space = max(self.function.space, cost)
+        self.space = max(self.space, cost)
+
+
+_LITERAL_KINDS = {
+    # JavaScript/TypeScript
+    "string": "str", "template_string": "str", "array": "list", "object": "dict",
+    # Go
+    "interpreted_string_literal": "str", "raw_string_literal": "str",
+    # Rust (&str literals can't grow, but they start Strings via +)
+    "string_literal": "str", "array_expression": "list",
+}
+
+_CONSTRUCTOR_KINDS = {
+    # JavaScript/TypeScript
+    "Array": "list", "Array.from": "list", "Set": "set", "Map": "dict", "String": "str",
+    # Rust
+    "Vec::new": "list", "Vec::with_capacity": "list", "vec": "list",
+    "String::new": "str", "String::with_capacity": "str", "String::from": "str", "format": "str",
+    "to_string": "str", "to_owned": "str",
+    "HashSet::new": "set", "BTreeSet::new": "set", "HashMap::new": "dict", "BTreeMap::new": "dict",
+    "VecDeque::new": "deque", "VecDeque::with_capacity": "deque",
+}
+
+
+def callee_of(node, ctx: TreeSitterContext) -> tuple[Any, str, str]:
+    """(receiver node or None, method or function name, full callee text) of a call."""
+    if node.type == "macro_invocation":
+        name = ctx.text(node.child_by_field_name("macro"))
+        return None, name, name
+    function = node.child_by_field_name("function") or node.child_by_field_name("constructor")
+    if function is None:
+        return None, "", ""
+    callee = ctx.text(function)
+    if function.type in ("member_expression", "selector_expression", "field_expression"):
+        receiver = (
+            function.child_by_field_name("object")
+            or function.child_by_field_name("operand")
+            or function.child_by_field_name("value")
+        )
+        member = (
+            function.child_by_field_name("property")
+            or function.child_by_field_name("field")
+        )
+        return receiver, ctx.text(member) if member else "", callee
+    if function.type == "scoped_identifier":
+        name = function.child_by_field_name("name")
+        return None, ctx.text(name) if name else callee, callee
+    return None, callee, callee
+
+
+def _is_call(node) -> bool:
+    return node.type in ("call_expression", "new_expression", "macro_invocation")
+
+
+def _calls(node, ctx: TreeSitterContext, names: frozenset[str]) -> bool:
+    """Whether a call's method name or full callee is among `names`."""
+    _, name, callee = callee_of(node, ctx)
+    return name in names or callee in names
+
+
+def _name_of(node, ctx: TreeSitterContext) -> str:
+    name = node.child_by_field_name("name")
+    if name is not None:
+        return ctx.text(name)
+    # const f = (x) => ..., let f = |x| ...
+    parent = node.parent
+    if parent is not None and parent.type in ("variable_declarator", "let_declaration", "short_var_declaration"):
+        target = parent.child_by_field_name("name") or parent.child_by_field_name("pattern")
+        if target is not None:
+            return ctx.text(target)
+    return "<anonymous>"
+
+
+class TreeSitterRule(Rule):
+    """
+    A check run during the tree-sitter walk.
+
+    Like `Rule`, with grammar node type names in `node_types`; rules shared
+    between languages read the language's spec.
+    """
+    node_types: tuple[str, ...] = ()
+
+    def __init__(self, spec: LanguageSpec):
+        self.spec = spec
+
+    def finding(self, node, message: str, impact: str) -> Finding:
+        row, column = node.start_point
+        return Finding(rule=self.id, message=message, line=row + 1, col=column + 1, impact=impact)
+
+
+# Shared rules --------------------------------------------------------------
+
+
+class NestedLoopsRule(TreeSitterRule):
+    id = "nested-loops"
+
+    @property
+    def node_types(self):
+        return tuple(self.spec.loops | self.spec.functions)
+
+    def check(self, node, ctx):
+        # Reported once per nest, at the loop (or per-element callback) that makes it quadratic
+        if ctx.loop_depth == 2 and ctx.loops[-1].node is node and ctx.loops[-1].power:
+            yield self.finding(node, "Consider hash-based approach to reduce nested loops", "high")
+
+
+class LinearSearchInLoopRule(TreeSitterRule):
+    id = "linear-search-in-loop"
+    node_types = ("call_expression",)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        receiver, name, callee = callee_of(node, ctx)
+        if name not in self.spec.linear_methods and callee not in self.spec.linear_methods:
+            return
+        kind = ctx.kind_of(receiver) if receiver is not None else None
+        if kind in ("str", "set", "dict"):
+            return
+        # Rust's contains is also a set/str method: only flag known lists
+        if self.spec.name == "rust" and name == "contains" and kind != "list":
+            return
+        lookup = {"javascript": "a Set or Map", "go": "a map", "rust": "a HashSet or HashMap"}
+        yield self.finding(
+            node,
+            f"Linear search inside a loop - build {lookup.get(self.spec.name, 'a hash set')} "
+            "once for O(1) lookups",
+            "high",
+        )
+
+
+class SortInLoopRule(TreeSitterRule):
+    id = "sort-in-loop"
+    node_types = ("call_expression",)
+
+    def check(self, node, ctx):
+        if ctx.in_loop and _calls(node, ctx, self.spec.sort_calls):
+            yield self.finding(node, "Sorting inside loop is expensive - consider sorting once", "high")
+
+
+class AllocationInLoopRule(TreeSitterRule):
+    id = "allocation-in-loop"
+    node_types = ("call_expression", "new_expression", "macro_invocation")
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        if _calls(node, ctx, self.spec.copy_calls):
+            yield self.finding(
+                node, "Copying a collection inside a loop is O(n) per iteration - copy once or borrow", "medium"
+            )
+        elif _calls(node, ctx, self.spec.allocations):
+            _, _, callee = callee_of(node, ctx)
+            yield self.finding(
+                node, f"Allocation inside a loop ({callee}) - create it once outside the loop and reuse it", "medium"
+            )
+
+
+class FrontRemovalRule(TreeSitterRule):
+    id = "front-removal-in-loop"
+    node_types = ("call_expression",)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        receiver, name, _ = callee_of(node, ctx)
+        if name not in self.spec.front_removals or ctx.kind_of(receiver) == "deque":
+            return
+        arguments = node.child_by_field_name("arguments")
+        first = arguments.named_children[0] if arguments is not None and arguments.named_children else None
+        # JS shift()/unshift() always touch the front, Rust remove/insert only at index 0
+        if self.spec.name == "rust" and (first is None or ctx.text(first) != "0"):
+            return
+        remedy = "VecDeque" if self.spec.name == "rust" else "an index or a queue"
+        yield self.finding(node, f"Removing or inserting at the front shifts every element - use {remedy}", "medium")
+
+
+class UnmemoizedRecursionRule(TreeSitterRule):
+    id = "unmemoized-recursion"
+
+    @property
+    def node_types(self):
+        return tuple(self.spec.functions)
+
+    def check(self, node, ctx):
+        # The self-calls are only known once the body is walked (see check_function)
+        return ()
+
+    def check_function(self, function: _Function, ctx: TreeSitterContext) -> Iterable[Finding]:
+        calls = function.self_calls
+        if len(calls) >= 2 and not function.memoized and not any(_halving_call(call, ctx) for call in calls):
+            yield self.finding(
+                function.node,
+                f"Memoize recursive function '{function.name}' (repeated subproblems make it exponential)",
+                "high",
+            )
+
+
+# Language rules ------------------------------------------------------------
+
+
+class GoStringConcatRule(TreeSitterRule):
+    id = "string-concat-in-loop"
+    node_types = ("assignment_statement",)
+
+    def check(self, node, ctx):
+        if not ctx.in_loop or _operator(node, ctx) != "+=":
+            return
+        left, right = node.child_by_field_name("left"), node.child_by_field_name("right")
+        targets = left.named_children if left is not None else []
+        values = right.named_children if right is not None else []
+        if "str" in [ctx.kind_of(target) for target in targets] + [ctx.kind_of(value) for value in values]:
+            yield self.finding(node, "Use strings.Builder instead of += on strings in a loop", "high")
+
+
+class MissingPreallocationRule(TreeSitterRule):
+    """append/push in a loop to a container created without a capacity."""
+    id = "missing-preallocation"
+    node_types = ("call_expression",)
+
+    REMEDIES = {
+        "go": "make([]T, 0, n)",
+        "rust": "Vec::with_capacity(n)",
+    }
+
+    def check(self, node, ctx):
+        if not ctx.in_loop:
+            return
+        receiver, name, _ = callee_of(node, ctx)
+        if name not in self.spec.grow_methods:
+            return
+        if self.spec.name == "go":
+            # append(xs, ...): the container is the first argument
+            arguments = node.child_by_field_name("arguments")
+            receiver = arguments.named_children[0] if arguments is not None and arguments.named_children else None
+        if receiver is None or receiver.type != "identifier" or ctx.text(receiver) not in ctx.unsized:
+            return
+        ctx.unsized.discard(ctx.text(receiver))  # Once per container
+        yield self.finding(
+            node,
+            f"'{ctx.text(receiver)}' grows inside a loop - preallocate with {self.REMEDIES[self.spec.name]} "
+            "when the size is known",
+            "low",
+        )
+
+
+# Grammars ------------------------------------------------------------------
+
+
+_JS_COMMON = dict(
+    functions=frozenset({
+        "function_declaration", "function_expression", "function", "arrow_function",
+        "method_definition", "generator_function_declaration",
+    }),
+    loops=frozenset({"for_statement", "for_in_statement", "while_statement", "do_statement"}),
+    assignments=frozenset({"assignment_expression", "augmented_assignment_expression"}),
+    declarations=frozenset({"variable_declarator"}),
+    linear_methods=frozenset({"includes", "indexOf", "lastIndexOf", "find", "findIndex", "some"}),
+    sort_calls=frozenset({"sort", "toSorted"}),
+    copy_calls=frozenset({"slice", "concat", "Array.from", "structuredClone", "toSorted", "toReversed"}),
+    allocations=frozenset({"Map", "Set", "Array", "RegExp", "Date", "Intl.NumberFormat", "Intl.DateTimeFormat"}),
+    grow_methods=frozenset({"push"}),
+    iterating_methods=frozenset({"forEach", "map", "filter", "reduce", "flatMap", "every", "some", "find"}),
+    front_removals=frozenset({"shift", "unshift"}),
+    type_kinds=(
+        (r"\[\]\s*$|^\s*:?\s*(Readonly)?Array<", "list"),
+        (r"^\s*:?\s*(Readonly)?Set<", "set"),
+        (r"^\s*:?\s*(Readonly)?Map<|^\s*:?\s*Record<", "dict"),
+        (r"^\s*:?\s*string\s*$", "str"),
+    ),
+)
+
+LANGUAGES: dict[str, LanguageSpec] = {
+    "javascript": LanguageSpec(name="javascript", module="tree_sitter_javascript", loader="language", **_JS_COMMON),
+    "typescript": LanguageSpec(
+        name="javascript", module="tree_sitter_typescript", loader="language_typescript", **_JS_COMMON
+    ),
+    "tsx": LanguageSpec(name="javascript", module="tree_sitter_typescript", loader="language_tsx", **_JS_COMMON),
+    "go": LanguageSpec(
+        name="go",
+        module="tree_sitter_go",
+        loader="language",
+        functions=frozenset({"function_declaration", "method_declaration", "func_literal"}),
+        loops=frozenset({"for_statement"}),
+        assignments=frozenset({"assignment_statement", "short_var_declaration", "inc_statement", "dec_statement"}),
+        declarations=frozenset({"short_var_declaration", "var_spec"}),
+        linear_methods=frozenset({"slices.Contains", "slices.Index", "slices.IndexFunc", "slices.ContainsFunc"}),
+        sort_calls=frozenset({
+            "sort.Slice", "sort.SliceStable", "sort.Sort", "sort.Stable", "sort.Ints", "sort.Strings",
+            "sort.Float64s", "slices.Sort", "slices.SortFunc", "slices.SortStableFunc",
+        }),
+        copy_calls=frozenset({"slices.Clone", "maps.Clone", "copy"}),
+        allocations=frozenset({
+            "make", "regexp.MustCompile", "regexp.Compile", "fmt.Sprintf", "strings.Split", "json.Marshal",
+        }),
+        grow_methods=frozenset({"append"}),
+        type_kinds=(
+            (r"^\s*\[\]", "list"),
+            (r"^\s*map\[", "dict"),
+            (r"^\s*string\s*$", "str"),
+        ),
+    ),
+    "rust": LanguageSpec(
+        name="rust",
+        module="tree_sitter_rust",
+        loader="language",
+        functions=frozenset({"function_item", "closure_expression"}),
+        loops=frozenset({"for_expression", "while_expression", "loop_expression"}),
+        assignments=frozenset({"assignment_expression", "compound_assignment_expr"}),
+        declarations=frozenset({"let_declaration"}),
+        linear_methods=frozenset({"contains", "position", "binary_search_by_key"}),
+        sort_calls=frozenset({"sort", "sort_by", "sort_by_key", "sort_unstable", "sort_unstable_by"}),
+        copy_calls=frozenset({"clone", "to_vec", "to_owned", "cloned", "collect"}),
+        allocations=frozenset({
+            "Vec::new", "vec", "String::new", "format", "HashMap::new", "HashSet::new", "Regex::new",
+            "Box::new",
+        }),
+        grow_methods=frozenset({"push", "push_str", "extend"}),
+        iterating_methods=frozenset({"for_each", "map", "filter", "filter_map", "flat_map", "fold", "any", "all"}),
+        front_removals=frozenset({"remove", "insert"}),
+        type_kinds=(
+            (r"Vec<|^\s*&\s*(mut\s+)?\[", "list"),
+            (r"VecDeque<", "deque"),
+            (r"HashSet<|BTreeSet<", "set"),
+            (r"HashMap<|BTreeMap<", "dict"),
+            (r"^\s*&?\s*(mut\s+)?(str|String)\s*$", "str"),
+        ),
+    ),
+}
+
+_SHARED_RULES: list[type[TreeSitterRule]] = [
+    NestedLoopsRule,
+    LinearSearchInLoopRule,
+    SortInLoopRule,
+    AllocationInLoopRule,
+    UnmemoizedRecursionRule,
+]
+
+JAVASCRIPT_RULES: list[type[TreeSitterRule]] = _SHARED_RULES + [FrontRemovalRule]
+GO_RULES: list[type[TreeSitterRule]] = _SHARED_RULES + [GoStringConcatRule, MissingPreallocationRule]
+RUST_RULES: list[type[TreeSitterRule]] = _SHARED_RULES + [FrontRemovalRule, MissingPreallocationRule]
+
+RULE_PACKS: dict[str, list[type[TreeSitterRule]]] = {
+    "javascript": JAVASCRIPT_RULES,
+    "typescript": JAVASCRIPT_RULES,
+    "tsx": JAVASCRIPT_RULES,
+    "go": GO_RULES,
+    "rust": RUST_RULES,
+}
+
+
+# Parsers -------------------------------------------------------------------
+
+_parsers = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _load_language(grammar: str):
+    """The tree-sitter Language of a grammar, None when tree-sitter or the grammar isn't installed."""
+    try:
+        import tree_sitter
+        spec = LANGUAGES[grammar]
+        module = importlib.import_module(spec.module)
+        return tree_sitter.Language(getattr(module, spec.loader)())
+    except (ImportError, AttributeError, TypeError, ValueError):
+        return None
+
+
+def _parser(grammar: str):
+    """A parser for the grammar, created once per thread."""
+    parsers = _parsers.__dict__.setdefault("by_grammar", {})
+    if grammar not in parsers:
+        import tree_sitter
+        parsers[grammar] = tree_sitter.Parser(_load_language(grammar))
+    return parsers[grammar]
+
+
+def is_supported(language: str) -> bool:
+    """Whether code in this language can be analyzed here (grammar installed)."""
+    grammar = LANGUAGE_ALIASES.get(language.lower())
+    return grammar is not None and _load_language(grammar) is not None
+
+
+# Walker --------------------------------------------------------------------
+
+
+def _operator(node, ctx: TreeSitterContext) -> str | None:
+    operator = node.child_by_field_name("operator")
+    return ctx.text(operator) if operator is not None else None
+
+
+def _halving_call(call, ctx: TreeSitterContext) -> bool:
+    arguments = call.child_by_field_name("arguments")
+    return arguments is not None and bool(_HALVING_ARGS.search(ctx.text(arguments)))
+
+
+class TreeSitterAnalyzer:
+    """Walks a syntax tree once, running the language's rules and estimating complexity."""
+
+    def __init__(self, language: str, rules: Iterable[type[TreeSitterRule]] | None = None):
+        grammar = LANGUAGE_ALIASES.get(language.lower())
+        if grammar is None or _load_language(grammar) is None:
+            raise ValueError(f"No tree-sitter grammar available for {language}")
+        self.grammar = grammar
+        self.spec = LANGUAGES[grammar]
+        self.rules = [rule(self.spec) for rule in (RULE_PACKS[grammar] if rules is None else rules)]
+        self._dispatch: dict[str, list[TreeSitterRule]] = {}
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                self._dispatch.setdefault(node_type, []).append(rule)
+
+    def analyze(self, code: str) -> AnalysisReport:
+        """
+        Analyze source code.
+
+        Raises:
+            SyntaxError: If the code can't be parsed
+        """
+        source = code.encode("utf-8")
+        tree = _parser(self.grammar).parse(source)
+        if tree.root_node.has_error:
+            raise SyntaxError(f"{self.grammar} code does not parse")
+        ctx = TreeSitterContext(self.spec, source)
+        findings: list[Finding] = []
+        self._visit(tree.root_node, ctx, findings)
+        # One finding per rule and line
+        findings = list({(f.rule, f.line): f for f in reversed(findings)}.values())
+        findings.sort(key=lambda f: (IMPACT_ORDER[f.impact], f.line, f.col))
+        return AnalysisReport(
+            time_complexity=ctx.time.label(),
+            space_complexity=ctx.space.label(),
+            findings=findings,
+            functions=ctx.function_reports,
+        )
+
+    def _check(self, node, ctx: TreeSitterContext, findings: list[Finding]) -> None:
+        for rule in self._dispatch.get(node.type, ()):
+            findings.extend(rule.check(node, ctx))
+
+    def _visit(self, node, ctx: TreeSitterContext, findings: list[Finding], callback: bool = False) -> None:
+        spec = self.spec
+        if node.type in spec.functions:
+            self._visit_function(node, ctx, findings, callback)
+        elif node.type in spec.loops:
+            self._visit_loop(node, ctx, findings)
+        else:
+            self._check(node, ctx, findings)
+            self._account(node, ctx)
+            iterating = _is_call(node) and _calls(node, ctx, spec.iterating_methods)
+            for child in node.named_children:
+                if iterating and child.type in ("arguments", "argument_list"):
+                    for argument in child.named_children:
+                        self._visit(argument, ctx, findings, callback=True)
+                else:
+                    self._visit(child, ctx, findings)
+            if node.type in spec.declarations:
+                self._bind(node, ctx)
+
+    def _visit_loop(self, node, ctx: TreeSitterContext, findings: list[Finding]) -> None:
+        body = node.child_by_field_name("body")
+        header = [child for child in node.named_children if child != body]
+        for child in header:
+            self._visit(child, ctx, findings)
+        header_text = " ".join(ctx.text(child) for child in header)
+        halving = any(_HALVING.search(ctx.text(n)) for n in self._assignments(node, ctx))
+        if halving:
+            loop = _Loop(node, 0, 1)
+        elif _CONSTANT_BOUND.search(header_text) or (
+            header and header[-1].type in ("array", "array_expression", "composite_literal")
+        ):
+            loop = _Loop(node, 0, 0)
+        else:
+            loop = _Loop(node, 1, 0)
+        ctx.loops.append(loop)
+        self._check(node, ctx, findings)
+        ctx.add_time(ctx.loop_cost)
+        if body is not None:
+            self._visit(body, ctx, findings)
+        ctx.loops.pop()
+
+    def _assignments(self, node, ctx: TreeSitterContext) -> Iterable:
+        """Assignments and declarations of a loop, outside nested loops and functions."""
+        stack = list(node.named_children)
+        while stack:
+            child = stack.pop()
+            if child.type in self.spec.assignments or child.type in self.spec.declarations:
+                yield child
+            elif child.type not in self.spec.loops and child.type not in self.spec.functions:
+                stack.extend(child.named_children)
+
+    def _visit_function(self, node, ctx: TreeSitterContext, findings: list[Finding], callback: bool) -> None:
+        if callback:
+            # A callback run once per element is a loop of its enclosing function
+            loop = _Loop(node, 1, 0)
+            ctx.loops.append(loop)
+            self._check(node, ctx, findings)
+            ctx.add_time(ctx.loop_cost)
+            for child in node.named_children:
+                self._visit(child, ctx, findings)
+            ctx.loops.pop()
+            return
+
+        self._check(node, ctx, findings)
+        function = _Function(node=node, name=_name_of(node, ctx))
+        body = node.child_by_field_name("body")
+        function.memoized = bool(body is not None and _MEMO_NAMES.search(ctx.text(body)))
+        parameters = node.child_by_field_name("parameters")
+        if parameters is not None:
+            for parameter in parameters.named_children:
+                self._bind_parameter(parameter, function, ctx)
+
+        outer_loops, ctx.loops = ctx.loops, []  # a function body starts a new loop nest
+        ctx.functions.append(function)
+        for child in node.named_children:
+            if child != parameters:
+                self._visit(child, ctx, findings)
+        ctx.functions.pop()
+        ctx.loops = outer_loops
+
+        for rule in self.rules:
+            if isinstance(rule, UnmemoizedRecursionRule):
+                findings.extend(rule.check_function(function, ctx))
+        time, space = self._recursion_cost(function, ctx)
+        ctx.add_time(time)
+        ctx.add_space(space)
+        if function.name != "<anonymous>":
+            ctx.function_reports.append(FunctionReport(
+                name=function.name,
+                line=node.start_point[0] + 1,
+                end_line=node.end_point[0] + 1,
+                time_complexity=time.label(),
+                space_complexity=space.label(),
+            ))
+
+    def _bind_parameter(self, parameter, function: _Function, ctx: TreeSitterContext) -> None:
+        name = parameter.child_by_field_name("name") or parameter.child_by_field_name("pattern")
+        type_node = parameter.child_by_field_name("type")
+        if name is None or type_node is None:
+            return
+        kind = ctx.type_kind(type_node)
+        if kind:
+            function.scope[ctx.text(name)] = kind
+
+    def _bind(self, node, ctx: TreeSitterContext) -> None:
+        """Record what kind of value a declaration binds, and whether it was sized."""
+        if node.type == "short_var_declaration":
+            left, right = node.child_by_field_name("left"), node.child_by_field_name("right")
+            pairs = zip(left.named_children, right.named_children) if left and right else ()
+        else:
+            name = node.child_by_field_name("name") or node.child_by_field_name("pattern")
+            value = node.child_by_field_name("value")
+            pairs = [(name, value)] if name is not None else []
+            type_node = node.child_by_field_name("type")
+            if name is not None and value is None and type_node is not None:
+                # var xs []int, let v: Vec<i32>;
+                kind = ctx.type_kind(type_node)
+                ctx.bind(ctx.text(name), kind)
+                if kind == "list":
+                    ctx.unsized.add(ctx.text(name))
+                return
+        for name, value in pairs:
+            if name.type != "identifier":
+                continue
+            kind = ctx.kind_of(value)
+            ctx.bind(ctx.text(name), kind)
+            if kind in ("list", "str") and self._unsized(value, ctx):
+                ctx.unsized.add(ctx.text(name))
+            else:
+                ctx.unsized.discard(ctx.text(name))
+
+    def _unsized(self, value, ctx: TreeSitterContext) -> bool:
+        """Whether an empty container is created without room for what comes next."""
+        text = ctx.text(value).replace(" ", "")
+        return bool(re.fullmatch(r"\[\]|\[\]\w+\{\}|make\(\[\]\w+,0\)|Vec::new\(\)|vec!\[\]|String::new\(\)", text))
+
+    def _account(self, node, ctx: TreeSitterContext) -> None:
+        """Add the cost of one expression at the current loop depth."""
+        spec = self.spec
+        if _is_call(node):
+            receiver, name, callee = callee_of(node, ctx)
+            function = ctx.function
+            if function and function.name != "<anonymous>" and name == function.name and (
+                receiver is None or ctx.text(receiver) in ("this", "self")
+                or node.child_by_field_name("function").type == "selector_expression"
+            ):
+                function.self_calls.append(node)
+            if name in spec.sort_calls or callee in spec.sort_calls:
+                ctx.add_time(ctx.loop_cost.times(power=1, log=1))
+            elif (name in spec.linear_methods or callee in spec.linear_methods) and ctx.kind_of(receiver) not in (
+                "set", "dict"
+            ):
+                ctx.add_time(ctx.loop_cost.times(power=1))
+            elif name in spec.front_removals and ctx.kind_of(receiver) != "deque":
+                ctx.add_time(ctx.loop_cost.times(power=1))
+            if name in spec.copy_calls or callee in spec.copy_calls:
+                ctx.add_time(ctx.loop_cost.times(power=1))
+                ctx.add_space(Cost(power=1))
+            elif name in spec.grow_methods:
+                ctx.add_space(Cost(power=ctx.loop_depth))
+        elif node.type in ("augmented_assignment_expression", "assignment_statement"):
+            if _operator(node, ctx) == "+=" and spec.name == "go":
+                left = node.child_by_field_name("left")
+                if left is not None and any(ctx.kind_of(target) == "str" for target in left.named_children):
+                    ctx.add_time(ctx.loop_cost.times(power=1))
+        elif node.type == "spread_element":
+            ctx.add_time(ctx.loop_cost.times(power=1))
+            ctx.add_space(Cost(power=1))
+
+    def _recursion_cost(self, function: _Function, ctx: TreeSitterContext) -> tuple[Cost, Cost]:
+        """Time and space of a function including its recursion."""
+        body_time, body_space = function.time, function.space
+        calls = function.self_calls
+        if not calls:
+            return body_time, body_space
+        if any(_halving_call(call, ctx) for call in calls):
+            if len(calls) == 1:
+                # T(n) = T(n/2) + f(n), e.g. binary search
+                time = body_time if body_time.power else body_time.times(log=1)
+            else:
+                # T(n) = 2T(n/2) + f(n), e.g. merge sort
+                time = body_time.times(log=1) if body_time.power == 1 else max(body_time, Cost(power=1))
+            return time, max(body_space, Cost(log=1))
+        if len(calls) == 1 or function.memoized:
+            return body_time.times(power=1), max(body_space, Cost(power=1))
+        return Cost(exponential=True), max(body_space, Cost(power=1))
+
+
+def analyze_source(code: str, language: str) -> AnalysisReport:
+    """
+    Analyze JavaScript/TypeScript, Go or Rust code with its rule pack.
+
+    Raises:
+        ValueError: If no grammar for the language is installed
+        SyntaxError: If the code can't be parsed
+    """
+    return TreeSitterAnalyzer(language).analyze(code)
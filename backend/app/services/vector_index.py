@@ -0,0 +1,164 @@
+"""
+HNSW index management and index-friendly vector queries.
+
+`solution_embeddings` stores vectors of several dimensions in one untyped
+column, so each embedding space gets its own partial HNSW index over
+`embedding::vector(dim)`. Queries must use that exact expression in an
+`ORDER BY ... <=> :q LIMIT k` form for the planner to pick the index;
+similarity thresholds and filters are applied to the k candidates afterwards.
+Recall/latency is traded per request through the HNSW `ef_search` of a tier.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import engine
+from app.services.embedding_spaces import EmbeddingSpaceInfo, validate_space_name
+
+logger = logging.getLogger(__name__)
+
+# Tables holding per-space vectors, each gets one HNSW index per space
+VECTOR_TABLES = ("solution_embeddings", "solution_embedding_chunks")
+
+
+@dataclass(frozen=True)
+class SearchTier:
+    """Recall/latency knobs applied to one request."""
+    name: str
+    ef_search: int  # HNSW candidate list size while scanning
+    candidates: int  # nearest neighbours fetched before post-filtering
+
+
+def get_search_tier(name: str | None = None) -> SearchTier:
+    """Resolve a tier name from settings, falling back to the default tier."""
+    settings = get_settings()
+    tiers = settings.search_tiers
+    name = name if name in tiers else settings.search_default_tier
+    tier = tiers[name]
+    return SearchTier(name=name, ef_search=tier["ef_search"], candidates=tier["candidates"])
+
+
+async def apply_search_tier(db: AsyncSession, tier: SearchTier) -> None:
+    """Set ef_search (and iterative scans) for the rest of the current transaction."""
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+        {"ef_search": str(tier.ef_search)},
+    )
+    iterative_scan = get_settings().hnsw_iterative_scan
+    if iterative_scan:
+        # Keep scanning the graph until LIMIT rows pass the filters (pgvector >= 0.8)
+        await db.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :mode, true)"),
+            {"mode": iterative_scan},
+        )
+
+
+def vector_column(space: EmbeddingSpaceInfo, alias: str) -> str:
+    """Expression matching the space's partial index, e.g. `se.embedding::vector(768)`."""
+    return f"{alias}.embedding::vector({int(space.dim)})"
+
+
+def query_vector(space: EmbeddingSpaceInfo, param: str = "embedding") -> str:
+    """Bind parameter cast to the space's dimension."""
+    return f"CAST(:{param} AS vector({int(space.dim)}))"
+
+
+def nearest_solutions_cte(
+    space: EmbeddingSpaceInfo,
+    name: str = "candidates",
+    filters: list[str] | None = None,
+) -> str:
+    """
+    CTE with the :candidates nearest solutions in `space` and their similarity.
+
+    `filters` are SQL predicates over `s` (solutions) and `p` (problems); they
+    run inside the index scan (iterative scan) instead of after it, so a
+    selective filter still yields :candidates rows.
+
+    Expects :space, :embedding and :candidates parameters.
+    """
+    column = vector_column(space, "se")
+    vector = query_vector(space)
+    joins = ""
+    where = ""
+    if filters:
+        joins = """
+            JOIN solutions s ON s.id = se.solution_id
+            JOIN problems p ON p.id = s.problem_id
+        """
+        where = "".join(f" AND {f}" for f in filters)
+    return f"""
+        {name} AS (
+            SELECT se.solution_id, 1 - ({column} <=> {vector}) AS embedding_sim
+            FROM solution_embeddings se
+            {joins}
+            WHERE se.space = :space{where}
+            ORDER BY {column} <=> {vector}
+            LIMIT :candidates
+        )
+    """
+
+
+def index_name(table: str, space_name: str) -> str:
+    return f"idx_{table}_hnsw_{validate_space_name(space_name)}"
+
+
+async def ensure_space_indexes(
+    space: EmbeddingSpaceInfo,
+    m: int | None = None,
+    ef_construction: int | None = None,
+) -> list[str]:
+    """
+    Build the HNSW indexes of a space if they don't exist.
+
+    Uses CREATE INDEX CONCURRENTLY, so search keeps running during the build.
+    A concurrent build that failed or was cancelled leaves an INVALID index
+    behind, which IF NOT EXISTS would keep skipping; those are dropped and
+    rebuilt.
+
+    Returns:
+        Names of the indexes
+    """
+    settings = get_settings()
+    m = int(m or settings.hnsw_m)
+    ef_construction = int(ef_construction or settings.hnsw_ef_construction)
+    space_name = validate_space_name(space.name)
+
+    names = []
+    async with engine.connect() as conn:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(
+            text("SELECT set_config('maintenance_work_mem', :mem, false)"),
+            {"mem": settings.hnsw_maintenance_work_mem},
+        )
+        for table in VECTOR_TABLES:
+            name = index_name(table, space_name)
+            valid = (await conn.execute(
+                text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": name},
+            )).scalar()
+            if valid is False:
+                logger.warning(f"HNSW index {name} is invalid (interrupted build), dropping it")
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            logger.info(f"Building HNSW index {name} (m={m}, ef_construction={ef_construction})")
+            await conn.execute(text(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}
+                ON {table} USING hnsw ((embedding::vector({int(space.dim)})) vector_cosine_ops)
+                WITH (m = {m}, ef_construction = {ef_construction})
+                WHERE space = '{space_name}'
+            """))
+            names.append(name)
+    return names
+
+
+async def drop_space_indexes(space_name: str) -> None:
+    """Drop the HNSW indexes of a (retired) space."""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in VECTOR_TABLES:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(table, space_name)}"))
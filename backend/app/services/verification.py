@@ -0,0 +1,673 @@
+"""
+Measured verification of playground suggestions.
+
+Runs the submitted code and a candidate replacement (a similar solution or
+the generated rewrite) side by side in a subprocess, on the same inputs:
+either inputs supplied by the caller (one list of positional arguments per
+call) or inputs generated from the function signature at growing sizes. Each
+call is timed (best of a few runs, after a warmup) under a per-call timer,
+and the two outputs are compared, so the reported speedup is measured and
+only trusted when the outputs agree. The sizes at which both versions
+completed make up the scaling curve.
+
+`verify_rewrite` uses the same runner as a correctness gate for automatic
+rewrites: every changed function must return exactly the same results.
+Runs are counted against a per-request `VerificationBudget`.
+
+The subprocess is a sandbox: isolated interpreter, empty environment,
+temporary working directory and hard resource limits (see `_run_script`).
+
+Equivalence is checked for Python only. JavaScript/TypeScript, Go and Rust
+are timed in the same sandbox (`verify_timing`): programs are compiled and
+run in a temporary directory with an empty environment and hard limits,
+node under its permission model, and the source is screened for process,
+file and network access first. Their timings are reported as a curve only,
+never as a speedup.
+"""
+
+import ast
+import asyncio
+import json
+import logging
+import os
+import re
+import resource
+import shutil
+import signal
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.config import get_settings
+from app.services.benchmark import (
+    MAX_EXECUTION_TIME,
+    create_go_benchmark_script,
+    create_javascript_benchmark_script,
+    create_rust_benchmark_script,
+    generate_javascript_test_input,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sandbox limits besides the configurable memory and CPU time
+SANDBOX_MAX_FILES = 64
+SANDBOX_MAX_FILE_BYTES = 1024 * 1024
+SANDBOX_MAX_BINARY_BYTES = 64 * 1024 * 1024  # compiler output
+
+# Toolchain variables the compilers need to find their installation; the
+# compiled programs run with an empty environment
+_TOOLCHAIN_ENV = ("PATH", "HOME", "GOROOT", "RUSTUP_HOME", "RUSTUP_TOOLCHAIN", "CARGO_HOME")
+
+# Go packages a timed program may import: no os, exec, net, syscall, unsafe or cgo
+_GO_IMPORTS = {
+    "bytes", "cmp", "container/heap", "container/list", "container/ring", "errors", "fmt",
+    "maps", "math", "math/bits", "runtime", "slices", "sort", "strconv", "strings", "time",
+    "unicode", "unicode/utf8",
+}
+_GO_IMPORT = re.compile(r'\bimport\s*(?:\(([^)]*)\)|([\w.]*\s*"[^"]*"))')
+
+# Rust std modules a timed program may use, and constructs it may not
+_RUST_MODULES = {
+    "borrow", "char", "cmp", "collections", "convert", "default", "f32", "f64", "fmt", "hash",
+    "hint", "i8", "i16", "i32", "i64", "i128", "isize", "iter", "mem", "num", "ops", "option",
+    "rc", "result", "slice", "str", "string", "time", "u8", "u16", "u32", "u64", "u128",
+    "usize", "vec",
+}
+_RUST_PATH = re.compile(r"\b(?:std|core|alloc)\s*::\s*(\w+|\{)")
+_RUST_FORBIDDEN = re.compile(
+    r"\bunsafe\b|\bextern\b|\b(?:std|core|alloc)\s+as\b"
+    r"|\b(?:include|include_str|include_bytes|env|option_env)\s*!"
+)
+
+# Equivalence levels, best first
+EQUIVALENCE_ORDER = ("exact", "unordered", "different", "error")
+
+_INT_NAMES = {"n", "k", "m", "num", "number", "size", "count", "limit", "target", "x", "steps", "depth"}
+_STR_NAMES = {"s", "text", "string", "word", "line", "sentence", "pattern"}
+_MATRIX_NAMES = {"matrix", "grid", "board", "mat"}
+
+
+@dataclass
+class ScalingPoint:
+    """Timings of both versions at one input size (None if it didn't finish)."""
+    size: int
+    baseline_ms: float | None
+    candidate_ms: float | None
+    speedup: float | None
+    equivalence: str | None = None
+
+
+@dataclass
+class VerificationResult:
+    function: str
+    candidate_function: str
+    equivalence: str  # exact, unordered, different, error or unchecked
+    speedup: float | None  # at the largest size both versions finished
+    curve: list[ScalingPoint] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def equivalent(self) -> bool:
+        return self.equivalence in ("exact", "unordered")
+
+
+@dataclass
+class VerificationBudget:
+    """Sandbox runs one request may still start."""
+    runs: int
+
+    def take(self) -> bool:
+        if self.runs <= 0:
+            return False
+        self.runs -= 1
+        return True
+
+
+def _parameters(code: str, func_name: str) -> list[ast.arg] | None:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == func_name:
+            args = node.args.posonlyargs + node.args.args
+            return [arg for arg in args if arg.arg not in ("self", "cls")]
+    return None
+
+
+def argument_kind(arg: ast.arg) -> str:
+    """Kind of input to generate for a parameter: int, str, dict, matrix or list."""
+    annotation = ast.unparse(arg.annotation).replace(" ", "") if arg.annotation else ""
+    if annotation in ("int", "float"):
+        return "int"
+    if annotation == "str":
+        return "str"
+    if annotation.startswith(("dict", "Dict")):
+        return "dict"
+    if annotation.startswith(("list[list", "List[List")) or arg.arg.lower() in _MATRIX_NAMES:
+        return "matrix"
+    if annotation.startswith(("list", "List", "Sequence")):
+        return "list"
+    name = arg.arg.lower()
+    if name in _INT_NAMES:
+        return "int"
+    if name in _STR_NAMES:
+        return "str"
+    if len(arg.arg) == 1 and arg.arg.isupper():
+        return "matrix"  # A, B
+    return "list"
+
+
+def create_verification_script(
+    baseline_code: str,
+    baseline_func: str,
+    candidate_code: str,
+    candidate_func: str,
+    arg_kinds: list[str] | None,
+    sizes: list[int],
+    inputs: list[list[Any]] | None,
+    runs: int,
+    call_timeout: float,
+) -> str:
+    """Python script that runs both versions and prints a RESULT: JSON line."""
+    return f'''
+import copy
+import json
+import math
+import random
+import signal
+import sys
+import time
+
+
+class CallTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise CallTimeout()
+
+
+signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def load(code, name):
+    namespace = {{"__name__": "__verify__"}}
+    exec(compile(code, "<" + name + ">", "exec"), namespace)
+    return namespace[name]
+
+
+def make_arg(kind, size, rng):
+    if kind == "int":
+        return size
+    if kind == "str":
+        return "".join(rng.choice("abcdefghij") for _ in range(size))
+    if kind == "dict":
+        return {{i: rng.randint(0, size) for i in range(size)}}
+    if kind == "matrix":
+        side = max(1, math.isqrt(size))
+        return [[rng.randint(0, 9) for _ in range(side)] for _ in range(side)]
+    return [rng.randint(0, size) for _ in range(size)]
+
+
+def input_size(args, index):
+    if args and isinstance(args[0], int):
+        return args[0]
+    if args and hasattr(args[0], "__len__"):
+        return len(args[0])
+    return index
+
+
+def timed(func, args):
+    best = None
+    result = None
+    for _ in range({runs} + 1):  # first call is a warmup
+        call_args = copy.deepcopy(args)
+        signal.setitimer(signal.ITIMER_REAL, {call_timeout})
+        try:
+            start = time.perf_counter()
+            result = func(*call_args)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def compare(a, b):
+    if a == b:
+        return "exact"
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        try:
+            if sorted(a, key=repr) == sorted(b, key=repr):
+                return "unordered"
+        except Exception:
+            pass
+    return "different"
+
+
+def main():
+    sys.setrecursionlimit(10000)
+    baseline = load({baseline_code!r}, {baseline_func!r})
+    candidate = load({candidate_code!r}, {candidate_func!r})
+
+    arg_kinds = {arg_kinds!r}
+    user_inputs = json.loads({json.dumps(inputs)!r})
+    if user_inputs is not None:
+        cases = [(input_size(args, i), args) for i, args in enumerate(user_inputs)]
+    else:
+        rng = random.Random(42)
+        cases = [(size, [make_arg(kind, size, rng) for kind in arg_kinds]) for size in {sizes!r}]
+
+    points = []
+    for size, args in cases:
+        point = {{"size": size, "baseline_ms": None, "candidate_ms": None, "equivalence": None}}
+        points.append(point)
+        try:
+            expected, point["baseline_ms"] = timed(baseline, args)
+        except CallTimeout:
+            break  # larger inputs would time out too
+        except Exception as e:
+            print("RESULT:" + json.dumps({{"error": "Submitted code failed: " + repr(e), "points": points}}))
+            return
+        try:
+            actual, point["candidate_ms"] = timed(candidate, args)
+            point["equivalence"] = compare(expected, actual)
+        except CallTimeout:
+            point["equivalence"] = "error"
+            break
+        except Exception as e:
+            point["equivalence"] = "error"
+            print("RESULT:" + json.dumps({{"error": "Candidate failed: " + repr(e), "points": points}}))
+            return
+
+    print("RESULT:" + json.dumps({{"points": points}}))
+
+
+main()
+'''
+
+
+def _sandbox_limits(
+    memory_bytes: int,
+    cpu_seconds: int,
+    threads: bool = False,
+    file_bytes: int = SANDBOX_MAX_FILE_BYTES,
+) -> Callable[[], None]:
+    """
+    preexec_fn setting hard resource limits on the sandbox process (it can't raise them).
+
+    Args:
+        threads: Lift the process limit for runtimes and compilers that can't
+            start without threads (node, Go); RLIMIT_NPROC counts both
+    """
+    limits = [
+        (resource.RLIMIT_AS, memory_bytes),
+        (resource.RLIMIT_CPU, cpu_seconds),
+        (resource.RLIMIT_NOFILE, SANDBOX_MAX_FILES),
+        (resource.RLIMIT_FSIZE, file_bytes),
+        (resource.RLIMIT_CORE, 0),
+    ]
+    if not threads:
+        limits.append((resource.RLIMIT_NPROC, 0))  # no fork or threads
+
+    def apply() -> None:
+        for limit, value in limits:
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, value))
+
+    return apply
+
+
+async def _sandboxed(
+    argv: list[str],
+    workdir: str,
+    limits: Callable[[], None],
+    env: dict[str, str] | None = None,
+) -> tuple[int, str, str] | None:
+    """
+    Run one command in the sandbox: `workdir` as working directory, an empty
+    environment unless given, `limits` as preexec_fn and its own session, so
+    the whole process group is killed on timeout.
+
+    Returns:
+        (returncode, stdout, stderr), or None when it timed out
+    """
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=workdir,
+        env=env or {},
+        preexec_fn=limits,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=MAX_EXECUTION_TIME)
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        return None
+    return process.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+
+async def _run_script(script: str) -> dict:
+    """
+    Run a verification script in the sandbox and parse its RESULT line.
+
+    The script runs isolated (`-I`: no user site, no PYTHON* variables),
+    with an empty environment, in a temporary working directory and under
+    hard limits on memory, CPU time, processes, open files and file size.
+    Its stderr is only logged: the submitted code controls it.
+    """
+    settings = get_settings()
+    with tempfile.TemporaryDirectory(prefix="codeforge-verify-") as workdir:
+        script_path = os.path.join(workdir, "verify.py")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(script)
+        finished = await _sandboxed(
+            [sys.executable, "-I", "-B", script_path],
+            workdir,
+            _sandbox_limits(
+                settings.playground_sandbox_memory_mb * 1024 * 1024,
+                settings.playground_sandbox_cpu_seconds,
+            ),
+        )
+    if finished is None:
+        return {"error": f"Verification timed out after {MAX_EXECUTION_TIME}s", "points": []}
+    returncode, stdout, stderr = finished
+    for line in stdout.splitlines():
+        if line.startswith("RESULT:"):
+            return json.loads(line[len("RESULT:"):])
+    logger.warning(f"Verification run exited with {returncode} without a result: {stderr[-2000:]}")
+    return {"error": "Verification run failed without a result (crashed or hit a resource limit)", "points": []}
+
+
+def _summarize(points: list[ScalingPoint]) -> tuple[str, float | None]:
+    """Worst equivalence over the points, and the speedup at the largest finished size."""
+    levels = [p.equivalence for p in points if p.equivalence]
+    equivalence = max(levels, key=EQUIVALENCE_ORDER.index) if levels else "error"
+    finished = [p for p in points if p.speedup is not None]
+    return equivalence, finished[-1].speedup if finished else None
+
+
+async def verify_python(
+    baseline_code: str,
+    baseline_func: str,
+    candidate_code: str,
+    candidate_func: str,
+    inputs: list[list[Any]] | None = None,
+    sizes: list[int] | None = None,
+    runs: int | None = None,
+) -> VerificationResult:
+    """
+    Run both versions on the same inputs and compare outputs and timings.
+
+    Args:
+        sizes: Generated input sizes (default `playground_verify_sizes`);
+            functions of numbers alone always use `playground_verify_int_sizes`
+        runs: Timed runs per call (default `playground_verify_runs`)
+    """
+    settings = get_settings()
+    result = VerificationResult(
+        function=baseline_func, candidate_function=candidate_func, equivalence="error", speedup=None
+    )
+    baseline_params = _parameters(baseline_code, baseline_func)
+    candidate_params = _parameters(candidate_code, candidate_func)
+    if baseline_params is None or candidate_params is None:
+        result.error = "Could not parse the functions to compare"
+        return result
+    if len(baseline_params) != len(candidate_params):
+        result.error = (
+            f"Signatures differ: {baseline_func} takes {len(baseline_params)} arguments, "
+            f"{candidate_func} takes {len(candidate_params)}"
+        )
+        return result
+
+    arg_kinds = [argument_kind(arg) for arg in baseline_params]
+    # Functions of a number alone (fib(n), is_prime(n)) get their own small sizes
+    if set(arg_kinds) == {"int"}:
+        sizes = settings.playground_verify_int_sizes
+    else:
+        sizes = sizes or settings.playground_verify_sizes
+    script = create_verification_script(
+        baseline_code, baseline_func, candidate_code, candidate_func,
+        arg_kinds=arg_kinds,
+        sizes=sizes,
+        inputs=inputs,
+        runs=runs or settings.playground_verify_runs,
+        call_timeout=settings.playground_verify_call_timeout_seconds,
+    )
+    data = await _run_script(script)
+
+    for point in data.get("points", []):
+        speedup = None
+        if point["baseline_ms"] is not None and point["candidate_ms"]:
+            speedup = round(point["baseline_ms"] / point["candidate_ms"], 2)
+        result.curve.append(ScalingPoint(
+            size=point["size"],
+            baseline_ms=point["baseline_ms"],
+            candidate_ms=point["candidate_ms"],
+            speedup=speedup,
+            equivalence=point["equivalence"],
+        ))
+    result.equivalence, result.speedup = _summarize(result.curve)
+    result.error = data.get("error")
+    if result.equivalence == "different":
+        result.speedup = None  # a faster wrong answer is not a speedup
+    return result
+
+
+def _timing_language(language: str) -> str | None:
+    language = language.lower()
+    if language in ("javascript", "js", "typescript", "ts"):
+        return "javascript"
+    if language in ("go", "golang"):
+        return "go"
+    if language in ("rust", "rs"):
+        return "rust"
+    return None
+
+
+def screen_source(code: str, language: str) -> str | None:
+    """
+    Reason a program may not be timed in the sandbox, or None.
+
+    Go programs may only import `_GO_IMPORTS` and Rust programs may only use
+    `_RUST_MODULES` of std, without unsafe, extern or compile-time file and
+    environment access. Node programs run under its permission model instead.
+    """
+    if language == "go":
+        for block, single in _GO_IMPORT.findall(code):
+            for package in re.findall(r'"([^"]*)"', block or single):
+                if package not in _GO_IMPORTS:
+                    return f'Import of "{package}" is not allowed in verification runs'
+    elif language == "rust":
+        forbidden = _RUST_FORBIDDEN.search(code)
+        if forbidden:
+            return f"{forbidden.group(0).strip()} is not allowed in verification runs"
+        for module in _RUST_PATH.findall(code):
+            if module not in _RUST_MODULES:
+                return f"std::{module} is not allowed in verification runs"
+    return None
+
+
+async def _time_in_sandbox(
+    code: str,
+    function_name: str,
+    size: int,
+    language: str,
+    runs: int,
+) -> tuple[float | None, str | None]:
+    """
+    Time one program of a timing-only language in the sandbox.
+
+    Compilers get the toolchain variables and a larger file size limit; the
+    program itself runs with an empty environment. Node and Go binaries need
+    threads and reserve address space up front, so they run under
+    `playground_sandbox_runtime_memory_mb` without the process limit; node's
+    permission model denies them file, child process and worker access.
+
+    Returns:
+        (mean milliseconds per call, error)
+    """
+    settings = get_settings()
+    memory = settings.playground_sandbox_memory_mb * 1024 * 1024
+    runtime_memory = settings.playground_sandbox_runtime_memory_mb * 1024 * 1024
+    cpu = settings.playground_sandbox_cpu_seconds
+    toolchain_env = {name: os.environ[name] for name in _TOOLCHAIN_ENV if name in os.environ}
+    compiler_limits = _sandbox_limits(runtime_memory, cpu, threads=True, file_bytes=SANDBOX_MAX_BINARY_BYTES)
+
+    with tempfile.TemporaryDirectory(prefix="codeforge-verify-") as workdir:
+        binary = os.path.join(workdir, "bench")
+        if language == "javascript":
+            node = shutil.which("node")
+            if not node:
+                return None, "Node.js not installed"
+            source = os.path.join(workdir, "bench.js")
+            script = create_javascript_benchmark_script(
+                code, function_name, generate_javascript_test_input(size), runs
+            )
+            compile_argv = None
+            run_argv = [
+                node, "--experimental-permission", f"--allow-fs-read={source}",
+                f"--max-old-space-size={settings.playground_sandbox_memory_mb}", source,
+            ]
+            run_limits = _sandbox_limits(runtime_memory, cpu, threads=True)
+        elif language == "go":
+            go = shutil.which("go")
+            if not go:
+                return None, "Go not installed"
+            source = os.path.join(workdir, "bench.go")
+            script = create_go_benchmark_script(code, function_name, size, runs)
+            compile_argv = [go, "build", "-o", binary, source]
+            toolchain_env.update(CGO_ENABLED="0", GOTOOLCHAIN="local", GOFLAGS="")
+            run_argv = [binary]
+            run_limits = _sandbox_limits(runtime_memory, cpu, threads=True)
+        else:
+            rustc = shutil.which("rustc")
+            if not rustc:
+                return None, "Rust compiler not installed"
+            source = os.path.join(workdir, "bench.rs")
+            script = create_rust_benchmark_script(code, function_name, size, runs)
+            compile_argv = [rustc, "-O", source, "-o", binary]
+            run_argv = [binary]
+            run_limits = _sandbox_limits(memory, cpu)  # single-threaded
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(script)
+
+        if compile_argv:
+            compiled = await _sandboxed(compile_argv, workdir, compiler_limits, env=toolchain_env)
+            if compiled is None or compiled[0] != 0:
+                logger.info(f"Verification build failed: {compiled[2][-2000:] if compiled else 'timed out'}")
+                return None, "Compilation failed"
+        finished = await _sandboxed(run_argv, workdir, run_limits)
+
+    if finished is None:
+        return None, f"Verification timed out after {MAX_EXECUTION_TIME}s"
+    returncode, stdout, stderr = finished
+    lines = stdout.splitlines()
+    if "SUCCESS" in lines:
+        for line in lines:
+            if line.startswith("TIME:"):
+                return float(line[len("TIME:"):]), None
+    logger.info(f"Verification run exited with {returncode} without a timing: {stderr[-2000:]}")
+    return None, "Verification run failed (crashed or hit a resource limit)"
+
+
+async def verify_timing(
+    baseline_code: str,
+    baseline_func: str,
+    candidate_code: str,
+    candidate_func: str,
+    language: str,
+    sizes: list[int] | None = None,
+) -> VerificationResult:
+    """
+    Timing-only comparison for languages without an equivalence check.
+
+    Both programs run in the sandbox at each size until one fails. The
+    outputs are not compared, so the result is "unchecked" and carries the
+    timing curve only, without a speedup.
+    """
+    settings = get_settings()
+    result = VerificationResult(
+        function=baseline_func, candidate_function=candidate_func, equivalence="unchecked", speedup=None
+    )
+    timing_language = _timing_language(language)
+    if timing_language is None:
+        result.equivalence = "error"
+        result.error = f"Unsupported language: {language}"
+        return result
+    problem = screen_source(baseline_code, timing_language) or screen_source(candidate_code, timing_language)
+    if problem:
+        result.equivalence = "error"
+        result.error = problem
+        return result
+
+    for size in sizes or settings.playground_verify_sizes:
+        baseline_ms, result.error = await _time_in_sandbox(
+            baseline_code, baseline_func, size, timing_language, settings.playground_verify_runs
+        )
+        if baseline_ms is None:
+            break
+        candidate_ms, result.error = await _time_in_sandbox(
+            candidate_code, candidate_func, size, timing_language, settings.playground_verify_runs
+        )
+        if candidate_ms is None:
+            break
+        result.curve.append(ScalingPoint(
+            size=size,
+            baseline_ms=round(baseline_ms, 4),
+            candidate_ms=round(candidate_ms, 4),
+            speedup=round(baseline_ms / candidate_ms, 2) if candidate_ms > 0 else None,
+        ))
+    if not result.curve:
+        result.equivalence = "error"
+    return result
+
+
+def _functions(code: str) -> dict[str, str]:
+    """ast.dump of every top-level function, by name."""
+    return {
+        node.name: ast.dump(node)
+        for node in ast.parse(code).body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+
+
+async def verify_rewrite(before: str, after: str, budget: VerificationBudget) -> tuple[bool, str | None]:
+    """
+    Check that a rewrite of Python code returns exactly the same results.
+
+    Every top-level function the rewrite changed is run, before and after, on
+    small generated inputs (including empty ones); each run takes one from
+    the request's budget, and the rewrite is rejected once it is spent.
+
+    Returns:
+        (equivalent, reason when not)
+    """
+    old, new = _functions(before), _functions(after)
+    changed = [name for name in new if old.get(name) != new[name]]
+    if not changed:
+        return False, "No function to run"
+    if any(name not in old for name in changed):
+        return False, "Rewrite added a function"
+    settings = get_settings()
+    for name in changed:
+        if not budget.take():
+            return False, "Verification budget of the request is spent"
+        result = await verify_python(
+            before, name, after, name,
+            sizes=settings.playground_rewrite_check_sizes,
+            runs=1,
+        )
+        if result.equivalence != "exact":
+            return False, result.error or f"{name} returned {result.equivalence} results"
+    return True, None
@@ -150,41 +150,241 @@ def run_benchmark(
         raise self.retry(exc=exc, countdown=30)
 
 
+def _run_async(coro):
+    """Run a coroutine to completion on a fresh event loop (Celery tasks are sync)."""
+    import asyncio
+
+    from app.database import engine
+    from app.services.cache import close_redis
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # Pooled database connections and the Redis client are bound to this
+        # loop; the next task runs on a new one
+        try:
+            loop.run_until_complete(engine.dispose())
+        finally:
+            loop.run_until_complete(close_redis())
+            loop.close()
+
+
 @celery_app.task
-def update_solution_embedding(solution_id: int, code: str, language: str = "python") -> bool:
+def update_solution_embedding(solution_id: str, code: str, language: str = "python") -> bool:
     """
     Update embedding for a solution in the database.
 
     Args:
-        solution_id: ID of solution to update
-        code: Source code
+        solution_id: UUID of solution to update
+        code: Source code (kept for backwards compatibility; the stored row is embedded)
         language: Programming language
 
     Returns:
         True if successful
     """
     try:
-        embedding = generate_embedding(code, language)
-        # In production: update database with new embedding
-        logger.info(f"Updated embedding for solution {solution_id}")
-        return True
+        from uuid import UUID
+        from app.database import async_session
+        from app.services.embedding_spaces import get_write_spaces
+        from app.services.reindex import embed_and_write
+        from app.services.playground_cache import invalidate_playground_solutions
+        from app.services.search_cache import invalidate_solutions
+
+        async def _update() -> bool:
+            async with async_session() as db:
+                embedded = 0
+                for space in await get_write_spaces(db):
+                    count, _ = await embed_and_write(db, [UUID(solution_id)], space, force=True)
+                    embedded += count
+                await db.commit()
+                await invalidate_solutions(db, [UUID(solution_id)])
+                await invalidate_playground_solutions(db, [UUID(solution_id)])
+                return embedded > 0
+
+        updated = _run_async(_update())
+        if updated:
+            logger.info(f"Updated embedding for solution {solution_id}")
+        else:
+            logger.warning(f"Solution {solution_id} not found, embedding not updated")
+        return updated
     except Exception as exc:
         logger.error(f"Failed to update embedding for solution {solution_id}: {exc}")
         return False
 
 
-@celery_app.task
-def reindex_all_solutions() -> dict:
+@celery_app.task(bind=True)
+def reindex_all_solutions(self, space: Optional[str] = None, force: bool = False, resume: bool = True) -> dict:
     """
     Reindex all solutions with fresh embeddings.
 
+    Processes the table in keyset pages until the time budget is used up,
+    then re-enqueues itself to continue from the checkpoint, so a full run
+    over a large table never hits the worker's hard time limit.
+
+    Args:
+        space: Embedding space to (re)build; defaults to the space serving search
+        force: Re-embed rows even if their text is unchanged
+        resume: Continue from the last checkpoint instead of starting over
+
     Returns:
         Stats about reindexing process
     """
-    logger.info("Starting full reindex of all solutions")
-    # Placeholder - would query all solutions and regenerate embeddings
+    from app.config import get_settings
+    from app.services.reindex import reindex_solutions
+
+    settings = get_settings()
+
+    def report(stats) -> None:
+        self.update_state(state="PROGRESS", meta=stats.to_dict())
+
+    logger.info(f"Starting full reindex of all solutions (space={space or 'search'})")
+    stats = _run_async(
+        reindex_solutions(
+            space_name=space,
+            resume=resume,
+            force=force,
+            time_budget_seconds=settings.reindex_time_budget_seconds,
+            progress_callback=report,
+        )
+    )
+
+    if not stats.finished:
+        # Continue from the checkpoint in a fresh task
+        reindex_all_solutions.apply_async(kwargs={"space": space, "force": force, "resume": True})
+    elif stats.errors == 0:
+        # Building HNSW after the bulk load is much faster than maintaining it row by row
+        build_vector_indexes.apply_async(kwargs={"space": space})
+
     return {
-        "status": "completed",
-        "solutions_processed": 0,
-        "errors": 0
+        "status": "completed" if stats.finished else "continuing",
+        "space": space,
+        "solutions_processed": stats.processed,
+        "solutions_embedded": stats.embedded,
+        "solutions_skipped": stats.skipped,
+        "errors": stats.errors,
     }
+
+
+@celery_app.task
+def build_vector_indexes(space: Optional[str] = None) -> dict:
+    """
+    Build the HNSW indexes of an embedding space (no-op if they exist).
+
+    Args:
+        space: Embedding space; defaults to the space serving search
+
+    Returns:
+        Names of the indexes
+    """
+    from app.database import async_session
+    from app.services.embedding_spaces import get_search_space, get_space
+    from app.services.vector_index import ensure_space_indexes
+
+    async def _build():
+        async with async_session() as db:
+            info = await get_space(db, space) if space else await get_search_space(db)
+        if not info:
+            raise ValueError(f"Unknown embedding space '{space}'")
+        return info, await ensure_space_indexes(info)
+
+    info, names = _run_async(_build())
+    logger.info(f"HNSW indexes ready for embedding space '{info.name}': {', '.join(names)}")
+    return {"space": info.name, "indexes": names}
+
+
+@celery_app.task
+def register_embedding_space(name: str, model: str, dim: int) -> dict:
+    """
+    Register a new embedding space and start backfilling it.
+
+    New solution writes are dual-written to the space immediately; the
+    backfill fills in existing solutions in the background.
+    """
+    from app.database import async_session
+    from app.services.embedding_spaces import register_space
+
+    async def _register():
+        async with async_session() as db:
+            space = await register_space(db, name, model, dim)
+            await db.commit()
+            return space
+
+    space = _run_async(_register())
+    reindex_all_solutions.apply_async(kwargs={"space": space.name, "resume": False})
+    logger.info(f"Registered embedding space '{name}' ({model}, {dim}d); backfill queued")
+    return {"name": space.name, "model": space.model, "dim": space.dim, "status": space.status}
+
+
+@celery_app.task
+def activate_embedding_space(name: str, min_coverage: float = 1.0) -> dict:
+    """Switch search to another embedding space in one transaction."""
+    from app.database import async_session
+    from app.services.embedding_spaces import activate_space
+
+    async def _activate():
+        async with async_session() as db:
+            space = await activate_space(db, name, min_coverage=min_coverage)
+            await db.commit()
+            return space
+
+    space = _run_async(_activate())
+    return {"name": space.name, "model": space.model, "is_active": space.is_active}
+
+
+@celery_app.task
+def process_embedding_outbox() -> dict:
+    """
+    Embed all solutions queued in the embedding outbox.
+
+    Enqueued (coalesced) after solution writes and also run periodically by
+    beat as a sweep, so entries written while Redis was down still get embedded.
+
+    Returns:
+        Counts of embedded, skipped and failed entries
+    """
+    from app.services.embedding_outbox import drain_outbox
+
+    return _run_async(drain_outbox())
+
+
+@celery_app.task
+def refresh_suggestion_index() -> dict:
+    """
+    Rebuild the autocomplete index from the database.
+
+    Incremental updates only ever add; the periodic rebuild drops deleted
+    titles, recomputes popularity and ages out old search queries.
+
+    Returns:
+        Counts of indexed entries and prefix keys
+    """
+    from app.database import async_session
+    from app.services.suggestions import rebuild_suggestions
+
+    async def _refresh():
+        async with async_session() as db:
+            return await rebuild_suggestions(db)
+
+    return _run_async(_refresh())
+
+
+@celery_app.task
+def backfill_code_fingerprints(force: bool = False) -> dict:
+    """
+    Fingerprint solutions and problem baselines stored without one.
+
+    Run after migration 009, and with force=True after changing the
+    normalization in app/services/fingerprints.py.
+
+    Returns:
+        Counts of fingerprinted solutions and problems
+    """
+    from app.database import async_session
+    from app.services.fingerprints import backfill_fingerprints
+
+    async def _backfill():
+        async with async_session() as db:
+            return await backfill_fingerprints(db, force=force)
+
+    return _run_async(_backfill())
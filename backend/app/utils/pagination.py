@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque URL-safe token holding the sort name (and the
+filters of listings that have them) plus the sort key and id of the last
+row returned; the next page continues strictly after
+that row, so deep pages cost the same as the first and rows inserted in the
+meantime don't shift pages. Listings order by (key DESC, id DESC) with the
+key made non-null, so a row-value comparison matches the ORDER BY exactly.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# count= modes for list endpoints
+COUNT_MODES = ("exact", "approximate", "none")
+
+
+@dataclass
+class Cursor:
+    """Decoded cursor: the row the next page starts after."""
+    sort: str
+    key: Any
+    id: str
+    position: int = 0  # rows returned before this cursor (for ranked pools)
+
+
+def encode_cursor(
+    sort: str, key: Any, row_id: Any, position: int = 0, filters: dict[str, Any] | None = None
+) -> str:
+    if isinstance(key, datetime):
+        key = {"ts": key.isoformat()}
+    payload = {"s": sort, "k": key, "id": str(row_id), "n": position}
+    if filters:
+        payload["f"] = filters
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, filters: dict[str, Any] | None = None) -> Cursor:
+    """
+    Decode a cursor issued for the same sort order and filters.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or from another sort or filters
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["k"]
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["ts"])
+        decoded = Cursor(sort=payload["s"], key=key, id=payload["id"], position=int(payload.get("n", 0)))
+        issued_filters = payload.get("f") or None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if decoded.sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+    if issued_filters != (filters or None):
+        raise HTTPException(status_code=400, detail="Cursor was issued for different filters")
+    return decoded
+
+
+def resolve_count_mode(count: str | None, cursor: str | None) -> str:
+    """Exact totals on the first page by default; cursor pages skip counting."""
+    if count is None:
+        return "none" if cursor else "exact"
+    return count
+
+
+async def estimate_rows(db: AsyncSession, statement: str | Select, params: dict | None = None) -> int:
+    """Planner's row estimate for a query (raw SQL or a Select), without running it."""
+    if isinstance(statement, str):
+        result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}"), params or {})
+    else:
+        conn = await db.connection()
+        compiled = statement.compile(dialect=conn.dialect)
+        positional = tuple(compiled.params[name] for name in compiled.positiontup or ())
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", positional)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -28,5 +28,23 @@ celery_app.conf.update(
 # Optional: Configure task routes
 celery_app.conf.task_routes = {
     "app.tasks.generate_embedding": {"queue": "embeddings"},
+    "app.tasks.update_solution_embedding": {"queue": "embeddings"},
+    "app.tasks.reindex_all_solutions": {"queue": "embeddings"},
+    "app.tasks.build_vector_indexes": {"queue": "embeddings"},
+    "app.tasks.process_embedding_outbox": {"queue": "embeddings"},
     "app.tasks.run_benchmark": {"queue": "benchmarks"},
 }
+
+# Periodic tasks (the worker runs with an embedded beat, see docker-compose.yml)
+celery_app.conf.beat_schedule = {
+    # Picks up outbox entries whose enqueue was lost (e.g. Redis was down on write)
+    "sweep-embedding-outbox": {
+        "task": "app.tasks.process_embedding_outbox",
+        "schedule": settings.embedding_outbox_sweep_seconds,
+    },
+    # Drops deleted titles and ages out old queries; incremental updates only ever add
+    "refresh-suggestion-index": {
+        "task": "app.tasks.refresh_suggestion_index",
+        "schedule": settings.suggestion_refresh_seconds,
+    },
+}
@@ -12,7 +12,10 @@ sys.path.insert(0, '/app')
 
 from sqlalchemy import text
 from app.database import async_session
-from app.services.embeddings import get_embedding
+from app.services.embeddings import get_embedding, build_embedding_text, compute_code_hash
+from app.services.embedding_spaces import ensure_config_space
+from app.services.fingerprints import fingerprint_columns
+from app.services.reindex import EmbeddingUpdate, write_embeddings
 
 
 # Demo solutions - no author (community contributions)
@@ -145,6 +148,9 @@ def quicksort(arr):
 async def seed_database():
     """Seed the database with demo solutions (no authors - community contributions)."""
     async with async_session() as db:
+        # Embeddings go into the embedding space configured in settings
+        space = await ensure_config_space(db)
+
         # Add solutions without authors (community contributions)
         for sol in SEED_SOLUTIONS:
             # Get problem ID
@@ -173,18 +179,21 @@ async def seed_database():
 
             # Generate embedding
             print(f"Generating embedding for: {sol['title']}")
-            embedding_text = f"{sol['title']} {sol['description']} {sol['code']}"
-            embedding = await get_embedding(embedding_text)
+            embedding_text = build_embedding_text(sol["title"], sol["description"], sol["code"])
+            embedding = await get_embedding(embedding_text, model_name=space.model)
 
             # Insert solution without author (NULL author_id = community contribution)
-            await db.execute(
+            result = await db.execute(
                 text("""
                     INSERT INTO solutions
                     (problem_id, author_id, title, description, code, language,
-                     complexity_time, complexity_space, tags, embedding, speedup, vote_count)
+                     complexity_time, complexity_space, tags, speedup, vote_count,
+                     structure_hash, minhash, lsh_buckets)
                     VALUES
                     (:problem_id, NULL, :title, :description, :code, :language,
-                     :complexity_time, :complexity_space, :tags, :embedding, :speedup, 0)
+                     :complexity_time, :complexity_space, :tags, :speedup, 0,
+                     :structure_hash, :minhash, :lsh_buckets)
+                    RETURNING id
                 """),
                 {
                     "problem_id": problem_id,
@@ -195,17 +204,26 @@ async def seed_database():
                     "complexity_time": sol["complexity_time"],
                     "complexity_space": sol["complexity_space"],
                     "tags": sol["tags"],
-                    "embedding": str(embedding),
                     "speedup": sol["speedup"],
+                    **fingerprint_columns(sol["code"], sol["language"]),
                 }
             )
+            solution_id = result.scalar()
+            await write_embeddings(
+                db,
+                [EmbeddingUpdate(solution_id, embedding, compute_code_hash(embedding_text))],
+                space.name,
+            )
             print(f"Added: {sol['title']} (community contribution)")
 
         await db.commit()
         print("\nSeeding complete!")
 
         # Show count
-        result = await db.execute(text("SELECT COUNT(*) FROM solutions WHERE embedding IS NOT NULL"))
+        result = await db.execute(
+            text("SELECT COUNT(*) FROM solution_embeddings WHERE space = :space"),
+            {"space": space.name},
+        )
         count = result.scalar()
         print(f"Total solutions with embeddings: {count}")
 
@@ -12,7 +12,9 @@ sys.path.insert(0, '/app')
 
 from sqlalchemy import text
 from app.database import async_session
-from app.services.embeddings import get_embedding
+from app.services.embeddings import get_embedding, build_embedding_text, compute_code_hash
+from app.services.embedding_spaces import ensure_config_space
+from app.services.reindex import EmbeddingUpdate, write_embeddings
 
 
 # Demo solutions - no author (community contributions)
@@ -188,6 +190,9 @@ def find_duplicates(arr):
 async def seed_more():
     """Add more duplicate detection solutions (no authors - community contributions)."""
     async with async_session() as db:
+        # Embeddings go into the embedding space configured in settings
+        space = await ensure_config_space(db)
+
         # Get problem
         result = await db.execute(
             text("SELECT id FROM problems WHERE title = 'Find Duplicate Elements'")
@@ -212,18 +217,19 @@ async def seed_more():
 
             # Generate embedding
             print(f"Generating embedding for: {sol['title']}")
-            embedding_text = f"{sol['title']} {sol['description']} {sol['code']}"
-            embedding = await get_embedding(embedding_text)
+            embedding_text = build_embedding_text(sol["title"], sol["description"], sol["code"])
+            embedding = await get_embedding(embedding_text, model_name=space.model)
 
             # Insert without author (community contribution)
-            await db.execute(
+            result = await db.execute(
                 text("""
                     INSERT INTO solutions
                     (problem_id, author_id, title, description, code, language,
-                     complexity_time, complexity_space, tags, embedding, speedup, vote_count)
+                     complexity_time, complexity_space, tags, speedup, vote_count)
                     VALUES
                     (:problem_id, NULL, :title, :description, :code, :language,
-                     :complexity_time, :complexity_space, :tags, :embedding, :speedup, 0)
+                     :complexity_time, :complexity_space, :tags, :speedup, 0)
+                    RETURNING id
                 """),
                 {
                     "problem_id": problem_id,
@@ -234,10 +240,15 @@ async def seed_more():
                     "complexity_time": sol["complexity_time"],
                     "complexity_space": sol["complexity_space"],
                     "tags": sol["tags"],
-                    "embedding": str(embedding),
                     "speedup": sol["speedup"],
                 }
             )
+            solution_id = result.scalar()
+            await write_embeddings(
+                db,
+                [EmbeddingUpdate(solution_id, embedding, compute_code_hash(embedding_text))],
+                space.name,
+            )
             print(f"✓ Added: {sol['title']} ({sol['speedup']}x)")
             added += 1
 
@@ -1,8 +1,10 @@
 """
 Pytest configuration and fixtures for CodeForge backend tests.
 """
+import fnmatch
 import pytest
 import asyncio
+import sys
 from uuid import uuid4
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -10,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from app.main import app
 from app.database import Base, get_db
 from app.config import get_settings
+from app.services import cache
 
 settings = get_settings()
 
@@ -36,6 +39,125 @@ async def client():
         yield client
 
 
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client (strings and sorted sets only)."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys, *args):
+        keys = [keys, *args] if isinstance(keys, str) else list(keys) + list(args)
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        self.ttls.pop(key, None)
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    async def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.data.pop(key, None) is not None
+            self.ttls.pop(key, None)
+        return removed
+
+    unlink = delete
+
+    async def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+    async def ttl(self, key):
+        if key not in self.data:
+            return -2
+        return self.ttls.get(key, -1)
+
+    async def zadd(self, key, mapping):
+        members = self.data.setdefault(key, {})
+        added = sum(member not in members for member in mapping)
+        members.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    async def zincrby(self, key, amount, member):
+        members = self.data.setdefault(key, {})
+        members[member] = members.get(member, 0.0) + amount
+        return members[member]
+
+    def _ranked(self, key):
+        return sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    async def zremrangebyrank(self, key, start, stop):
+        ranked = self._ranked(key)
+        stop = len(ranked) + stop if stop < 0 else stop
+        doomed = ranked[start:stop + 1]
+        for member, _ in doomed:
+            del self.data[key][member]
+        return len(doomed)
+
+    async def zrevrangebyscore(self, key, max, min, start=0, num=None):
+        low = float("-inf") if min == "-inf" else float(min)
+        high = float("inf") if max == "+inf" else float(max)
+        members = [m for m, score in reversed(self._ranked(key)) if low <= score <= high]
+        return members[start:start + num if num is not None else None]
+
+    async def scan_iter(self, match="*", count=None):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Route every module's get_redis() to a fresh FakeRedis."""
+    fake = FakeRedis()
+    real = cache.get_redis
+    for module in list(sys.modules.values()):
+        if getattr(module, "get_redis", None) is real:
+            monkeypatch.setattr(module, "get_redis", lambda: fake)
+    return fake
+
+
 # Sample data generators for tests
 def generate_sample_problem_data():
     """Generate sample problem data for testing."""
@@ -0,0 +1,125 @@
+"""
+Tests for the in-process vector index.
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.ann_index import AnnIndex
+from app.services.embedding_spaces import EmbeddingSpaceInfo
+
+SPACE = EmbeddingSpaceInfo(name="test", model="test-model", dim=4)
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def index():
+    vectors = [unit(1, 0, 0, 0), unit(1, 1, 0, 0), unit(0, 1, 0, 0), unit(0, 0, 1, 0)]
+    return AnnIndex(
+        SPACE,
+        ["a", "b", "c", "d"],
+        np.stack(vectors).astype(np.float16),
+        languages=["python", "python", "go", "python"],
+        categories=["sorting", "graphs", "sorting", "sorting"],
+    )
+
+
+def test_search_orders_by_similarity(index):
+    results = index.search(unit(1, 0.1, 0, 0), k=3)
+    assert [solution_id for solution_id, _ in results] == ["a", "b", "c"]
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == pytest.approx(0.995, abs=1e-2)
+
+
+def test_search_k_larger_than_index(index):
+    assert len(index.search(unit(1, 0, 0, 0), k=10)) == 4
+    assert index.search(unit(1, 0, 0, 0), k=0) == []
+
+
+def test_search_filters(index):
+    query = unit(1, 0, 0, 0)
+    assert [i for i, _ in index.search(query, k=4, language="go")] == ["c"]
+    assert [i for i, _ in index.search(query, k=4, language="Python", category="sorting")] == ["a", "d"]
+    assert index.search(query, k=4, language="rust") == []
+
+
+def test_search_rejects_wrong_dimension(index):
+    with pytest.raises(ValueError):
+        index.search([1.0, 0.0], k=1)
+
+
+def test_upsert_replaces_loaded_row(index):
+    index.upsert("c", unit(1, 0, 0, 0), "go", "sorting")
+    results = index.search(unit(1, 0, 0, 0), k=4)
+    assert [i for i, _ in results].count("c") == 1
+    assert results[0][1] == pytest.approx(results[1][1], abs=1e-3)
+    assert {results[0][0], results[1][0]} == {"a", "c"}
+    assert len(index) == 4
+
+
+def test_upsert_adds_new_row_with_attributes(index):
+    index.upsert("e", unit(0, 0, 0, 1), "rust", "graphs")
+    assert len(index) == 5
+    assert index.search(unit(0, 0, 0, 1), k=1)[0][0] == "e"
+    assert [i for i, _ in index.search(unit(0, 0, 0, 1), k=5, language="rust")] == ["e"]
+    # Upserting again updates the overflow row in place of adding another
+    index.upsert("e", unit(0, 0, 1, 1), "rust", "sorting")
+    assert len(index) == 5
+    assert [i for i, _ in index.search(unit(0, 0, 0, 1), k=5, category="graphs")] == ["b"]
+
+
+def test_remove(index):
+    index.upsert("e", unit(0, 0, 0, 1))
+    index.remove("a")
+    index.remove("e")
+    index.remove("missing")
+    assert len(index) == 3
+    ids = [i for i, _ in index.search(unit(1, 0, 0, 1), k=5)]
+    assert "a" not in ids and "e" not in ids
+    # A removed solution comes back when it is embedded again
+    index.upsert("a", unit(1, 0, 0, 0))
+    assert index.search(unit(1, 0, 0, 0), k=1)[0][0] == "a"
+
+
+def test_apply_batch_with_repeated_id(index):
+    index.apply(
+        upserts=[("e", unit(0, 0, 0, 1), "", ""), ("e", unit(0, 1, 0, 0), "", "")],
+        removes=["d"],
+    )
+    assert len(index) == 4
+    assert [i for i, _ in index.search(unit(0, 0, 0, 1), k=4)].count("e") == 1
+    assert index.search(unit(0, 1, 0, 0), k=1)[0][0] in {"c", "e"}
+
+
+def test_search_is_consistent_during_writes(index):
+    """Searches in other threads never see a half-applied change."""
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                results = index.search(unit(1, 1, 1, 1), k=100)
+                ids = [i for i, _ in results]
+                assert len(ids) == len(set(ids))
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=search) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for i in range(300):
+        index.upsert(f"n{i % 50}", unit(1, i % 7, 0, 1), "python", "sorting")
+        if i % 3 == 0:
+            index.remove(f"n{(i + 1) % 50}")
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors
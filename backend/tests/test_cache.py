@@ -0,0 +1,85 @@
+"""
+Tests for the shared Redis client.
+"""
+import asyncio
+import threading
+
+import pytest
+import redis.asyncio
+
+from app.services import cache
+from app.tasks import _run_async
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = threading.Event()
+        self.closed_on = None
+
+    async def aclose(self):
+        self.closed_on = asyncio.get_running_loop()
+        self.closed.set()
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Clients created by get_redis(), starting from no shared client."""
+    created = []
+
+    def from_url(url, **kwargs):
+        created.append(FakeClient())
+        return created[-1]
+    monkeypatch.setattr(redis.asyncio.Redis, "from_url", from_url)
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_redis_loop", None)
+    return created
+
+
+@pytest.mark.anyio
+async def test_client_is_shared_within_a_loop(clients):
+    assert cache.get_redis() is cache.get_redis()
+    assert len(clients) == 1
+
+
+@pytest.mark.anyio
+async def test_close_redis(clients):
+    client = cache.get_redis()
+    await cache.close_redis()
+    assert client.closed.is_set()
+    assert client.closed_on is asyncio.get_running_loop()
+    assert cache.get_redis() is not client
+    # Nothing to close is fine
+    await cache.close_redis()
+    await cache.close_redis()
+
+
+def test_task_loop_closes_its_client(clients):
+    """Each Celery task loop closes the client it created before the loop ends."""
+    async def use_redis():
+        return cache.get_redis()
+
+    first = _run_async(use_redis())
+    second = _run_async(use_redis())
+    assert first is not second
+    assert first.closed.is_set() and second.closed.is_set()
+    assert cache._redis is None
+
+
+def test_client_of_a_running_loop_is_closed_on_that_loop(clients):
+    """A client replaced from another thread's loop is closed on its own loop."""
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def use_redis():
+            return cache.get_redis()
+        old = asyncio.run_coroutine_threadsafe(use_redis(), other).result(timeout=5)
+
+        new = asyncio.run(use_redis())
+        assert new is not old
+        assert old.closed.wait(timeout=5)
+        assert old.closed_on is other
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(timeout=5)
+        other.close()
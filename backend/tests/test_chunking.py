@@ -0,0 +1,87 @@
+"""
+Tests for splitting long solutions into embedding chunks.
+"""
+from app.services.chunking import _window_lines, chunk_code, count_tokens
+
+
+def function(name: str, statements: int) -> str:
+    body = "\n".join(f"    total = total + {name}_{i} * 2" for i in range(statements))
+    return f"def {name}(values):\n    total = 0\n{body}\n    return total\n"
+
+
+def test_short_code_is_not_chunked():
+    assert chunk_code("def f(x):\n    return x\n", max_tokens=50) == []
+
+
+def test_python_chunks_follow_functions():
+    code = function("first", 5) + "\n" + function("second", 5)
+    per_function = count_tokens(function("first", 5))
+    chunks = chunk_code(code, max_tokens=per_function + 5, overlap_tokens=0)
+
+    assert [c.index for c in chunks] == [0, 1]
+    assert chunks[0].text.startswith("def first") and chunks[1].text.startswith("def second")
+    assert chunks[0].end_line < chunks[1].start_line
+    lines = code.splitlines()
+    for chunk in chunks:
+        assert chunk.text == "\n".join(lines[chunk.start_line - 1:chunk.end_line]).strip()
+
+
+def test_small_functions_are_packed_together():
+    code = "\n".join(function(f"f{i}", 1) for i in range(4)) + "\n" + function("big", 30)
+    small = count_tokens(function("f0", 1))
+    chunks = chunk_code(code, max_tokens=small * 4 + 10, overlap_tokens=0)
+
+    assert "def f0" in chunks[0].text and "def f3" in chunks[0].text
+    assert all(count_tokens(c.text) <= small * 4 + 10 for c in chunks)
+    assert any("def big" in c.text for c in chunks[1:])
+
+
+def test_methods_of_a_class_are_split():
+    code = "class Sorter:\n" + "".join(
+        "\n".join("    " + line for line in function(f"m{i}", 8).splitlines()) + "\n" for i in range(3)
+    )
+    chunks = chunk_code(code, max_tokens=count_tokens(function("m0", 8)) + 10, overlap_tokens=0)
+    assert [c.text.split("(")[0] for c in chunks] == ["def m0", "def m1", "def m2"]
+
+
+def test_unparsable_code_uses_line_windows():
+    code = "\n".join(f"x{i} = compute(x{i - 1}, {i}) +" for i in range(60))
+    chunks = chunk_code(code, max_tokens=80, overlap_tokens=20)
+    assert len(chunks) > 1
+    assert chunks[0].start_line == 1 and chunks[-1].end_line == 60
+    assert all(count_tokens(c.text) <= 80 for c in chunks)
+
+
+def test_other_languages_use_line_windows():
+    code = "\n".join(f"let x{i} = compute(x{i - 1}, {i});" for i in range(60))
+    chunks = chunk_code(code, language="rust", max_tokens=80, overlap_tokens=0)
+    # Without overlap the windows tile the code exactly
+    assert chunks[0].start_line == 1 and chunks[-1].end_line == 60
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line + 1
+
+
+def test_window_lines_overlap():
+    lines = ["a b c d e"] * 10  # 5 tokens per line
+    windows = _window_lines(lines, first_line=1, max_tokens=20, overlap_tokens=10)
+    assert windows[0] == (1, 4)
+    # Consecutive windows share two lines (10 tokens) of context
+    for previous, window in zip(windows, windows[1:]):
+        assert window[0] == previous[1] - 1
+    assert windows[-1][1] == 10
+
+
+def test_window_lines_offset_and_progress():
+    lines = ["a b c d e"] * 6
+    windows = _window_lines(lines, first_line=11, max_tokens=10, overlap_tokens=100)
+    assert windows[0] == (11, 12)
+    # An overlap larger than the window still moves forward by at least one line
+    starts = [start for start, _ in windows]
+    assert starts == sorted(set(starts))
+    assert windows[-1][1] == 16
+
+
+def test_window_lines_oversized_line():
+    """A single line over budget becomes its own window instead of looping."""
+    lines = ["short", " ".join(["tok"] * 50), "short"]
+    assert _window_lines(lines, first_line=1, max_tokens=10, overlap_tokens=0) == [(1, 1), (2, 2), (3, 3)]
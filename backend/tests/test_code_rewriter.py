@@ -0,0 +1,82 @@
+"""
+Tests for the Python source rewrites.
+"""
+import pytest
+
+from app.services.code_rewriter import (
+    CounterRewrite,
+    ListToSetRewrite,
+    MemoizeRewrite,
+    rewrite_python,
+)
+
+FIB = "def fib(n):\n    if n <= 1:\n        return n\n    return fib(n - 1) + fib(n - 2)\n"
+BEST = (
+    "def best(arr{ann}, i):\n"
+    "    if i >= len(arr):\n"
+    "        return 0\n"
+    "    return max(best(arr, i + 1), arr[i] + best(arr, i + 2))\n"
+)
+INTERSECT = (
+    "def intersect(a, b{ann}):\n"
+    "    result = []\n"
+    "    for x in a:\n"
+    "        if x in b:\n"
+    "            result.append(x)\n"
+    "    return result\n"
+)
+
+
+def applied(code: str, rewrite, proven_only: bool = True) -> bool:
+    return bool(rewrite_python(code, [rewrite], proven_only=proven_only).applied)
+
+
+def test_memoize_numeric_arguments():
+    assert applied(FIB, MemoizeRewrite)
+    namespace = {}
+    exec(rewrite_python(FIB, [MemoizeRewrite]).code, namespace)
+    assert namespace["fib"](30) == 832040
+
+
+@pytest.mark.parametrize("ann, proven", [
+    ("", False),  # a list argument: lru_cache would raise TypeError
+    (": list[int]", False),
+    (": tuple[int, ...]", True),
+    (": str", True),
+])
+def test_memoize_needs_hashable_arguments(ann, proven):
+    code = BEST.format(ann=ann)
+    assert applied(code, MemoizeRewrite) == proven
+    # Unproven changes are only made for verification
+    assert applied(code, MemoizeRewrite, proven_only=False)
+
+
+def test_memoize_needs_a_number_use():
+    """Comparisons alone don't show a number: lists compare too."""
+    code = "def f(a, b):\n    if a < b:\n        return 0\n    return f(a, b) + f(b, a)\n"
+    assert not applied(code, MemoizeRewrite)
+    code = "def f(a, b):\n    if a == b:\n        return 0\n    return f(a - 1, b) + f(a, b - 1)\n"
+    assert applied(code, MemoizeRewrite)
+
+
+@pytest.mark.parametrize("ann, proven", [
+    ("", False),  # items may be lists
+    (": list[list[int]]", False),
+    (": list[int]", True),
+    (": Sequence[tuple[int, str]]", True),
+])
+def test_list_to_set_needs_hashable_items(ann, proven):
+    assert applied(INTERSECT.format(ann=ann), ListToSetRewrite) == proven
+
+
+def test_list_to_set_literals():
+    code = "def f(a):\n    allowed = {value}\n    return [x for x in a if x in allowed]\n"
+    assert applied(code.format(value="[1, 2, 3]"), ListToSetRewrite)
+    assert applied(code.format(value="'a b'.split()"), ListToSetRewrite)
+    assert not applied(code.format(value="[[1], [2]]"), ListToSetRewrite)
+
+
+def test_counter_of_strings():
+    code = "def dups({param}):\n    return [c for c in {name} if {name}.count(c) > 1]\n"
+    assert applied(code.format(param="word: str", name="word"), CounterRewrite)
+    assert not applied(code.format(param="rows", name="rows"), CounterRewrite)
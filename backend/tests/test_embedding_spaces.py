@@ -0,0 +1,38 @@
+"""
+Tests for embedding space lifecycle.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.embedding_spaces import retire_space
+
+
+class FakeDB:
+    """Knows one space; records every statement."""
+
+    def __init__(self, is_active=False):
+        self.space = SimpleNamespace(name="old", model="old-model", dim=3, status="ready", is_active=is_active)
+        self.statements: list[str] = []
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        row = self.space if sql.startswith("SELECT") and params["name"] == self.space.name else None
+        return SimpleNamespace(fetchone=lambda: row)
+
+
+@pytest.mark.anyio
+async def test_retire_space_drops_all_its_vectors():
+    db = FakeDB()
+    await retire_space(db, "old")
+    deleted = [sql.split()[2] for sql in db.statements if sql.startswith("DELETE")]
+    assert deleted == ["solution_embeddings", "solution_embedding_chunks"]
+
+
+@pytest.mark.anyio
+async def test_retire_active_space_is_refused():
+    db = FakeDB(is_active=True)
+    with pytest.raises(ValueError, match="active"):
+        await retire_space(db, "old")
+    assert not [sql for sql in db.statements if sql.startswith("DELETE")]
@@ -0,0 +1,112 @@
+"""
+Tests for structural code fingerprints.
+"""
+import numpy as np
+
+from app.services.fingerprints import (
+    LSH_BANDS,
+    NUM_PERM,
+    estimated_similarity,
+    fingerprint_code,
+    fingerprint_columns,
+    normalize_structure,
+)
+
+BUBBLE_SORT = '''
+def bubble_sort(arr):
+    """Bubble sort - O(n^2)"""
+    n = len(arr)
+    for i in range(n):
+        for j in range(0, n - i - 1):
+            if arr[j] > arr[j + 1]:
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+    return arr
+'''
+
+BUBBLE_SORT_RENAMED = '''
+def sort_values(values: list[int]) -> list[int]:
+    # same algorithm, different names, comments and literals
+    size = len(values)
+    for a in range(size):
+        for b in range(1, size - a - 2):
+            if values[b] > values[b + 1]:
+                values[b], values[b + 1] = values[b + 1], values[b]
+    return values
+'''
+
+SHORTEST_PATH = '''
+import heapq
+
+def dijkstra(graph, source):
+    dist = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist.get(node, float("inf")):
+            continue
+        for neighbor, weight in graph.get(node, []):
+            candidate = d + weight
+            if candidate < dist.get(neighbor, float("inf")):
+                dist[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return dist
+'''
+
+
+def test_renamed_python_has_same_structure_hash():
+    original = fingerprint_code(BUBBLE_SORT, "python")
+    renamed = fingerprint_code(BUBBLE_SORT_RENAMED, "python")
+    assert original.structure_hash == renamed.structure_hash
+    assert set(original.lsh_buckets) & set(renamed.lsh_buckets)
+    assert estimated_similarity(original, renamed.minhash[None, :])[0] == 1.0
+
+
+def test_renamed_tokens_share_lsh_buckets():
+    """Languages without an AST here are alpha-renamed on tokens."""
+    go = "func sumAll(xs []int) int {\n    total := 0\n    for _, x := range xs {\n        total += x\n    }\n    return total\n}"
+    renamed = "func add(vals []int) int {\n    acc := 0 // running sum\n    for _, v := range vals {\n        acc += v\n    }\n    return acc\n}"
+    original = fingerprint_code(go, "go")
+    other = fingerprint_code(renamed, "go")
+    assert original.structure_hash == other.structure_hash
+    assert set(original.lsh_buckets) & set(other.lsh_buckets)
+
+
+def test_unrelated_code_has_low_similarity():
+    sort = fingerprint_code(BUBBLE_SORT, "python")
+    path = fingerprint_code(SHORTEST_PATH, "python")
+    assert sort.structure_hash != path.structure_hash
+    assert estimated_similarity(sort, path.minhash[None, :])[0] < 0.2
+
+
+def test_estimated_similarity_per_row():
+    sort = fingerprint_code(BUBBLE_SORT, "python")
+    path = fingerprint_code(SHORTEST_PATH, "python")
+    signatures = np.stack([path.minhash, sort.minhash])
+    similarities = estimated_similarity(sort, signatures)
+    assert similarities.shape == (2,)
+    assert similarities[1] == 1.0 and similarities[0] < similarities[1]
+    assert estimated_similarity(sort, np.empty((0, NUM_PERM))).shape == (0,)
+
+
+def test_fingerprint_shape():
+    fingerprint = fingerprint_code(BUBBLE_SORT, "python")
+    assert fingerprint.minhash.shape == (NUM_PERM,)
+    assert (fingerprint.minhash < 2 ** 31).all()
+    assert len(fingerprint.lsh_buckets) == LSH_BANDS
+    assert all(-(2 ** 63) <= bucket < 2 ** 63 for bucket in fingerprint.lsh_buckets)
+
+
+def test_unparsable_python_falls_back_to_tokens():
+    code = "def broken(arr:\n    return arr[0"
+    assert normalize_structure(code, "python") == normalize_structure(code.replace("arr", "xs"), "python")
+    assert fingerprint_code(code, "python") is not None
+
+
+def test_empty_code_has_no_fingerprint():
+    assert fingerprint_code("", "python") is None
+    assert fingerprint_code("   \n# only a comment\n", "python") is None
+    assert fingerprint_columns("", "python", prefix="baseline_") == {
+        "baseline_structure_hash": None,
+        "baseline_minhash": None,
+        "baseline_lsh_buckets": None,
+    }
@@ -98,3 +98,304 @@ async def test_analyze_optimal_code(client: AsyncClient):
     assert response.status_code == 200
     data = response.json()
     assert "suggestions" in data
+
+
+@pytest.mark.anyio
+async def test_analyze_findings_have_positions(client: AsyncClient):
+    """Test that Python findings point at the offending line."""
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """def common(a, b):
+    seen = []
+    for x in a:
+        if x not in seen:
+            seen.append(x)
+    return seen
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    findings = response.json()["findings"]
+    membership = [f for f in findings if f["rule"] == "list-membership-in-loop"]
+    assert membership and membership[0]["line"] == 4
+    assert membership[0]["impact"] == "high"
+
+
+@pytest.mark.anyio
+async def test_analyze_exponential_recursion(client: AsyncClient):
+    """Test that naive recursion is reported as exponential."""
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert any(f["rule"] == "unmemoized-recursion" for f in data["findings"])
+
+
+@pytest.mark.anyio
+async def test_analyze_verify_measures_speedup(client: AsyncClient):
+    """Verify mode runs both versions and reports a measured speedup."""
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """def find_duplicates(arr):
+    duplicates = []
+    for i in range(len(arr)):
+        for j in range(i + 1, len(arr)):
+            if arr[i] == arr[j]:
+                duplicates.append(arr[i])
+    return duplicates
+""",
+        "language": "python",
+        "verify": True,
+        "inputs": [[[1, 2, 3, 2, 1]], [[5, 5, 5]]],
+    })
+    assert response.status_code == 200
+    verification = response.json()["verification"]
+    assert verification["function"] == "find_duplicates"
+    assert [point["size"] for point in verification["curve"]] == [5, 3]
+    assert verification["equivalence"] in ("exact", "unordered", "different", "error")
+    if verification["equivalent"]:
+        assert response.json()["speedup_measured"] is True
+
+
+@pytest.mark.anyio
+async def test_analyze_rewrites_to_runnable_code(client: AsyncClient):
+    """Python rewrites replace the anti-pattern and keep the code runnable."""
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """def intersect(a, b: list[int]):
+    result = []
+    for x in a:
+        if x in b:
+            result.append(x)
+    return result
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert "set(b)" in data["optimized_code"]
+    assert "# Optimization" not in data["optimized_code"]
+    assert any(s.startswith("Applied:") for s in data["suggestions"])
+
+    namespace = {}
+    exec(data["optimized_code"], namespace)
+    assert namespace["intersect"]([1, 2, 3, 4], [4, 2, 9]) == [2, 4]
+
+
+@pytest.mark.anyio
+async def test_analyze_file_ranks_functions(client: AsyncClient):
+    """Files are split into functions and methods, ranked by impact, with module line numbers."""
+    response = await client.post("/api/v1/playground/analyze-file", json={
+        "code": """import math
+
+
+def norm(values):
+    return math.sqrt(sum(v * v for v in values))
+
+
+def fib(n):
+    if n <= 1:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+class Report:
+    def render(self, rows):
+        for i in range(len(rows)):
+            print(rows[i])
+""",
+        "language": "python",
+        "path": "stats.py",
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["path"] == "stats.py"
+    functions = {function["name"]: function for function in data["functions"]}
+    assert set(functions) == {"norm", "fib", "Report.render"}
+    assert data["functions"][0]["name"] == "fib"
+    assert functions["fib"]["line"] == 8
+    assert functions["norm"]["impact"] is None
+
+    render_finding = next(f for f in data["findings"] if f["function"] == "Report.render")
+    assert render_finding["line"] == 16
+    assert render_finding["col"] == 9
+    assert data["findings"][0]["rule"] == "unmemoized-recursion"
+
+
+@pytest.mark.anyio
+async def test_analyze_files_keeps_request_order(client: AsyncClient):
+    """Multi-file analysis returns files in order and ranks findings across them."""
+    response = await client.post("/api/v1/playground/analyze-files", json={
+        "files": [
+            {"code": "def first(a):\n    return a[0]\n", "language": "python", "path": "a.py"},
+            {"code": "def pairs(a):\n    out = []\n    for x in a:\n        for y in a:\n            out.append((x, y))\n    return out\n",
+             "language": "python", "path": "b.py"},
+        ],
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert [file["path"] for file in data["files"]] == ["a.py", "b.py"]
+    assert data["findings"][0]["path"] == "b.py"
+
+
+@pytest.mark.anyio
+async def test_analyze_profile_targets_hot_functions(client: AsyncClient):
+    """Collapsed stacks are mapped to source functions and only the hottest are analyzed."""
+    code = """def fib(n):
+    if n <= 1:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+def load(path):
+    with open(path) as f:
+        return f.read()
+
+
+def unused(a):
+    return a
+"""
+    stacks = "\n".join([
+        "main (/srv/app/lib/calc.py:20);fib (/srv/app/lib/calc.py:4);fib (/srv/app/lib/calc.py:4) 80",
+        "main (/srv/app/lib/calc.py:20);load (/srv/app/lib/calc.py:9) 15",
+        "main (/srv/app/lib/calc.py:20);dumps (/usr/lib/python3.11/json/__init__.py:231) 5",
+    ])
+    response = await client.post("/api/v1/playground/analyze-profile", json={
+        "profile": stacks,
+        "files": [{"code": code, "language": "python", "path": "lib/calc.py"}],
+        "top_n": 1,
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_time"] == 1.0
+    assert [f["function"]["name"] for f in data["functions"]] == ["fib"]
+    hot = data["functions"][0]
+    assert hot["self_percent"] == 80.0
+    assert 0 < hot["estimated_savings"] <= hot["self_time"]
+    assert data["unmatched"][0]["function"] == "dumps"
+
+
+@pytest.mark.anyio
+async def test_analyze_profile_rejects_invalid_pstats(client: AsyncClient):
+    """A pstats profile that isn't a marshalled stats dict is a client error."""
+    response = await client.post("/api/v1/playground/analyze-profile", json={
+        "profile": "bm90IGEgcHJvZmlsZQ==",
+        "format": "pstats",
+        "files": [{"code": "def f():\n    pass\n", "language": "python", "path": "f.py"}],
+    })
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_analyze_go_with_tree_sitter(client: AsyncClient):
+    """Go code is parsed with tree-sitter and gets positioned findings."""
+    pytest.importorskip("tree_sitter_go")
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """package main
+
+func join(items []string) string {
+	s := ""
+	var ids []int
+	for i, item := range items {
+		s += item
+		ids = append(ids, i)
+	}
+	return s
+}
+""",
+        "language": "go"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    rules = {f["rule"]: f for f in data["findings"]}
+    assert rules["string-concat-in-loop"]["line"] == 7
+    assert rules["missing-preallocation"]["impact"] == "low"
+    assert data["complexity"]["time"] == "O(n²)"
+
+
+@pytest.mark.anyio
+async def test_analyze_javascript_callbacks_are_loops(client: AsyncClient):
+    """Per-element callbacks count as loops, so a lookup inside forEach is quadratic."""
+    pytest.importorskip("tree_sitter_javascript")
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """function common(a, b) {
+  const out = [];
+  a.forEach(x => {
+    if (b.includes(x)) out.push(x);
+  });
+  return out;
+}""",
+        "language": "javascript"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["findings"][0]["rule"] == "linear-search-in-loop"
+    assert data["findings"][0]["line"] == 4
+    assert data["complexity"]["time"] == "O(n²)"
+
+
+@pytest.mark.anyio
+async def test_annotate_counts_lines_and_allocations(client: AsyncClient):
+    """Lines get symbolic execution counts and allocations in the deepest loop are hot."""
+    response = await client.post("/api/v1/playground/annotate", json={
+        "code": """def pairs(a, b):
+    out = []
+    for x in a:
+        for y in b:
+            out.append([x, y])
+    return out
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    counts = {line["line"]: line["count"] for line in data["lines"]}
+    assert counts == {1: "1", 2: "1", 3: "n", 4: "n·m", 5: "n·m", 6: "1"}
+    assert max(data["lines"], key=lambda line: line["heat"])["line"] == 4
+    assert data["allocations"][0] == {"line": 5, "col": 24, "kind": "list", "count": "n·m", "hot": True}
+    assert {size["symbol"]: size["expression"] for size in data["sizes"]} == {"n": "a", "m": "b"}
+    assert data["complexity"]["time"] == "O(n²)"
+
+
+@pytest.mark.anyio
+async def test_analyze_does_not_run_code_without_verify(client: AsyncClient, tmp_path):
+    """Without verify, rewrites are returned unverified and the submitted module is never executed."""
+    marker = tmp_path / "ran"
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": f"""open({str(marker)!r}, "w").close()
+
+
+def intersect(a, b: list[int]):
+    result = []
+    for x in a:
+        if x in b:
+            result.append(x)
+    return result
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert "set(b)" in data["optimized_code"]
+    assert any("not verified" in s for s in data["suggestions"])
+    assert not marker.exists()
+
+
+@pytest.mark.anyio
+async def test_analyze_skips_unproven_rewrites_without_verify(client: AsyncClient):
+    """Rewrites needing hashable arguments the code doesn't show are not applied unverified."""
+    response = await client.post("/api/v1/playground/analyze", json={
+        "code": """def best(arr, i):
+    if i >= len(arr):
+        return 0
+    return max(best(arr, i + 1), arr[i] + best(arr, i + 2))
+""",
+        "language": "python"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert "lru_cache" not in data["optimized_code"]
+    assert data["speedup"] == 1.0
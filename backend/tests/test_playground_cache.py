@@ -0,0 +1,175 @@
+"""
+Tests for the playground analysis cache.
+"""
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.config import get_settings
+from app.routers.playground import normalize_code
+from app.services.playground_cache import (
+    analysis_cache_key,
+    bump_playground_versions,
+    invalidate_playground_solutions,
+    lookup_analysis,
+    store_analysis,
+)
+
+CODE = "def total(values):\n    # add them up\n    return sum(values)\n"
+REFORMATTED = "def total(values):\n\n    return sum(values)  # same code, other comment\n"
+RESPONSE = {"original_code": CODE, "suggestions": []}
+
+
+def key_for(code: str, language: str = "python", **options) -> str:
+    return analysis_cache_key(normalize_code(code, language), language, **options)
+
+
+async def lookup(code: str, language: str = "python"):
+    cached, _ = await lookup_analysis(key_for(code, language), code, language)
+    return cached
+
+
+async def analyzed(code: str, language: str = "python", **match) -> None:
+    """Store the response of an analysis that started with a lookup."""
+    _, version = await lookup_analysis(key_for(code, language), code, language)
+    await store_analysis(key_for(code, language), code, language, version, RESPONSE, **match)
+
+
+class FakeDB:
+    """Answers the (problem_id, language) lookup of invalidate_playground_solutions."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    async def execute(self, statement, params=None):
+        self.calls += 1
+        return SimpleNamespace(fetchall=lambda: self.rows)
+
+
+def test_key_ignores_formatting_but_not_options():
+    assert key_for(CODE) == key_for(REFORMATTED)
+    assert key_for(CODE) != key_for(CODE, language="javascript")
+    assert key_for(CODE) != key_for(CODE, verify=True)
+    assert key_for(CODE, verify=True, inputs=[[1]]) != key_for(CODE, verify=True, inputs=[[2]])
+
+
+@pytest.mark.anyio
+async def test_exact_hit_returns_response(fake_redis):
+    problem_id = str(uuid4())
+    await analyzed(CODE, solution_id="s1", problem_id=problem_id)
+
+    cached = await lookup(CODE)
+    assert cached.response == RESPONSE
+    assert cached.solution_id == "s1"
+
+
+@pytest.mark.anyio
+async def test_normalized_hit_reuses_match_only(fake_redis):
+    """Same structure, different text: the match is reused, the response is not."""
+    await analyzed(CODE, solution_id="s1", problem_id=str(uuid4()))
+
+    cached = await lookup(REFORMATTED)
+    assert cached.response is None
+    assert cached.solution_id == "s1"
+
+
+@pytest.mark.anyio
+async def test_miss(fake_redis):
+    assert await lookup(CODE) is None
+
+
+@pytest.mark.anyio
+async def test_bump_problem_invalidates_matched_entries(fake_redis):
+    problem_id, other_problem = uuid4(), uuid4()
+    await analyzed(CODE, solution_id="s1", problem_id=str(problem_id))
+
+    await bump_playground_versions([(other_problem, None)])
+    assert await lookup(CODE) is not None
+
+    await bump_playground_versions([(problem_id, None)])
+    assert await lookup(CODE) is None
+
+
+@pytest.mark.anyio
+async def test_bump_language_invalidates_unmatched_entries(fake_redis):
+    """Entries without a match depend on their language: any new solution could match."""
+    await analyzed(CODE)
+
+    await bump_playground_versions([(None, "go")])
+    assert (await lookup(CODE)).solution_id is None
+
+    await bump_playground_versions([(None, "Python")])
+    assert await lookup(CODE) is None
+
+
+@pytest.mark.anyio
+async def test_entries_stored_after_a_bump_are_fresh(fake_redis):
+    problem_id = str(uuid4())
+    await bump_playground_versions([(problem_id, "python")])
+    await analyzed(CODE, solution_id="s1", problem_id=problem_id)
+    assert (await lookup(CODE)).response == RESPONSE
+
+
+@pytest.mark.anyio
+async def test_write_during_analysis_keeps_the_entry_stale(fake_redis):
+    """A response computed before a write is stamped with the version read before the analysis."""
+    _, version = await lookup_analysis(key_for(CODE), CODE, "python")
+    await bump_playground_versions([(uuid4(), "python")])
+    await store_analysis(key_for(CODE), CODE, "python", version, RESPONSE)
+    assert await lookup(CODE) is None
+
+
+@pytest.mark.anyio
+async def test_matched_entry_is_not_stored_after_a_write_during_analysis(fake_redis):
+    problem_id = str(uuid4())
+    _, version = await lookup_analysis(key_for(CODE), CODE, "python")
+    await bump_playground_versions([(problem_id, "python")])
+    await store_analysis(key_for(CODE), CODE, "python", version, RESPONSE, solution_id="s1", problem_id=problem_id)
+    assert key_for(CODE) not in fake_redis.data
+
+    # Writes of other languages don't matter
+    _, version = await lookup_analysis(key_for(CODE), CODE, "python")
+    await bump_playground_versions([(problem_id, "go")])
+    await store_analysis(key_for(CODE), CODE, "python", version, RESPONSE, solution_id="s1", problem_id=problem_id)
+    assert (await lookup(CODE)).response == RESPONSE
+
+
+@pytest.mark.anyio
+async def test_invalidate_solutions_bumps_their_problems_and_languages(fake_redis):
+    problem_id = uuid4()
+    await analyzed(CODE, solution_id="s1", problem_id=str(problem_id))
+    go_code = "func total(xs []int) int { return 0 }"
+    await analyzed(go_code, "go")
+
+    db = FakeDB([SimpleNamespace(problem_id=problem_id, language="go")])
+    await invalidate_playground_solutions(db, [uuid4()])
+    assert await lookup(CODE) is None
+    assert await lookup(go_code, "go") is None
+
+    # Nothing to invalidate: no query
+    empty = FakeDB([])
+    await invalidate_playground_solutions(empty, [])
+    assert empty.calls == 0
+
+
+@pytest.mark.anyio
+async def test_disabled_cache(fake_redis, monkeypatch):
+    monkeypatch.setattr(get_settings(), "playground_cache_enabled", False)
+    assert await lookup_analysis(key_for(CODE), CODE, "python") == (None, None)
+    await analyzed(CODE)
+    assert fake_redis.data == {}
+    assert await lookup(CODE) is None
+
+
+@pytest.mark.anyio
+async def test_redis_errors_fail_open(fake_redis, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(fake_redis, "get", broken)
+    monkeypatch.setattr(fake_redis, "incr", broken)
+
+    await analyzed(CODE)
+    assert await lookup(CODE) is None
+    await bump_playground_versions([(uuid4(), "python")])
@@ -0,0 +1,185 @@
+"""
+Tests for the bulk embedding reindex.
+"""
+from types import SimpleNamespace
+from uuid import UUID
+
+import pytest
+
+from app.services import reindex
+from app.services.embedding_spaces import EmbeddingSpaceInfo
+from app.services.embeddings import build_embedding_text, compute_code_hash
+from app.services.reindex import embed_solutions, job_name_for_space, reindex_solutions
+
+SPACE = EmbeddingSpaceInfo(name="codebert", model="test-model", dim=2)
+
+
+def solution(n: int, code: str = "def f(x):\n    return x\n", **embedded) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=UUID(int=n), title=f"Solution {n}", description="", code=code, language="python",
+        code_hash=embedded.get("code_hash"), has_embedding=embedded.get("has_embedding", False),
+    )
+
+
+def embedded_hash(row) -> str:
+    return compute_code_hash(build_embedding_text(row.title, row.description, row.code))
+
+
+@pytest.fixture
+def embedded_texts(monkeypatch):
+    """Texts sent to the model; every text embeds to [1, 0]."""
+    texts = []
+
+    async def get_embeddings_batch(batch, model_name=None):
+        texts.extend(batch)
+        return [[1.0, 0.0] for _ in batch]
+    monkeypatch.setattr(reindex, "get_embeddings_batch", get_embeddings_batch)
+    return texts
+
+
+@pytest.mark.anyio
+async def test_embed_solutions_skips_unchanged(embedded_texts):
+    unchanged = solution(1)
+    unchanged.code_hash, unchanged.has_embedding = embedded_hash(unchanged), True
+    edited = solution(2, code_hash="stale", has_embedding=True)
+    new = solution(3)
+
+    updates, skipped = await embed_solutions([unchanged, edited, new], SPACE)
+    assert skipped == 1
+    assert [u.solution_id for u in updates] == [edited.id, new.id]
+    assert updates[0].code_hash == embedded_hash(edited)
+    assert len(embedded_texts) == 2
+
+
+@pytest.mark.anyio
+async def test_embed_solutions_force_reembeds(embedded_texts):
+    unchanged = solution(1)
+    unchanged.code_hash, unchanged.has_embedding = embedded_hash(unchanged), True
+    updates, skipped = await embed_solutions([unchanged], SPACE, force=True)
+    assert skipped == 0
+    assert [u.solution_id for u in updates] == [unchanged.id]
+
+
+@pytest.mark.anyio
+async def test_embed_solutions_nothing_pending(embedded_texts):
+    assert await embed_solutions([], SPACE) == ([], 0)
+    assert embedded_texts == []
+
+
+class FakeReindexDB:
+    """Just enough of an AsyncSession for reindex_solutions: solutions, embeddings and checkpoints."""
+
+    def __init__(self, solutions):
+        self.solutions = sorted(solutions, key=lambda row: row.id)
+        self.embedded: list[UUID] = []
+        self.checkpoints: dict[str, dict] = {}
+        self.committed: dict[str, dict] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        sql, params = str(statement), params or {}
+        if "FROM reindex_checkpoints" in sql:
+            row = self.committed.get(params["job_name"])
+            return SimpleNamespace(fetchone=lambda: SimpleNamespace(**row) if row else None)
+        if "INSERT INTO reindex_checkpoints" in sql:
+            self.checkpoints[params["job_name"]] = {
+                "last_solution_id": UUID(params["last_id"]) if params["last_id"] else None,
+                **{key: params[key] for key in ("processed", "embedded", "skipped", "errors", "status")},
+            }
+            return SimpleNamespace(rowcount=1)
+        if "FROM solutions s" in sql:
+            after = params.get("after_id")
+            rows = [row for row in self.solutions if after is None or row.id > after][:params["limit"]]
+            return SimpleNamespace(fetchall=lambda: rows)
+        if "INSERT INTO solution_embeddings" in sql:
+            ids = [params[key] for key in params if key.startswith("id_")]
+            self.embedded.extend(ids)
+            return SimpleNamespace(rowcount=len(ids))
+        return SimpleNamespace(rowcount=0)
+
+    async def commit(self):
+        self.committed = {name: dict(row) for name, row in self.checkpoints.items()}
+
+    async def rollback(self):
+        self.checkpoints = {name: dict(row) for name, row in self.committed.items()}
+
+
+@pytest.fixture
+def fake_db(monkeypatch, embedded_texts):
+    db = FakeReindexDB([solution(n) for n in range(1, 6)])
+    ready = []
+
+    async def get_space(session, name):
+        return SPACE if name == SPACE.name else None
+
+    async def mark_space_ready(session, name):
+        ready.append(name)
+    monkeypatch.setattr(reindex, "async_session", lambda: db)
+    monkeypatch.setattr(reindex, "get_space", get_space)
+    monkeypatch.setattr(reindex, "mark_space_ready", mark_space_ready)
+    db.ready = ready
+    return db
+
+
+@pytest.mark.anyio
+async def test_reindex_resumes_from_checkpoint(fake_db):
+    # A tiny time budget stops the job after its first page
+    stats = await reindex_solutions(SPACE.name, page_size=2, time_budget_seconds=1e-9)
+    assert not stats.finished
+    assert stats.processed == 2
+    checkpoint = fake_db.committed[job_name_for_space(SPACE.name)]
+    assert checkpoint["status"] == "running"
+    assert checkpoint["last_solution_id"] == UUID(int=2)
+    assert fake_db.ready == []
+
+    stats = await reindex_solutions(SPACE.name, page_size=2)
+    assert stats.finished
+    assert stats.processed == 5 and stats.embedded == 5
+    # Every solution was embedded exactly once across both runs
+    assert sorted(fake_db.embedded) == [UUID(int=n) for n in range(1, 6)]
+    assert fake_db.committed[job_name_for_space(SPACE.name)]["status"] == "completed"
+    assert fake_db.ready == [SPACE.name]
+
+
+@pytest.mark.anyio
+async def test_reindex_without_resume_starts_over(fake_db):
+    await reindex_solutions(SPACE.name, page_size=2, time_budget_seconds=1e-9)
+    stats = await reindex_solutions(SPACE.name, resume=False, page_size=2)
+    assert stats.finished and stats.processed == 5
+    assert fake_db.embedded.count(UUID(int=1)) == 2
+
+
+@pytest.mark.anyio
+async def test_reindex_completed_checkpoint_starts_fresh(fake_db):
+    await reindex_solutions(SPACE.name, page_size=10)
+    stats = await reindex_solutions(SPACE.name, page_size=10)
+    assert stats.processed == 5
+
+
+@pytest.mark.anyio
+async def test_reindex_failed_page_is_counted_and_skipped(fake_db, monkeypatch):
+    calls = []
+
+    async def embed_solutions(rows, space, force=False):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("model unavailable")
+        return [], len(rows)
+    monkeypatch.setattr(reindex, "embed_solutions", embed_solutions)
+
+    stats = await reindex_solutions(SPACE.name, page_size=2)
+    assert stats.finished
+    assert stats.errors == 2 and stats.skipped == 3
+    # Errors leave the space in backfilling for another run
+    assert fake_db.ready == []
+
+
+@pytest.mark.anyio
+async def test_reindex_unknown_space(fake_db):
+    with pytest.raises(ValueError):
+        await reindex_solutions("missing")
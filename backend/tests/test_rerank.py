@@ -0,0 +1,110 @@
+"""
+Tests for search re-ranking and scoring profiles.
+"""
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import PROFILE_FEATURES, Settings, get_settings
+from app.services.rerank import (
+    CandidateFeatures,
+    ScoringProfile,
+    fused_scores,
+    get_scoring_profile,
+    normalized_features,
+    rank,
+)
+
+
+def candidate(n: int, **values) -> SimpleNamespace:
+    columns = (
+        "embedding_sim", "fts_score", "title_score", "speedup", "memory_reduction",
+        "efficiency_score", "readability_score", "vote_count", "created_at",
+    )
+    return SimpleNamespace(id=f"00000000-0000-0000-0000-{n:012d}", **{c: values.get(c) for c in columns})
+
+
+@pytest.fixture
+def features():
+    return CandidateFeatures.from_rows([
+        # Best match of every retriever, unbenchmarked
+        candidate(1, embedding_sim=0.9, fts_score=0.5, title_score=0.8),
+        # Weaker vector match, 1000x faster, 10x less memory
+        candidate(2, embedding_sim=0.5, speedup=1000.0, memory_reduction=10.0, efficiency_score=80.0),
+        # Lexical only, popular and readable
+        candidate(3, fts_score=0.2, vote_count=99, readability_score=90.0),
+    ])
+
+
+def test_normalized_features_range(features):
+    normalized = normalized_features(features)
+    assert set(normalized) == set(PROFILE_FEATURES)
+    for values in normalized.values():
+        assert values.shape == (3,)
+        assert ((values >= 0) & (values <= 1)).all()
+
+
+def test_normalized_features_values(features):
+    normalized = normalized_features(features)
+    # Rank 1 in all three lists fuses to 1.0; absent lists contribute nothing
+    assert normalized["relevance"][0] == pytest.approx(1.0)
+    # Second in one list each
+    assert normalized["relevance"][1] == pytest.approx(normalized["relevance"][2])
+    assert normalized["relevance"][1] < normalized["relevance"][0]
+    assert normalized["speedup"] == pytest.approx([0.0, 1.0, 0.0])
+    assert normalized["memory"] == pytest.approx([0.0, 0.5, 0.0])
+    assert normalized["efficiency"] == pytest.approx([0.0, 0.8, 0.0])
+    assert normalized["readability"] == pytest.approx([0.0, 0.0, 0.9])
+    assert normalized["votes"] == pytest.approx([0.0, 0.0, 1.0])
+
+
+@pytest.mark.parametrize("name", list(get_settings().scoring_profiles))
+def test_fused_scores_per_profile(features, name):
+    profile = get_scoring_profile(name)
+    normalized = normalized_features(features)
+    expected = sum(weight * normalized[feature] for feature, weight in profile.weights.items())
+    assert fused_scores(features, profile) == pytest.approx(expected)
+
+
+def test_profiles_change_the_order(features):
+    def order(name):
+        positions, _, _ = rank(features, "relevance", get_scoring_profile(name))
+        return [int(features.ids[i][-1]) for i in positions]
+
+    assert order("relevance-only") == [1, 2, 3]
+    assert order("speed-first")[0] == 2
+    assert order("community")[-1] == 2
+
+
+def test_ties_break_by_id():
+    features = CandidateFeatures.from_rows([candidate(2), candidate(1), candidate(3)])
+    positions, _, _ = rank(features, "relevance", ScoringProfile("flat", {"relevance": 1.0}))
+    assert list(features.ids[positions]) == sorted(features.ids)
+
+
+def test_unknown_profile_falls_back_to_default():
+    assert get_scoring_profile("no-such-profile").name == get_settings().search_default_profile
+    assert get_scoring_profile(None).name == get_settings().search_default_profile
+
+
+def test_settings_reject_unknown_features():
+    with pytest.raises(ValidationError, match="unknown features"):
+        Settings(scoring_profiles={"balanced": {"relevance": 1.0, "stars": 0.5}})
+
+
+def test_settings_reject_negative_weights():
+    with pytest.raises(ValidationError, match="negative"):
+        Settings(scoring_profiles={"balanced": {"relevance": 1.0, "votes": -0.5}})
+
+
+def test_settings_reject_missing_default_profile():
+    with pytest.raises(ValidationError, match="search_default_profile"):
+        Settings(search_default_profile="fast", scoring_profiles={"balanced": {"relevance": 1.0}})
+
+
+def test_empty_pool():
+    features = CandidateFeatures.from_rows([])
+    assert len(fused_scores(features, get_scoring_profile())) == 0
+    positions, _, _ = rank(features)
+    assert len(positions) == 0
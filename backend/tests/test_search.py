@@ -1,9 +1,13 @@
 """
 Tests for search API endpoints.
 """
+import json
+
 import pytest
 from httpx import AsyncClient
 
+from app.utils.pagination import encode_cursor
+
 
 @pytest.mark.anyio
 async def test_search_basic(client: AsyncClient):
@@ -56,6 +60,21 @@ async def test_search_with_min_speedup(client: AsyncClient):
     assert response.status_code == 200
 
 
+@pytest.mark.anyio
+async def test_search_pages_do_not_overlap(client: AsyncClient):
+    """Test that consecutive relevance pages are cut from one ordering."""
+    pages = []
+    for offset in (0, 5):
+        response = await client.post("/api/v1/search/", json={
+            "query": "sort array",
+            "limit": 5,
+            "offset": offset
+        })
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()["items"]])
+    assert not set(pages[0]) & set(pages[1])
+
+
 @pytest.mark.anyio
 async def test_search_suggestions(client: AsyncClient):
     """Test search suggestions endpoint."""
@@ -88,3 +107,100 @@ async def test_search_by_category_with_language(client: AsyncClient):
         "sort": "speedup"
     })
     assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_search_by_category_cursor_pages(client: AsyncClient):
+    """Test keyset pagination of category listings."""
+    response = await client.get("/api/v1/search/by-category", params={
+        "category": "sorting",
+        "limit": 2
+    })
+    assert response.status_code == 200
+    first = response.json()
+    if not first["next_cursor"]:
+        return
+
+    response = await client.get("/api/v1/search/by-category", params={
+        "category": "sorting",
+        "limit": 2,
+        "cursor": first["next_cursor"]
+    })
+    assert response.status_code == 200
+    second = response.json()
+    assert second["total"] is None
+    first_ids = {item["id"] for item in first["items"]}
+    assert not first_ids & {item["id"] for item in second["items"]}
+
+
+@pytest.mark.anyio
+async def test_search_by_category_invalid_cursor(client: AsyncClient):
+    """Test that a malformed cursor is rejected."""
+    response = await client.get("/api/v1/search/by-category", params={
+        "category": "sorting",
+        "cursor": "not-a-cursor"
+    })
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_search_by_category_cursor_of_other_filters(client: AsyncClient):
+    """A cursor only continues the category and language it was issued for."""
+    row_id = "00000000-0000-0000-0000-000000000001"
+    cursor = encode_cursor("speedup", 2.0, row_id, filters={"category": "graphs", "language": None})
+    response = await client.get("/api/v1/search/by-category", params={"category": "sorting", "cursor": cursor})
+    assert response.status_code == 400
+    assert "filters" in response.json()["detail"]
+
+    cursor = encode_cursor("speedup", 2.0, row_id, filters={"category": "sorting", "language": "go"})
+    response = await client.get("/api/v1/search/by-category", params={
+        "category": "sorting", "language": "python", "cursor": cursor,
+    })
+    assert response.status_code == 400
+
+    # Cursors without filters (issued before filters were stamped) are rejected too
+    response = await client.get("/api/v1/search/by-category", params={
+        "category": "sorting", "cursor": encode_cursor("speedup", 2.0, row_id),
+    })
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_search_stream(client: AsyncClient):
+    """Test that streaming search ends with the final results."""
+    response = await client.post("/api/v1/search/stream", json={
+        "query": "sort array",
+        "limit": 5
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[-1]["event"] == "results"
+    assert "items" in events[-1]["data"]
+
+
+@pytest.mark.anyio
+async def test_search_batch(client: AsyncClient):
+    """Test that batch search returns one result per query, in order."""
+    response = await client.post("/api/v1/search/batch", json={
+        "queries": [
+            {"query": "sort array", "limit": 3},
+            {"query": "remove duplicates", "limit": 3},
+        ]
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["query"] for r in results] == ["sort array", "remove duplicates"]
+
+
+@pytest.mark.anyio
+async def test_search_scoring_profile(client: AsyncClient):
+    """Test search with a named scoring profile."""
+    response = await client.post("/api/v1/search/", json={
+        "query": "sort array",
+        "profile": "speed-first",
+        "limit": 5
+    })
+    assert response.status_code == 200
+    scores = [item["similarity_score"] for item in response.json()["items"]]
+    assert scores == sorted(scores, reverse=True)
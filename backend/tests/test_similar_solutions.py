@@ -0,0 +1,220 @@
+"""
+Tests for finding similar optimized solutions in the playground.
+"""
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.routers import playground
+from app.routers.playground import find_similar_solution, structural_similarities
+from app.services.embedding_spaces import EmbeddingSpaceInfo
+from app.services.fingerprints import fingerprint_code
+
+SPACE = EmbeddingSpaceInfo(name="codebert", model="test-model", dim=3)
+
+BASELINE = '''
+def find_duplicates(arr):
+    duplicates = []
+    for i in range(len(arr)):
+        for j in range(i + 1, len(arr)):
+            if arr[i] == arr[j] and arr[i] not in duplicates:
+                duplicates.append(arr[i])
+    return duplicates
+'''
+
+RENAMED = BASELINE.replace("arr", "items").replace("duplicates", "seen_twice")
+
+UNRELATED = '''
+def word_count(text):
+    counts = {}
+    for word in text.split():
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+'''
+
+FAST = "def find_duplicates(arr):\n    from collections import Counter\n    return [x for x, c in Counter(arr).items() if c > 1]\n"
+
+
+def solution_row(code: str, minhash=..., sim_score: float = 0.0, speedup: float = 50.0, problem_id=None):
+    if minhash is ...:
+        fingerprint = fingerprint_code(code, "python")
+        minhash = fingerprint.minhash.tolist() if fingerprint else None
+    return SimpleNamespace(
+        id=uuid4(), code=code, title="Counter", speedup=speedup,
+        complexity_time="O(n)", complexity_space="O(n)", minhash=minhash,
+        problem_id=problem_id or uuid4(), problem_title="Find Duplicate Elements", sim_score=sim_score,
+    )
+
+
+def test_structural_similarities_uses_stored_minhash():
+    fingerprint = fingerprint_code(BASELINE, "python")
+    rows = [solution_row(RENAMED), solution_row(UNRELATED)]
+    similarities = structural_similarities(fingerprint, rows, "python")
+    assert similarities.shape == (2,)
+    assert similarities[0] == 1.0
+    assert similarities[1] < 0.3
+
+
+def test_structural_similarities_fingerprints_rows_without_minhash(monkeypatch):
+    """Rows written before the backfill are fingerprinted on the fly, and only those."""
+    fingerprint = fingerprint_code(BASELINE, "python")
+    fingerprinted = []
+    original = playground.fingerprint_code
+
+    def counting_fingerprint(code, language):
+        fingerprinted.append(code)
+        return original(code, language)
+    monkeypatch.setattr(playground, "fingerprint_code", counting_fingerprint)
+
+    rows = [solution_row(UNRELATED), solution_row(RENAMED, minhash=None), solution_row("", minhash=None)]
+    similarities = structural_similarities(fingerprint, rows, "python")
+    assert fingerprinted == [RENAMED, ""]
+    assert similarities[1] == 1.0
+    # Nothing to fingerprint counts as no similarity
+    assert similarities[2] == 0.0
+    assert similarities[0] < similarities[1]
+
+
+def test_structural_similarities_without_fingerprint():
+    rows = [solution_row(RENAMED)]
+    assert np.array_equal(structural_similarities(None, rows, "python"), np.zeros(1))
+    assert structural_similarities(fingerprint_code(BASELINE, "python"), [], "python").shape == (0,)
+
+
+class FakeDB:
+    """Routes the queries of find_similar_solution to canned rows and records them."""
+
+    def __init__(self, vector_rows=(), structural_rows=(), missing_rows=(), fail=False):
+        self.vector_rows = list(vector_rows)
+        self.structural_rows = list(structural_rows)
+        self.missing_rows = list(missing_rows)
+        self.fail = fail
+        self.queries: list[tuple[str, dict]] = []
+        self.rolled_back = False
+
+    def ran(self, marker: str) -> list[dict]:
+        return [params for sql, params in self.queries if marker in sql]
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.queries.append((sql, params or {}))
+        if self.fail:
+            raise ConnectionError("database down")
+        if "nearest_chunks" in sql:
+            rows = self.vector_rows
+        elif "lsh_buckets &&" in sql:
+            rows = self.structural_rows
+        elif "s.id = ANY(:ids)" in sql:
+            rows = [row for row in self.missing_rows if row.id in params["ids"]]
+        else:
+            rows = []
+        return SimpleNamespace(fetchall=lambda: rows)
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+    """Codes sent to the embedding model."""
+    calls = []
+
+    async def get_search_space(db):
+        return SPACE
+
+    async def get_embedding(code, model_name=None):
+        calls.append(code)
+        return [0.1, 0.2, 0.3]
+    monkeypatch.setattr(playground, "get_search_space", get_search_space)
+    monkeypatch.setattr(playground, "get_embedding", get_embedding)
+    return calls
+
+
+def structural_match(row, code: str = RENAMED) -> SimpleNamespace:
+    fingerprint = fingerprint_code(code, "python")
+    return SimpleNamespace(id=row.id, structure_hash=fingerprint.structure_hash, minhash=fingerprint.minhash.tolist())
+
+
+@pytest.mark.anyio
+async def test_find_similar_embeds_the_code(embedded):
+    row = solution_row(FAST, sim_score=0.8)
+    db = FakeDB(vector_rows=[row])
+    match, complete = await find_similar_solution(db, BASELINE, "python")
+    assert match.id == str(row.id)
+    assert complete
+    assert embedded == [BASELINE]
+    assert db.ran("nearest_chunks")[0]["embedding"] == str([0.1, 0.2, 0.3])
+
+
+@pytest.mark.anyio
+async def test_find_similar_uses_query_embedding(embedded):
+    """Batched callers pass the embedding they computed; the model is not called again."""
+    row = solution_row(FAST, sim_score=0.8)
+    db = FakeDB(vector_rows=[row])
+    match, complete = await find_similar_solution(db, BASELINE, "python", query_embedding=[0.3, 0.2, 0.1])
+    assert match.id == str(row.id)
+    assert complete
+    assert embedded == []
+    assert db.ran("nearest_chunks")[0]["embedding"] == str([0.3, 0.2, 0.1])
+
+
+@pytest.mark.anyio
+async def test_find_similar_structural_only(embedded):
+    """Without the embedding model, structural LSH matches alone find the solution."""
+    problem_id = uuid4()
+    near_copy = solution_row(FAST, problem_id=problem_id)
+    db = FakeDB(structural_rows=[structural_match(near_copy)], missing_rows=[near_copy])
+
+    match, complete = await find_similar_solution(db, BASELINE, "python", structural_only=True)
+    assert match.id == str(near_copy.id)
+    assert match.problem_id == str(problem_id)
+    # Structural matches alone don't make a complete lookup
+    assert not complete
+    assert embedded == []
+    assert not db.ran("nearest_chunks")
+    assert "embedding" not in db.ran("s.id = ANY(:ids)")[0]
+
+
+@pytest.mark.anyio
+async def test_find_similar_falls_back_when_embedding_fails(embedded, monkeypatch):
+    async def unavailable(code, model_name=None):
+        raise RuntimeError("model not loaded")
+    monkeypatch.setattr(playground, "get_embedding", unavailable)
+    near_copy = solution_row(FAST)
+    db = FakeDB(structural_rows=[structural_match(near_copy)], missing_rows=[near_copy])
+
+    match, complete = await find_similar_solution(db, BASELINE, "python")
+    assert match.id == str(near_copy.id)
+    assert not complete
+    assert not db.ran("nearest_chunks")
+
+
+@pytest.mark.anyio
+async def test_find_similar_merges_vector_and_structural_pools(embedded):
+    vector_only = solution_row(UNRELATED, sim_score=0.3, speedup=500.0)
+    near_copy = solution_row(FAST, sim_score=0.3, speedup=5.0)
+    db = FakeDB(
+        vector_rows=[vector_only],
+        structural_rows=[structural_match(near_copy, BASELINE)],
+        missing_rows=[near_copy],
+    )
+    match, _ = await find_similar_solution(db, BASELINE, "python")
+    # The identical structure outranks a faster but unrelated vector candidate
+    assert match.id == str(near_copy.id)
+    assert db.ran("s.id = ANY(:ids)")[0]["ids"] == [near_copy.id]
+
+
+@pytest.mark.anyio
+async def test_find_similar_nothing_found(embedded):
+    match, complete = await find_similar_solution(FakeDB(), BASELINE, "python")
+    assert match is None
+    assert complete
+
+
+@pytest.mark.anyio
+async def test_find_similar_database_failure(embedded):
+    db = FakeDB(fail=True)
+    assert await find_similar_solution(db, BASELINE, "python") == (None, False)
+    assert db.rolled_back
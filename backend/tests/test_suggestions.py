@@ -0,0 +1,50 @@
+"""
+Tests for the autocomplete index.
+"""
+import pytest
+
+from app.config import get_settings
+from app.services import suggestions
+from app.services.suggestions import BUILT_KEY, BUILT_TTL_FACTOR, lookup_suggestions, rebuild_suggestions
+from app.worker import celery_app
+
+
+@pytest.fixture
+def entries(monkeypatch):
+    rows = [
+        ("problems", "Merge Sort", 3, ["Merge Sort", "merge-sort"]),
+        ("categories", "sorting", 1, ["sorting"]),
+    ]
+
+    async def load_entries(db):
+        return rows
+    monkeypatch.setattr(suggestions, "_load_entries", load_entries)
+    return rows
+
+
+@pytest.mark.anyio
+async def test_rebuild_serves_lookups(fake_redis, entries):
+    """A rebuilt index answers prefix lookups of every word start."""
+    await rebuild_suggestions(db=None)
+    result = await lookup_suggestions("sor", limit=5)
+    assert result["problems"] == ["Merge Sort"]
+    assert result["categories"] == ["sorting"]
+
+
+@pytest.mark.anyio
+async def test_built_marker_expires_without_refresh(fake_redis, entries):
+    """The index is only trusted for a bounded number of missed refreshes."""
+    await rebuild_suggestions(db=None)
+    expected = BUILT_TTL_FACTOR * get_settings().suggestion_refresh_seconds
+    assert await fake_redis.ttl(BUILT_KEY) == expected
+
+    # Once the marker is gone, lookups fall back to the database
+    await fake_redis.delete(BUILT_KEY)
+    assert await lookup_suggestions("sor", limit=5) is None
+
+
+def test_refresh_is_scheduled():
+    """Beat rebuilds the index every suggestion_refresh_seconds."""
+    entry = celery_app.conf.beat_schedule["refresh-suggestion-index"]
+    assert entry["task"] == "app.tasks.refresh_suggestion_index"
+    assert entry["schedule"] == get_settings().suggestion_refresh_seconds
@@ -0,0 +1,44 @@
+"""
+Tests for running Celery task coroutines.
+"""
+import asyncio
+
+import pytest
+
+from app import database
+from app.tasks import _run_async
+
+
+class FakeEngine:
+    def __init__(self):
+        self.disposed_on = []
+
+    async def dispose(self):
+        self.disposed_on.append(asyncio.get_running_loop())
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setattr(database, "engine", fake)
+    return fake
+
+
+def test_each_task_loop_disposes_the_pool(engine):
+    """Pooled asyncpg connections never outlive the loop they were opened on."""
+    async def task():
+        return asyncio.get_running_loop()
+
+    first = _run_async(task())
+    second = _run_async(task())
+    assert engine.disposed_on == [first, second]
+    assert first.is_closed() and second.is_closed()
+
+
+def test_pool_is_disposed_when_the_task_fails(engine):
+    async def failing():
+        raise RuntimeError("task failed")
+
+    with pytest.raises(RuntimeError):
+        _run_async(failing())
+    assert len(engine.disposed_on) == 1
@@ -0,0 +1,73 @@
+"""
+Tests for HNSW index management.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import vector_index
+from app.services.embedding_spaces import EmbeddingSpaceInfo
+from app.services.vector_index import ensure_space_indexes, index_name
+
+SPACE = EmbeddingSpaceInfo(name="codebert", model="test-model", dim=3)
+
+
+class FakeConnection:
+    """Answers the pg_index validity lookup from `valid` (index name -> indisvalid)."""
+
+    def __init__(self, valid):
+        self.valid = valid
+        self.statements: list[str] = []
+
+    async def execution_options(self, **options):
+        return self
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        value = self.valid.get(params["name"]) if "pg_index" in sql else None
+        return SimpleNamespace(scalar=lambda: value)
+
+
+class FakeEngine:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def connect(self):
+        conn = self.conn
+
+        class Context:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+        return Context()
+
+
+def built(conn: FakeConnection, verb: str) -> list[str]:
+    return [sql.split()[6 if verb == "CREATE" else 5] for sql in conn.statements if sql.startswith(verb)]
+
+
+@pytest.mark.anyio
+async def test_invalid_index_is_rebuilt(monkeypatch):
+    """An index left INVALID by an interrupted concurrent build is dropped, then built again."""
+    chunks = index_name("solution_embedding_chunks", SPACE.name)
+    embeddings = index_name("solution_embeddings", SPACE.name)
+    conn = FakeConnection({embeddings: True, chunks: False})
+    monkeypatch.setattr(vector_index, "engine", FakeEngine(conn))
+
+    assert await ensure_space_indexes(SPACE) == [embeddings, chunks]
+    assert built(conn, "DROP") == [chunks]
+    assert built(conn, "CREATE") == [embeddings, chunks]
+    drop = next(i for i, sql in enumerate(conn.statements) if sql.startswith("DROP"))
+    assert conn.statements[drop + 1].startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {chunks}")
+
+
+@pytest.mark.anyio
+async def test_missing_and_valid_indexes_are_not_dropped(monkeypatch):
+    conn = FakeConnection({index_name("solution_embeddings", SPACE.name): True})
+    monkeypatch.setattr(vector_index, "engine", FakeEngine(conn))
+    await ensure_space_indexes(SPACE)
+    assert built(conn, "DROP") == []
+    assert len(built(conn, "CREATE")) == 2
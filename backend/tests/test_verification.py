@@ -0,0 +1,144 @@
+"""
+Tests for the verification sandbox.
+"""
+import pytest
+
+from app.routers.playground import AnalyzeResponse, ComplexityInfo, VerificationInfo, apply_verification
+from app.services import verification
+from app.services.verification import (
+    VerificationBudget,
+    screen_source,
+    verify_python,
+    verify_rewrite,
+    verify_timing,
+)
+
+
+@pytest.mark.anyio
+async def test_sandbox_does_not_inherit_environment(monkeypatch):
+    """Submitted code can't read the backend's environment."""
+    monkeypatch.setenv("SECRET_KEY", "do-not-leak")
+    baseline = "import os\n\ndef f(a):\n    return 'SECRET_KEY' in os.environ\n"
+    candidate = "def f(a):\n    return False\n"
+    result = await verify_python(baseline, "f", candidate, "f", inputs=[[[1]]])
+    assert result.equivalence == "exact"
+
+
+@pytest.mark.anyio
+async def test_sandbox_limits_processes():
+    """The sandbox runs under hard resource limits."""
+    baseline = "import resource\n\ndef f(a):\n    return resource.getrlimit(resource.RLIMIT_NPROC)\n"
+    candidate = "def f(a):\n    return (0, 0)\n"
+    result = await verify_python(baseline, "f", candidate, "f", inputs=[[[1]]])
+    assert result.equivalence == "exact"
+
+
+@pytest.mark.anyio
+async def test_sandbox_stderr_is_not_returned(monkeypatch):
+    """A run without a result reports a generic error, not the process's stderr."""
+    monkeypatch.setenv("SECRET_KEY", "do-not-leak")
+    baseline = (
+        "import os, sys\n"
+        "sys.stderr.write('leaked: ' + os.environ.get('SECRET_KEY', 'missing'))\n"
+        "os._exit(1)\n\n"
+        "def f(a):\n    return a\n"
+    )
+    result = await verify_python(baseline, "f", "def f(a):\n    return a\n", "f", inputs=[[[1]]])
+    assert result.equivalence == "error"
+    assert "leaked" not in result.error
+    assert "do-not-leak" not in result.error
+
+
+@pytest.mark.anyio
+async def test_rewrite_check_stops_when_budget_is_spent():
+    """Rewrite checks take runs from the request's budget and are rejected once it is spent."""
+    before = "def f(a):\n    return a\n\ndef g(a):\n    return a\n"
+    after = "def f(a):\n    return list(a)\n\ndef g(a):\n    return list(a)\n"
+    budget = VerificationBudget(runs=1)
+    equivalent, reason = await verify_rewrite(before, after, budget)
+    assert not equivalent
+    assert "budget" in reason
+    assert budget.runs == 0
+
+
+def test_screen_source():
+    assert screen_source('import (\n    "sort"\n    "strings"\n)\nfunc f(a []int) int { return 0 }', "go") is None
+    assert "os/exec" in screen_source('import "os/exec"\nfunc f(a []int) int { return 0 }', "go")
+    assert "unsafe" in screen_source('import (\n    "sort"\n    u "unsafe"\n)', "go")
+
+    assert screen_source("use std::collections::HashSet;\nfn f(a: &Vec<i32>) -> usize { 0 }", "rust") is None
+    assert "std::process" in screen_source('fn f(a: &Vec<i32>) { std::process::exit(1) }', "rust")
+    assert screen_source('use std::{fs, process};', "rust") is not None
+    assert screen_source('const S: &str = include_str!("/etc/passwd");', "rust") is not None
+    assert screen_source("fn f(a: &Vec<i32>) { unsafe {} }", "rust") is not None
+
+
+@pytest.fixture
+def sandboxed(monkeypatch):
+    """Commands started through the sandbox runner, each answered with a timing."""
+    started = []
+
+    async def run(argv, workdir, limits, env=None):
+        started.append({"argv": argv, "env": env})
+        ms = 4.0 if len(started) % 2 else 1.0
+        return 0, f"TIME:{ms}\nMEMORY:0\nSUCCESS\n", ""
+    monkeypatch.setattr(verification, "_sandboxed", run)
+    monkeypatch.setattr(verification.shutil, "which", lambda name: f"/usr/bin/{name}")
+    return started
+
+
+@pytest.mark.anyio
+async def test_timing_runs_node_in_the_sandbox(sandboxed):
+    """Other languages are timed through the sandbox runner and get a curve, not a speedup."""
+    code = "function f(a) { return a.length }"
+    result = await verify_timing(code, "f", code, "f", "typescript", sizes=[10, 100])
+    assert result.equivalence == "unchecked"
+    assert result.speedup is None
+    assert [point.speedup for point in result.curve] == [4.0, 4.0]
+    assert len(sandboxed) == 4
+    for run in sandboxed:
+        assert run["argv"][0] == "/usr/bin/node"
+        assert "--experimental-permission" in run["argv"]
+        assert not run["env"]
+
+
+@pytest.mark.anyio
+async def test_timing_compiles_with_toolchain_and_runs_without_environment(sandboxed, monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "do-not-leak")
+    code = "fn f(a: &Vec<i32>) -> usize { a.len() }"
+    await verify_timing(code, "f", code, "f", "rust", sizes=[10])
+    compile_run, binary_run = sandboxed[0], sandboxed[1]
+    assert compile_run["argv"][0] == "/usr/bin/rustc"
+    assert "SECRET_KEY" not in compile_run["env"]
+    assert binary_run["argv"][0].endswith("bench")
+    assert not binary_run["env"]
+
+
+@pytest.mark.anyio
+async def test_timing_rejects_screened_code(sandboxed):
+    code = 'import "os/exec"\nfunc f(a []int) int { return 0 }'
+    result = await verify_timing(code, "f", code, "f", "go")
+    assert result.equivalence == "error"
+    assert "os/exec" in result.error
+    assert sandboxed == []
+
+
+def test_unchecked_timing_keeps_the_estimate():
+    """Only verified-equivalent results replace the estimated speedup."""
+    def response():
+        return AnalyzeResponse(
+            optimized_code="", speedup=2.0, complexity=ComplexityInfo(time="O(n)", space="O(1)"), suggestions=[]
+        )
+
+    def info(equivalence, equivalent):
+        return VerificationInfo(
+            candidate="generated", function="f", candidate_function="f",
+            equivalence=equivalence, equivalent=equivalent, speedup=9.0, curve=[],
+        )
+
+    unchecked = apply_verification(response(), info("unchecked", False))
+    assert (unchecked.speedup, unchecked.speedup_measured) == (2.0, False)
+    assert unchecked.verification.equivalence == "unchecked"
+
+    exact = apply_verification(response(), info("exact", True))
+    assert (exact.speedup, exact.speedup_measured) == (9.0, True)
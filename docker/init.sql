@@ -45,6 +45,10 @@ CREATE TABLE problems (
     baseline_language language_type NOT NULL,
     baseline_complexity_time VARCHAR(50),
     baseline_complexity_space VARCHAR(50),
+    -- Structural fingerprint of the baseline code (see migration 009)
+    baseline_structure_hash VARCHAR(64),
+    baseline_minhash INTEGER[],
+    baseline_lsh_buckets BIGINT[],
     test_cases JSONB DEFAULT '[]',
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
@@ -58,12 +62,19 @@ CREATE TABLE solutions (
     title VARCHAR(255) NOT NULL,
     description TEXT,
     code TEXT NOT NULL,
+    code_preview TEXT GENERATED ALWAYS AS (
+        CASE WHEN length(code) > 200 THEN left(code, 200) || '...' ELSE code END
+    ) STORED,
     language language_type NOT NULL,
     complexity_time VARCHAR(50),
     complexity_space VARCHAR(50),
     tags TEXT[] DEFAULT '{}',
     embedding vector(768),
     search_vector tsvector,
+    -- Structural fingerprint of the alpha-renamed code (see migration 009)
+    structure_hash VARCHAR(64),
+    minhash INTEGER[],
+    lsh_buckets BIGINT[],
     is_verified BOOLEAN DEFAULT FALSE,
     vote_count INTEGER DEFAULT 0,
     speedup FLOAT,
@@ -140,9 +151,73 @@ CREATE TABLE search_queries (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Embedding spaces: named (model, dim) pairs, at most one serves search (see migration 004)
+CREATE TABLE embedding_spaces (
+    name VARCHAR(100) PRIMARY KEY,
+    model VARCHAR(255) NOT NULL,
+    dim INTEGER NOT NULL,
+    status VARCHAR(20) DEFAULT 'backfilling',
+    is_active BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    activated_at TIMESTAMPTZ
+);
+
+-- Per-space solution embeddings (see migration 004)
+CREATE TABLE solution_embeddings (
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    space VARCHAR(100) NOT NULL REFERENCES embedding_spaces(name) ON DELETE CASCADE,
+    embedding vector NOT NULL,
+    code_hash VARCHAR(64),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (solution_id, space)
+);
+
+-- Per-chunk embeddings for solutions longer than the model context (see migration 005)
+CREATE TABLE solution_embedding_chunks (
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    space VARCHAR(100) NOT NULL REFERENCES embedding_spaces(name) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    embedding vector NOT NULL,
+    PRIMARY KEY (solution_id, space, chunk_index)
+);
+
+-- Shadow query comparisons between embedding spaces (see migration 004)
+CREATE TABLE embedding_shadow_comparisons (
+    id BIGSERIAL PRIMARY KEY,
+    query TEXT NOT NULL,
+    primary_space VARCHAR(100) NOT NULL,
+    shadow_space VARCHAR(100) NOT NULL,
+    k INTEGER NOT NULL,
+    overlap FLOAT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Outbox for embedding solutions on write (see migration 003)
+CREATE TABLE embedding_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    processed_at TIMESTAMPTZ
+);
+
+-- Bulk embedding reindex checkpoints (see migration 002)
+CREATE TABLE reindex_checkpoints (
+    job_name VARCHAR(100) PRIMARY KEY,
+    last_solution_id UUID,
+    processed INTEGER DEFAULT 0,
+    embedded INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    status VARCHAR(20) DEFAULT 'running',
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Create indexes
-CREATE INDEX idx_solutions_embedding ON solutions 
-    USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
 CREATE INDEX idx_solutions_search ON solutions USING gin(search_vector);
 CREATE INDEX idx_solutions_language ON solutions(language);
 CREATE INDEX idx_solutions_problem ON solutions(problem_id);
@@ -155,6 +230,10 @@ CREATE INDEX idx_users_score ON users(score DESC);
 CREATE INDEX idx_problems_slug ON problems(slug);
 CREATE INDEX idx_problems_category ON problems(category);
 CREATE INDEX idx_problems_title_trgm ON problems USING gin(title gin_trgm_ops);
+CREATE INDEX idx_solutions_structure_hash ON solutions(structure_hash);
+CREATE INDEX idx_solutions_lsh_buckets ON solutions USING gin(lsh_buckets);
+CREATE INDEX idx_problems_baseline_structure_hash ON problems(baseline_structure_hash);
+CREATE INDEX idx_problems_baseline_lsh_buckets ON problems USING gin(baseline_lsh_buckets);
 
 -- Comments indexes
 CREATE INDEX idx_comments_solution ON solution_comments(solution_id);
@@ -166,6 +245,22 @@ CREATE INDEX idx_pageviews_path ON page_views(path);
 CREATE INDEX idx_pageviews_created ON page_views(created_at);
 CREATE INDEX idx_search_queries_created ON search_queries(created_at);
 
+-- Embedding indexes
+CREATE UNIQUE INDEX uq_embedding_spaces_active ON embedding_spaces(is_active) WHERE is_active;
+CREATE INDEX idx_solution_embeddings_space ON solution_embeddings(space);
+CREATE INDEX idx_solution_embedding_chunks_space ON solution_embedding_chunks(space);
+-- Per-space HNSW indexes over the fixed-dimension cast (see migration 006)
+CREATE INDEX idx_solution_embeddings_hnsw_codebert ON solution_embeddings
+    USING hnsw ((embedding::vector(768)) vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+    WHERE space = 'codebert';
+CREATE INDEX idx_solution_embedding_chunks_hnsw_codebert ON solution_embedding_chunks
+    USING hnsw ((embedding::vector(768)) vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+    WHERE space = 'codebert';
+CREATE INDEX idx_shadow_comparisons_space ON embedding_shadow_comparisons(shadow_space);
+CREATE INDEX idx_shadow_comparisons_created ON embedding_shadow_comparisons(created_at);
+CREATE INDEX idx_embedding_outbox_solution ON embedding_outbox(solution_id);
+CREATE INDEX idx_embedding_outbox_pending ON embedding_outbox(id) WHERE processed_at IS NULL;
+
 -- Trigger to update search_vector
 CREATE OR REPLACE FUNCTION update_search_vector()
 RETURNS TRIGGER AS $$
@@ -204,6 +299,30 @@ CREATE TRIGGER update_solutions_timestamp
     BEFORE UPDATE ON solutions
     FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
+-- Publish solution embedding changes for in-process vector indexes (see migration 007)
+CREATE OR REPLACE FUNCTION notify_solution_embedding_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('solution_embedding_changes', json_build_object(
+            'op', 'delete', 'solution_id', OLD.solution_id, 'space', OLD.space
+        )::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('solution_embedding_changes', json_build_object(
+        'op', 'upsert', 'solution_id', NEW.solution_id, 'space', NEW.space
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_solution_embedding_changes
+    AFTER INSERT OR UPDATE OR DELETE ON solution_embeddings
+    FOR EACH ROW EXECUTE FUNCTION notify_solution_embedding_change();
+
+-- Default embedding space
+INSERT INTO embedding_spaces (name, model, dim, status, is_active, activated_at)
+VALUES ('codebert', 'microsoft/codebert-base', 768, 'ready', TRUE, NOW());
+
 -- Insert seed data (sample problem and baseline)
 INSERT INTO problems (title, slug, description, category, difficulty, baseline_code, baseline_language, baseline_complexity_time, baseline_complexity_space) VALUES
 ('Find Duplicate Elements',
@@ -0,0 +1,20 @@
+-- Migration 002: Bookkeeping for bulk embedding reindex
+-- Run this migration to upgrade existing database
+
+-- Unchanged rows are skipped by comparing the hash of the embedded text with
+-- solution_embeddings.code_hash (migration 004), so solutions get no new columns.
+
+-- =====================================================
+-- REINDEX CHECKPOINTS TABLE
+-- =====================================================
+CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+    job_name VARCHAR(100) PRIMARY KEY,
+    last_solution_id UUID,
+    processed INTEGER DEFAULT 0,
+    embedded INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    status VARCHAR(20) DEFAULT 'running',
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,19 @@
+-- Migration 003: Outbox for embedding solutions on write
+-- Run this migration to upgrade existing database
+
+CREATE TABLE IF NOT EXISTS embedding_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    processed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_outbox_solution ON embedding_outbox(solution_id);
+-- Workers only ever scan pending rows
+CREATE INDEX IF NOT EXISTS idx_embedding_outbox_pending ON embedding_outbox(id) WHERE processed_at IS NULL;
+
+-- Queue existing solutions that were created without an embedding
+INSERT INTO embedding_outbox (solution_id)
+SELECT id FROM solutions WHERE embedding IS NULL;
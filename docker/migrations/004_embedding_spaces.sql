@@ -0,0 +1,63 @@
+-- Migration 004: Named embedding spaces with dual-write and online cutover
+-- Run this migration to upgrade existing database
+
+-- =====================================================
+-- EMBEDDING SPACES TABLE
+-- =====================================================
+CREATE TABLE IF NOT EXISTS embedding_spaces (
+    name VARCHAR(100) PRIMARY KEY,
+    model VARCHAR(255) NOT NULL,
+    dim INTEGER NOT NULL,
+    status VARCHAR(20) DEFAULT 'backfilling',
+    is_active BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    activated_at TIMESTAMPTZ
+);
+
+-- At most one space serves search
+CREATE UNIQUE INDEX IF NOT EXISTS uq_embedding_spaces_active ON embedding_spaces(is_active) WHERE is_active;
+
+-- =====================================================
+-- PER-SPACE SOLUTION EMBEDDINGS
+-- =====================================================
+CREATE TABLE IF NOT EXISTS solution_embeddings (
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    space VARCHAR(100) NOT NULL REFERENCES embedding_spaces(name) ON DELETE CASCADE,
+    embedding vector NOT NULL,
+    code_hash VARCHAR(64),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (solution_id, space)
+);
+
+CREATE INDEX IF NOT EXISTS idx_solution_embeddings_space ON solution_embeddings(space);
+
+-- =====================================================
+-- SHADOW QUERY COMPARISONS
+-- =====================================================
+CREATE TABLE IF NOT EXISTS embedding_shadow_comparisons (
+    id BIGSERIAL PRIMARY KEY,
+    query TEXT NOT NULL,
+    primary_space VARCHAR(100) NOT NULL,
+    shadow_space VARCHAR(100) NOT NULL,
+    k INTEGER NOT NULL,
+    overlap FLOAT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_shadow_comparisons_space ON embedding_shadow_comparisons(shadow_space);
+CREATE INDEX IF NOT EXISTS idx_shadow_comparisons_created ON embedding_shadow_comparisons(created_at);
+
+-- =====================================================
+-- MOVE EXISTING VECTORS INTO THE DEFAULT SPACE
+-- =====================================================
+INSERT INTO embedding_spaces (name, model, dim, status, is_active, activated_at)
+VALUES ('codebert', 'microsoft/codebert-base', 768, 'ready', TRUE, NOW())
+ON CONFLICT (name) DO NOTHING;
+
+-- Copied vectors have no code_hash yet: the next reindex re-embeds them once
+-- and records the hash, after which unchanged rows are skipped
+INSERT INTO solution_embeddings (solution_id, space, embedding)
+SELECT id, 'codebert', embedding
+FROM solutions
+WHERE embedding IS NOT NULL
+ON CONFLICT (solution_id, space) DO NOTHING;
@@ -0,0 +1,17 @@
+-- Migration 005: Per-chunk embeddings for solutions longer than the model context
+-- Run this migration to upgrade existing database
+
+CREATE TABLE IF NOT EXISTS solution_embedding_chunks (
+    solution_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    space VARCHAR(100) NOT NULL REFERENCES embedding_spaces(name) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    embedding vector NOT NULL,
+    PRIMARY KEY (solution_id, space, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_solution_embedding_chunks_space ON solution_embedding_chunks(space);
+
+-- Chunks are produced by the reindex job: run reindex_all_solutions with force=True
+-- once after this migration to chunk solutions that are already embedded.
@@ -0,0 +1,23 @@
+-- Migration 006: Per-space HNSW vector indexes
+-- Run this migration to upgrade existing database
+
+-- The legacy index on solutions.embedding is no longer queried
+DROP INDEX IF EXISTS idx_solutions_embedding;
+
+-- solution_embeddings stores untyped vectors, so each space gets a partial
+-- index over its fixed-dimension cast. Queries use the same expression
+-- (see app/services/vector_index.py). Spaces registered later get their
+-- indexes from the build_vector_indexes task once backfilled.
+SET maintenance_work_mem = '512MB';
+
+CREATE INDEX IF NOT EXISTS idx_solution_embeddings_hnsw_codebert
+    ON solution_embeddings USING hnsw ((embedding::vector(768)) vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE space = 'codebert';
+
+CREATE INDEX IF NOT EXISTS idx_solution_embedding_chunks_hnsw_codebert
+    ON solution_embedding_chunks USING hnsw ((embedding::vector(768)) vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE space = 'codebert';
+
+RESET maintenance_work_mem;
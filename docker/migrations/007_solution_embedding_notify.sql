@@ -0,0 +1,25 @@
+-- Migration 007: Publish solution embedding changes for in-process vector indexes
+-- Run this migration to upgrade existing database
+
+-- API processes with ann_index_enabled LISTEN on this channel and re-read the
+-- changed vectors. The payload only carries keys (NOTIFY payloads are limited
+-- to 8000 bytes, less than a 768-dim vector in text form).
+CREATE OR REPLACE FUNCTION notify_solution_embedding_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('solution_embedding_changes', json_build_object(
+            'op', 'delete', 'solution_id', OLD.solution_id, 'space', OLD.space
+        )::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('solution_embedding_changes', json_build_object(
+        'op', 'upsert', 'solution_id', NEW.solution_id, 'space', NEW.space
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_solution_embedding_changes ON solution_embeddings;
+CREATE TRIGGER trg_solution_embedding_changes
+    AFTER INSERT OR UPDATE OR DELETE ON solution_embeddings
+    FOR EACH ROW EXECUTE FUNCTION notify_solution_embedding_change();
@@ -0,0 +1,10 @@
+-- Migration 008: Precomputed code preview for search results
+-- Run this migration to upgrade existing database
+
+-- Search responses only show the first 200 characters of a solution; a
+-- stored generated column keeps listings from reading full code blobs.
+-- Adding it rewrites the solutions table once.
+ALTER TABLE solutions ADD COLUMN IF NOT EXISTS code_preview TEXT
+    GENERATED ALWAYS AS (
+        CASE WHEN length(code) > 200 THEN left(code, 200) || '...' ELSE code END
+    ) STORED;
@@ -0,0 +1,22 @@
+-- Migration 009: Structural fingerprints for playground retrieval
+-- Run this migration to upgrade existing database
+
+-- Alpha-renamed AST fingerprints of every solution and problem baseline:
+-- an exact structure hash, a MinHash signature and its LSH band buckets.
+-- The GIN indexes on the buckets let the playground find structurally
+-- similar code with an array overlap (&&) instead of a full scan.
+ALTER TABLE solutions ADD COLUMN IF NOT EXISTS structure_hash VARCHAR(64);
+ALTER TABLE solutions ADD COLUMN IF NOT EXISTS minhash INTEGER[];
+ALTER TABLE solutions ADD COLUMN IF NOT EXISTS lsh_buckets BIGINT[];
+
+ALTER TABLE problems ADD COLUMN IF NOT EXISTS baseline_structure_hash VARCHAR(64);
+ALTER TABLE problems ADD COLUMN IF NOT EXISTS baseline_minhash INTEGER[];
+ALTER TABLE problems ADD COLUMN IF NOT EXISTS baseline_lsh_buckets BIGINT[];
+
+CREATE INDEX IF NOT EXISTS idx_solutions_structure_hash ON solutions(structure_hash);
+CREATE INDEX IF NOT EXISTS idx_solutions_lsh_buckets ON solutions USING gin(lsh_buckets);
+CREATE INDEX IF NOT EXISTS idx_problems_baseline_structure_hash ON problems(baseline_structure_hash);
+CREATE INDEX IF NOT EXISTS idx_problems_baseline_lsh_buckets ON problems USING gin(baseline_lsh_buckets);
+
+-- Fingerprints are computed in Python; fill in existing rows with the
+-- backfill_code_fingerprints Celery task after applying this migration.
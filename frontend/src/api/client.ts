@@ -1,4 +1,13 @@
 import axios from 'axios'
+import type {
+  AnalyzeFileRequest,
+  AnalyzeProfileRequest,
+  AnnotateRequest,
+  FileAnalysis,
+  FilesAnalysis,
+  LineAnnotations,
+  ProfileAnalysis,
+} from '../types/api'
 
 export const api = axios.create({
   baseURL: '/api/v1',
@@ -105,6 +114,14 @@ export const commentsApi = {
 export const playgroundApi = {
   analyze: (code: string, language: string) =>
     api.post('/playground/analyze', { code, language }),
+  analyzeFile: (file: AnalyzeFileRequest) =>
+    api.post<FileAnalysis>('/playground/analyze-file', file),
+  analyzeFiles: (files: AnalyzeFileRequest[]) =>
+    api.post<FilesAnalysis>('/playground/analyze-files', { files }),
+  analyzeProfile: (profile: AnalyzeProfileRequest) =>
+    api.post<ProfileAnalysis>('/playground/analyze-profile', profile),
+  annotate: (request: AnnotateRequest) =>
+    api.post<LineAnnotations>('/playground/annotate', request),
 }
 
 export const authApi = {
@@ -45,7 +45,12 @@ export function useSearchSuggestions(query: string) {
     queryKey: ['searchSuggestions', query],
     queryFn: async () => {
       const response = await searchApi.suggestions(query)
-      return response.data as { suggestions: string[] }
+      return response.data as {
+        problems: string[]
+        solutions: string[]
+        categories: string[]
+        queries: string[]
+      }
     },
     enabled: query.length >= 2,
   })
@@ -91,7 +91,7 @@ export function useSolutionsCount() {
     queryKey: ['solutions', 'count'],
     queryFn: async () => {
       const response = await solutionsApi.list({ size: 1 })
-      return response.data.total
+      return response.data.total ?? 0
     },
   })
 }
@@ -260,7 +260,7 @@ export default function Search() {
       </div>
 
       {/* Results count */}
-      {data && data.total > 0 && (
+      {data?.total != null && data.total > 0 && (
         <div className="text-center text-sm text-text-muted">
           Showing {data.items.length} of {data.total} results
         </div>
@@ -160,9 +160,10 @@ export interface SolutionResponse {
 
 export interface SolutionList {
   items: SolutionResponse[]
-  total: number
+  total: number | null  // null on cursor pages unless count is requested
   page: number
   size: number
+  next_cursor?: string | null
 }
 
 // Search types
@@ -186,8 +187,9 @@ export interface SearchResultItem {
 
 export interface SearchResult {
   items: SearchResultItem[]
-  total: number
+  total: number | null  // null on cursor pages; approximate for semantic search
   query: string
+  next_cursor?: string | null
 }
 
 export interface SearchParams {
@@ -199,7 +201,9 @@ export interface SearchParams {
   badges?: SolutionBadge[]
   limit?: number
   offset?: number
+  cursor?: string  // next_cursor of the previous page
   sort?: 'relevance' | 'speedup' | 'memory' | 'efficiency' | 'votes' | 'recent'
+  profile?: 'balanced' | 'relevance-only' | 'speed-first' | 'memory-first' | 'community'
 }
 
 // Benchmark types
@@ -278,12 +282,145 @@ export interface PlaygroundAnalysis {
   dependencies: string[]
   optimization_patterns: OptimizationPattern[]
   suggestions: string[]
+  findings?: CodeFinding[]
+  speedup_measured?: boolean
+  verification?: Verification | null
   similar_solutions?: SearchResultItem[]
 }
 
+export interface CodeFinding {
+  rule: string
+  message: string
+  line: number
+  col: number
+  impact: 'high' | 'medium' | 'low'
+}
+
+export interface ScalingPoint {
+  size: number
+  baseline_ms: number | null
+  candidate_ms: number | null
+  speedup: number | null
+  equivalence: string | null
+}
+
+export interface Verification {
+  candidate: 'similar_solution' | 'generated'
+  function: string
+  candidate_function: string
+  equivalence: 'exact' | 'unordered' | 'different' | 'error' | 'unchecked'
+  equivalent: boolean
+  speedup: number | null
+  curve: ScalingPoint[]
+  error: string | null
+}
+
 export interface AnalyzeRequest {
   code: string
   language: string
+  verify?: boolean
+  inputs?: unknown[][]
+}
+
+export interface AnalyzeFileRequest {
+  code: string
+  language: string
+  path?: string | null
+}
+
+export interface FunctionAnalysis {
+  name: string
+  line: number
+  end_line: number
+  impact: 'high' | 'medium' | 'low' | null
+  analysis: PlaygroundAnalysis
+}
+
+export interface FileFinding extends CodeFinding {
+  path: string | null
+  function: string
+  speedup: number
+}
+
+export interface FileAnalysis {
+  path: string | null
+  functions: FunctionAnalysis[]
+  findings: FileFinding[]
+}
+
+export interface FilesAnalysis {
+  files: FileAnalysis[]
+  findings: FileFinding[]
+}
+
+export interface AnalyzeProfileRequest {
+  profile: string // collapsed stacks, or a base64 pstats dump
+  format?: 'collapsed' | 'pstats'
+  sample_rate_hz?: number
+  files: AnalyzeFileRequest[]
+  top_n?: number
+}
+
+export interface HotFunctionAnalysis {
+  path: string | null
+  function: FunctionAnalysis
+  self_time: number
+  self_percent: number
+  calls: number | null
+  estimated_savings: number
+  estimated_savings_percent: number
+}
+
+export interface AnnotateRequest {
+  code: string
+  language: string
+}
+
+export interface LineCost {
+  line: number
+  count: string // e.g. "n", "n²", "n·m", "n log n", "2ⁿ"
+  depth: number
+  heat: number // 0 to 1
+}
+
+export interface AllocationSite {
+  line: number
+  col: number
+  kind: 'list' | 'dict' | 'set' | 'comprehension' | 'copy' | 'slice' | 'string-concat'
+  count: string
+  hot: boolean
+}
+
+export interface SizeSymbol {
+  symbol: string
+  expression: string
+  function: string | null
+}
+
+export interface LineAnnotations {
+  complexity: {
+    time: string
+    space: string
+  }
+  lines: LineCost[]
+  allocations: AllocationSite[]
+  sizes: SizeSymbol[]
+}
+
+export interface UnmatchedFrame {
+  file: string
+  line: number | null
+  function: string
+  self_time: number
+  self_percent: number
+}
+
+export interface ProfileAnalysis {
+  total_time: number
+  functions: HotFunctionAnalysis[]
+  estimated_savings: number
+  estimated_savings_percent: number
+  unmatched: UnmatchedFrame[]
 }
 
 // Badge metadata for UI
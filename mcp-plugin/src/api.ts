@@ -67,6 +67,20 @@ export async function searchCode(
   return response.data
 }
 
+export interface SearchRequest {
+  query: string
+  language?: string
+  category?: string
+  min_speedup?: number
+  limit?: number
+}
+
+// Many searches in one request (one batched embedding pass on the server)
+export async function searchCodeBatch(queries: SearchRequest[]): Promise<SearchResponse[]> {
+  const response = await api.post<{ results: SearchResponse[] }>('/search/batch', { queries })
+  return response.data.results
+}
+
 export async function getSolution(id: number): Promise<Solution> {
   const response = await api.get<Solution>(`/solutions/${id}`)
   return response.data